@@ -0,0 +1,93 @@
+"""
+Benchmark order throughput of the threaded and the asyncio order paths
+
+Sends the same market orders against the local stand-in exchange once from a
+thread pool of MarketOrders and once from a single event loop of
+AsyncMarketOrders, then runs OCOs and short TWAPs on the loop. With request
+latency the thread pool is capped at one request per thread, the event loop
+at the number of orders in flight.
+
+Usage:
+    uv run python -m benchmarks.bench_async --orders 1000 --latency-ms 50 --threads 16
+"""
+from src.bot import set_client_factory
+from src.async_bot import set_async_client_factory, close_async_client
+from src.sim_exchange import SimExchange, AsyncSimExchange
+from src.market_orders import MarketOrders
+from src.async_orders import AsyncMarketOrders, AsyncOCOOrders, AsyncTWAPOrders
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import logging
+import time
+
+
+def run_threads(orders, threads):
+    bot = MarketOrders()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda i: bot.place_buy_order('BTCUSDT', 0.001), range(orders)))
+    return sum(1 for r in results if r), time.perf_counter() - start
+
+
+async def run_async(adapter, orders, ocos, twaps):
+    market = await AsyncMarketOrders.create()
+    await market.get_current_price('BTCUSDT')  # Open the client before timing
+    start = time.perf_counter()
+    results = await asyncio.gather(*(market.place_buy_order('BTCUSDT', 0.001) for _ in range(orders)))
+    market_elapsed = time.perf_counter() - start
+    market_peak = adapter.peak_in_flight
+
+    oco_bot = await AsyncOCOOrders.create()
+    start = time.perf_counter()
+    placed = await asyncio.gather(*(oco_bot.place_oco_order('BTCUSDT', 0.001, 31000, 29000) for _ in range(ocos)))
+    oco_elapsed = time.perf_counter() - start
+
+    twap_bot = await AsyncTWAPOrders.create()
+    start = time.perf_counter()
+    configs = await asyncio.gather(*(twap_bot.place_twap_order('BTCUSDT', 0.01, 'BUY', 0.05, 5) for _ in range(twaps)))
+    statuses = await asyncio.gather(*(twap_bot.wait_twap(c['twap_id']) for c in configs if c))
+    twap_elapsed = time.perf_counter() - start
+    await close_async_client()
+    return {
+        'filled': sum(1 for r in results if r),
+        'market_elapsed': market_elapsed,
+        'market_peak': market_peak,
+        'ocos': sum(1 for p in placed if p),
+        'oco_elapsed': oco_elapsed,
+        'twaps': sum(1 for s in statuses if s and s['status'] == 'COMPLETED'),
+        'twap_chunks': sum(s['chunks_executed'] for s in statuses if s),
+        'twap_elapsed': twap_elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs asyncio order throughput benchmark")
+    parser.add_argument('--orders', type=int, default=1000, help='Market orders per run')
+    parser.add_argument('--threads', type=int, default=16, help='Thread pool size of the threaded run')
+    parser.add_argument('--ocos', type=int, default=200, help='OCOs placed at once on the event loop')
+    parser.add_argument('--twaps', type=int, default=100, help='TWAPs (5 chunks over 3 s) run at once on the event loop')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Median REST latency of the stand-in exchange')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    latency = (args.latency_ms, 0.3) if args.latency_ms else None
+    sim = SimExchange(latency_ms=latency, seed=args.seed, publish_to_bus=False)
+    set_client_factory(sim.as_client)
+    adapter = AsyncSimExchange(sim)
+    set_async_client_factory(adapter.as_client)
+
+    filled, thread_elapsed = run_threads(args.orders, args.threads)
+    stats = asyncio.run(run_async(adapter, args.orders, args.ocos, args.twaps))
+
+    print(f"REST latency:     {args.latency_ms} ms median")
+    print(f"Threads ({args.threads:>3}):    {filled}/{args.orders} orders in {thread_elapsed:.3f} s, {filled / thread_elapsed:,.0f} orders/s")
+    print(f"Event loop:       {stats['filled']}/{args.orders} orders in {stats['market_elapsed']:.3f} s, "
+          f"{stats['filled'] / stats['market_elapsed']:,.0f} orders/s, {stats['market_peak']} requests in flight at peak")
+    print(f"OCOs:             {stats['ocos']}/{args.ocos} placed in {stats['oco_elapsed']:.3f} s")
+    print(f"TWAPs:            {stats['twaps']}/{args.twaps} completed, {stats['twap_chunks']} chunks in {stats['twap_elapsed']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
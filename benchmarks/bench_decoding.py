@@ -0,0 +1,148 @@
+"""
+Benchmark exchange payload decoding: plain dicts vs the typed models
+
+Compares, for synthetic exchange-info, account and order payloads shaped like
+the Binance futures responses:
+  dict     json.loads of the whole payload (what python-binance returns)
+  models   json.loads, then conversion to the slots models
+  msgspec  typed decoding of only the used fields (needs msgspec installed)
+Reports parse time and the memory retained by the decoded result.
+
+Usage:
+    uv run python -m benchmarks.bench_decoding --symbols 350 --repeat 50
+"""
+from src.models import Order, ExchangeInfo, Account, decode_exchange_info, decode_account, msgspec
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+
+def exchange_info_payload(num_symbols, rng):
+    symbols = []
+    for i in range(num_symbols):
+        name = f"SYM{i}USDT"
+        symbols.append({
+            'symbol': name, 'pair': name, 'contractType': 'PERPETUAL', 'deliveryDate': 4133404800000,
+            'onboardDate': 1569398400000, 'status': 'TRADING', 'maintMarginPercent': '2.5000',
+            'requiredMarginPercent': '5.0000', 'baseAsset': f"SYM{i}", 'quoteAsset': 'USDT', 'marginAsset': 'USDT',
+            'pricePrecision': 2, 'quantityPrecision': 3, 'baseAssetPrecision': 8, 'quotePrecision': 8,
+            'underlyingType': 'COIN', 'underlyingSubType': ['PoW'], 'settlePlan': 0, 'triggerProtect': '0.0500',
+            'liquidationFee': '0.012500', 'marketTakeBound': '0.05',
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': '0.10', 'maxPrice': '4529764', 'tickSize': rng.choice(['0.10', '0.01', '0.0001'])},
+                {'filterType': 'LOT_SIZE', 'minQty': '0.001', 'maxQty': '1000', 'stepSize': rng.choice(['0.001', '0.1', '1'])},
+                {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.001', 'maxQty': '120', 'stepSize': '0.001'},
+                {'filterType': 'MAX_NUM_ORDERS', 'limit': 200},
+                {'filterType': 'MAX_NUM_ALGO_ORDERS', 'limit': 10},
+                {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+                {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500', 'multiplierDecimal': '4'}
+            ],
+            'orderTypes': ['LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET', 'TRAILING_STOP_MARKET'],
+            'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX', 'GTD']
+        })
+    return {
+        'timezone': 'UTC', 'serverTime': 1753674917000, 'futuresType': 'U_MARGINED',
+        'rateLimits': [{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 2400}],
+        'exchangeFilters': [], 'assets': [{'asset': 'USDT', 'marginAvailable': True, 'autoAssetExchange': '-10000'}],
+        'symbols': symbols
+    }
+
+
+def account_payload(num_symbols, rng):
+    positions = []
+    for i in range(num_symbols):
+        open_position = rng.random() < 0.02
+        positions.append({
+            'symbol': f"SYM{i}USDT", 'positionSide': 'BOTH',
+            'positionAmt': f"{rng.uniform(-5, 5):.3f}" if open_position else '0.000',
+            'unrealizedProfit': f"{rng.uniform(-100, 100):.8f}" if open_position else '0.00000000',
+            'isolatedMargin': '0', 'notional': '0', 'isolatedWallet': '0', 'initialMargin': '0',
+            'maintMargin': '0', 'updateTime': 0, 'entryPrice': f"{rng.uniform(1, 50000):.2f}" if open_position else '0.0'
+        })
+    assets = [{
+        'asset': asset, 'walletBalance': '1000.00000000', 'unrealizedProfit': '0.00000000', 'marginBalance': '1000.00000000',
+        'maintMargin': '0.00000000', 'initialMargin': '0.00000000', 'positionInitialMargin': '0.00000000',
+        'openOrderInitialMargin': '0.00000000', 'crossWalletBalance': '1000.00000000', 'crossUnPnl': '0.00000000',
+        'availableBalance': '1000.00000000', 'maxWithdrawAmount': '1000.00000000', 'updateTime': 0
+    } for asset in ('USDT', 'USDC', 'BTC', 'ETH', 'BNB', 'FDUSD')]
+    return {
+        'totalInitialMargin': '0.00000000', 'totalMaintMargin': '0.00000000', 'totalWalletBalance': '6000.00000000',
+        'totalUnrealizedProfit': '0.00000000', 'totalMarginBalance': '6000.00000000', 'totalPositionInitialMargin': '0.00000000',
+        'totalOpenOrderInitialMargin': '0.00000000', 'totalCrossWalletBalance': '6000.00000000', 'totalCrossUnPnl': '0.00000000',
+        'availableBalance': '6000.00000000', 'maxWithdrawAmount': '6000.00000000', 'assets': assets, 'positions': positions
+    }
+
+
+def order_payload(order_id):
+    return {
+        'orderId': order_id, 'symbol': 'BTCUSDT', 'status': 'FILLED', 'clientOrderId': f"TWAP_1753674917.{order_id}",
+        'price': '0.00', 'avgPrice': '30012.40000', 'origQty': '0.010', 'executedQty': '0.010', 'cumQty': '0.010',
+        'cumQuote': '300.12400', 'timeInForce': 'GTC', 'type': 'MARKET', 'reduceOnly': False, 'closePosition': False,
+        'side': 'BUY', 'positionSide': 'BOTH', 'stopPrice': '0.00', 'workingType': 'CONTRACT_PRICE', 'priceProtect': False,
+        'origType': 'MARKET', 'priceMatch': 'NONE', 'selfTradePreventionMode': 'NONE', 'goodTillDate': 0, 'updateTime': 1753674917123
+    }
+
+
+def measure(decode, raw, repeat):
+    """(mean milliseconds per decode, KB retained by one decoded result)"""
+    decode(raw)  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(raw)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    tracemalloc.start()
+    result = decode(raw)
+    retained = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exchange payload decoding benchmark")
+    parser.add_argument('--symbols', type=int, default=350, help='Symbols in the exchange-info and account payloads')
+    parser.add_argument('--orders', type=int, default=1000, help='Order responses for the per-order comparison')
+    parser.add_argument('--repeat', type=int, default=50, help='Decodes per measurement')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    exchange_raw = json.dumps(exchange_info_payload(args.symbols, rng)).encode()
+    account_raw = json.dumps(account_payload(args.symbols, rng)).encode()
+    orders_raw = json.dumps([order_payload(i) for i in range(args.orders)]).encode()
+
+    cases = [
+        (f"exchange info ({len(exchange_raw) / 1024:.0f} KB)", exchange_raw, [
+            ('dict', json.loads),
+            ('models', lambda raw: ExchangeInfo.from_dict(json.loads(raw))),
+            ('msgspec', decode_exchange_info if msgspec else None)
+        ]),
+        (f"account ({len(account_raw) / 1024:.0f} KB)", account_raw, [
+            ('dict', json.loads),
+            ('models', lambda raw: Account.from_dict(json.loads(raw))),
+            ('msgspec', decode_account if msgspec else None)
+        ]),
+        (f"{args.orders} order responses ({len(orders_raw) / 1024:.0f} KB)", orders_raw, [
+            ('dict', json.loads),
+            ('models', lambda raw: [Order.from_dict(o) for o in json.loads(raw)]),
+            ('msgspec', None)
+        ])
+    ]
+
+    print(f"{'Payload':<34} {'Path':<9} {'Parse ms':>10} {'Retained KB':>12}")
+    print("-" * 68)
+    for name, raw, paths in cases:
+        for path, decode in paths:
+            if decode is None:
+                continue
+            elapsed, retained = measure(decode, raw, args.repeat)
+            print(f"{name:<34} {path:<9} {elapsed:>10.3f} {retained:>12.1f}")
+        print("-" * 68)
+    if not msgspec:
+        print("msgspec is not installed, typed fast path skipped (pip install msgspec)")
+
+
+if __name__ == "__main__":
+    main()
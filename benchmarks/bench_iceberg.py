@@ -0,0 +1,63 @@
+"""
+Benchmark iceberg refill latency against the local stand-in exchange
+
+Refill latency is the time from the slice fill event on the order event bus to
+the acknowledgement of the next slice.
+
+Usage:
+    uv run python -m benchmarks.bench_iceberg --icebergs 20 --slices 50 --latency-ms 5
+"""
+from src.bot import set_client_factory
+from src.sim_exchange import SimExchange
+from src.advanced.iceberg import IcebergOrders
+import argparse
+import logging
+import random
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iceberg refill latency benchmark")
+    parser.add_argument('--icebergs', type=int, default=20, help='Concurrent iceberg orders')
+    parser.add_argument('--slices', type=int, default=50, help='Slices per iceberg')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Median REST latency of the stand-in exchange')
+    parser.add_argument('--stream-latency-ms', type=float, default=0, help='Median user-data stream delay')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    latency = (args.latency_ms, 0.3) if args.latency_ms else None
+    stream_latency = (args.stream_latency_ms, 0.3) if args.stream_latency_ms else None
+    sim = SimExchange(latency_ms=latency, stream_latency_ms=stream_latency, seed=args.seed)
+    set_client_factory(sim.as_client)
+
+    iceberg_orders = IcebergOrders()
+    iceberg_orders.use_user_stream = False  # The stand-in publishes fills into the bus
+    visible = 0.01
+    for i in range(args.icebergs):
+        iceberg_orders.place_iceberg_order('BTCUSDT', 'BUY' if i % 2 == 0 else 'SELL', visible * args.slices, visible, 29000 if i % 2 == 0 else 31000)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    while iceberg_orders.get_active_iceberg_orders():
+        resting = sim.open_orders()
+        if resting:
+            sim.fill(rng.choice(resting)['orderId'])
+        else:
+            time.sleep(0.0005)
+    elapsed = time.perf_counter() - start
+
+    stats = iceberg_orders.get_refill_latency_stats()
+    print(f"Icebergs:        {args.icebergs}")
+    print(f"Slices each:     {args.slices}")
+    print(f"REST latency:    {args.latency_ms} ms median")
+    print(f"Elapsed:         {elapsed:.3f} s")
+    print(f"Refills:         {stats['count']}")
+    print(f"Refill p50:      {stats['p50_ms']:.3f} ms")
+    print(f"Refill p90:      {stats['p90_ms']:.3f} ms")
+    print(f"Refill p99:      {stats['p99_ms']:.3f} ms")
+    print(f"Refill max:      {stats['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
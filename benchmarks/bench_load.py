@@ -0,0 +1,447 @@
+"""
+Load-test concurrent TWAP, OCO and bracket workloads in one bot process
+
+Runs increasing numbers of each workload against the local stand-in exchange
+with log-normal REST and user-data stream latency, and a connection limit so
+requests queue like they do on a real HTTP pool. Every level gets a fresh
+exchange; fills of the OCO and bracket legs are scripted at seeded times, so
+two runs with the same arguments drive the same workload.
+
+Per level it reports:
+  - TWAP wake lateness: how late each chunk was sent after its interval
+    elapsed (thread scheduling and GIL contention), and the schedule drift
+    of the last chunk
+  - OCO reaction: leg fill to sibling cancel at the exchange, through the
+    periodic reconcile_oco_orders loop
+  - Bracket protect / reaction: entry fill to both legs resting, and leg
+    fill to sibling cancel, through the event-driven dispatcher
+  - Request queueing for a connection, CPU, RSS and thread count
+
+A level is saturated when a p99 crosses its limit or work is lost; the
+first saturated level is where capacity ends. Write results with --out and
+check a later build against them with --compare.
+
+Usage:
+    uv run python -m benchmarks.bench_load --levels 1,2,4,8,16,32 --duration 10
+    uv run python -m benchmarks.bench_load --levels 8,16,32,64 --latency-ms 40 --max-inflight 10 --out load.json
+    uv run python -m benchmarks.bench_load --levels 8,16,32,64 --latency-ms 40 --max-inflight 10 --compare load.json
+"""
+from src.bot import set_client_factory
+from src.sim_exchange import SimExchange
+from src.events import order_events
+from src.advanced.twa import TWAPOrders
+from src.advanced.oco import OCOOrders
+from src.advanced.bracket import BracketOrders
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import heapq
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import threading
+import time
+
+import numpy as np
+
+SAMPLE_SECONDS = 0.1  # Resource sampling period
+LEG_RETRY_SECONDS = 0.005  # Retry of a scripted leg fill whose leg is not resting yet
+
+
+class LoadSimExchange(SimExchange):
+    """
+    Stand-in exchange that timestamps order state changes and limits concurrent requests
+
+    At most max_inflight requests are on the wire at once, the rest wait for
+    a connection and that wait is recorded.
+    """
+    def __init__(self, max_inflight=None, **kwargs):
+        self.times = {}  # (orderId, execution type) -> perf_counter of the first occurrence
+        self.queue_waits = []
+        self._slots = threading.BoundedSemaphore(max_inflight) if max_inflight else None
+        super().__init__(**kwargs)
+
+    def _request(self):
+        if self._slots is None:
+            return super()._request()
+        queued = time.perf_counter()
+        with self._slots:
+            self.queue_waits.append(time.perf_counter() - queued)
+            super()._request()
+
+    def _emit(self, order, execution_type, last_qty=0.0, last_price=0.0):
+        self.times.setdefault((order['orderId'], execution_type), time.perf_counter())
+        super()._emit(order, execution_type, last_qty, last_price)
+
+    def resting_legs(self, prefix):
+        """Resting exit legs of a bracket, by order type"""
+        with self._lock:
+            return {o['type']: o for o in self.open_orders() if o['clientOrderId'].startswith(prefix) and o['type'] != 'LIMIT'}
+
+
+class ResourceSampler:
+    """Samples thread count and RSS in the background, CPU time over the whole window"""
+    def __init__(self):
+        self.threads = []
+        self.rss = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='load-sampler')
+
+    def start(self):
+        self._threads_before = threading.active_count()
+        self._rss_before = rss_bytes()
+        self._cpu_before = cpu_seconds()
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self.threads.append(threading.active_count())
+            self.rss.append(rss_bytes())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        wall = time.perf_counter() - self._start
+        rss = [r for r in self.rss if r] or [self._rss_before or 0]
+        return {
+            'cpu_percent': (cpu_seconds() - self._cpu_before) / wall * 100,
+            'threads_peak': max(self.threads or [self._threads_before]),
+            'threads_added': max(self.threads or [self._threads_before]) - self._threads_before,
+            'rss_peak_mb': max(rss) / 2**20,
+            'rss_growth_mb': (rss[-1] - (self._rss_before or rss[0])) / 2**20
+        }
+
+
+def rss_bytes():
+    """Current resident set size (Linux), None elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentiles(values_ms):
+    """count, p50, p99 and max of a list of milliseconds"""
+    if not len(values_ms):
+        return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = np.asarray(values_ms, dtype=float)
+    p50, p99 = np.percentile(values, [50, 99])
+    return {'count': len(values), 'p50_ms': float(p50), 'p99_ms': float(p99), 'max_ms': float(values.max())}
+
+
+def symbol_prices(count):
+    prices = {'BTCUSDT': 30000.0, 'ETHUSDT': 2000.0}
+    for i in range(max(0, count - len(prices))):
+        prices[f"SIM{i}USDT"] = 100.0
+    return dict(list(prices.items())[:max(1, count)])
+
+
+def script_fills(level, duration, rng):
+    """Seeded (seconds after start, kind, index, leg) fills of the OCO and bracket legs"""
+    script = []
+    for i in range(level):
+        script.append((rng.uniform(0.2, 0.8) * duration, 'oco', i, rng.choice(['take_profit', 'stop_loss'])))
+        entry_at = rng.uniform(0.1, 0.5) * duration
+        script.append((entry_at, 'entry', i, None))
+        script.append((entry_at + rng.uniform(0.1, 0.3) * duration, 'exit', i, rng.choice(['TAKE_PROFIT', 'STOP'])))
+    heapq.heapify(script)
+    return script
+
+
+def drive_fills(sim, script, start, ocos, brackets, stop_event):
+    """Fill the scripted legs on time, returns how many exit fills had to wait for their leg"""
+    waited = 0
+    while script and not stop_event.is_set():
+        due, kind, index, leg = script[0]
+        delay = start + due - time.perf_counter()
+        if delay > 0:
+            stop_event.wait(delay)
+            continue
+        heapq.heappop(script)
+        if kind == 'oco':
+            oco = ocos[index]
+            if oco:
+                sim.fill(oco[f"{leg}_order"]['orderId'])
+        elif kind == 'entry':
+            if brackets[index] and brackets[index].get('entry_order_id'):
+                sim.fill(brackets[index]['entry_order_id'])
+        elif brackets[index]:
+            legs = sim.resting_legs(f"{brackets[index]['bracket_id']}.")
+            if len(legs) < 2:
+                if brackets[index]['state'] not in ('ERROR', 'CANCELLED'):
+                    waited += 1
+                    heapq.heappush(script, (time.perf_counter() - start + LEG_RETRY_SECONDS, kind, index, leg))
+                continue
+            sim.fill(legs[leg]['orderId'])
+    return waited
+
+
+def reconcile_loop(oco_orders, interval, stop_event):
+    while not stop_event.wait(interval):
+        oco_orders.reconcile_oco_orders()
+
+
+def run_level(level, args, seed):
+    """Run level TWAPs, OCOs and brackets concurrently, returns the level's measurements"""
+    rng = random.Random(seed * 1000 + level)
+    prices = symbol_prices(args.symbols)
+    symbols = list(prices)
+    sim = LoadSimExchange(
+        max_inflight=args.max_inflight,
+        prices=prices,
+        latency_ms=(args.latency_ms, args.latency_sigma) if args.latency_ms else None,
+        stream_latency_ms=(args.stream_latency_ms, args.latency_sigma) if args.stream_latency_ms else None,
+        seed=seed * 1000 + level
+    )
+    set_client_factory(sim.as_client)
+    twap_orders, oco_orders, bracket_orders = TWAPOrders(), OCOOrders(), BracketOrders()
+    bracket_orders.use_user_stream = False  # The stand-in publishes fills into the bus
+    chunks = max(2, int(args.duration / args.chunk_interval))
+    script = script_fills(level, args.duration, rng)
+
+    sampler = ResourceSampler().start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.placers) as pool:
+        twap_futures = [
+            pool.submit(twap_orders.place_twap_order, symbols[i % len(symbols)], round(0.001 * chunks * 10, 3),
+                        'BUY' if i % 2 == 0 else 'SELL', args.duration / 60, chunks, 'MARKET')
+            for i in range(level)
+        ]
+        oco_futures, bracket_futures = [], []
+        for i in range(level):
+            symbol = symbols[i % len(symbols)]
+            price = prices[symbol]
+            oco_futures.append(pool.submit(oco_orders.place_oco_order, symbol, 0.01,
+                                           round(price * 1.05, 1), round(price * 0.95, 1), 'SELL'))
+            bracket_futures.append(pool.submit(bracket_orders.place_bracket_order, symbol, 0.01, round(price * 0.99, 1),
+                                               round(price * 0.95, 1), round(price * 1.05, 1), 'BUY'))
+        twaps = [f.result() for f in twap_futures]
+        ocos = [f.result() for f in oco_futures]
+        brackets = [f.result() for f in bracket_futures]
+    placement_seconds = time.perf_counter() - start
+
+    stop_event = threading.Event()
+    reconciler = threading.Thread(target=reconcile_loop, args=(oco_orders, args.reconcile_seconds, stop_event), daemon=True)
+    reconciler.start()
+    leg_waits = drive_fills(sim, script, start, ocos, brackets, stop_event)
+
+    # Let the TWAPs finish and the last reactions come in
+    deadline = time.perf_counter() + args.duration + args.reconcile_seconds * 2 + 5
+    def settled():
+        return (all(t is None or t['status'] != 'ACTIVE' for t in twaps)
+                and not oco_orders.active_oco_orders
+                and all(b is None or b['state'] in ('CLOSED', 'CANCELLED', 'ERROR') for b in brackets))
+    while not settled() and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    reconciler.join()
+    bracket_orders._stop.set()
+    order_events.unsubscribe(bracket_orders._subscription.name)
+    resources = sampler.stop()
+    for twap in twaps:
+        if twap and twap['status'] == 'ACTIVE':
+            twap['stop_event'].set()
+
+    # TWAP: each chunk after the first should go out interval seconds after the previous one returned
+    lateness, drift, chunks_missed = [], [], 0
+    for twap in twaps:
+        if twap is None:
+            chunks_missed += chunks
+            continue
+        ledger = twap['ledger']
+        submitted, returned = np.array(ledger.submitted), np.array(ledger.filled)
+        interval = twap['interval_seconds']
+        lateness.extend((submitted[1:] - returned[:-1] - interval) * 1000)
+        if len(submitted):
+            drift.append((submitted[-1] - submitted[0] - (len(submitted) - 1) * interval) * 1000)
+        chunks_missed += twap['num_chunks'] - twap['chunks_executed']
+
+    # Reactions, from the exchange's own timestamps
+    oco_reaction, oco_unreacted = [], 0
+    for oco in ocos:
+        if oco is None:
+            oco_unreacted += 1
+            continue
+        legs = [oco['take_profit_order']['orderId'], oco['stop_loss_order']['orderId']]
+        filled = [leg for leg in legs if (leg, 'TRADE') in sim.times]
+        if not filled:
+            oco_unreacted += 1
+            continue
+        sibling = legs[1 - legs.index(filled[0])]
+        cancelled = sim.times.get((sibling, 'CANCELED'))
+        if cancelled is None:
+            oco_unreacted += 1
+        else:
+            oco_reaction.append((cancelled - sim.times[(filled[0], 'TRADE')]) * 1000)
+
+    protect, bracket_reaction, bracket_unreacted = [], [], 0
+    orders_by_bracket = {}
+    for order in sim.orders.values():
+        orders_by_bracket.setdefault(order['clientOrderId'].split('.')[0], []).append(order)
+    for bracket in brackets:
+        if bracket is None:
+            bracket_unreacted += 1
+            continue
+        orders = orders_by_bracket.get(bracket['bracket_id'], [])
+        entry_filled = sim.times.get((bracket.get('entry_order_id'), 'TRADE'))
+        legs = [o for o in orders if o['type'] != 'LIMIT']
+        if entry_filled and len(legs) >= 2:
+            protect.append((max(sim.times[(o['orderId'], 'NEW')] for o in legs[:2]) - entry_filled) * 1000)
+        exits = [o for o in legs if (o['orderId'], 'TRADE') in sim.times]
+        siblings = [o for o in legs if (o['orderId'], 'CANCELED') in sim.times]
+        if exits and siblings:
+            bracket_reaction.append((sim.times[(siblings[0]['orderId'], 'CANCELED')] - sim.times[(exits[0]['orderId'], 'TRADE')]) * 1000)
+        else:
+            bracket_unreacted += 1
+
+    result = {
+        'level': level,
+        'elapsed_seconds': elapsed,
+        'placement_seconds': placement_seconds,
+        'requests': sim.request_count,
+        'requests_per_second': sim.request_count / elapsed,
+        'queue_wait': percentiles(np.array(sim.queue_waits) * 1000),
+        'twap_lateness': percentiles(lateness),
+        'twap_drift': percentiles(drift),
+        'twap_chunks_missed': chunks_missed,
+        'oco_reaction': percentiles(oco_reaction),
+        'oco_unreacted': oco_unreacted,
+        'bracket_protect': percentiles(protect),
+        'bracket_reaction': percentiles(bracket_reaction),
+        'bracket_unreacted': bracket_unreacted,
+        'bracket_leg_waits': leg_waits,
+        **resources
+    }
+    result['saturated'] = saturation_reasons(result, args)
+    return result
+
+
+def saturation_reasons(result, args):
+    """Limits a level crossed, empty when it kept up"""
+    limits = [
+        ('twap_lateness', args.max_lateness_ms),
+        ('queue_wait', args.max_queue_ms),
+        ('bracket_protect', args.max_reaction_ms),
+        ('bracket_reaction', args.max_reaction_ms),
+        # The reconcile loop only looks every reconcile_seconds
+        ('oco_reaction', args.reconcile_seconds * 1000 + args.max_reaction_ms),
+    ]
+    reasons = [f"{name} p99 {result[name]['p99_ms']:.1f} ms > {limit:g} ms"
+               for name, limit in limits if result[name]['p99_ms'] is not None and result[name]['p99_ms'] > limit]
+    for name in ('twap_chunks_missed', 'oco_unreacted', 'bracket_unreacted'):
+        if result[name]:
+            reasons.append(f"{name} {result[name]}")
+    return reasons
+
+
+def fmt(value, width, precision=1):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{precision}f}"
+
+
+def report(results):
+    print(f"{'Level':>5} {'Req/s':>7} {'Queue99':>8} {'TWAPlate50':>10} {'TWAPlate99':>10} {'Drift99':>8} "
+          f"{'OCO50':>8} {'OCO99':>8} {'Prot99':>8} {'Brk99':>8} {'CPU%':>6} {'Thr':>5} {'RSS MB':>7}  Saturated")
+    print("-" * 130)
+    for r in results:
+        print(f"{r['level']:>5} {r['requests_per_second']:>7.0f} {fmt(r['queue_wait']['p99_ms'], 8)} "
+              f"{fmt(r['twap_lateness']['p50_ms'], 10, 2)} {fmt(r['twap_lateness']['p99_ms'], 10, 2)} {fmt(r['twap_drift']['p99_ms'], 8)} "
+              f"{fmt(r['oco_reaction']['p50_ms'], 8)} {fmt(r['oco_reaction']['p99_ms'], 8)} "
+              f"{fmt(r['bracket_protect']['p99_ms'], 8)} {fmt(r['bracket_reaction']['p99_ms'], 8)} "
+              f"{r['cpu_percent']:>6.0f} {r['threads_peak']:>5} {r['rss_peak_mb']:>7.1f}  {'; '.join(r['saturated']) or 'no'}")
+    print("Latencies in ms. Level N runs N TWAPs, N OCOs and N brackets at once.")
+
+
+def compare(results, baseline_path):
+    """Print the change of the p99s against a saved run, per level both ran"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline['config'] != config_key(results['config']):
+        print(f"Note: {baseline_path} was run with different settings, deltas are not like for like")
+    before = {r['level']: r for r in baseline['levels']}
+    print(f"\nChange vs {baseline_path} (p99 ms, + is slower)")
+    print(f"{'Level':>5} {'TWAPlate99':>11} {'OCO99':>9} {'Brk99':>9} {'Queue99':>9} {'CPU%':>7}")
+    for r in results['levels']:
+        b = before.get(r['level'])
+        if b is None:
+            continue
+        def delta(name):
+            now, then = r[name]['p99_ms'], b[name]['p99_ms']
+            return f"{now - then:>+9.1f}" if now is not None and then is not None else f"{'-':>9}"
+        print(f"{r['level']:>5} {delta('twap_lateness'):>11} {delta('oco_reaction')} {delta('bracket_reaction')} "
+              f"{delta('queue_wait')} {r['cpu_percent'] - b['cpu_percent']:>+7.0f}")
+    print(f"Saturation: {baseline['saturation_level']} -> {results['saturation_level']}")
+
+
+def config_key(config):
+    """Settings that change the workload, compared between runs"""
+    return {k: v for k, v in config.items() if k not in ('levels', 'out', 'compare', 'keep_going')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent TWAP/OCO/bracket load test")
+    parser.add_argument('--levels', type=str, default='1,2,4,8,16,32', help='Comma-separated concurrency levels: N of each workload')
+    parser.add_argument('--duration', type=float, default=10, help='TWAP duration and fill window per level, seconds')
+    parser.add_argument('--chunk-interval', type=float, default=0.5, help='Seconds between TWAP chunks')
+    parser.add_argument('--symbols', type=int, default=4, help='Symbols the workloads are spread over')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Median REST latency of the stand-in exchange, 0 for none')
+    parser.add_argument('--stream-latency-ms', type=float, default=5, help='Median user-data stream delay, 0 for none')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Sigma of the log-normal latencies')
+    parser.add_argument('--max-inflight', type=int, default=10, help='Requests on the wire at once, like an HTTP connection pool, 0 for no limit')
+    parser.add_argument('--placers', type=int, default=16, help='Threads placing the workloads at the start of a level')
+    parser.add_argument('--reconcile-seconds', type=float, default=1.0, help='Period of the OCO reconcile loop')
+    parser.add_argument('--max-lateness-ms', type=float, default=50, help='TWAP chunk lateness p99 beyond which a level is saturated')
+    parser.add_argument('--max-queue-ms', type=float, default=50, help='Connection wait p99 beyond which a level is saturated')
+    parser.add_argument('--max-reaction-ms', type=float, default=250, help='Bracket reaction p99 (and OCO on top of the reconcile period) beyond which a level is saturated')
+    parser.add_argument('--keep-going', action='store_true', help='Run the remaining levels after the first saturated one')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    parser.add_argument('--out', type=str, help='Write the results as JSON')
+    parser.add_argument('--compare', type=str, metavar='BASELINE', help='Show the change against a JSON file written with --out')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)  # Lost work is counted, not logged
+    levels = [int(level) for level in args.levels.split(',')]
+    print(f"Stand-in exchange: REST {args.latency_ms} ms, stream {args.stream_latency_ms} ms median (sigma {args.latency_sigma}), "
+          f"{args.max_inflight or 'unlimited'} connections; {args.duration:g}s per level, seed {args.seed}")
+
+    results = []
+    for level in levels:
+        result = run_level(level, args, args.seed)
+        results.append(result)
+        print(f"  level {level}: {result['requests']} requests in {result['elapsed_seconds']:.1f}s"
+              f"{', saturated' if result['saturated'] else ''}", flush=True)
+        if result['saturated'] and not args.keep_going:
+            break
+
+    saturated = next((r for r in results if r['saturated']), None)
+    output = {
+        'config': config_key(vars(args)),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'levels': results,
+        'saturation_level': saturated['level'] if saturated else None
+    }
+    print()
+    report(results)
+    if saturated:
+        print(f"Saturation starts at level {saturated['level']}: {'; '.join(saturated['saturated'])}")
+    else:
+        print(f"No saturation up to level {results[-1]['level']}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(output, f, indent=2)
+    if args.compare:
+        compare(output, args.compare)
+
+
+if __name__ == "__main__":
+    main()
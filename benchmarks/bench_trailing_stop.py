@@ -0,0 +1,100 @@
+"""
+Benchmark the trailing-stop engine against a replayed tick file
+
+Usage:
+    uv run python -m benchmarks.bench_trailing_stop --stops 50000 --ticks 200000
+    uv run python -m benchmarks.bench_trailing_stop --tick-file ticks.csv --stops 20000
+    uv run python -m benchmarks.bench_trailing_stop --stops 2000 --ticks 20000 --naive
+"""
+from src.advanced.trailing_stop import TrailingStopEngine
+from src.streams import replay_tick_file
+import argparse
+import random
+import time
+
+
+def generate_ticks(path, symbol, num_ticks, seed, start_price=30000.0):
+    """Write a random-walk tick file in the replay format"""
+    rng = random.Random(seed)
+    price = start_price
+    ts = 1_700_000_000_000
+    with open(path, 'w') as f:
+        f.write("timestamp_ms,symbol,price,quantity\n")
+        for _ in range(num_ticks):
+            price *= 1 + rng.gauss(0, 0.0004)
+            ts += rng.randint(1, 200)
+            f.write(f"{ts},{symbol},{price:.2f},{rng.random():.3f}\n")
+
+
+class NaiveEngine:
+    """Scan-every-stop baseline with the same interface as TrailingStopEngine"""
+    def __init__(self):
+        self.stops = {}
+
+    def add_stop(self, stop_id, symbol, side, callback_rate, reference_price):
+        self.stops[stop_id] = [symbol, side, callback_rate, reference_price]
+
+    def on_price(self, symbol, price):
+        fired = []
+        for stop_id, stop in self.stops.items():
+            if stop[0] != symbol:
+                continue
+            if stop[1] == 'SELL':
+                stop[3] = max(stop[3], price)
+                if price <= stop[3] * (1 - stop[2]):
+                    fired.append(stop_id)
+            else:
+                stop[3] = min(stop[3], price)
+                if price >= stop[3] * (1 + stop[2]):
+                    fired.append(stop_id)
+        for stop_id in fired:
+            del self.stops[stop_id]
+        return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trailing-stop engine benchmark")
+    parser.add_argument('--stops', type=int, default=20000, help='Concurrent trailing stops')
+    parser.add_argument('--ticks', type=int, default=200000, help='Ticks to generate when no tick file is given')
+    parser.add_argument('--tick-file', type=str, help='Tick file to replay (timestamp_ms,symbol,price[,quantity])')
+    parser.add_argument('--symbol', type=str, default='BTCUSDT', help='Symbol for generated ticks')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    parser.add_argument('--naive', action='store_true', help='Benchmark the linear-scan baseline instead')
+    args = parser.parse_args()
+
+    tick_file = args.tick_file
+    if not tick_file:
+        tick_file = f"/tmp/ticks_{args.symbol}_{args.ticks}_{args.seed}.csv"
+        generate_ticks(tick_file, args.symbol, args.ticks, args.seed)
+
+    with open(tick_file) as f:
+        f.readline()
+        first = f.readline().split(',')
+    symbol, start_price = first[1], float(first[2])
+
+    engine = NaiveEngine() if args.naive else TrailingStopEngine()
+    rng = random.Random(args.seed)
+    for stop_id in range(args.stops):
+        side = 'SELL' if stop_id % 2 == 0 else 'BUY'
+        engine.add_stop(stop_id, symbol, side, rng.uniform(0.002, 0.05), start_price)
+
+    fired = 0
+    def on_tick(tick_symbol, price, quantity, ts):
+        nonlocal fired
+        fired += len(engine.on_price(tick_symbol, price))
+
+    start = time.perf_counter()
+    ticks = replay_tick_file(tick_file, on_tick)
+    elapsed = time.perf_counter() - start
+
+    print(f"Engine:          {'naive scan' if args.naive else 'heap-indexed'}")
+    print(f"Stops:           {args.stops}")
+    print(f"Ticks:           {ticks}")
+    print(f"Stops fired:     {fired}")
+    print(f"Elapsed:         {elapsed:.3f} s")
+    print(f"Throughput:      {ticks / elapsed:,.0f} ticks/s")
+    print(f"Per tick:        {elapsed / ticks * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
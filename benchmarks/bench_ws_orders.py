@@ -0,0 +1,93 @@
+"""
+Benchmark per-order latency of REST and WebSocket API order entry
+
+Places and cancels resting limit orders one at a time, first with the
+python-binance REST client, then through WsOrderGateway, and reports the
+round-trip latency percentiles of each path. By default both go to the local
+stand-in exchange served over HTTP and WebSocket, so the difference is the
+protocol overhead; with --live they go to the futures testnet (API keys from
+.env), with limit orders placed far below the market.
+
+Usage:
+    uv run python -m benchmarks.bench_ws_orders --orders 500
+    uv run python -m benchmarks.bench_ws_orders --orders 50 --live
+"""
+from src.bot import create_binance_client
+from src.sim_exchange import SimExchange
+from src.sim_server import SimExchangeServer
+from src.ws_gateway import WsOrderGateway, WS_API_URL
+import argparse
+import logging
+import time
+
+import numpy as np
+
+
+def run(client, symbol, price, quantity, orders):
+    """Place-then-cancel orders one at a time, returns (place, cancel) latencies in ms"""
+    place, cancel = [], []
+    for _ in range(orders):
+        start = time.perf_counter()
+        order = client.futures_create_order(symbol=symbol, side='BUY', type='LIMIT', timeInForce='GTC', quantity=quantity, price=price)
+        placed = time.perf_counter()
+        client.futures_cancel_order(symbol=symbol, orderId=order['orderId'])
+        place.append((placed - start) * 1000)
+        cancel.append((time.perf_counter() - placed) * 1000)
+    return np.array(place), np.array(cancel)
+
+
+def report(name, latencies):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    print(f"{name:<16} {latencies.mean():>9.3f} {p50:>9.3f} {p90:>9.3f} {p99:>9.3f} {latencies.max():>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="REST vs WebSocket API order latency benchmark")
+    parser.add_argument('--orders', type=int, default=500, help='Orders placed and cancelled per path')
+    parser.add_argument('--symbol', type=str, default='BTCUSDT', help='Symbol to trade')
+    parser.add_argument('--quantity', type=float, default=0.001, help='Order quantity')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Median latency of the stand-in exchange')
+    parser.add_argument('--live', action='store_true', help='Run against the futures testnet instead of the stand-in')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = None
+    if args.live:
+        rest = create_binance_client()
+        gateway = WsOrderGateway(WS_API_URL).start()
+        # Far enough below the market that the orders rest until cancelled
+        price = round(float(rest.futures_symbol_ticker(symbol=args.symbol)['price']) * 0.8, 1)
+    else:
+        sim = SimExchange(prices={args.symbol: 30000.0}, latency_ms=(args.latency_ms, 0.3) if args.latency_ms else None,
+                          seed=args.seed, publish_to_bus=False)
+        server = SimExchangeServer(sim, api_secret='sim').start()
+        rest = server.rest_client(api_secret='sim')
+        gateway = WsOrderGateway(server.ws_url, api_key='sim', api_secret='sim').start()
+        price = 29000.0
+    ws = gateway.wrap(rest)
+
+    try:
+        # Warm up both connections
+        run(rest, args.symbol, price, args.quantity, 5)
+        run(ws, args.symbol, price, args.quantity, 5)
+        rest_place, rest_cancel = run(rest, args.symbol, price, args.quantity, args.orders)
+        ws_place, ws_cancel = run(ws, args.symbol, price, args.quantity, args.orders)
+    finally:
+        gateway.stop()
+        if server:
+            server.stop()
+
+    print(f"{'live testnet' if args.live else 'local stand-in'}, {args.orders} orders per path, latencies in ms")
+    print(f"{'Path':<16} {'Mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'Max':>9}")
+    print("-" * 66)
+    report('REST place', rest_place)
+    report('WS-API place', ws_place)
+    report('REST cancel', rest_cancel)
+    report('WS-API cancel', ws_cancel)
+    print(f"WS-API p50 saving: place {np.median(rest_place) - np.median(ws_place):.3f} ms, "
+          f"cancel {np.median(rest_cancel) - np.median(ws_cancel):.3f} ms; {gateway.fallbacks} REST fallbacks")
+
+
+if __name__ == "__main__":
+    main()
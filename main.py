@@ -1,26 +1,56 @@
+import time
+_process_start = time.perf_counter()  # Taken before the heavy imports so --trace-timings covers them
+
 from src.market_orders import MarketOrders
 from src.limit_orders import LimitOrders
 from src.advanced.oco import OCOOrders
-from src.advanced.stop_limit import StopLimitOrders
+from src.advanced.stop_limit import StopLimitOrders, STOP_LIMIT_BUFFER
 from src.advanced.twa import TWAPOrders
+from src.advanced.trailing_stop import TrailingStopOrders
+from src.advanced.conditional import ConditionalOrders
+from src.advanced.pov import POVOrders
+from src.advanced.iceberg import IcebergOrders
+from src.advanced.chase import ChaseOrders
+from src.advanced.bracket import BracketOrders
+from src.advanced.rebalance import Rebalancer
+from src.panic import KillSwitch
+from src.sharding import ShardSupervisor, load_strategies
+from src.bot import register_client_wrapper, set_client_factory, create_binance_client
+from src.replay import CassetteWriter, RecordingClient, ReplayClient
+from src.profiling import ProfileSession, TracedClient
+from src.log_pipeline import start_logging, LOG_FILE
+from src.metrics import metrics, MetricsClient, MetricsRegistry, start_metrics_server, METRICS_FILE
+from src.journal import journal, JournalClient
+from src.ws_gateway import WsOrderGateway
+from src.heartbeat import DeadMansSwitch
+from src.analytics import analytics, journal_fills, tca_report
+from src.funding import FundingCache, FundingSync, HISTORY_DAYS
+from src.sweep import KlineSync, synthetic_klines, kline_path, parse_grid, run_sweep, PARAMETERS, OBJECTIVES, IMPACT_BPS
+from datetime import datetime, timedelta
 import logging
 import argparse
+import json
+import os
+import shutil
+import tempfile
+
+# Commands that follow live websocket streams, which cassettes do not record
+STREAM_COMMANDS = ('trailing-stop', 'pov', 'iceberg', 'chase', 'bracket', 'supervise')
 
 
 def setup_logging():
-    """Sets up the logging configuration to output to a file."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        filename='bot.log',
-        filemode='a'  # Append to the log file
-    )
-    # Also, add a handler to print to the console
-    console = logging.StreamHandler()
-    console.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(levelname)s: %(message)s')
-    console.setFormatter(formatter)
-    logging.getLogger('').addHandler(console)
+    """Sets up the logging pipeline: JSONL records in bot.log plus console output, written off-thread."""
+    start_logging(LOG_FILE, level=logging.INFO, console=True)
+
+def stream_command(args):
+    """Name of the command if it needs live websocket streams, None otherwise"""
+    if args.order_type in STREAM_COMMANDS:
+        return args.order_type
+    if args.order_type == 'conditional' and args.conditional_action == 'run':
+        return 'conditional run'
+    if args.order_type == 'twap' and args.chunk_type == 'chase':
+        return 'twap --order-type chase'
+    return None
 
 def display_order_details(order):
     """Display order details in a formatted way"""
@@ -102,6 +132,304 @@ def display_twap_details(twap_config):
     print("="*60)
     print(" TWAP execution started in background...")
 
+def display_trailing_stop_details(stop_config):
+    """Display trailing stop details"""
+    if not stop_config:
+        print(" Trailing stop placement failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*60)
+    print("✅ TRAILING STOP ARMED SUCCESSFULLY")
+    print("="*60)
+    print(f"Stop ID:         {stop_config['stop_id']}")
+    print(f"Symbol:          {stop_config['symbol']}")
+    print(f"Exit Side:       {stop_config['side']}")
+    print(f"Quantity:        {stop_config['quantity']}")
+    print(f"Callback Rate:   {stop_config['callback_rate']}%")
+    print(f"Reference Price: ${stop_config['reference_price']:,.2f}")
+    print(f"Exit Type:       {stop_config['order_type']}")
+    print(f"Status:          {stop_config['status']}")
+    print("="*60)
+
+def display_pov_details(pov_config):
+    """Display POV order details"""
+    if not pov_config:
+        print(" POV order placement failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*60)
+    print("✅ POV ORDER INITIATED SUCCESSFULLY")
+    print("="*60)
+    print(f"POV ID:          {pov_config['pov_id']}")
+    print(f"Symbol:          {pov_config['symbol']}")
+    print(f"Side:            {pov_config['side']}")
+    print(f"Total Quantity:  {pov_config['total_quantity']}")
+    print(f"Participation:   {pov_config['participation_rate']}%")
+    print(f"Clip Size:       {pov_config['min_clip']} - {pov_config['max_clip']}")
+    print(f"Volume Window:   {pov_config['window_seconds']} seconds")
+    print(f"Order Type:      {pov_config['order_type']}")
+    print(f"Status:          {pov_config['status']}")
+    print("="*60)
+
+def display_iceberg_details(state):
+    """Display iceberg order details"""
+    if not state:
+        print(" Iceberg order placement failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*60)
+    print("✅ ICEBERG ORDER PLACED SUCCESSFULLY")
+    print("="*60)
+    print(f"Iceberg ID:      {state.iceberg_id}")
+    print(f"Symbol:          {state.symbol}")
+    print(f"Side:            {state.side}")
+    print(f"Total Quantity:  {state.total_quantity}")
+    print(f"Visible Slice:   {state.visible_quantity}")
+    print(f"Price:           ${state.price:,.2f}")
+    print(f"Status:          {state.status}")
+    print("="*60)
+
+def display_chase_details(state):
+    """Display chase order details"""
+    if not state:
+        print(" Chase order placement failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*60)
+    print("✅ CHASE ORDER PLACED SUCCESSFULLY")
+    print("="*60)
+    print(f"Chase ID:        {state.chase_id}")
+    print(f"Symbol:          {state.symbol}")
+    print(f"Side:            {state.side}")
+    print(f"Quantity:        {state.quantity}")
+    print(f"Price:           ${state.price:,.2f}")
+    print(f"Chase Limit:     ${state.limit_price:,.2f}")
+    print(f"Order ID:        {state.order_id}")
+    print(f"Status:          {state.status}")
+    print("="*60)
+
+def display_bracket_details(bracket):
+    """Display bracket order details"""
+    if not bracket:
+        print(" Bracket order placement failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*60)
+    print("✅ BRACKET ENTRY PLACED SUCCESSFULLY")
+    print("="*60)
+    print(f"Bracket ID:      {bracket['bracket_id']}")
+    print(f"Symbol:          {bracket['symbol']}")
+    print(f"Side:            {bracket['side']}")
+    print(f"Quantity:        {bracket['quantity']}")
+    print(f"Entry Price:     ${bracket['entry_price']:,.2f}")
+    print(f"Stop Loss:       ${bracket['stop_loss_price']:,.2f}")
+    print(f"Take Profit:     ${bracket['take_profit_price']:,.2f}")
+    print(f"State:           {bracket['state']}")
+    print("="*60)
+
+def display_conditional_orders(conditions):
+    """Display conditional orders as a table"""
+    if not conditions:
+        print(" No conditional orders found.")
+        return
+        
+    print("\n" + "="*100)
+    print(f"{'ID':<22} {'Condition':<30} {'Order':<30} {'Status':<10}")
+    print("="*100)
+    for cond in conditions.values():
+        condition = f"{cond['watch_symbol']} {cond['condition']} {cond['trigger_price']}"
+        order = f"{cond['side']} {cond['quantity']} {cond['symbol']} {cond['order_type']}"
+        print(f"{cond['cond_id']:<22} {condition:<30} {order:<30} {cond['status']:<10}")
+    print("="*100)
+
+def display_metrics(summaries):
+    """Display latency histograms as a table"""
+    if not summaries:
+        print(" No metrics recorded yet.")
+        return
+        
+    print("\n" + "="*100)
+    print(f"{'Metric':<10} {'Name':<32} {'Count':>8} {'Errors':>7} {'Mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'Max':>9}")
+    print("="*100)
+    for m in summaries:
+        latencies = ''.join(f"{m.get(key, 0):>9.1f}" for key in ('mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'))
+        print(f"{m['name']:<10} {m['label']:<32} {m['count']:>8} {m['errors']:>7}{latencies}")
+    print("="*100)
+    print(" Latencies in milliseconds")
+
+def display_history(records):
+    """Display journal records as a table"""
+    if not records:
+        print(" No matching orders in the journal.")
+        return
+        
+    print("\n" + "="*120)
+    print(f"{'Time':<20} {'Kind':<9} {'Method':<31} {'Symbol':<10} {'Order ID':<12} {'Tag':<22} {'Details'}")
+    print("="*120)
+    for record in records:
+        when = datetime.fromtimestamp(record['ts']).strftime('%Y-%m-%d %H:%M:%S')
+        if record['kind'] == 'error':
+            details = record['error']
+        elif record['kind'] == 'request':
+            params = record.get('params', {})
+            details = ' '.join(str(params[k]) for k in ('side', 'type', 'quantity', 'price', 'stopPrice') if k in params)
+        else:
+            response = record.get('response')
+            details = f"{response.get('status')} {response.get('executedQty')}/{response.get('origQty')}" if isinstance(response, dict) else str(response)[:40]
+        print(f"{when:<20} {record['kind']:<9} {record['method']:<31} {record['symbol'] or '':<10} {record['order_id'] or '':<12} {record['tag'] or '':<22} {details}")
+    print("="*120)
+    print(f" {len(records)} records")
+
+def display_rebalance_plan(plan, dry_run=False):
+    """Display rebalance orders as a table"""
+    if not plan:
+        print(" Rebalance failed. Check bot.log for details.")
+        return
+        
+    print("\n" + "="*100)
+    print(f"{'Symbol':<14} {'Price':>12} {'Position':>14} {'Weight':>8} {'Target':>14} {'Order':>20} {'Notional':>12}")
+    print("="*100)
+    for row in plan['rows']:
+        order = f"{row['side']} {row['quantity']}" if row['send'] else '-'
+        if row.get('order_id') is None and row['send'] and not dry_run:
+            order += ' FAILED'
+        print(f"{row['symbol']:<14} {row['price']:>12,.4f} {row['position']:>14.4f} {row['weight']:>8.2%} {row['target']:>14.4f} {order:>20} {row['notional']:>12,.2f}")
+    print("="*100)
+    print(f" Capital ${plan['capital']:,.2f}, {plan['orders']} orders, turnover ${plan['turnover']:,.2f}")
+    if 'elapsed_seconds' in plan:
+        print(f" Snapshot + plan {plan['plan_seconds'] * 1000:.0f} ms, all orders done in {plan['elapsed_seconds'] * 1000:.0f} ms, {plan['failed']} failed")
+    elif dry_run:
+        print(" Dry run, no orders sent")
+
+def parse_weights(value):
+    """Target weights from 'BTCUSDT=0.5,ETHUSDT=-0.2' or a JSON file of {symbol: weight}"""
+    if value.endswith('.json'):
+        with open(value) as f:
+            return {symbol: float(weight) for symbol, weight in json.load(f).items()}
+    weights = {}
+    for item in value.split(','):
+        symbol, _, weight = item.partition('=')
+        weights[symbol.strip()] = float(weight)
+    return weights
+
+def display_panic_report(report):
+    """Display the outcome of a panic flatten"""
+    print("\n" + "="*60)
+    print("🛑 PANIC: ACCOUNT FLAT" if report['flat'] else "⚠️  PANIC: ACCOUNT NOT FLAT")
+    print("="*60)
+    print(f"Workers Stopped:   {report['workers_stopped']} (this and {report['processes_reached']} other processes)")
+    if report['processes_unreached']:
+        print(f"Not Confirmed:     processes {', '.join(map(str, report['processes_unreached']))}")
+    print(f"Symbols Cancelled: {len(report['cancelled'])}")
+    print(f"Positions Closed:  {len(report['closed'])}")
+    for closed in report['closed']:
+        print(f"   {closed['symbol']:<12} {closed['amount']:>14}  order {closed['order_id']}")
+    if report['open_orders_left'] is not None:
+        print(f"Open Orders Left:  {report['open_orders_left']}")
+    if report['positions_left'] is not None:
+        print(f"Positions Left:    {report['positions_left']}")
+    for error in report['errors']:
+        print(f" Error: {error}")
+    if 'dispatch_seconds' in report:
+        print(f"Requests Done In:  {report['dispatch_seconds'] * 1000:.0f} ms")
+    print(f"Time To Flat:      {report['elapsed_seconds'] * 1000:.0f} ms")
+    print("="*60)
+
+def display_shard_health(rows):
+    """Display the health of the shard workers and the feed"""
+    print("\n" + "="*100)
+    print(f"{'Process':<10} {'PID':>8} {'Status':<10} {'Restarts':>8} {'Ticks':>12} {'Lag':>8} {'Dropped':>8} {'Beat s':>7}  Symbols")
+    print("="*100)
+    for row in rows:
+        age = f"{row['heartbeat_age']:.1f}" if row['heartbeat_age'] is not None else '-'
+        if 'ticks' in row:
+            print(f"{row['name']:<10} {row['pid']:>8} {row['status']:<10} {row['restarts']:>8} {row['ticks']:>12,} "
+                  f"{row['lag']:>8} {row['dropped']:>8} {age:>7}  {', '.join(row['symbols'])}")
+        else:
+            print(f"{row['name']:<10} {row['pid']:>8} {row['status']:<10} {row['restarts']:>8} {'':>12} {'':>8} {'':>8} {age:>7}")
+    print("="*100)
+
+def display_execution_report(reports):
+    """Display VWAP and shortfall of the parent orders filled in this run"""
+    print("\n" + "="*100)
+    print(f"{'Parent':<26} {'Symbol':<10} {'Side':<5} {'Fills':>6} {'Filled':>12} {'VWAP':>14} {'Arrival':>14} {'Shortfall bps':>14}")
+    print("="*100)
+    for r in reports:
+        shortfall = f"{r['shortfall_bps']:+.2f}" if r['shortfall_bps'] is not None else '-'
+        print(f"{r['source']:<26} {r['symbol']:<10} {r['side'] or '':<5} {r['fills']:>6} {r['filled']:>12.6g} {r['vwap']:>14,.4f} {r['arrival_price']:>14,.4f} {shortfall:>14}")
+    print("="*100)
+
+def display_tca(report):
+    """Display a TCA report from the order journal"""
+    if not report['parents']:
+        print(" No fills in the journal for this selection.")
+        return
+        
+    print("\n" + "="*120)
+    print(f"{'Start':<20} {'Tag':<24} {'Symbol':<10} {'Side':<5} {'Orders':>6} {'Filled':>12} {'VWAP':>14} {'Arrival':>14} {'Bps':>8} {'Cost':>10}")
+    print("="*120)
+    for p in report['parents']:
+        start = datetime.fromtimestamp(p['start']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{start:<20} {p['tag'] or '-':<24} {p['symbol']:<10} {p['side']:<5} {p['orders']:>6} {p['filled']:>12.6g} "
+              f"{p['vwap']:>14,.4f} {p['arrival_price']:>14,.4f} {p['shortfall_bps']:>+8.2f} {p['shortfall_cost']:>+10.2f}")
+    print("="*120)
+    print(f"{'Symbol':<14} {'Position':>14} {'Volume':>16} {'Last Fill':>14} {'PnL':>14}")
+    print("-"*120)
+    for s in report['symbols']:
+        print(f"{s['symbol']:<14} {s['position']:>14.6g} {s['volume']:>16,.2f} {s['mark']:>14,.4f} {s['pnl']:>+14,.2f}")
+    print("="*120)
+    print(" Arrival is the first fill of each parent; PnL marks open positions at the last fill")
+
+def display_funding_rank(rows, stats, elapsed):
+    """Display symbols ranked by funding carry and basis"""
+    if not rows:
+        print(" No cached funding data. Run 'python main.py funding sync' first.")
+        return
+        
+    def cell(value, width, fmt):
+        # fmt may start with a sign option, which goes after the alignment
+        return format(value, f">{width}{fmt}" if fmt[0] != '+' else f">+{width}{fmt[1:]}") if value is not None else f"{'-':>{width}}"
+    
+    print("\n" + "="*110)
+    print(f"{'Symbol':<14} {'Side':<6} {'Carry APR':>10} {'All APR':>10} {'Next APR':>10} {'Paid %':>7} {'Events':>7} {'Every':>6} {'Basis bps':>10} {'Prem bps':>9} {'Mark':>12}")
+    print("="*110)
+    for r in rows:
+        print(f"{r['symbol']:<14} {r['side']:<6} {cell(r['carry_apr_pct'], 10, '+.2f')} {cell(r['carry_apr_all_pct'], 10, '+.2f')} "
+              f"{cell(r['predicted_apr_pct'], 10, '+.2f')} {cell(None if r['positive_share'] is None else r['positive_share'] * 100, 7, '.0f')} "
+              f"{r['funding_events']:>7} {r['interval_hours']:>5.0f}h {cell(r['basis_bps'], 10, '+.2f')} {cell(r['premium_bps'], 9, '+.2f')} {cell(r['mark_price'], 12, ',.4f')}")
+    print("="*110)
+    print(" Carry: annualized funding over the window, positive when shorts are paid (Side receives it); Paid %: share of events with positive funding")
+    print(f" Ranked {stats['symbols']} symbols over {stats['funding_rows']:,} funding events and {stats['premium_rows']:,} premium klines in {elapsed * 1000:.1f} ms")
+
+def display_sweep_results(report, top):
+    """Display the best configurations of a parameter sweep"""
+    results = report['results'][:top] if top else report['results']
+    params = list(PARAMETERS[report['strategy']])
+    metric_names = list(OBJECTIVES[report['strategy']])
+    widths = {name: max(len(name), 8) for name in params + metric_names}
+    
+    def cell(value, width):
+        if isinstance(value, str):
+            return f"{value:>{width}}"
+        return f"{value:>{width}.4g}" if value == value else f"{'-':>{width}}"
+    
+    line = 6 + sum(w + 1 for w in widths.values())
+    print("\n" + "="*line)
+    print(f"{'Rank':>5} " + ' '.join(f"{name:>{widths[name]}}" for name in params + metric_names))
+    print("="*line)
+    for i, r in enumerate(results, 1):
+        print(f"{i:>5} " + ' '.join(cell(r[name], widths[name]) for name in params + metric_names))
+    print("="*line)
+    print(f" Ranked by {', '.join(report['objectives'])}: {report['configs']} configurations x {report['entries']} entries "
+          f"({report['bars']:,} bars, {report['horizon']}-bar horizon) on {report['workers']} workers in {report['elapsed_seconds']:.2f}s")
+
+def parse_history_time(value):
+    """Parse '2025-07-28', '2025-07-28T14:00' or a relative '12h' / '7d' into epoch seconds"""
+    if value[-1] in 'hd' and value[:-1].isdigit():
+        delta = timedelta(hours=int(value[:-1])) if value[-1] == 'h' else timedelta(days=int(value[:-1]))
+        return (datetime.now() - delta).timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
 def display_grid_details(grid_config):
     """Display Grid strategy details"""
     if not grid_config:
@@ -139,9 +467,51 @@ Examples:
     python main.py take-profit --symbol BTCUSDT --quantity 0.001 --stop-price 31000 --limit-price 31100
     python main.py oco --symbol BTCUSDT --quantity 0.001 --take-profit 31000 --stop-loss 29000
     python main.py twap --symbol BTCUSDT --side buy --total-quantity 0.01 --duration 10 --chunks 5
+    python main.py trailing-stop --symbol BTCUSDT --quantity 0.001 --callback-rate 1
+    python main.py conditional add --watch-symbol ETHUSDT --condition above --trigger-price 4000 --symbol BTCUSDT --side buy --quantity 0.001
+    python main.py conditional run
+    python main.py pov --symbol BTCUSDT --side buy --total-quantity 0.1 --participation 10 --min-clip 0.002 --max-clip 0.01
+    python main.py iceberg --symbol BTCUSDT --side buy --total-quantity 0.1 --visible-quantity 0.01 --price 30000
+    python main.py chase --symbol BTCUSDT --side buy --quantity 0.01 --max-distance 0.5 --max-amends 2
+    python main.py bracket --symbol BTCUSDT --side buy --quantity 0.01 --entry-price 30000 --stop-loss 29000 --take-profit 32000
+    python main.py rebalance --weights BTCUSDT=0.5,ETHUSDT=0.3,SOLUSDT=-0.2 --capital 10000 --dry-run
+    python main.py rebalance --weights targets.json --execution limit --limit-offset 0.05
+    python main.py supervise --strategies strategies.json --workers 4
+    python main.py supervise --strategies strategies.json --feed synthetic --simulate --start-prices BTCUSDT=30000,ETHUSDT=2000 --duration 60
+    
+  Risk:
+    python main.py panic
+    python main.py panic --close-positions
+    
+  Monitoring:
+    python main.py tca --since 7d
+    python main.py tca --tag TWAP_1753674917_1
+    python main.py stats
+    python main.py funding sync
+    python main.py funding rank --window 7 --top 20
+    python main.py history --symbol BTCUSDT --since 24h
+    python main.py sweep oco --symbol BTCUSDT --days 30 --param take_profit=0.5:3:0.25 --param stop_loss=0.5:3:0.25 --objective sharpe --objective worst_bps
+    python main.py sweep twap --synthetic 100000 --param duration=5,10,30,60 --param chunks=5:60:5 --quantity 5
+    python main.py history --tag TWAP_1753674917_1
+    python main.py --record session.cassette market --symbol BTCUSDT --side buy --quantity 0.001
+    python main.py --replay session.cassette --replay-speed 0 market --symbol BTCUSDT --side buy --quantity 0.001
+    python main.py --ws-orders market --symbol BTCUSDT --side buy --quantity 0.001
+    python main.py --dead-man 30 chase --symbol BTCUSDT --side buy --quantity 0.01 --timeout 600
+    python main.py --metrics-port 9108 twap --symbol BTCUSDT --side buy --total-quantity 0.01 --duration 10 --chunks 5
         """
     )
     
+    parser.add_argument('--profile', action='store_true', help='Run the command under cProfile, report written to profiles/')
+    parser.add_argument('--trace-timings', action='store_true', help='Record wall-clock timings of client calls and validation steps')
+    parser.add_argument('--tracemalloc', action='store_true', help='Record the top memory allocations')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', type=str, metavar='CASSETTE', help='Record every exchange call and response to a cassette file')
+    cassette_group.add_argument('--replay', type=str, metavar='CASSETTE', help='Serve exchange calls from a recorded cassette instead of the exchange')
+    cassette_group.add_argument('--ws-orders', action='store_true', help='Place, cancel, modify and query orders over the WebSocket API, falling back to REST')
+    parser.add_argument('--dead-man', type=float, metavar='SECONDS', help="Keep the exchange's auto-cancel countdown at SECONDS on every traded symbol while the process is healthy")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='Replay speed relative to the recorded latencies, 0 for as fast as possible (default: 1)')
+    
     subparsers = parser.add_subparsers(dest='order_type', help='The type of order to place', required=True)
 
     # --- Market Order Parser ---
@@ -187,6 +557,7 @@ Examples:
     oco_parser.add_argument('--take-profit', type=float, required=True, help='Take-profit price')
     oco_parser.add_argument('--stop-loss', type=float, required=True, help='Stop-loss price')
     oco_parser.add_argument('--side', type=str, default='sell', choices=['buy', 'sell'], help='Order side (default: sell)')
+    oco_parser.add_argument('--stop-limit-buffer', type=float, default=STOP_LIMIT_BUFFER * 100, help=f'Stop-loss limit price beyond the trigger, in percent (default: {STOP_LIMIT_BUFFER * 100:g})')
 
     # --- TWAP Order Parser ---
     twap_parser = subparsers.add_parser('twap', help='Place TWAP (Time-Weighted Average Price) order')
@@ -195,13 +566,212 @@ Examples:
     twap_parser.add_argument('--total-quantity', type=float, required=True, help='Total quantity to trade')
     twap_parser.add_argument('--duration', type=int, required=True, help='Duration in minutes')
     twap_parser.add_argument('--chunks', type=int, help='Number of chunks (default: duration)')
-    twap_parser.add_argument('--order-type', type=str, default='market', choices=['market', 'limit'], help='Order type for chunks')
+    twap_parser.add_argument('--order-type', dest='chunk_type', type=str, default='market', choices=['market', 'limit', 'chase'], help='Order type for chunks (chase: limit chunks that follow the best bid/ask)')
+
+    # --- Trailing Stop Parser ---
+    trailing_parser = subparsers.add_parser('trailing-stop', help='Place a client-side trailing stop')
+    trailing_parser.add_argument('--symbol', type=str, required=True, help='Trading symbol')
+    trailing_parser.add_argument('--quantity', type=float, required=True, help='Quantity to exit')
+    trailing_parser.add_argument('--callback-rate', type=float, required=True, help='Retracement from the high/low that triggers, in percent')
+    trailing_parser.add_argument('--side', type=str, default='sell', choices=['buy', 'sell'], help='Exit side (default: sell)')
+    trailing_parser.add_argument('--exit-type', type=str, default='market', choices=['market', 'limit'], help='Exit order type')
+    trailing_parser.add_argument('--limit-offset', type=float, default=0.1, help='Limit exit price offset from trigger, in percent')
+
+    # --- Conditional Order Parser ---
+    conditional_parser = subparsers.add_parser('conditional', help='Manage client-side conditional orders')
+    conditional_actions = conditional_parser.add_subparsers(dest='conditional_action', required=True)
+    cond_add_parser = conditional_actions.add_parser('add', help='Add a dormant conditional order')
+    cond_add_parser.add_argument('--watch-symbol', type=str, required=True, help='Symbol whose price is watched')
+    cond_add_parser.add_argument('--condition', type=str, required=True, choices=['above', 'below'], help='Trigger when price crosses above or below')
+    cond_add_parser.add_argument('--trigger-price', type=float, required=True, help='Trigger price of the watched symbol')
+    cond_add_parser.add_argument('--symbol', type=str, required=True, help='Symbol to trade when triggered')
+    cond_add_parser.add_argument('--side', type=str, required=True, choices=['buy', 'sell'], help='Order side')
+    cond_add_parser.add_argument('--quantity', type=float, required=True, help='Quantity to trade')
+    cond_add_parser.add_argument('--exec-type', type=str, default='market', choices=['market', 'limit'], help='Order type placed when triggered')
+    cond_add_parser.add_argument('--price', type=float, help='Limit price (required for limit)')
+    conditional_actions.add_parser('list', help='List conditional orders')
+    cond_cancel_parser = conditional_actions.add_parser('cancel', help='Cancel a pending conditional order')
+    cond_cancel_parser.add_argument('--id', type=str, required=True, help='Conditional order ID')
+    conditional_actions.add_parser('run', help='Evaluate pending conditional orders on the price stream')
+
+    # --- POV Order Parser ---
+    pov_parser = subparsers.add_parser('pov', help='Place POV (Percentage of Volume) order')
+    pov_parser.add_argument('--symbol', type=str, required=True, help='Trading symbol')
+    pov_parser.add_argument('--side', type=str, required=True, choices=['buy', 'sell'], help='Order side')
+    pov_parser.add_argument('--total-quantity', type=float, required=True, help='Total quantity to trade')
+    pov_parser.add_argument('--participation', type=float, required=True, help='Target share of traded volume, in percent')
+    pov_parser.add_argument('--min-clip', type=float, required=True, help='Smallest child order size')
+    pov_parser.add_argument('--max-clip', type=float, required=True, help='Largest child order size')
+    pov_parser.add_argument('--window', type=int, default=60, help='Rolling volume window in seconds (default: 60)')
+    pov_parser.add_argument('--max-duration', type=float, help='Stop after this many minutes')
+    pov_parser.add_argument('--exec-type', type=str, default='market', choices=['market', 'limit'], help='Order type for child orders')
+
+    # --- Iceberg Order Parser ---
+    iceberg_parser = subparsers.add_parser('iceberg', help='Place an iceberg limit order')
+    iceberg_parser.add_argument('--symbol', type=str, required=True, help='Trading symbol')
+    iceberg_parser.add_argument('--side', type=str, required=True, choices=['buy', 'sell'], help='Order side')
+    iceberg_parser.add_argument('--total-quantity', type=float, required=True, help='Total quantity to trade')
+    iceberg_parser.add_argument('--visible-quantity', type=float, required=True, help='Quantity shown on the book per slice')
+    iceberg_parser.add_argument('--price', type=float, required=True, help='Limit price')
+
+    # --- Chase Order Parser ---
+    chase_parser = subparsers.add_parser('chase', help='Place a limit order that follows the best bid/ask')
+    chase_parser.add_argument('--symbol', type=str, required=True, help='Trading symbol')
+    chase_parser.add_argument('--side', type=str, required=True, choices=['buy', 'sell'], help='Order side')
+    chase_parser.add_argument('--quantity', type=float, required=True, help='Quantity to trade')
+    chase_parser.add_argument('--max-distance', type=float, default=0.5, help='Furthest the order may chase from the starting touch, in percent (default: 0.5)')
+    chase_parser.add_argument('--max-amends', type=float, default=1.0, help='Amendments per second at most (default: 1)')
+    chase_parser.add_argument('--improve-ticks', type=int, default=0, help='Ticks inside the best bid/ask to quote (default: 0)')
+    chase_parser.add_argument('--allow-taker', action='store_true', help='Send as GTC instead of post-only GTX')
+    chase_parser.add_argument('--timeout', type=float, help='Cancel if not filled after this many seconds')
+
+    # --- Bracket Order Parser ---
+    bracket_parser = subparsers.add_parser('bracket', help='Place an entry with stop-loss and take-profit placed on fill')
+    bracket_parser.add_argument('--symbol', type=str, required=True, help='Trading symbol')
+    bracket_parser.add_argument('--side', type=str, required=True, choices=['buy', 'sell'], help='Entry side')
+    bracket_parser.add_argument('--quantity', type=float, required=True, help='Entry quantity')
+    bracket_parser.add_argument('--entry-price', type=float, required=True, help='Entry limit price')
+    bracket_parser.add_argument('--stop-loss', type=float, required=True, help='Stop-loss trigger price')
+    bracket_parser.add_argument('--take-profit', type=float, required=True, help='Take-profit trigger price')
+    bracket_parser.add_argument('--stop-limit-buffer', type=float, default=STOP_LIMIT_BUFFER * 100, help=f'Stop-loss limit price beyond the trigger, in percent (default: {STOP_LIMIT_BUFFER * 100:g})')
+
+    # --- Rebalance Parser ---
+    rebalance_parser = subparsers.add_parser('rebalance', help='Rebalance positions to target weights in one order wave')
+    rebalance_parser.add_argument('--weights', type=str, required=True, help="Target weights: 'BTCUSDT=0.5,ETHUSDT=-0.2' or a JSON file of {symbol: weight}")
+    rebalance_parser.add_argument('--capital', type=float, help='Notional the weights apply to (default: account margin balance)')
+    rebalance_parser.add_argument('--execution', type=str, default='market', choices=['market', 'limit'], help='Order type of the rebalance orders')
+    rebalance_parser.add_argument('--limit-offset', type=float, default=0.1, help='Limit price distance from last price in percent (default: 0.1)')
+    rebalance_parser.add_argument('--close-unlisted', action='store_true', help='Also close positions in symbols without a target')
+    rebalance_parser.add_argument('--workers', type=int, default=16, help='Orders in flight at once (default: 16)')
+    rebalance_parser.add_argument('--dry-run', action='store_true', help='Only show the orders')
+
+    # --- Supervise Parser ---
+    supervise_parser = subparsers.add_parser('supervise', help='Run strategies in worker processes sharded by symbol, fed from shared memory')
+    supervise_parser.add_argument('--strategies', type=str, required=True, help='JSON list of strategy specs, e.g. [{"type": "trailing-stop", "symbol": "BTCUSDT", "quantity": 0.01, "callback_rate": 1}]')
+    supervise_parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU, at most one per symbol)')
+    supervise_parser.add_argument('--feed', type=str, default='market', choices=['market', 'synthetic'], help='Binance market stream or random-walk ticks (default: market)')
+    supervise_parser.add_argument('--start-prices', type=str, help="Starting prices for the synthetic feed and --simulate: 'BTCUSDT=30000,ETHUSDT=2000' or a JSON file")
+    supervise_parser.add_argument('--feed-rate', type=int, default=0, help='Synthetic ticks per second (default: 0, as fast as possible)')
+    supervise_parser.add_argument('--simulate', action='store_true', help='Trade against a local simulated exchange in every worker')
+    supervise_parser.add_argument('--duration', type=float, help='Seconds to run (default: until Ctrl+C)')
+    supervise_parser.add_argument('--heartbeat-timeout', type=float, default=10.0, help='Seconds of silence before a process is restarted (default: 10)')
+    supervise_parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between health reports (default: 5)')
+
+    # --- Panic Parser ---
+    panic_parser = subparsers.add_parser('panic', help='Cancel all open orders on every symbol, optionally close all positions')
+    panic_parser.add_argument('--close-positions', action='store_true', help='Also close every position with reduce-only market orders')
+    panic_parser.add_argument('--workers', type=int, default=32, help='Requests in flight at once (default: 32)')
+
+    # --- History Parser ---
+    history_parser = subparsers.add_parser('history', help='Query the order journal')
+    history_parser.add_argument('--symbol', type=str, help='Only this symbol')
+    history_parser.add_argument('--order-id', type=int, help='Only this exchange order id')
+    history_parser.add_argument('--tag', type=str, help='Only this strategy id, e.g. a TWAP id')
+    history_parser.add_argument('--since', type=str, help="Start time: ISO date/time or relative like '24h', '7d'")
+    history_parser.add_argument('--until', type=str, help='End time: ISO date/time or relative')
+    history_parser.add_argument('--limit', type=int, default=50, help='Show the most recent N records (default: 50, 0 for all)')
+    history_parser.add_argument('--json', action='store_true', help='Print raw JSON lines')
+    history_parser.add_argument('--reindex', action='store_true', help='Rebuild the index from the journal first')
+
+    # --- TCA Parser ---
+    tca_parser = subparsers.add_parser('tca', help='Transaction cost analysis of journaled fills')
+    tca_parser.add_argument('--symbol', type=str, help='Only this symbol')
+    tca_parser.add_argument('--tag', type=str, help='Only this strategy id, e.g. a TWAP id')
+    tca_parser.add_argument('--since', type=str, help="Start time: ISO date/time or relative like '24h', '7d'")
+    tca_parser.add_argument('--until', type=str, help='End time: ISO date/time or relative')
+    tca_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    # --- Funding Parser ---
+    funding_parser = subparsers.add_parser('funding', help='Cache funding rates and rank symbols by carry and basis')
+    funding_actions = funding_parser.add_subparsers(dest='funding_action', required=True)
+    funding_sync_parser = funding_actions.add_parser('sync', help='Fetch new funding events, premium klines and a mark snapshot')
+    funding_sync_parser.add_argument('--symbols', type=str, help='Comma-separated symbols (default: every perpetual)')
+    funding_sync_parser.add_argument('--history-days', type=float, default=HISTORY_DAYS, help=f'History fetched for symbols not cached yet (default: {HISTORY_DAYS})')
+    funding_sync_parser.add_argument('--workers', type=int, default=4, help='Symbols fetched at once (default: 4)')
+    funding_rank_parser = funding_actions.add_parser('rank', help='Rank cached symbols by annualized carry or basis')
+    funding_rank_parser.add_argument('--window', type=float, default=7, help='Days the carry and premium are averaged over (default: 7)')
+    funding_rank_parser.add_argument('--sort', type=str, default='carry', choices=['carry', 'basis', 'funding'], help='Rank by window carry, current basis or predicted funding (default: carry)')
+    funding_rank_parser.add_argument('--symbols', type=str, help='Comma-separated symbols (default: all cached)')
+    funding_rank_parser.add_argument('--top', type=int, default=20, help='Show the top N symbols (default: 20, 0 for all)')
+    funding_rank_parser.add_argument('--json', action='store_true', help='Print the ranking as JSON')
+
+    # --- Sweep Parser ---
+    sweep_parser = subparsers.add_parser('sweep', help='Backtest a grid of OCO or TWAP settings over cached klines on a process pool')
+    sweep_parser.add_argument('strategy', type=str, choices=sorted(PARAMETERS), help='Strategy whose settings are swept')
+    sweep_parser.add_argument('--symbol', type=str, default='BTCUSDT', help='Trading symbol (default: BTCUSDT)')
+    sweep_parser.add_argument('--interval', type=str, default='1m', help='Kline interval (default: 1m)')
+    sweep_parser.add_argument('--days', type=float, default=30, help='History fetched when nothing is cached yet (default: 30)')
+    sweep_parser.add_argument('--synthetic', type=int, metavar='BARS', help='Sweep over BARS seeded random-walk klines instead of exchange data')
+    sweep_parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic klines (default: 0)')
+    sweep_parser.add_argument('--param', type=str, action='append', metavar='NAME=VALUES', help="Grid values as 'name=v1,v2' or 'name=start:stop:step', repeatable")
+    sweep_parser.add_argument('--objective', type=str, action='append', help='Metric to rank by, repeatable: configurations are ordered by their mean rank')
+    sweep_parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    sweep_parser.add_argument('--entry-step', type=int, default=60, help='Bars between simulated entries (default: 60)')
+    sweep_parser.add_argument('--horizon', type=int, help='Bars an OCO is followed for (default: one day)')
+    sweep_parser.add_argument('--quantity', type=float, default=1.0, help='TWAP total quantity, for the impact model (default: 1)')
+    sweep_parser.add_argument('--impact-bps', type=float, default=IMPACT_BPS, help=f"Impact of trading a whole bar's volume, in bps (default: {IMPACT_BPS})")
+    sweep_parser.add_argument('--top', type=int, default=20, help='Show the top N configurations (default: 20, 0 for all)')
+    sweep_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    sweep_parser.add_argument('--out', type=str, help='Also write the full report as JSON to this file')
+
+    # --- Stats Parser ---
+    stats_parser = subparsers.add_parser('stats', help='Show exchange call and order latency metrics')
+    stats_parser.add_argument('--reset', action='store_true', help=f'Clear the recorded metrics ({METRICS_FILE})')
 
     args = parser.parse_args()
 
     logging.info(f"CLI arguments received: {args}")
     logging.info(f"Starting {args.order_type} order execution")
 
+    if args.replay and stream_command(args):
+        logging.error(f"--replay cannot run {stream_command(args)}: it needs live websocket streams")
+        print(f" --replay cannot run {stream_command(args)}: it follows live websocket streams, which cassettes do not record")
+        return
+
+    ws_gateway = None
+    if args.ws_orders:
+        try:
+            ws_gateway = WsOrderGateway().start()
+        except Exception as e:
+            logging.error(f"Error starting WebSocket API gateway: {e}")
+            print(f" Could not start the WebSocket API gateway: {e}")
+            return
+        register_client_wrapper(ws_gateway.wrap)
+
+    session = ProfileSession(args.order_type, args.profile, args.trace_timings, args.tracemalloc, origin=_process_start)
+    if session.enabled:
+        session.start()
+        if session.tracer:
+            register_client_wrapper(lambda client: TracedClient(client, session.tracer))
+    cassette = replay = None
+    if args.record:
+        cassette = CassetteWriter(args.record)
+        set_client_factory(lambda: RecordingClient(create_binance_client(), cassette))
+    elif args.replay:
+        try:
+            replay = ReplayClient(args.replay, args.replay_speed)
+        except Exception as e:
+            logging.error(f"Error loading cassette {args.replay}: {e}")
+            print(f" Could not load cassette {args.replay}: {e}")
+            return
+        set_client_factory(replay.as_client)
+    register_client_wrapper(MetricsClient)
+    analytics.start()
+    if not replay:
+        # Replayed orders were journaled when they were recorded
+        register_client_wrapper(JournalClient)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    dead_man = None
+    if args.dead_man:
+        try:
+            dead_man = DeadMansSwitch([args.symbol] if getattr(args, 'symbol', None) else None, args.dead_man).start()
+        except Exception as e:
+            logging.error(f"Error starting dead-man's switch: {e}")
+            print(f" Could not start the dead-man's switch: {e}")
+            return
+        print(f" Dead-man's switch armed: open orders are cancelled within {args.dead_man}s if this process stalls or dies")
+
     try:
         if args.order_type == 'market':
             print(f"   Placing MARKET {args.side.upper()} order...")
@@ -316,7 +886,7 @@ Examples:
                 print(f"   Stop-Loss vs Current: {sl_diff:+.2f}%")
             
             oco_result = oco_orders.place_oco_order(
-                args.symbol, args.quantity, args.take_profit, args.stop_loss, args.side
+                args.symbol, args.quantity, args.take_profit, args.stop_loss, args.side, args.stop_limit_buffer / 100
             )
             
             display_oco_details(oco_result)
@@ -330,9 +900,11 @@ Examples:
             print(f"   Total Quantity: {args.total_quantity}")
             print(f"   Duration: {args.duration} minutes")
             print(f"   Chunks: {args.chunks if args.chunks else args.duration}")
-            print(f"   Order Type: {args.order_type.upper()}")
+            print(f"   Order Type: {args.chunk_type.upper()}")
             
             twap_orders = TWAPOrders()
+            # Replayed LIMIT chunks are only accounted from their recorded REST responses
+            twap_orders.use_user_stream = not args.replay
             
             # Show current market price for reference
             current_price = twap_orders.get_current_price(args.symbol)
@@ -343,27 +915,305 @@ Examples:
             
             twap_config = twap_orders.place_twap_order(
                 args.symbol, args.total_quantity, args.side, 
-                args.duration, args.chunks, args.order_type
+                args.duration, args.chunks, args.chunk_type
             )
             
             display_twap_details(twap_config)
             
             if twap_config:
                 print(f"\n Use 'python monitor_twap.py --twap-id {twap_config['twap_id']}' to monitor this TWAP order")
+
+        elif args.order_type == 'trailing-stop':
+            print(f" Placing TRAILING STOP {args.side.upper()} order...")
+            print(f"   Symbol: {args.symbol.upper()}")
+            print(f"   Quantity: {args.quantity}")
+            print(f"   Callback Rate: {args.callback_rate}%")
+            print(f"   Exit Type: {args.exit_type.upper()}")
+            
+            trailing_orders = TrailingStopOrders()
+            stop_config = trailing_orders.place_trailing_stop(
+                args.symbol, args.quantity, args.callback_rate, args.side,
+                args.exit_type, args.limit_offset
+            )
+            
+            display_trailing_stop_details(stop_config)
+            
+            if stop_config:
+                print(" Following price stream, waiting for trigger (Ctrl+C to stop)...")
+                while trailing_orders.get_active_trailing_stops():
+                    time.sleep(1)
+                # Give the exit order time to be sent
+                while stop_config['status'] == 'TRIGGERED':
+                    time.sleep(0.1)
+                print(f" Trailing stop triggered at ${stop_config['trigger_price']:,.2f}")
+                display_order_details(stop_config['exit_order'])
+
+        elif args.order_type == 'conditional':
+            conditional_orders = ConditionalOrders()
+            
+            if args.conditional_action == 'add':
+                print(f" Adding CONDITIONAL order...")
+                print(f"   If: {args.watch_symbol.upper()} {args.condition.upper()} ${args.trigger_price:,.2f}")
+                print(f"   Then: {args.side.upper()} {args.quantity} {args.symbol.upper()} ({args.exec_type.upper()})")
+                
+                cond = conditional_orders.add_conditional_order(
+                    args.watch_symbol, args.condition, args.trigger_price, args.symbol,
+                    args.side, args.quantity, args.exec_type, args.price
+                )
+                if cond:
+                    display_conditional_orders({cond['cond_id']: cond})
+                    print(" Use 'python main.py conditional run' to start monitoring")
+                else:
+                    print(" Conditional order creation failed. Check bot.log for details.")
+            elif args.conditional_action == 'list':
+                display_conditional_orders(conditional_orders.conditional_orders)
+            elif args.conditional_action == 'cancel':
+                if conditional_orders.cancel_conditional_order(args.id):
+                    print(f" Conditional order {args.id} cancelled")
+                else:
+                    print(f" Conditional order {args.id} not found or not pending")
+            else:  # run
+                pending = conditional_orders.get_pending_conditional_orders()
+                print(f" Monitoring {len(pending)} pending conditional orders (Ctrl+C to stop)...")
+                conditional_orders.start()
+                while conditional_orders.get_pending_conditional_orders():
+                    time.sleep(1)
+                print(" All conditional orders resolved")
+
+        elif args.order_type == 'pov':
+            print(f" Initiating POV {args.side.upper()} order...")
+            print(f"   Symbol: {args.symbol.upper()}")
+            print(f"   Total Quantity: {args.total_quantity}")
+            print(f"   Participation: {args.participation}%")
+            print(f"   Clip Size: {args.min_clip} - {args.max_clip}")
+            
+            pov_orders = POVOrders()
+            pov_config = pov_orders.place_pov_order(
+                args.symbol, args.total_quantity, args.side, args.participation,
+                args.min_clip, args.max_clip, args.window, args.exec_type, args.max_duration
+            )
+            
+            display_pov_details(pov_config)
+            
+            if pov_config:
+                print(" Following trade stream (Ctrl+C to stop)...")
+                while pov_orders.get_active_pov_orders():
+                    time.sleep(5)
+                    print(f"   Executed: {pov_config['total_executed']}/{pov_config['total_quantity']} in {pov_config['chunks_executed']} child orders")
+                print(f" POV {pov_config['status'].lower()}")
+
+        elif args.order_type == 'iceberg':
+            print(f" Placing ICEBERG {args.side.upper()} order...")
+            print(f"   Symbol: {args.symbol.upper()}")
+            print(f"   Total Quantity: {args.total_quantity}")
+            print(f"   Visible Quantity: {args.visible_quantity}")
+            print(f"   Price: ${args.price:,.2f}")
+            
+            iceberg_orders = IcebergOrders()
+            state = iceberg_orders.place_iceberg_order(
+                args.symbol, args.side, args.total_quantity, args.visible_quantity, args.price
+            )
+            
+            display_iceberg_details(state)
+            
+            if state:
+                print(" Refilling slices from the user-data stream (Ctrl+C to stop)...")
+                while state.status == 'ACTIVE':
+                    time.sleep(1)
+                print(f" Iceberg {state.status.lower()}: {state.filled_quantity}/{state.total_quantity} filled in {state.slices_placed} slices")
+                latency = iceberg_orders.get_refill_latency_stats()
+                if latency:
+                    print(f"   Refill latency p50/p99: {latency['p50_ms']:.1f}/{latency['p99_ms']:.1f} ms")
+
+        elif args.order_type == 'chase':
+            print(f" Placing CHASE {args.side.upper()} order...")
+            print(f"   Symbol: {args.symbol.upper()}")
+            print(f"   Quantity: {args.quantity}")
+            print(f"   Max Distance: {args.max_distance}%")
+            print(f"   Max Amendments: {args.max_amends}/s")
+            
+            chase_orders = ChaseOrders()
+            state = chase_orders.place_chase_order(
+                args.symbol, args.side, args.quantity, args.max_distance, args.max_amends,
+                args.improve_ticks, post_only=not args.allow_taker
+            )
+            
+            display_chase_details(state)
+            
+            if state:
+                print(" Following the best bid/ask (Ctrl+C to cancel)...")
+                deadline = time.time() + args.timeout if args.timeout else None
+                try:
+                    while state.status == 'ACTIVE':
+                        if deadline and time.time() >= deadline:
+                            chase_orders.cancel_chase_order(state.chase_id)
+                            break
+                        time.sleep(0.5)
+                except KeyboardInterrupt:
+                    chase_orders.cancel_chase_order(state.chase_id)
+                    raise
+                print(f" Chase {state.status.lower()}: {state.filled_quantity}/{state.quantity} filled, "
+                      f"{state.amendments} amendments, last price {state.price}")
+
+        elif args.order_type == 'bracket':
+            print(f" Placing BRACKET {args.side.upper()} order...")
+            print(f"   Symbol: {args.symbol.upper()}")
+            print(f"   Quantity: {args.quantity}")
+            print(f"   Entry: ${args.entry_price:,.2f}")
+            print(f"   Stop Loss: ${args.stop_loss:,.2f}")
+            print(f"   Take Profit: ${args.take_profit:,.2f}")
+            
+            bracket_orders = BracketOrders()
+            bracket = bracket_orders.place_bracket_order(
+                args.symbol, args.quantity, args.entry_price, args.stop_loss, args.take_profit, args.side, args.stop_limit_buffer / 100
+            )
+            
+            display_bracket_details(bracket)
+            
+            if bracket:
+                print(" Waiting for entry fills to place protective legs (Ctrl+C to stop)...")
+                state = bracket['state']
+                while bracket['state'] in ('PENDING_ENTRY', 'PARTIALLY_FILLED', 'PROTECTED'):
+                    time.sleep(1)
+                    if bracket['state'] != state:
+                        state = bracket['state']
+                        print(f"   {state}: entry {bracket['entry_filled']}/{bracket['quantity']}, exited {bracket['exit_filled']}")
+                print(f" Bracket {bracket['state'].lower()}")
+        
+        elif args.order_type == 'rebalance':
+            targets = parse_weights(args.weights)
+            print(f" Rebalancing {len(targets)} symbols to target weights...")
+            plan = Rebalancer().rebalance(
+                targets, capital=args.capital, order_type=args.execution, limit_offset=args.limit_offset / 100,
+                close_unlisted=args.close_unlisted, max_workers=args.workers, dry_run=args.dry_run
+            )
+            display_rebalance_plan(plan, args.dry_run)
+        
+        elif args.order_type == 'supervise':
+            strategies = load_strategies(args.strategies)
+            if not strategies:
+                print(f" No valid strategies in {args.strategies}. Check bot.log for details.")
+                return
+            supervisor = ShardSupervisor(
+                strategies, workers=args.workers, feed=args.feed,
+                prices=parse_weights(args.start_prices) if args.start_prices else None,
+                simulate=args.simulate, feed_rate=args.feed_rate, heartbeat_timeout=args.heartbeat_timeout
+            )
+            print(f" Supervising {len(strategies)} strategies on {len(supervisor.shard_map)} symbols in {supervisor.workers} worker processes...")
+            print(" Workers log to bot.shard<N>.log, the feed to bot.feed.log. Press Ctrl+C to stop.")
+            supervisor.run(duration=args.duration, report_interval=args.report_interval, on_report=display_shard_health)
+            display_shard_health(supervisor.check())
+            print(f" {len(supervisor.done)}/{len(strategies)} strategies finished")
+        
+        elif args.order_type == 'panic':
+            print(" PANIC: cancelling all open orders" + (" and closing all positions" if args.close_positions else "") + "...")
+            report = KillSwitch().panic(close_positions=args.close_positions, max_workers=args.workers)
+            display_panic_report(report)
+        
+        elif args.order_type == 'history':
+            if args.reindex:
+                print(f" Rebuilt index: {journal.rebuild_index()} records")
+            records = journal.query(
+                symbol=args.symbol,
+                order_id=args.order_id,
+                tag=args.tag,
+                since=parse_history_time(args.since) if args.since else None,
+                until=parse_history_time(args.until) if args.until else None,
+                limit=args.limit or None
+            )
+            if args.json:
+                for record in records:
+                    print(json.dumps(record))
+            else:
+                display_history(list(records))
+        
+        elif args.order_type == 'tca':
+            records = journal.query(
+                symbol=args.symbol,
+                tag=args.tag,
+                since=parse_history_time(args.since) if args.since else None,
+                until=parse_history_time(args.until) if args.until else None
+            )
+            report = tca_report(journal_fills(records))
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                display_tca(report)
+        
+        elif args.order_type == 'funding':
+            symbols = [symbol.strip().upper() for symbol in args.symbols.split(',')] if args.symbols else None
+            if args.funding_action == 'sync':
+                print(" Syncing funding rates, premium index and mark prices...")
+                report = FundingSync().sync(symbols, args.history_days, args.workers)
+                print(f" {report['symbols']} symbols: +{report['funding_rows']} funding events, +{report['premium_rows']} premium klines, "
+                      f"{report['up_to_date']} already up to date, {report['requests']} requests in {report['elapsed_seconds']:.2f}s")
+                for error in report['errors']:
+                    print(f"   Error: {error}")
+            else:  # rank
+                cache = FundingCache()
+                start = time.perf_counter()
+                rows = cache.rank(args.window, args.sort, symbols)
+                elapsed = time.perf_counter() - start
+                rows = rows[:args.top] if args.top else rows
+                if args.json:
+                    print(json.dumps(rows, indent=2))
+                else:
+                    display_funding_rank(rows, cache.stats(), elapsed)
+        
+        elif args.order_type == 'sweep':
+            temp_dir = None
+            if args.synthetic:
+                temp_dir = tempfile.mkdtemp(prefix='sweep-')
+                path = synthetic_klines(kline_path(args.symbol, args.interval, temp_dir), args.synthetic, args.interval, seed=args.seed)
+            else:
+                print(f" Syncing {args.symbol.upper()} {args.interval} klines...")
+                path, _ = KlineSync().sync(args.symbol, args.interval, args.days)
+            try:
+                report = run_sweep(path, args.strategy, parse_grid(args.strategy, args.param), args.objective, args.workers,
+                                   args.interval, args.horizon, args.entry_step, args.quantity, args.impact_bps)
+            except ValueError as e:
+                logging.error(f"Error running sweep: {e}")
+                print(f" {e}")
+                return
+            finally:
+                if temp_dir:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+            if args.out:
+                with open(args.out, 'w') as f:
+                    json.dump(report, f, indent=2)
+            if args.json:
+                print(json.dumps({**report, 'results': report['results'][:args.top] if args.top else report['results']}, indent=2))
+            else:
+                display_sweep_results(report, args.top)
+        
+        elif args.order_type == 'stats':
+            if args.reset:
+                if os.path.exists(METRICS_FILE):
+                    os.remove(METRICS_FILE)
+                print(" Metrics cleared.")
+            else:
+                recorded = MetricsRegistry()
+                recorded.load()
+                display_metrics(recorded.summary())
         
         else:
             print(f" Unknown order type: {args.order_type}")
             return
 
+        analytics.drain()
+        reports = analytics.reports()
+        if reports:
+            display_execution_report(reports)
+
         if args.order_type in ['market', 'limit', 'stop-loss', 'take-profit']:
             logging.info(f"Successfully placed {args.order_type} order")
-        else:
-            logging.info(f"Successfully initiated {args.order_type} strategy")
 
-        if order:
-            logging.info(f"Successfully placed {args.order_type} {args.side} order: {order}")
+            if order:
+                logging.info("Successfully placed %s %s order: %s", args.order_type, args.side, order)
+            else:
+                logging.error("Order placement failed. See logs for details.")
         else:
-            logging.error("Order placement failed. See logs for details.")
+            logging.info(f"Successfully initiated {args.order_type} strategy")
 
     except KeyboardInterrupt:
         print("\n Operation cancelled by user")
@@ -372,6 +1222,24 @@ Examples:
         logging.error(f"An unexpected error occurred in main: {e}", exc_info=True)
         print(f" An unexpected error occurred: {e}")
         print("Check bot.log for detailed error information.")
+    finally:
+        if dead_man:
+            dead_man.stop()
+            status = dead_man.get_status()
+            print(f" Dead-man's switch: {status['refreshes']} refreshes, {status['stalls']} stalls, "
+                  f"max wake-up lateness {status['max_lateness_ms']:.1f} ms" + (f", tripped: {status['tripped']}" if status['tripped'] else ""))
+        if replay:
+            print(f" Replayed {replay.served} calls from {args.replay} ({replay.diverged} diverged, {replay.remaining()} unused)")
+        else:
+            metrics.save()
+        if ws_gateway:
+            ws_gateway.stop()
+            print(f" Orders over the WebSocket API: {ws_gateway.sent} requests, {ws_gateway.fallbacks} REST fallbacks")
+        if cassette:
+            cassette.close()
+            print(f" Exchange calls recorded to {args.record}")
+        if session.enabled:
+            print(f" Profile written to {session.stop()}")
 
 
 if __name__ == "__main__":
@@ -381,7 +1249,10 @@ if __name__ == "__main__":
     print("=" * 80)
     print(" Available Order Types:")
     print("   • Basic: market, limit")
-    print("   • Advanced: stop-loss, take-profit, oco, twap")
+    print("   • Advanced: stop-loss, take-profit, oco, twap, trailing-stop, conditional, pov, iceberg, chase, bracket, rebalance")
+    print("   • Risk: panic")
+    print("   • Sharding: supervise")
+    print("   • Monitoring: stats, history, tca, funding, sweep")
     print("=" * 80)
     main()
 
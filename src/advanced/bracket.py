@@ -0,0 +1,339 @@
+from src.advanced.stop_limit import StopLimitOrders, stop_limit_price, STOP_LIMIT_BUFFER
+from src.bot import register_stop_event, make_client_order_id
+from src.validator import validate_positive_number, validate_symbol
+from src.events import order_events, FILL, CANCEL, REJECT
+from src.streams import get_user_stream
+from src.metrics import timed_order
+import itertools
+import logging
+import threading
+import time
+
+# Quantities below this are treated as zero
+EPSILON = 1e-9
+
+class BracketOrders(StopLimitOrders):
+    """
+    Event-driven bracket orders: entry first, protective legs on entry fill
+
+    Every bracket is a small state machine
+    PENDING_ENTRY -> PARTIALLY_FILLED -> PROTECTED -> CLOSED (or CANCELLED / ERROR).
+    Stop-loss and take-profit legs are only placed once the entry fills, always
+    sized to the open position, resized on partial fills and cancelled OCO-style
+    when the other leg closes the position. All brackets share one dispatcher
+    thread that routes order events through a client order id index.
+    """
+    def __init__(self, bus=order_events):
+        super().__init__()
+        logging.info("BracketOrders initialized for Futures trading")
+        self.active_brackets = {}  # bracket_id -> bracket state
+        self.use_user_stream = True  # Set False when fills are published into the bus by something else
+        self._by_client_id = {}  # Working client order id -> (bracket, leg)
+        self._cancelling = {}  # Client order id of a leg we are cancelling -> (bracket, leg, leg state)
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._stop = register_stop_event(threading.Event())
+        self._subscription = bus.subscribe(f"bracket-{id(self)}", [FILL, CANCEL, REJECT])
+        self._dispatcher = None
+
+    @timed_order('bracket')
+    def place_bracket_order(self, symbol, quantity, entry_price, stop_loss_price, take_profit_price, side='BUY', stop_limit_buffer=STOP_LIMIT_BUFFER):
+        """
+        Place a bracket: a LIMIT entry now, reduce-only stop-loss and take-profit once it fills
+
+        Args:
+            symbol: Trading pair
+            quantity: Amount to trade
+            entry_price: Entry limit price
+            stop_loss_price: Stop-loss trigger price
+            take_profit_price: Take-profit trigger price
+            side: 'BUY' for long, 'SELL' for short
+            stop_limit_buffer: Stop-loss limit price distance beyond the trigger, as a fraction
+        """
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(entry_price, "entry_price"):
+                return None
+            if not validate_positive_number(stop_loss_price, "stop_loss_price"):
+                return None
+            if not validate_positive_number(take_profit_price, "take_profit_price"):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            side = side.upper()
+            if side not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+            if side == 'BUY' and not stop_loss_price < entry_price < take_profit_price:
+                logging.error("Long bracket needs stop-loss < entry < take-profit")
+                return None
+            if side == 'SELL' and not take_profit_price < entry_price < stop_loss_price:
+                logging.error("Short bracket needs take-profit < entry < stop-loss")
+                return None
+
+            self._start_dispatcher()
+
+            bracket_id = f"BRK_{int(time.time())}_{next(self._ids)}"
+            bracket = {
+                'bracket_id': bracket_id,
+                'symbol': symbol.upper(),
+                'side': side,
+                'exit_side': 'SELL' if side == 'BUY' else 'BUY',
+                'quantity': quantity,
+                'entry_price': entry_price,
+                'stop_loss_price': stop_loss_price,
+                'take_profit_price': take_profit_price,
+                'stop_limit_buffer': stop_limit_buffer,
+                'state': 'PENDING_ENTRY',
+                'entry_client_id': None,
+                'entry_filled': 0.0,
+                'exit_filled': 0.0,
+                'legs': {},  # leg name -> {'client_id', 'quantity', 'filled'}
+                'created_time': time.time(),
+                'order_seq': itertools.count(1)
+            }
+
+            with self._lock:
+                self.active_brackets[bracket_id] = bracket
+                entry_client_id = self._next_client_id(bracket)
+                bracket['entry_client_id'] = entry_client_id
+                self._by_client_id[entry_client_id] = (bracket, 'entry')
+
+            entry_order = self._create_order(
+                source=bracket_id,
+                newClientOrderId=entry_client_id,
+                symbol=symbol.upper(),
+                side=side,
+                type='LIMIT',
+                timeInForce='GTC',
+                quantity=quantity,
+                price=str(entry_price)
+            )
+            bracket['entry_order_id'] = entry_order.get('orderId')
+            logging.info(f"Bracket {bracket_id} entry placed: {side} {quantity} {symbol.upper()} at {entry_price}")
+            return bracket
+
+        except Exception as e:
+            logging.error(f"Error placing bracket order: {e}")
+            return None
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None:
+            if self.use_user_stream:
+                get_user_stream()
+            self._dispatcher = threading.Thread(
+                target=self._subscription.run,
+                args=(self._on_event, self._stop),
+                daemon=True,
+                name='bracket-dispatcher'
+            )
+            self._dispatcher.start()
+
+    def _next_client_id(self, bracket):
+        return make_client_order_id(bracket['bracket_id'], next(bracket['order_seq']))
+
+    def _on_event(self, event):
+        """Route an order event to its bracket and advance the state machine"""
+        if self._stop.is_set():
+            return
+        with self._lock:
+            entry = self._by_client_id.get(event.client_order_id)
+            cancelling = self._cancelling.get(event.client_order_id) if entry is None else None
+            if entry is None and cancelling is None:
+                return
+            bracket, leg = entry or cancelling[:2]
+            try:
+                if cancelling:
+                    self._on_cancelling_event(bracket, leg, cancelling[2], event)
+                elif leg == 'entry':
+                    self._on_entry_event(bracket, event)
+                else:
+                    self._on_leg_event(bracket, leg, event)
+            except Exception as e:
+                logging.error(f"Bracket {bracket['bracket_id']} - Error handling {leg} event: {e}")
+                bracket['state'] = 'ERROR'
+
+    def _on_entry_event(self, bracket, event):
+        if event.event_type == FILL:
+            if event.cum_quantity <= bracket['entry_filled'] + EPSILON:
+                return  # Duplicate report
+            bracket['entry_filled'] = event.cum_quantity
+            entry_done = bracket['entry_filled'] >= bracket['quantity'] - EPSILON
+            if entry_done:
+                del self._by_client_id[bracket['entry_client_id']]
+            bracket['state'] = 'PROTECTED' if entry_done else 'PARTIALLY_FILLED'
+            logging.info(f"Bracket {bracket['bracket_id']} entry filled {bracket['entry_filled']}/{bracket['quantity']}")
+            self._sync_legs(bracket)
+        else:  # Entry cancelled or rejected outside the bracket
+            del self._by_client_id[bracket['entry_client_id']]
+            if bracket['entry_filled'] > EPSILON:
+                bracket['state'] = 'PROTECTED'  # Keep protecting what did fill
+                logging.info(f"Bracket {bracket['bracket_id']} entry ended at {bracket['entry_filled']}, legs keep protecting it")
+            else:
+                bracket['state'] = 'CANCELLED' if event.event_type == CANCEL else 'ERROR'
+                logging.warning(f"Bracket {bracket['bracket_id']} entry {'cancelled' if event.event_type == CANCEL else 'rejected'} before any fill")
+
+    def _on_leg_event(self, bracket, leg, event):
+        leg_state = bracket['legs'][leg]
+        if event.event_type != FILL:
+            # A protective leg vanished without us asking: the position is unprotected
+            del self._by_client_id[event.client_order_id]
+            del bracket['legs'][leg]
+            bracket['state'] = 'ERROR'
+            logging.error(f"Bracket {bracket['bracket_id']} {leg} leg was {'cancelled' if event.event_type == CANCEL else 'rejected'} outside the bracket")
+            return
+
+        delta = event.cum_quantity - leg_state['filled']
+        if delta <= EPSILON:
+            return  # Duplicate report
+        leg_state['filled'] = event.cum_quantity
+        bracket['exit_filled'] += delta
+        logging.info(f"Bracket {bracket['bracket_id']} {leg} filled {leg_state['filled']}/{leg_state['quantity']}")
+
+        position = bracket['entry_filled'] - bracket['exit_filled']
+        if position <= EPSILON:
+            if leg_state['filled'] >= leg_state['quantity'] - EPSILON:
+                del self._by_client_id[event.client_order_id]
+                del bracket['legs'][leg]
+            self._close(bracket, leg)
+        else:
+            # Partial exit: shrink the sibling to the remaining position
+            self._sync_legs(bracket, keep=leg)
+
+    def _on_cancelling_event(self, bracket, leg, leg_state, event):
+        """A leg we are cancelling can still fill until the cancel lands"""
+        if event.event_type != FILL:
+            del self._cancelling[event.client_order_id]  # Our cancel is confirmed
+            return
+
+        delta = event.cum_quantity - leg_state['filled']
+        if delta <= EPSILON:
+            return  # Duplicate report
+        leg_state['filled'] = event.cum_quantity
+        bracket['exit_filled'] += delta
+        if leg_state['filled'] >= leg_state['quantity'] - EPSILON:
+            del self._cancelling[event.client_order_id]  # Filled before the cancel landed
+        logging.info(f"Bracket {bracket['bracket_id']} {leg} filled {leg_state['filled']}/{leg_state['quantity']} while being cancelled")
+
+        if bracket['state'] not in ('PARTIALLY_FILLED', 'PROTECTED'):
+            return
+        if bracket['entry_filled'] - bracket['exit_filled'] <= EPSILON:
+            self._close(bracket, leg)
+        else:
+            # The legs placed in its place are now too large
+            self._sync_legs(bracket)
+
+    def _close(self, bracket, leg):
+        """Position closed by leg: cancel the other legs and whatever is left of the entry"""
+        self._cancel_legs(bracket)
+        if bracket['entry_client_id'] in self._by_client_id:
+            del self._by_client_id[bracket['entry_client_id']]
+            self._cancel_order(bracket, bracket['entry_client_id'], 'entry')
+        bracket['state'] = 'CLOSED'
+        logging.info(f"Bracket {bracket['bracket_id']} closed by {leg}")
+
+    def _sync_legs(self, bracket, keep=None):
+        """
+        Make both protective legs cover exactly the open position
+
+        Stop and take-profit orders cannot be amended, so a leg of the wrong
+        size is cancelled and re-placed. The leg named in keep is left alone
+        (it is partially filled and already covers the position).
+        """
+        position = round(bracket['entry_filled'] - bracket['exit_filled'], 8)
+        for leg in ('stop_loss', 'take_profit'):
+            if leg == keep:
+                continue
+            leg_state = bracket['legs'].get(leg)
+            if leg_state and abs(leg_state['quantity'] - leg_state['filled'] - position) <= EPSILON:
+                continue
+            if leg_state:
+                self._cancel_leg(bracket, leg)
+            if position > EPSILON:
+                self._place_leg(bracket, leg, position)
+
+    def _place_leg(self, bracket, leg, quantity):
+        client_id = self._next_client_id(bracket)
+        bracket['legs'][leg] = {'client_id': client_id, 'quantity': quantity, 'filled': 0.0}
+        self._by_client_id[client_id] = (bracket, leg)
+        exit_side = bracket['exit_side']
+        params = {
+            'source': bracket['bracket_id'],
+            'newClientOrderId': client_id,
+            'symbol': bracket['symbol'],
+            'side': exit_side,
+            'timeInForce': 'GTC',
+            'quantity': quantity,
+            'reduceOnly': 'true'
+        }
+        if leg == 'stop_loss':
+            stop_price = bracket['stop_loss_price']
+            params.update(
+                type='STOP',
+                price=str(self.quantize_price(bracket['symbol'], stop_limit_price(stop_price, exit_side, bracket['stop_limit_buffer']))),
+                stopPrice=str(stop_price)
+            )
+        else:
+            params.update(
+                type='TAKE_PROFIT',
+                price=str(bracket['take_profit_price']),
+                stopPrice=str(bracket['take_profit_price'])
+            )
+        try:
+            self._create_order(**params)
+            logging.info(f"Bracket {bracket['bracket_id']} {leg} placed for {quantity}")
+        except Exception as e:
+            del self._by_client_id[client_id]
+            del bracket['legs'][leg]
+            bracket['state'] = 'ERROR'
+            logging.error(f"Bracket {bracket['bracket_id']} - Error placing {leg}: {e}")
+
+    def _cancel_leg(self, bracket, leg):
+        leg_state = bracket['legs'].pop(leg)
+        # Move out of the working index first so our own cancel is not seen as an
+        # outside cancel, fills that land before the cancel are still counted
+        self._by_client_id.pop(leg_state['client_id'], None)
+        self._cancelling[leg_state['client_id']] = (bracket, leg, leg_state)
+        self._cancel_order(bracket, leg_state['client_id'], leg)
+
+    def _cancel_legs(self, bracket):
+        for leg in list(bracket['legs']):
+            self._cancel_leg(bracket, leg)
+
+    def _cancel_order(self, bracket, client_id, name):
+        try:
+            self.client.futures_cancel_order(symbol=bracket['symbol'], origClientOrderId=client_id)
+            logging.info(f"Bracket {bracket['bracket_id']} cancelled {name} order {client_id}")
+        except Exception as e:
+            logging.warning(f"Could not cancel bracket {name} order {client_id} (might be already filled): {e}")
+
+    def cancel_bracket_order(self, bracket_id):
+        """Cancel a bracket's entry and protective legs (an open position is left as is)"""
+        with self._lock:
+            bracket = self.active_brackets.get(bracket_id)
+            if not bracket or bracket['state'] in ('CLOSED', 'CANCELLED'):
+                logging.warning(f"Bracket {bracket_id} not found or already finished")
+                return False
+            if self._by_client_id.pop(bracket['entry_client_id'], None):
+                self._cancel_order(bracket, bracket['entry_client_id'], 'entry')
+            self._cancel_legs(bracket)
+            bracket['state'] = 'CANCELLED'
+        logging.info(f"Bracket {bracket_id} cancelled")
+        return True
+
+    def get_bracket_status(self, bracket_id):
+        """Get status of a bracket"""
+        with self._lock:
+            bracket = self.active_brackets.get(bracket_id)
+            if not bracket:
+                return None
+            status = {k: v for k, v in bracket.items() if k != 'order_seq'}
+            status['legs'] = {leg: dict(leg_state) for leg, leg_state in bracket['legs'].items()}
+            status['position'] = bracket['entry_filled'] - bracket['exit_filled']
+            return status
+
+    def get_active_brackets(self):
+        """Get all brackets that are not finished"""
+        return {k: v for k, v in self.active_brackets.items() if v['state'] in ('PENDING_ENTRY', 'PARTIALLY_FILLED', 'PROTECTED')}
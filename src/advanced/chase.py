@@ -0,0 +1,358 @@
+from src.limit_orders import LimitOrders
+from src.bot import register_stop_event, make_client_order_id
+from src.heartbeat import register_pulse
+from src.validator import validate_positive_number, validate_symbol, get_symbol_info
+from src.events import order_events, FILL, CANCEL, REJECT
+from src.streams import get_market_stream, get_user_stream
+from concurrent.futures import ThreadPoolExecutor
+from src.metrics import timed_order
+import itertools
+import logging
+import threading
+import time
+
+# Amendments per second across all chasers of one ChaseOrders, below the account order rate limit
+MAX_ACCOUNT_AMENDS_PER_SECOND = 10
+# How often the dispatcher retries chasers held back by a rate cap
+RETRY_SECONDS = 0.05
+# Seconds without a dispatcher pass before the dispatcher counts as stalled
+DISPATCHER_MAX_SILENCE = 10
+
+class _TokenBucket:
+    """Allows rate events per second with bursts of up to burst events"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class ChaseState:
+    """State of one chased limit order"""
+    __slots__ = (
+        'chase_id', 'symbol', 'side', 'quantity', 'price', 'anchor_price', 'limit_price',
+        'tick_size', 'improve_ticks', 'client_order_id', 'order_id', 'filled_quantity',
+        'amendments', 'capped', 'status', 'created_time', 'bucket', 'amending'
+    )
+
+    def __init__(self, chase_id, symbol, side, quantity, anchor_price, limit_price, tick_size, improve_ticks, max_amends_per_second):
+        self.chase_id = chase_id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.price = None  # Working price on the book
+        self.anchor_price = anchor_price  # Touch price when the chase started
+        self.limit_price = limit_price  # Furthest price the chase may go to
+        self.tick_size = tick_size
+        self.improve_ticks = improve_ticks
+        self.client_order_id = make_client_order_id(chase_id, 1)
+        self.order_id = None
+        self.filled_quantity = 0.0
+        self.amendments = 0
+        self.capped = False  # The touch is beyond limit_price, the order waits at the limit
+        self.status = 'ACTIVE'
+        self.created_time = time.time()
+        self.bucket = _TokenBucket(max_amends_per_second)
+        self.amending = False  # A modify request is in flight
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ('bucket', 'amending')}
+
+
+class ChaseOrders(LimitOrders):
+    """
+    Limit orders that follow the top of the book
+
+    Every chaser of this instance shares one book feed subscription per symbol
+    and one dispatcher thread. Book updates only record the latest best
+    bid/ask and wake the dispatcher, so a burst of updates costs one
+    repricing pass with the newest quote. Orders are repriced in place with
+    the modify-order endpoint, never cancelled and replaced, so they keep
+    their order id. Each chaser has its own amendment rate cap and all of them
+    share an account-wide one; a chaser held back by a cap is repriced to the
+    latest quote once it may amend again.
+    """
+    def __init__(self, bus=order_events, max_amends_per_second=MAX_ACCOUNT_AMENDS_PER_SECOND):
+        super().__init__()
+        logging.info("ChaseOrders initialized for Futures trading")
+        self.active_chase_orders = {}  # chase_id -> ChaseState
+        self.use_stream = True  # Set False when book updates are fed to on_book externally
+        self.use_user_stream = True  # Set False when fills are published into the bus by something else
+        self._books = {}  # symbol -> (bid, ask)
+        self._by_symbol = {}  # symbol -> [ChaseState]
+        self._by_client_id = {}  # client order id -> ChaseState
+        self._subscribed = set()
+        self._dirty = set()  # Symbols with a book update not yet dispatched
+        self._retry = set()  # chase_ids waiting for a rate cap or an in-flight amendment
+        self._account_bucket = _TokenBucket(max_amends_per_second)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = register_stop_event(threading.Event())
+        self._amend_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='chase-amend')
+        self._subscription = bus.subscribe(f"chase-{id(self)}", [FILL, CANCEL, REJECT])
+        self._threads = []
+
+    @timed_order('chase')
+    def place_chase_order(self, symbol, side, quantity, max_distance=0.5, max_amends_per_second=1.0, improve_ticks=0, post_only=True, source=None):
+        """
+        Place a limit order that is repriced to the best bid (BUY) or ask (SELL)
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            side: 'BUY' or 'SELL'
+            quantity: Amount to trade
+            max_distance: Furthest the order may chase from the starting touch, in percent
+            max_amends_per_second: Amendment rate cap of this order
+            improve_ticks: Ticks inside the touch to quote, never crossing the spread
+            post_only: Send as GTX so the order only ever adds liquidity
+            source: Strategy id the fills are attributed to (default: the chase id)
+        """
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(max_distance, "max_distance"):
+                return None
+            if not validate_positive_number(max_amends_per_second, "max_amends_per_second"):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+
+            symbol, side = symbol.upper(), side.upper()
+            book = self._books.get(symbol) or self._fetch_book(symbol)
+            if not book:
+                logging.error(f"Could not get the order book of {symbol}")
+                return None
+            symbol_info = get_symbol_info(self.client, symbol)
+            tick_size = symbol_info.tick_size if symbol_info else 0.0
+            anchor = book[0] if side == 'BUY' else book[1]
+            limit = anchor * (1 + max_distance / 100) if side == 'BUY' else anchor * (1 - max_distance / 100)
+
+            self._start_threads()
+            chase_id = f"CHASE_{int(time.time())}_{next(self._ids)}"
+            state = ChaseState(chase_id, symbol, side, quantity, anchor, self.quantize_price(symbol, limit),
+                               tick_size, improve_ticks, max_amends_per_second)
+            if source:
+                state.client_order_id = make_client_order_id(source, f"c{chase_id.rpartition('_')[2]}")
+            state.price = self._target_price(state, *book)
+            with self._lock:
+                # Register before sending: the fill can arrive before the REST response
+                self.active_chase_orders[chase_id] = state
+                self._by_client_id[state.client_order_id] = state
+
+            try:
+                order = self._create_order(
+                    source=source or chase_id,
+                    newClientOrderId=state.client_order_id,
+                    symbol=symbol,
+                    side=side,
+                    type='LIMIT',
+                    timeInForce='GTX' if post_only else 'GTC',
+                    quantity=quantity,
+                    price=str(state.price)
+                )
+            except Exception as e:
+                logging.error(f"Chase {chase_id} - Error placing order: {e}")
+                state.status = 'ERROR'
+                with self._lock:
+                    self._by_client_id.pop(state.client_order_id, None)
+                return None
+
+            with self._lock:
+                state.order_id = order.get('orderId')
+                if state.status == 'ACTIVE':
+                    self._by_symbol.setdefault(symbol, []).append(state)
+            if self.use_stream and symbol not in self._subscribed:
+                self._subscribed.add(symbol)
+                get_market_stream().on_book(symbol, self.on_book)
+
+            logging.info(f"Chase {chase_id} placed: {side} {quantity} {symbol} at {state.price}, limit {state.limit_price} ({state.order_id})")
+            return state
+
+        except Exception as e:
+            logging.error(f"Error placing chase order: {e}")
+            return None
+
+    def _fetch_book(self, symbol):
+        try:
+            ticker = self.client.futures_orderbook_ticker(symbol=symbol)
+            return float(ticker['bidPrice']), float(ticker['askPrice'])
+        except Exception as e:
+            logging.error(f"Error getting book ticker for {symbol}: {e}")
+            return None
+
+    def _start_threads(self):
+        if self._threads:
+            return
+        if self.use_user_stream:
+            get_user_stream()
+        self._threads = [
+            threading.Thread(target=self._subscription.run, args=(self._on_event, self._stop), daemon=True, name='chase-fills'),
+            threading.Thread(target=self._run_dispatcher, daemon=True, name='chase-dispatcher')
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def _target_price(state, bid, ask):
+        """Price to quote for the book (bid, ask), clamped to the chase limit"""
+        tick = state.tick_size
+        if state.side == 'BUY':
+            price = bid + state.improve_ticks * tick
+            if tick and price >= ask:
+                price = ask - tick  # Stay on the passive side of the spread
+            state.capped = price > state.limit_price
+            price = min(price, state.limit_price)
+        else:
+            price = ask - state.improve_ticks * tick
+            if tick and price <= bid:
+                price = bid + tick
+            state.capped = price < state.limit_price
+            price = max(price, state.limit_price)
+        return round(round(price / tick) * tick, 10) if tick else price
+
+    def on_book(self, symbol, bid, bid_qty=None, ask=None, ask_qty=None):
+        """Record a best bid/ask update and wake the dispatcher"""
+        self._books[symbol] = (bid, ask)
+        if self._by_symbol.get(symbol):
+            with self._lock:
+                self._dirty.add(symbol)
+            self._wake.set()
+
+    def _run_dispatcher(self):
+        """Reprice the chasers of updated symbols, and those held back by a rate cap"""
+        pulse = register_pulse('chase-dispatcher', DISPATCHER_MAX_SILENCE)
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(RETRY_SECONDS if self._retry else 0.5)
+                self._wake.clear()
+                pulse.beat()
+                if self._stop.is_set():
+                    return
+                with self._lock:
+                    dirty, self._dirty = self._dirty, set()
+                    retry, self._retry = self._retry, set()
+                    candidates = {state.chase_id: state for symbol in dirty for state in self._by_symbol.get(symbol, ())}
+                    for chase_id in retry:
+                        state = self.active_chase_orders.get(chase_id)
+                        if state is not None:
+                            candidates[chase_id] = state
+                now = time.monotonic()
+                for state in candidates.values():
+                    try:
+                        self._reprice(state, now)
+                    except Exception as e:
+                        logging.error(f"Chase {state.chase_id} - Error repricing: {e}")
+        finally:
+            pulse.close()
+
+    def _reprice(self, state, now):
+        if state.status != 'ACTIVE' or state.order_id is None:
+            return
+        if state.amending:
+            return  # Re-evaluated with the newest book once the amendment returns
+        book = self._books.get(state.symbol)
+        if book is None:
+            return
+        target = self._target_price(state, *book)
+        if state.price is not None and abs(target - state.price) < (state.tick_size or 1e-12) / 2:
+            return
+        allowed = state.bucket.take(now)
+        if allowed and not self._account_bucket.take(now):
+            state.bucket.refund()
+            allowed = False
+        if not allowed:
+            with self._lock:
+                self._retry.add(state.chase_id)
+            return
+        state.amending = True
+        self._amend_executor.submit(self._amend, state, target)
+
+    def _amend(self, state, price):
+        """Move a chaser's order to price with the modify-order endpoint"""
+        try:
+            order = self.client.futures_modify_order(
+                symbol=state.symbol,
+                orderId=state.order_id,
+                side=state.side,
+                quantity=state.quantity,
+                price=str(price)
+            )
+            state.price = float(order.get('price') or price)
+            state.amendments += 1
+            logging.info(f"Chase {state.chase_id} - Amended to {state.price}{' (at limit)' if state.capped else ''}")
+        except Exception as e:
+            # Usually the order filled or was cancelled while the request was in flight
+            logging.warning(f"Chase {state.chase_id} - Could not amend to {price}: {e}")
+        finally:
+            state.amending = False
+            if state.status == 'ACTIVE':
+                with self._lock:
+                    self._retry.add(state.chase_id)
+                self._wake.set()
+
+    def _on_event(self, event):
+        """Handle a fill/cancel/reject event from the order event bus"""
+        state = self._by_client_id.get(event.client_order_id)
+        if state is None:
+            return
+        if event.event_type == FILL:
+            if event.cum_quantity > state.filled_quantity:
+                state.filled_quantity = event.cum_quantity
+            if state.filled_quantity < state.quantity - 1e-12:
+                return  # Partial fill, the rest keeps chasing
+            self._finish(state, 'FILLED')
+            logging.info(f"Chase {state.chase_id} filled {state.filled_quantity} after {state.amendments} amendments")
+        else:  # CANCEL or REJECT
+            if state.status == 'ACTIVE':
+                self._finish(state, 'CANCELLED' if event.event_type == CANCEL else 'REJECTED')
+                logging.warning(f"Chase {state.chase_id} order was {state.status.lower()}, stopping")
+
+    def _finish(self, state, status):
+        with self._lock:
+            if state.status == 'ACTIVE':
+                state.status = status
+            self._by_client_id.pop(state.client_order_id, None)
+            states = self._by_symbol.get(state.symbol, [])
+            if state in states:
+                states.remove(state)
+
+    def cancel_chase_order(self, chase_id):
+        """Stop chasing and cancel the order"""
+        state = self.active_chase_orders.get(chase_id)
+        if not state or state.status != 'ACTIVE':
+            logging.warning(f"Chase ID {chase_id} not found or not active")
+            return False
+        self._finish(state, 'CANCELLED')
+        try:
+            self.client.futures_cancel_order(symbol=state.symbol, origClientOrderId=state.client_order_id)
+            logging.info(f"Chase {chase_id} cancelled")
+        except Exception as e:
+            logging.warning(f"Could not cancel chase order {state.client_order_id} (might be already filled): {e}")
+        return True
+
+    def get_chase_status(self, chase_id):
+        """Get status of a chase order"""
+        state = self.active_chase_orders.get(chase_id)
+        return state.to_dict() if state else None
+
+    def get_active_chase_orders(self):
+        """Get all chase orders still working"""
+        return {k: v for k, v in self.active_chase_orders.items() if v.status == 'ACTIVE'}
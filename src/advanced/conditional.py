@@ -0,0 +1,327 @@
+from src.market_orders import MarketOrders
+from src.bot import register_stop_event
+from src.limit_orders import LimitOrders
+from src.validator import validate_positive_number, validate_symbol
+from src.streams import get_market_stream
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop
+from src.metrics import timed_order
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+CONDITIONS_FILE = 'conditional_orders.json'
+# Finished conditions stay listed this long before they are pruned from the state file
+FINISHED_RETENTION_SECONDS = 7 * 86400
+
+class ConditionalOrderBook:
+    """
+    Sorted per-symbol trigger indexes for conditional orders
+
+    Conditions fire when the price crosses their trigger. A condition whose
+    trigger is already passed when it is added stays disarmed until the price
+    is back on the other side, so a stale condition never fires on the first
+    tick. Each watched symbol has a min-heap of armed 'above' triggers, a
+    max-heap of armed 'below' triggers and the mirror heaps of disarmed ones,
+    so a price tick pops exactly the k crossed triggers in O(log n + k) and
+    leaves the dormant ones untouched.
+    """
+    def __init__(self):
+        self._above = {}  # symbol -> min-heap of (trigger_price, seq, cond_id)
+        self._below = {}  # symbol -> min-heap of (-trigger_price, seq, cond_id)
+        self._above_disarmed = {}  # symbol -> min-heap of (-trigger_price, seq, cond_id), armed once price < trigger
+        self._below_disarmed = {}  # symbol -> min-heap of (trigger_price, seq, cond_id), armed once price > trigger
+        self._unplaced = {}  # symbol -> [(cond_id, condition, trigger_price)] waiting for a first price
+        self._live = set()
+        self._seq = itertools.count()
+        self.armed = []  # Conditions armed since the caller last cleared it
+
+    def add(self, cond_id, symbol, condition, trigger_price, armed=None):
+        """
+        Args:
+            armed: Whether the price was on the near side of the trigger when
+                the condition was added, None if unknown: decided on the next tick
+        """
+        self._live.add(cond_id)
+        if armed is None:
+            self._unplaced.setdefault(symbol, []).append((cond_id, condition, trigger_price))
+        elif condition == 'ABOVE':
+            if armed:
+                heappush(self._above.setdefault(symbol, []), (trigger_price, next(self._seq), cond_id))
+            else:
+                heappush(self._above_disarmed.setdefault(symbol, []), (-trigger_price, next(self._seq), cond_id))
+        else:
+            if armed:
+                heappush(self._below.setdefault(symbol, []), (-trigger_price, next(self._seq), cond_id))
+            else:
+                heappush(self._below_disarmed.setdefault(symbol, []), (trigger_price, next(self._seq), cond_id))
+
+    def remove(self, cond_id):
+        # Lazy deletion: dropped when it reaches the top of its heap
+        self._live.discard(cond_id)
+
+    def on_price(self, symbol, price):
+        """Feed a price tick, returns ids of the conditions whose trigger it crossed"""
+        for cond_id, condition, trigger_price in self._unplaced.pop(symbol, ()):
+            if cond_id in self._live:
+                armed = trigger_price > price if condition == 'ABOVE' else trigger_price < price
+                self.add(cond_id, symbol, condition, trigger_price, armed)
+                if armed:
+                    self.armed.append(cond_id)
+        above_disarmed = self._above_disarmed.get(symbol)
+        while above_disarmed and -above_disarmed[0][0] > price:
+            trigger_price, _, cond_id = heappop(above_disarmed)
+            if cond_id in self._live:
+                heappush(self._above.setdefault(symbol, []), (-trigger_price, next(self._seq), cond_id))
+                self.armed.append(cond_id)
+        below_disarmed = self._below_disarmed.get(symbol)
+        while below_disarmed and below_disarmed[0][0] < price:
+            trigger_price, _, cond_id = heappop(below_disarmed)
+            if cond_id in self._live:
+                heappush(self._below.setdefault(symbol, []), (-trigger_price, next(self._seq), cond_id))
+                self.armed.append(cond_id)
+
+        triggered = []
+        above = self._above.get(symbol)
+        while above and above[0][0] <= price:
+            cond_id = heappop(above)[2]
+            if cond_id in self._live:
+                self._live.remove(cond_id)
+                triggered.append(cond_id)
+        below = self._below.get(symbol)
+        while below and -below[0][0] >= price:
+            cond_id = heappop(below)[2]
+            if cond_id in self._live:
+                self._live.remove(cond_id)
+                triggered.append(cond_id)
+        return triggered
+
+    def symbols(self):
+        """Symbols with at least one indexed trigger"""
+        indexes = (self._above, self._below, self._above_disarmed, self._below_disarmed, self._unplaced)
+        return {symbol for index in indexes for symbol, heap in index.items() if heap}
+
+    def __len__(self):
+        return len(self._live)
+
+
+class ConditionalOrders(MarketOrders, LimitOrders):
+    def __init__(self, state_file=CONDITIONS_FILE):
+        super().__init__()
+        logging.info("ConditionalOrders initialized for Futures trading")
+        self.state_file = state_file
+        self.conditional_orders = {}  # All conditions by id, persisted to state_file
+        self.book = ConditionalOrderBook()
+        self._subscribed = set()
+        self._running = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._version = 0  # Bumped on every change of the conditions
+        self._saved_version = 0
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='conditional')
+        self._stop = register_stop_event(threading.Event())  # Set by stop_all_workers, no more triggers fire
+        self._load()
+
+    @timed_order('conditional')
+    def add_conditional_order(self, watch_symbol, condition, trigger_price, symbol, side, quantity, order_type='MARKET', price=None):
+        """
+        Add a dormant conditional order: when watch_symbol crosses trigger_price,
+        place an order on symbol
+
+        Args:
+            watch_symbol: Symbol whose price is watched (e.g., 'ETHUSDT')
+            condition: 'ABOVE' fires when price rises to trigger_price, 'BELOW' when it falls to it.
+                A trigger already passed when the condition is added waits for the
+                price to come back and cross it
+            trigger_price: Price level of the condition
+            symbol: Symbol to trade when triggered (e.g., 'BTCUSDT')
+            side: 'BUY' or 'SELL'
+            quantity: Amount to trade
+            order_type: 'MARKET' or 'LIMIT'
+            price: Limit price, required for LIMIT orders
+        """
+        try:
+            if not validate_positive_number(trigger_price, "trigger_price"):
+                return None
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if order_type.upper() == 'LIMIT' and not validate_positive_number(price, "price"):
+                return None
+            if not validate_symbol(self.client, watch_symbol):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            if condition.upper() not in ['ABOVE', 'BELOW']:
+                logging.error("Condition must be 'ABOVE' or 'BELOW'")
+                return None
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+
+            # Reference for the crossing, unknown if the price cannot be fetched
+            reference_price = self.get_current_price(watch_symbol)
+
+            with self._lock:
+                seq = len(self.conditional_orders) + 1
+                while f"COND_{int(time.time())}_{seq}" in self.conditional_orders:
+                    seq += 1  # Finished conditions were pruned
+                cond_id = f"COND_{int(time.time())}_{seq}"
+                armed = None
+                if reference_price:
+                    armed = trigger_price > reference_price if condition.upper() == 'ABOVE' else trigger_price < reference_price
+                cond = {
+                    'cond_id': cond_id,
+                    'watch_symbol': watch_symbol.upper(),
+                    'condition': condition.upper(),
+                    'trigger_price': trigger_price,
+                    'symbol': symbol.upper(),
+                    'side': side.upper(),
+                    'quantity': quantity,
+                    'order_type': order_type.upper(),
+                    'price': price,
+                    'status': 'PENDING',
+                    'armed': armed,
+                    'created_time': time.time(),
+                    'finished_time': None,
+                    'triggered_price': None,
+                    'order_id': None
+                }
+                self.conditional_orders[cond_id] = cond
+                self.book.add(cond_id, cond['watch_symbol'], cond['condition'], trigger_price, armed)
+                self._version += 1
+            self._flush()
+
+            if self._running:
+                self._subscribe(cond['watch_symbol'])
+
+            logging.info(f"Conditional order {cond_id} added: if {watch_symbol.upper()} {condition.upper()} {trigger_price} then {side.upper()} {quantity} {symbol.upper()}")
+            return cond
+
+        except Exception as e:
+            logging.error(f"Error adding conditional order: {e}")
+            return None
+
+    def cancel_conditional_order(self, cond_id):
+        """Cancel a pending conditional order"""
+        with self._lock:
+            cond = self.conditional_orders.get(cond_id)
+            if not cond or cond['status'] != 'PENDING':
+                logging.warning(f"Conditional order {cond_id} not found or not pending")
+                return False
+            self.book.remove(cond_id)
+            cond['status'] = 'CANCELLED'
+            cond['finished_time'] = time.time()
+            self._version += 1
+        self._flush()
+        logging.info(f"Conditional order {cond_id} cancelled")
+        return True
+
+    def get_pending_conditional_orders(self):
+        """Get all conditional orders waiting for their trigger"""
+        return {k: v for k, v in self.conditional_orders.items() if v['status'] == 'PENDING'}
+
+    def start(self):
+        """Start evaluating pending conditions on the price stream"""
+        self._running = True
+        for symbol in self.book.symbols():
+            self._subscribe(symbol)
+        logging.info(f"Conditional order engine started with {len(self.book)} pending conditions")
+
+    def _subscribe(self, symbol):
+        if symbol not in self._subscribed:
+            self._subscribed.add(symbol)
+            get_market_stream().on_trade(symbol, self.on_price)
+
+    def on_price(self, symbol, price, quantity=None, trade_time=None):
+        """Feed a price tick and place the orders of satisfied conditions"""
+        if self._stop.is_set():
+            return []
+        with self._lock:
+            triggered = self.book.on_price(symbol, price)
+            armed, self.book.armed = self.book.armed, []
+            for cond_id in armed:
+                self.conditional_orders[cond_id]['armed'] = True
+            fired = []
+            for cond_id in triggered:
+                cond = self.conditional_orders[cond_id]
+                cond['status'] = 'TRIGGERED'
+                cond['triggered_price'] = price
+                cond['finished_time'] = time.time()
+                fired.append(cond)
+            if armed or triggered:
+                self._version += 1
+
+        # State is written on the executor, not on the tick thread
+        if armed and not triggered:
+            self._executor.submit(self._flush)
+        for cond in fired:
+            logging.info(f"Conditional order {cond['cond_id']} triggered: {symbol} at {price}")
+            self._executor.submit(self._fire_order, cond)
+        return triggered
+
+    def _fire_order(self, cond):
+        """Place the order of a triggered condition through the regular order path"""
+        try:
+            # Persist the trigger before sending, so a restart never fires the same condition twice
+            self._flush()
+            if cond['order_type'] == 'MARKET':
+                if cond['side'] == 'BUY':
+                    order = self.place_buy_order(cond['symbol'], cond['quantity'])
+                else:
+                    order = self.place_sell_order(cond['symbol'], cond['quantity'])
+            else:  # LIMIT
+                if cond['side'] == 'BUY':
+                    order = self.place_limit_buy_order(cond['symbol'], cond['quantity'], cond['price'])
+                else:
+                    order = self.place_limit_sell_order(cond['symbol'], cond['quantity'], cond['price'])
+        except Exception as e:
+            logging.error(f"Error placing conditional order {cond['cond_id']}: {e}")
+            order = None
+
+        with self._lock:
+            cond['status'] = 'EXECUTED' if order else 'FAILED'
+            cond['order_id'] = order.get('orderId') if order else None
+            self._version += 1
+        self._flush()
+        return order
+
+    def _load(self):
+        """Load persisted conditions and rebuild the trigger indexes"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                self.conditional_orders = json.load(f)
+            for cond_id, cond in self.conditional_orders.items():
+                if cond['status'] == 'PENDING':
+                    self.book.add(cond_id, cond['watch_symbol'], cond['condition'], cond['trigger_price'], cond.get('armed'))
+            logging.info(f"Loaded {len(self.book)} pending conditional orders from {self.state_file}")
+        except Exception as e:
+            logging.error(f"Error loading conditional orders from {self.state_file}: {e}")
+
+    def _flush(self):
+        """
+        Atomically write all conditions to the state file if they changed
+
+        Finished conditions older than FINISHED_RETENTION_SECONDS are pruned
+        first. Safe from any thread; concurrent callers write once.
+        """
+        with self._save_lock:
+            with self._lock:
+                if self._saved_version == self._version:
+                    return
+                cutoff = time.time() - FINISHED_RETENTION_SECONDS
+                for cond_id, cond in list(self.conditional_orders.items()):
+                    if cond['status'] != 'PENDING' and (cond.get('finished_time') or cond['created_time']) < cutoff:
+                        del self.conditional_orders[cond_id]
+                version = self._version
+                state = json.dumps(self.conditional_orders)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(state)
+            os.replace(tmp_file, self.state_file)
+            self._saved_version = version
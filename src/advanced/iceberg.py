@@ -0,0 +1,229 @@
+from src.limit_orders import LimitOrders
+from src.bot import register_stop_event, make_client_order_id
+from src.validator import validate_positive_number, validate_symbol
+from src.events import order_events, FILL, CANCEL, REJECT
+from src.streams import get_user_stream
+from array import array
+from src.metrics import timed_order
+import itertools
+import logging
+import threading
+import time
+
+class IcebergState:
+    """Compact state of one iceberg parent order"""
+    __slots__ = (
+        'iceberg_id', 'symbol', 'side', 'total_quantity', 'visible_quantity', 'price',
+        'filled_quantity', 'slice_client_id', 'slice_order_id', 'slice_quantity',
+        'slice_filled', 'slices_placed', 'status', 'created_time', 'refill_started'
+    )
+
+    def __init__(self, iceberg_id, symbol, side, total_quantity, visible_quantity, price):
+        self.iceberg_id = iceberg_id
+        self.symbol = symbol
+        self.side = side
+        self.total_quantity = total_quantity
+        self.visible_quantity = visible_quantity
+        self.price = price
+        self.filled_quantity = 0.0  # Filled by completed slices
+        self.slice_client_id = None
+        self.slice_order_id = None
+        self.slice_quantity = 0.0
+        self.slice_filled = 0.0
+        self.slices_placed = 0
+        self.status = 'ACTIVE'
+        self.created_time = time.time()
+        self.refill_started = None  # Time of the fill event that triggered the pending refill
+
+    def to_dict(self):
+        status = {name: getattr(self, name) for name in self.__slots__ if name != 'refill_started'}
+        status['total_filled'] = self.filled_quantity + self.slice_filled
+        return status
+
+
+class IcebergOrders(LimitOrders):
+    def __init__(self, bus=order_events):
+        super().__init__()
+        logging.info("IcebergOrders initialized for Futures trading")
+        self.active_iceberg_orders = {}  # iceberg_id -> IcebergState
+        self.use_user_stream = True  # Set False when fills are published into the bus by something else
+        self.refill_latencies = array('d')  # Seconds from slice fill event to next slice acknowledgement
+        self._by_client_id = {}  # Working slice client order id -> IcebergState
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = register_stop_event(threading.Event())
+        self._subscription = bus.subscribe(f"iceberg-{id(self)}", [FILL, CANCEL, REJECT])
+        self._consumer = None
+
+    @timed_order('iceberg')
+    def place_iceberg_order(self, symbol, side, total_quantity, visible_quantity, price):
+        """
+        Place an iceberg order that only shows visible_quantity on the book
+
+        The next slice is placed as soon as the user-data stream reports the
+        current one filled, until total_quantity is done.
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            side: 'BUY' or 'SELL'
+            total_quantity: Total amount to trade
+            visible_quantity: Size of each slice shown on the book
+            price: Limit price of every slice
+        """
+        try:
+            if not validate_positive_number(total_quantity, "total_quantity"):
+                return None
+            if not validate_positive_number(visible_quantity, "visible_quantity"):
+                return None
+            if not validate_positive_number(price, "price"):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+            if visible_quantity > total_quantity:
+                logging.error(f"Visible quantity {visible_quantity} is above total quantity {total_quantity}")
+                return None
+
+            self._start_consumer()
+
+            iceberg_id = f"ICE_{int(time.time())}_{next(self._ids)}"
+            state = IcebergState(iceberg_id, symbol.upper(), side.upper(), total_quantity, visible_quantity, price)
+            with self._lock:
+                self.active_iceberg_orders[iceberg_id] = state
+
+            if not self._place_slice(state):
+                state.status = 'ERROR'
+                return None
+
+            logging.info(f"Iceberg order initiated: {iceberg_id} {side.upper()} {total_quantity} {symbol.upper()} at {price}, showing {visible_quantity}")
+            return state
+
+        except Exception as e:
+            logging.error(f"Error placing iceberg order: {e}")
+            return None
+
+    def _start_consumer(self):
+        if self._consumer is None:
+            if self.use_user_stream:
+                get_user_stream()
+            self._consumer = threading.Thread(
+                target=self._subscription.run,
+                args=(self._on_event, self._stop),
+                daemon=True,
+                name='iceberg-fills'
+            )
+            self._consumer.start()
+
+    def _place_slice(self, state):
+        """Place the next visible slice of an iceberg"""
+        remaining = state.total_quantity - state.filled_quantity
+        quantity = round(min(state.visible_quantity, remaining), 8)
+        client_id = make_client_order_id(state.iceberg_id, state.slices_placed + 1)
+
+        with self._lock:
+            # Register before sending: the fill can arrive before the REST response
+            state.slice_client_id = client_id
+            state.slice_order_id = None
+            state.slice_quantity = quantity
+            state.slice_filled = 0.0
+            state.slices_placed += 1
+            self._by_client_id[client_id] = state
+
+        try:
+            order = self._create_order(
+                source=state.iceberg_id,
+                newClientOrderId=client_id,
+                symbol=state.symbol,
+                side=state.side,
+                type='LIMIT',
+                timeInForce='GTC',
+                quantity=quantity,
+                price=str(state.price)
+            )
+        except Exception as e:
+            logging.error(f"Iceberg {state.iceberg_id} - Error placing slice {state.slices_placed}: {e}")
+            with self._lock:
+                self._by_client_id.pop(client_id, None)
+            return None
+
+        if state.refill_started is not None:
+            self.refill_latencies.append(time.time() - state.refill_started)
+            state.refill_started = None
+        state.slice_order_id = order.get('orderId')
+        logging.info(f"Iceberg {state.iceberg_id} - Slice {state.slices_placed} placed: {quantity} ({state.slice_order_id})")
+        return order
+
+    def _on_event(self, event):
+        """Handle a fill/cancel/reject event from the order event bus"""
+        if self._stop.is_set():
+            return
+        state = self._by_client_id.get(event.client_order_id)
+        if state is None:
+            return
+
+        if event.event_type == FILL:
+            if event.cum_quantity > state.slice_filled:
+                state.slice_filled = event.cum_quantity
+            if state.slice_filled < state.slice_quantity - 1e-12:
+                return  # Partial fill, slice keeps working
+
+            with self._lock:
+                if self._by_client_id.pop(event.client_order_id, None) is None:
+                    return  # Already handled (REST and stream both report the fill)
+                state.filled_quantity += state.slice_quantity
+                state.slice_filled = 0.0
+
+            if state.filled_quantity >= state.total_quantity - 1e-12:
+                state.status = 'COMPLETED'
+                logging.info(f"Iceberg {state.iceberg_id} completed in {state.slices_placed} slices")
+            elif state.status == 'ACTIVE':
+                state.refill_started = event.ts
+                if not self._place_slice(state):
+                    state.status = 'ERROR'
+        else:  # CANCEL or REJECT of the working slice
+            with self._lock:
+                self._by_client_id.pop(event.client_order_id, None)
+            if state.status == 'ACTIVE':
+                state.status = 'CANCELLED' if event.event_type == CANCEL else 'ERROR'
+                logging.warning(f"Iceberg {state.iceberg_id} slice {event.client_order_id} was {'cancelled' if event.event_type == CANCEL else 'rejected'}, stopping")
+
+    def cancel_iceberg_order(self, iceberg_id):
+        """Cancel an active iceberg order and its working slice"""
+        state = self.active_iceberg_orders.get(iceberg_id)
+        if not state or state.status != 'ACTIVE':
+            logging.warning(f"Iceberg ID {iceberg_id} not found or not active")
+            return False
+        state.status = 'CANCELLED'
+        try:
+            self.client.futures_cancel_order(symbol=state.symbol, origClientOrderId=state.slice_client_id)
+            logging.info(f"Iceberg {iceberg_id} cancelled")
+        except Exception as e:
+            logging.warning(f"Could not cancel iceberg slice {state.slice_client_id} (might be already filled): {e}")
+        return True
+
+    def get_iceberg_status(self, iceberg_id):
+        """Get status of an iceberg order"""
+        state = self.active_iceberg_orders.get(iceberg_id)
+        return state.to_dict() if state else None
+
+    def get_active_iceberg_orders(self):
+        """Get all active iceberg orders"""
+        return {k: v for k, v in self.active_iceberg_orders.items() if v.status == 'ACTIVE'}
+
+    def get_refill_latency_stats(self):
+        """Refill latency percentiles in milliseconds"""
+        latencies = sorted(self.refill_latencies)
+        if not latencies:
+            return None
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+        return {
+            'count': len(latencies),
+            'p50_ms': percentile(50),
+            'p90_ms': percentile(90),
+            'p99_ms': percentile(99),
+            'max_ms': latencies[-1] * 1000
+        }
@@ -1,15 +1,25 @@
 from src.bot import BasicBot
+from src.advanced.stop_limit import stop_limit_price, STOP_LIMIT_BUFFER
 from src.validator import validate_positive_number, validate_symbol
+from src.metrics import timed_order
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import time
 
+# Above this many tracked symbols one all-symbols open-orders request (weight 40)
+# is cheaper than a per-symbol request (weight 1 each)
+ALL_SYMBOLS_THRESHOLD = 5
+# Binance accepts at most 10 order ids per batch cancel
+MAX_BATCH_CANCEL = 10
+
 class OCOOrders(BasicBot):
     def __init__(self):
         super().__init__()
         logging.info("OCOOrders initialized for Futures trading")
         self.active_oco_orders = {}  # Track OCO order pairs
 
-    def place_oco_order(self, symbol, quantity, take_profit_price, stop_loss_price, side='SELL'):
+    @timed_order('oco')
+    def place_oco_order(self, symbol, quantity, take_profit_price, stop_loss_price, side='SELL', stop_limit_buffer=STOP_LIMIT_BUFFER):
         """
         Place OCO (One-Cancels-Other) order: Take-profit + Stop-loss
         When one executes, the other is automatically cancelled
@@ -20,6 +30,7 @@ class OCOOrders(BasicBot):
             take_profit_price: Price for take-profit order
             stop_loss_price: Price for stop-loss order
             side: 'SELL' for closing long position, 'BUY' for closing short position
+            stop_limit_buffer: Stop-loss limit price distance beyond the trigger, as a fraction
         """
         try:
             # Validate inputs
@@ -51,7 +62,8 @@ class OCOOrders(BasicBot):
                         return None
 
             # Place take-profit order
-            take_profit_order = self.client.futures_create_order(
+            take_profit_order = self._create_order(
+                source='OCO',
                 symbol=symbol.upper(),
                 side=side.upper(),
                 type='TAKE_PROFIT',
@@ -61,26 +73,27 @@ class OCOOrders(BasicBot):
                 stopPrice=str(take_profit_price)
             )
             
-            logging.info(f"Take-profit order placed: {take_profit_order}")
+            logging.info("Take-profit order placed: %s", take_profit_order)
             
             # Small delay to avoid rate limiting
             time.sleep(0.1)
             
             # Place stop-loss order
-            stop_loss_order = self.client.futures_create_order(
+            stop_loss_order = self._create_order(
+                source='OCO',
                 symbol=symbol.upper(),
                 side=side.upper(),
                 type='STOP',
                 timeInForce='GTC',
                 quantity=quantity,
-                price=str(stop_loss_price * 0.995 if side.upper() == 'SELL' else stop_loss_price * 1.005),
+                price=str(stop_limit_price(stop_loss_price, side, stop_limit_buffer)),
                 stopPrice=str(stop_loss_price)
             )
             
-            logging.info(f"Stop-loss order placed: {stop_loss_order}")
+            logging.info("Stop-loss order placed: %s", stop_loss_order)
             
             # Store OCO pair for monitoring
-            oco_id = f"OCO_{int(time.time())}"
+            oco_id = f"OCO_{int(time.time())}_{take_profit_order['orderId']}"  # Unique when many OCOs share a second
             self.active_oco_orders[oco_id] = {
                 'symbol': symbol.upper(),
                 'take_profit_order_id': take_profit_order['orderId'],
@@ -131,7 +144,7 @@ class OCOOrders(BasicBot):
             if tp_order['status'] == 'FILLED':
                 try:
                     cancel_result = self.client.futures_cancel_order(symbol=symbol, orderId=sl_order_id)
-                    logging.info(f"Take-profit filled, cancelled stop-loss order: {cancel_result}")
+                    logging.info("Take-profit filled, cancelled stop-loss order: %s", cancel_result)
                     del self.active_oco_orders[oco_id]
                     return {'filled': 'take_profit', 'cancelled': 'stop_loss', 'filled_order': tp_order}
                 except Exception as e:
@@ -141,7 +154,7 @@ class OCOOrders(BasicBot):
             elif sl_order['status'] == 'FILLED':
                 try:
                     cancel_result = self.client.futures_cancel_order(symbol=symbol, orderId=tp_order_id)
-                    logging.info(f"Stop-loss filled, cancelled take-profit order: {cancel_result}")
+                    logging.info("Stop-loss filled, cancelled take-profit order: %s", cancel_result)
                     del self.active_oco_orders[oco_id]
                     return {'filled': 'stop_loss', 'cancelled': 'take_profit', 'filled_order': sl_order}
                 except Exception as e:
@@ -153,6 +166,129 @@ class OCOOrders(BasicBot):
             logging.error(f"Error checking OCO status: {e}")
             return None
 
+    @timed_order('oco_reconcile')
+    def reconcile_oco_orders(self, max_workers=8):
+        """
+        Check every tracked OCO pair against one open-orders snapshot and cancel
+        the sibling of any leg that filled
+
+        Costs one open-orders request per symbol (or a single request for all
+        symbols), one order lookup per leg that left the book (only a FILLED
+        leg cancels its sibling; a cancelled or expired one is reported as
+        broken and its sibling kept) and one batch cancel per 10 triggered
+        pairs, instead of two order lookups per OCO.
+
+        Args:
+            max_workers: Number of batch cancels to send concurrently
+        """
+        try:
+            if not self.active_oco_orders:
+                return {'triggered': [], 'closed': [], 'broken': [], 'active': 0, 'requests': 0}
+
+            symbols = {oco['symbol'] for oco in self.active_oco_orders.values()}
+            open_ids, requests_made = self._snapshot_open_order_ids(symbols)
+
+            # Single pass over tracked OCOs: decide what to cancel
+            triggered = []
+            closed = []
+            broken = []  # A leg cancelled or expired unfilled, the sibling was kept
+            cancels = {}  # symbol -> [order ids to cancel]
+            for oco_id, oco_data in list(self.active_oco_orders.items()):
+                symbol_open = open_ids.get(oco_data['symbol'], set())
+                tp_open = oco_data['take_profit_order_id'] in symbol_open
+                sl_open = oco_data['stop_loss_order_id'] in symbol_open
+
+                if tp_open and sl_open:
+                    continue
+
+                # A leg that left the book only closes the position if it filled;
+                # a cancelled or expired one leaves its sibling as the only exit
+                gone = 'stop_loss' if tp_open else 'take_profit' if sl_open else None
+                if gone:
+                    status = self._final_status(oco_data['symbol'], oco_data[f"{gone}_order_id"])
+                    requests_made += 1
+                    if status is None:
+                        continue  # Unknown, look again on the next reconcile
+                    if status != 'FILLED':
+                        logging.warning(f"OCO {oco_id} {gone} leg ended {status} without filling, "
+                                        f"{'take_profit' if tp_open else 'stop_loss'} leg left on the book")
+                        broken.append({'oco_id': oco_id, 'ended': gone, 'status': status})
+                        del self.active_oco_orders[oco_id]
+                        continue
+
+                if tp_open:
+                    # Stop-loss filled, take-profit must go
+                    cancels.setdefault(oco_data['symbol'], []).append(oco_data['take_profit_order_id'])
+                    triggered.append({'oco_id': oco_id, 'filled': 'stop_loss', 'cancelled': 'take_profit'})
+                elif sl_open:
+                    cancels.setdefault(oco_data['symbol'], []).append(oco_data['stop_loss_order_id'])
+                    triggered.append({'oco_id': oco_id, 'filled': 'take_profit', 'cancelled': 'stop_loss'})
+                else:
+                    closed.append(oco_id)
+
+                del self.active_oco_orders[oco_id]
+
+            batches = [
+                (symbol, order_ids[i:i + MAX_BATCH_CANCEL])
+                for symbol, order_ids in cancels.items()
+                for i in range(0, len(order_ids), MAX_BATCH_CANCEL)
+            ]
+            if batches:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                    list(executor.map(lambda batch: self._cancel_batch(*batch), batches))
+                requests_made += len(batches)
+
+            logging.info(
+                f"OCO reconcile: {len(triggered)} triggered, {len(closed)} closed, {len(broken)} broken, "
+                f"{len(self.active_oco_orders)} active, {requests_made} requests"
+            )
+            return {
+                'triggered': triggered,
+                'closed': closed,
+                'broken': broken,
+                'active': len(self.active_oco_orders),
+                'requests': requests_made
+            }
+
+        except Exception as e:
+            logging.error(f"Error reconciling OCO orders: {e}")
+            return None
+
+    def _final_status(self, symbol, order_id):
+        """Status of an order that left the book, None if it could not be fetched"""
+        try:
+            return self.client.futures_get_order(symbol=symbol, orderId=order_id)['status']
+        except Exception as e:
+            logging.error(f"Error fetching OCO leg {order_id} on {symbol}: {e}")
+            return None
+
+    def _snapshot_open_order_ids(self, symbols):
+        """Fetch open order ids grouped by symbol, returns (ids_by_symbol, request_count)"""
+        if len(symbols) > ALL_SYMBOLS_THRESHOLD:
+            snapshots = [self.client.futures_get_open_orders()]
+        else:
+            snapshots = [self.client.futures_get_open_orders(symbol=symbol) for symbol in symbols]
+
+        open_ids = {}
+        for orders in snapshots:
+            for order in orders:
+                open_ids.setdefault(order['symbol'], set()).add(order['orderId'])
+        return open_ids, len(snapshots)
+
+    def _cancel_batch(self, symbol, order_ids):
+        """Cancel up to 10 orders of one symbol in a single request"""
+        try:
+            results = self.client.futures_cancel_orders(symbol=symbol, orderidlist=order_ids)
+            for result in results:
+                if 'code' in result:
+                    logging.warning(f"Could not cancel OCO sibling on {symbol} (might be already filled): {result.get('msg')}")
+                else:
+                    logging.info(f"Cancelled OCO sibling order {result.get('orderId')} on {symbol}")
+            return results
+        except Exception as e:
+            logging.error(f"Error batch cancelling orders {order_ids} on {symbol}: {e}")
+            return None
+
     def cancel_oco_orders(self, oco_id):
         """Cancel both orders in an OCO pair"""
         try:
@@ -172,7 +308,7 @@ class OCOOrders(BasicBot):
                     orderId=oco_data['take_profit_order_id']
                 )
                 results.append(('take_profit', tp_cancel))
-                logging.info(f"Cancelled take-profit order: {tp_cancel}")
+                logging.info("Cancelled take-profit order: %s", tp_cancel)
             except Exception as e:
                 logging.warning(f"Could not cancel take-profit order: {e}")
                 
@@ -183,7 +319,7 @@ class OCOOrders(BasicBot):
                     orderId=oco_data['stop_loss_order_id']
                 )
                 results.append(('stop_loss', sl_cancel))
-                logging.info(f"Cancelled stop-loss order: {sl_cancel}")
+                logging.info("Cancelled stop-loss order: %s", sl_cancel)
             except Exception as e:
                 logging.warning(f"Could not cancel stop-loss order: {e}")
             
@@ -0,0 +1,281 @@
+from src.advanced.twa import TWAPOrders
+from src.bot import register_stop_event
+from src.validator import validate_positive_number, validate_symbol, get_symbol_info
+from src.streams import get_market_stream
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from datetime import datetime
+from array import array
+from src.metrics import timed_order
+import itertools
+import logging
+import math
+import threading
+import time
+
+class VolumeWindow:
+    """
+    Rolling traded volume over the last window_seconds
+
+    Volume is summed into a fixed ring of time buckets with a running total, so
+    adding a trade and reading the window volume are O(1) amortized.
+    """
+    def __init__(self, window_seconds=60, bucket_seconds=1):
+        self.bucket_ms = max(1, int(bucket_seconds * 1000))
+        self.num_buckets = max(1, int(window_seconds / bucket_seconds))
+        self.buckets = array('d', [0.0]) * self.num_buckets
+        self.total = 0.0
+        self.head = None  # Absolute index of the newest bucket
+
+    def _advance(self, ts_ms):
+        index = ts_ms // self.bucket_ms
+        if self.head is None:
+            self.head = index
+        elif index > self.head:
+            if index - self.head >= self.num_buckets:
+                for slot in range(self.num_buckets):
+                    self.buckets[slot] = 0.0
+                self.total = 0.0
+            else:
+                for absolute in range(self.head + 1, index + 1):
+                    slot = absolute % self.num_buckets
+                    self.total -= self.buckets[slot]
+                    self.buckets[slot] = 0.0
+            self.head = index
+        return index
+
+    def add(self, ts_ms, quantity):
+        """Record traded quantity at ts_ms"""
+        index = self._advance(ts_ms)
+        index = min(index, self.head)
+        if self.head - index >= self.num_buckets:
+            return  # Older than the window
+        self.buckets[index % self.num_buckets] += quantity
+        self.total += quantity
+
+    def volume(self, ts_ms):
+        """Volume traded within the window ending at ts_ms"""
+        self._advance(ts_ms)
+        return max(self.total, 0.0)
+
+
+class POVOrders(TWAPOrders):
+    def __init__(self):
+        super().__init__()
+        logging.info("POVOrders initialized for Futures trading")
+        self.active_pov_orders = {}  # Track POV executions by id
+        self.use_stream = True  # Set False when trades are fed to on_trade externally
+        self._parents_by_symbol = {}  # symbol -> [pov configs]
+        self._market_windows = {}  # symbol -> {window_seconds: VolumeWindow of all traded volume}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='pov')
+        self._stop = register_stop_event(threading.Event())  # Set by stop_all_workers, no more clips are released
+
+    @timed_order('pov')
+    def place_pov_order(self, symbol, total_quantity, side, participation_rate, min_clip, max_clip,
+                        window_seconds=60, order_type='MARKET', max_duration_minutes=None):
+        """
+        Place POV (Percentage of Volume) order
+        Releases child orders so our share of traded volume tracks participation_rate
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            total_quantity: Total amount to trade
+            side: 'BUY' or 'SELL'
+            participation_rate: Target share of market volume in percent (10 = 10%)
+            min_clip: Smallest child order to release
+            max_clip: Largest child order to release
+            window_seconds: Rolling window the participation is measured over
+            order_type: 'MARKET' or 'LIMIT' child orders
+            max_duration_minutes: Stop releasing after this long (default: no limit)
+        """
+        try:
+            if not validate_positive_number(total_quantity, "total_quantity"):
+                return None
+            if not validate_positive_number(participation_rate, "participation_rate"):
+                return None
+            if not validate_positive_number(min_clip, "min_clip"):
+                return None
+            if not validate_positive_number(max_clip, "max_clip"):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+            if participation_rate >= 100:
+                logging.error("Participation rate must be below 100%")
+                return None
+            if min_clip > max_clip:
+                logging.error(f"Min clip {min_clip} is above max clip {max_clip}")
+                return None
+
+            min_quantity = self.get_min_quantity(symbol)
+            if min_quantity and min_clip < min_quantity:
+                logging.error(f"Min clip {min_clip} is below minimum {min_quantity}")
+                return None
+
+            symbol = symbol.upper()
+            pov_id = f"POV_{int(time.time())}_{next(self._ids)}"
+            pov_config = {
+                'pov_id': pov_id,
+                'symbol': symbol,
+                'side': side.upper(),
+                'total_quantity': total_quantity,
+                'participation_rate': participation_rate,
+                'min_clip': min_clip,
+                'max_clip': max_clip,
+                'window_seconds': window_seconds,
+                'order_type': order_type.upper(),
+                'max_duration_minutes': max_duration_minutes,
+                'step_size': self.get_step_size(symbol),
+                'released_quantity': 0,
+                'total_executed': 0,
+                'chunks_executed': 0,
+                'in_flight': False,
+                'start_time': datetime.now(),
+                'status': 'ACTIVE',
+                'errors': [],
+                'window': VolumeWindow(window_seconds)  # Our own released volume
+            }
+
+            with self._lock:
+                self.active_pov_orders[pov_id] = pov_config
+                self._parents_by_symbol.setdefault(symbol, []).append(pov_config)
+                new_symbol = symbol not in self._market_windows
+                # Parents with different windows compare against market volume over their own window
+                windows = self._market_windows.setdefault(symbol, {})
+                if window_seconds not in windows:
+                    windows[window_seconds] = VolumeWindow(window_seconds)
+
+            if new_symbol and self.use_stream:
+                get_market_stream().on_trade(symbol, self.on_trade)
+
+            logging.info(f"POV order initiated: {pov_id}")
+            logging.info(f"Total: {total_quantity}, Participation: {participation_rate}%, Clips: {min_clip}-{max_clip}, Window: {window_seconds}s")
+            return pov_config
+
+        except Exception as e:
+            logging.error(f"Error initiating POV order: {e}")
+            return None
+
+    def on_trade(self, symbol, price, quantity, trade_time):
+        """Feed one market trade and release child orders that are due"""
+        if self._stop.is_set():
+            return
+        releases = []
+        with self._lock:
+            windows = self._market_windows.get(symbol)
+            if not windows:
+                return
+            market_volumes = {}
+            for window_seconds, market in windows.items():
+                market.add(trade_time, quantity)
+                market_volumes[window_seconds] = market.volume(trade_time)
+
+            for pov_config in list(self._parents_by_symbol.get(symbol, ())):
+                if pov_config['status'] != 'ACTIVE' or pov_config['in_flight']:
+                    continue
+
+                max_duration = pov_config['max_duration_minutes']
+                if max_duration and (datetime.now() - pov_config['start_time']).total_seconds() > max_duration * 60:
+                    self._finish(pov_config, 'EXPIRED')
+                    continue
+
+                step_size = pov_config['step_size']
+                remaining = self._quantize(pov_config['total_quantity'] - pov_config['released_quantity'], step_size)
+                market_volume = market_volumes[pov_config['window_seconds']]
+                allowance = pov_config['participation_rate'] / 100 * market_volume - pov_config['window'].volume(trade_time)
+                clip = self._quantize(min(allowance, pov_config['max_clip'], remaining), step_size)
+                # Release at least min_clip, except for a smaller final remainder
+                final_remainder = clip > 0 and clip == remaining
+                if clip < pov_config['min_clip'] and not final_remainder:
+                    continue
+
+                pov_config['released_quantity'] += clip
+                pov_config['window'].add(trade_time, clip)
+                pov_config['in_flight'] = True
+                releases.append((pov_config, clip))
+
+        for pov_config, clip in releases:
+            self._executor.submit(self._release_child, pov_config, clip, price)
+
+    def _release_child(self, pov_config, clip, price):
+        """Send one child order through the TWAP chunk helpers"""
+        pov_id = pov_config['pov_id']
+        symbol = pov_config['symbol']
+        side = pov_config['side']
+        try:
+            if pov_config['order_type'] == 'MARKET':
+                order = self._place_market_chunk(symbol, clip, side, source=pov_id)
+            else:  # LIMIT
+                limit_price = self.quantize_price(symbol, price * 1.001 if side == 'BUY' else price * 0.999)
+                order = self._place_limit_chunk(symbol, clip, side, limit_price, source=pov_id)
+        except Exception as e:
+            logging.error(f"POV {pov_id} - Error releasing child order: {e}")
+            order = None
+
+        with self._lock:
+            pov_config['in_flight'] = False
+            if order:
+                pov_config['chunks_executed'] += 1
+                pov_config['total_executed'] += float(order.get('executedQty') or clip)
+                logging.info(f"POV {pov_id} - Child {pov_config['chunks_executed']} executed: {clip} ({order.get('orderId')})")
+                if pov_config['released_quantity'] >= pov_config['total_quantity'] - pov_config['step_size'] / 2:
+                    self._finish(pov_config, 'COMPLETED')
+            else:
+                # Give the quantity back so a later trade can release it again
+                pov_config['released_quantity'] -= clip
+                error_msg = f"Child order of {clip} failed to execute"
+                pov_config['errors'].append(error_msg)
+                logging.error(f"POV {pov_id} - {error_msg}")
+
+    def _finish(self, pov_config, status):
+        pov_config['status'] = status
+        pov_config['end_time'] = datetime.now()
+        self._parents_by_symbol[pov_config['symbol']].remove(pov_config)
+        logging.info(f"POV {pov_config['pov_id']} {status.lower()}: {pov_config['total_executed']}/{pov_config['total_quantity']} in {pov_config['chunks_executed']} child orders")
+
+    @staticmethod
+    def _quantize(quantity, step_size):
+        """Round quantity down to the symbol's step size"""
+        if quantity <= 0:
+            return 0
+        decimals = max(0, -Decimal(str(step_size)).as_tuple().exponent)
+        return round(math.floor(quantity / step_size + 1e-9) * step_size, decimals)
+
+    def get_step_size(self, symbol):
+        """Get quantity step size for a symbol"""
+        step_size = 0.001
+        try:
+            symbol_info = get_symbol_info(self.client, symbol)
+            if symbol_info:
+                step_size = symbol_info.step_size
+        except Exception as e:
+            logging.error(f"Error getting step size, using {step_size}: {e}")
+        return step_size
+
+    def get_pov_status(self, pov_id):
+        """Get status of a POV order"""
+        if pov_id not in self.active_pov_orders:
+            return None
+        status = {k: v for k, v in self.active_pov_orders[pov_id].items() if k != 'window'}
+        market = self._market_windows.get(status['symbol'], {}).get(status['window_seconds'])
+        status['window_market_volume'] = market.total if market else 0
+        return status
+
+    def cancel_pov_order(self, pov_id):
+        """Cancel an active POV order"""
+        with self._lock:
+            pov_config = self.active_pov_orders.get(pov_id)
+            if not pov_config or pov_config['status'] != 'ACTIVE':
+                logging.warning(f"POV ID {pov_id} not found or not active")
+                return False
+            self._finish(pov_config, 'CANCELLED')
+        return True
+
+    def get_active_pov_orders(self):
+        """Get all active POV orders"""
+        return {k: v for k, v in self.active_pov_orders.items() if v['status'] == 'ACTIVE' or v['in_flight']}
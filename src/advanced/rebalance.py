@@ -0,0 +1,191 @@
+from src.market_orders import MarketOrders
+from src.limit_orders import LimitOrders
+from src.validator import get_exchange_info
+from src.models import fetch_account
+from src.metrics import timed_order
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import logging
+import time
+
+def compute_deltas(prices, positions, weights, capital, step_sizes, min_notionals):
+    """
+    Orders that move positions to target weights, vectorized over all symbols
+
+    Args:
+        prices: Last prices
+        positions: Current signed position amounts
+        weights: Target signed weights of capital
+        capital: Notional the weights apply to
+        step_sizes: LOT_SIZE steps
+        min_notionals: Minimum order notionals
+
+    Returns:
+        (signed order quantities, order notionals, mask of orders to send),
+        quantities rounded toward zero to the step size
+    """
+    targets = weights * capital / prices
+    deltas = targets - positions
+    steps = np.floor(np.abs(deltas) / step_sizes + 1e-9)
+    quantities = np.sign(deltas) * steps * step_sizes
+    notionals = np.abs(quantities) * prices
+    send = (steps > 0) & (notionals >= min_notionals)
+    return quantities, notionals, send
+
+
+class Rebalancer(MarketOrders, LimitOrders):
+    """
+    Rebalances a basket of perpetuals to target weights
+
+    Positions, prices and account equity are read in one snapshot (all
+    symbols per request), the deltas are computed for every symbol at once
+    and the orders go out in one concurrent wave through the regular market
+    and limit order paths.
+    """
+    def __init__(self):
+        super().__init__()
+        logging.info("Rebalancer initialized for Futures trading")
+
+    def snapshot(self):
+        """Fetch all positions, prices and the account in parallel, returns (positions, prices, account)"""
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            positions = executor.submit(self.client.futures_position_information)
+            tickers = executor.submit(self.client.futures_symbol_ticker)
+            account = executor.submit(fetch_account, self.client)
+            net = {}
+            for p in positions.result():
+                # Hedge mode reports a LONG and a SHORT entry per symbol, rebalance the net amount
+                net[p['symbol']] = net.get(p['symbol'], 0.0) + float(p.get('positionAmt') or 0)
+            prices = {t['symbol']: float(t['price']) for t in tickers.result()}
+            return net, prices, account.result()
+
+    def plan_rebalance(self, targets, capital=None, close_unlisted=False):
+        """
+        Compute the orders of a rebalance without sending them
+
+        Args:
+            targets: Target weights by symbol, negative for shorts
+            capital: Notional the weights apply to (default: account margin balance)
+            close_unlisted: Also close positions in symbols not in targets
+
+        Returns:
+            Plan dict with the capital and one row per symbol, None on error
+        """
+        try:
+            targets = {symbol.upper(): float(weight) for symbol, weight in targets.items()}
+            positions, prices, account = self.snapshot()
+            info = get_exchange_info(self.client)
+            if capital is None:
+                capital = account.total_margin_balance
+            if not capital or capital <= 0:
+                logging.error(f"Invalid capital for rebalance: {capital}")
+                return None
+
+            if close_unlisted:
+                for symbol, amount in positions.items():
+                    if amount and symbol not in targets:
+                        targets[symbol] = 0.0
+            symbols = sorted(targets)
+            unknown = [s for s in symbols if info.get(s) is None or s not in prices]
+            if unknown:
+                logging.error(f"Unknown symbols in rebalance targets: {', '.join(unknown)}")
+                return None
+            not_trading = [s for s in symbols if not info.get(s).trading]
+            if not_trading:
+                logging.error(f"Symbols not trading: {', '.join(not_trading)}")
+                return None
+
+            gross = sum(abs(w) for w in targets.values())
+            if gross > 1:
+                logging.warning(f"Target weights add up to {gross:.2f}x capital, the rebalance uses leverage")
+
+            rules = [info.get(s) for s in symbols]
+            price_array = np.array([prices[s] for s in symbols])
+            position_array = np.array([positions.get(s, 0.0) for s in symbols])
+            weight_array = np.array([targets[s] for s in symbols])
+            quantities, notionals, send = compute_deltas(
+                price_array, position_array, weight_array, capital,
+                np.array([r.step_size for r in rules]), np.array([r.min_notional for r in rules])
+            )
+
+            rows = []
+            for symbol, symbol_info, position, weight, quantity, notional, send_order in zip(
+                symbols, rules, position_array.tolist(), weight_array.tolist(),
+                quantities.tolist(), notionals.tolist(), send.tolist()
+            ):
+                rows.append({
+                    'symbol': symbol,
+                    'price': prices[symbol],
+                    'position': position,
+                    'weight': weight,
+                    'target': weight * capital / prices[symbol],
+                    'quantity': round(abs(quantity), symbol_info.quantity_decimals),
+                    'side': 'BUY' if quantity > 0 else 'SELL',
+                    'notional': notional,
+                    'send': send_order
+                })
+            logging.info(f"Rebalance plan: {int(send.sum())} orders across {len(symbols)} symbols, capital {capital}")
+            return {'capital': capital, 'rows': rows, 'orders': int(send.sum()), 'turnover': float(notionals[send].sum())}
+
+        except Exception as e:
+            logging.error(f"Error planning rebalance: {e}")
+            return None
+
+    @timed_order('rebalance')
+    def rebalance(self, targets, capital=None, order_type='MARKET', limit_offset=0.001, close_unlisted=False, max_workers=16, dry_run=False):
+        """
+        Rebalance positions to target weights
+
+        Args:
+            targets: Target weights by symbol, negative for shorts
+            capital: Notional the weights apply to (default: account margin balance)
+            order_type: 'MARKET' or 'LIMIT'
+            limit_offset: LIMIT price distance from the last price, as a fraction (marketable side)
+            close_unlisted: Also close positions in symbols not in targets
+            max_workers: Orders in flight at once
+            dry_run: Only compute the plan
+        """
+        try:
+            order_type = order_type.upper()
+            if order_type not in ['MARKET', 'LIMIT']:
+                logging.error("Order type must be 'MARKET' or 'LIMIT'")
+                return None
+
+            start = time.perf_counter()
+            plan = self.plan_rebalance(targets, capital, close_unlisted)
+            if plan is None:
+                return None
+            plan['plan_seconds'] = time.perf_counter() - start
+            orders = [row for row in plan['rows'] if row['send']]
+            if dry_run or not orders:
+                plan['results'] = []
+                return plan
+
+            self.widen_connection_pool(max_workers)
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(orders)), thread_name_prefix='rebalance') as executor:
+                results = list(executor.map(lambda row: self._send(row, order_type, limit_offset), orders))
+            for row, order in zip(orders, results):
+                row['order_id'] = order.get('orderId') if order else None
+            plan['results'] = results
+            plan['failed'] = sum(1 for order in results if not order)
+            plan['elapsed_seconds'] = time.perf_counter() - start
+            logging.info(
+                f"Rebalance sent {len(orders) - plan['failed']}/{len(orders)} orders "
+                f"in {plan['elapsed_seconds']:.3f}s, turnover {plan['turnover']:.2f}"
+            )
+            return plan
+
+        except Exception as e:
+            logging.error(f"Error rebalancing: {e}")
+            return None
+
+    def _send(self, row, order_type, limit_offset):
+        """Send one rebalance order through the market or limit order path"""
+        symbol, quantity = row['symbol'], row['quantity']
+        if order_type == 'MARKET':
+            if row['side'] == 'BUY':
+                return self.place_buy_order(symbol, quantity)
+            return self.place_sell_order(symbol, quantity)
+        if row['side'] == 'BUY':
+            return self.place_limit_buy_order(symbol, quantity, self.quantize_price(symbol, row['price'] * (1 + limit_offset)))
+        return self.place_limit_sell_order(symbol, quantity, self.quantize_price(symbol, row['price'] * (1 - limit_offset)))
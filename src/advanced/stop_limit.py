@@ -1,12 +1,29 @@
 from src.bot import BasicBot
 from src.validator import validate_positive_number, validate_symbol
+from src.metrics import timed_order
 import logging
 
+# Default stop-loss limit price distance beyond the trigger, as a fraction
+STOP_LIMIT_BUFFER = 0.005
+
+def stop_limit_price(stop_price, side, buffer=STOP_LIMIT_BUFFER):
+    """
+    Limit price of a stop-loss leg: buffer beyond the trigger, so the order
+    still fills when the price moves through the stop
+
+    Args:
+        stop_price: Trigger price
+        side: Side of the stop-loss order, 'SELL' prices below the trigger
+        buffer: Distance beyond the trigger as a fraction
+    """
+    return stop_price * (1 - buffer) if side.upper() == 'SELL' else stop_price * (1 + buffer)
+
 class StopLimitOrders(BasicBot):
     def __init__(self):
         super().__init__()
         logging.info("StopLimitOrders initialized for Futures trading")
 
+    @timed_order('stop_loss')
     def place_stop_loss_order(self, symbol, quantity, stop_price, limit_price, side='SELL'):
         """
         Place a stop-loss order (stops losses by selling when price drops)
@@ -32,7 +49,7 @@ class StopLimitOrders(BasicBot):
             # For SELL stop-loss: stop_price should be below current market price
             # For BUY stop-loss: stop_price should be above current market price
             
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side=side.upper(),
                 type='STOP',  # Stop-loss order type
@@ -43,13 +60,14 @@ class StopLimitOrders(BasicBot):
             )
             
             logging.info(f"Stop-loss order placed for {symbol.upper()}: {side} {quantity} at stop {stop_price}, limit {limit_price}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
             
         except Exception as e:
             logging.error(f"Error placing stop-loss order: {e}")
             return None
 
+    @timed_order('take_profit')
     def place_take_profit_order(self, symbol, quantity, stop_price, limit_price, side='SELL'):
         """
         Place a take-profit order (locks in profits by selling when price rises)
@@ -72,7 +90,7 @@ class StopLimitOrders(BasicBot):
             if not validate_symbol(self.client, symbol):
                 return None
 
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side=side.upper(),
                 type='TAKE_PROFIT',  # Take-profit order type
@@ -83,16 +101,19 @@ class StopLimitOrders(BasicBot):
             )
             
             logging.info(f"Take-profit order placed for {symbol.upper()}: {side} {quantity} at stop {stop_price}, limit {limit_price}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
             
         except Exception as e:
             logging.error(f"Error placing take-profit order: {e}")
             return None
 
-    def place_stop_limit_bracket(self, symbol, quantity, entry_price, stop_loss_price, take_profit_price, side='BUY'):
+    @timed_order('stop_limit_bracket')
+    def place_stop_limit_bracket(self, symbol, quantity, entry_price, stop_loss_price, take_profit_price, side='BUY', stop_limit_buffer=STOP_LIMIT_BUFFER):
         """
         Place a complete bracket order: entry + stop-loss + take-profit
+        All three legs are placed at once; see BracketOrders in
+        src/advanced/bracket.py for legs placed as the entry fills
         
         Args:
             symbol: Trading pair
@@ -101,12 +122,13 @@ class StopLimitOrders(BasicBot):
             stop_loss_price: Stop-loss trigger price
             take_profit_price: Take-profit trigger price
             side: 'BUY' for long, 'SELL' for short
+            stop_limit_buffer: Stop-loss limit price distance beyond the trigger, as a fraction
         """
         orders = []
         
         try:
             # 1. Entry order (limit order)
-            entry_order = self.client.futures_create_order(
+            entry_order = self._create_order(
                 symbol=symbol.upper(),
                 side=side.upper(),
                 type='LIMIT',
@@ -116,26 +138,26 @@ class StopLimitOrders(BasicBot):
             )
             
             orders.append(('entry', entry_order))
-            logging.info(f"Entry order placed: {entry_order}")
+            logging.info("Entry order placed: %s", entry_order)
             
             # 2. Stop-loss order (opposite side)
             opposite_side = 'SELL' if side.upper() == 'BUY' else 'BUY'
             
-            stop_loss_order = self.client.futures_create_order(
+            stop_loss_order = self._create_order(
                 symbol=symbol.upper(),
                 side=opposite_side,
                 type='STOP',
                 timeInForce='GTC',
                 quantity=quantity,
-                price=str(stop_loss_price * 0.995 if opposite_side == 'SELL' else stop_loss_price * 1.005),  # Small buffer
+                price=str(stop_limit_price(stop_loss_price, opposite_side, stop_limit_buffer)),
                 stopPrice=str(stop_loss_price)
             )
             
             orders.append(('stop_loss', stop_loss_order))
-            logging.info(f"Stop-loss order placed: {stop_loss_order}")
+            logging.info("Stop-loss order placed: %s", stop_loss_order)
             
             # 3. Take-profit order
-            take_profit_order = self.client.futures_create_order(
+            take_profit_order = self._create_order(
                 symbol=symbol.upper(),
                 side=opposite_side,
                 type='TAKE_PROFIT',
@@ -146,7 +168,7 @@ class StopLimitOrders(BasicBot):
             )
             
             orders.append(('take_profit', take_profit_order))
-            logging.info(f"Take-profit order placed: {take_profit_order}")
+            logging.info("Take-profit order placed: %s", take_profit_order)
             
             return orders
             
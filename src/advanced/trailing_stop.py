@@ -0,0 +1,328 @@
+from src.market_orders import MarketOrders
+from src.bot import register_stop_event
+from src.limit_orders import LimitOrders
+from src.validator import validate_positive_number, validate_symbol
+from src.streams import get_market_stream
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop
+from src.metrics import timed_order
+import itertools
+import logging
+import threading
+import time
+
+class _TrailingBook:
+    """
+    Trailing stops of one symbol and one exit side
+
+    Prices are mapped to x = sign * price (sign +1 for SELL exits trailing the
+    high, -1 for BUY exits trailing the low), so both sides become "trail the
+    running maximum of x and fire once x <= watermark * (1 - sign * rate)".
+
+    Stops sharing a watermark live in one group whose members form a min-heap by
+    callback rate, so the tightest stop of a group fires first. Groups are indexed
+    by a watermark heap (raised and merged on a new extreme) and a trigger heap
+    (fired when price crosses the group's tightest level). A tick that makes no
+    new extreme and fires nothing costs two heap peeks.
+    """
+    def __init__(self, sign):
+        self.sign = sign
+        self.groups = {}  # gid -> [watermark_x, members_heap[(rate, stop_id)], version]
+        self.stop_group = {}  # live stop_id -> gid
+        self._watermarks = []  # min-heap of (watermark_x, gid)
+        self._triggers = []  # min-heap of (-trigger_x, gid, version)
+        self._gids = itertools.count()
+
+    def _trigger_x(self, watermark_x, rate):
+        return watermark_x * (1 - self.sign * rate)
+
+    def _push_trigger(self, gid, group):
+        heappush(self._triggers, (-self._trigger_x(group[0], group[1][0][0]), gid, group[2]))
+
+    def add(self, stop_id, rate, price):
+        x = self.sign * price
+        gid = next(self._gids)
+        group = [x, [(rate, stop_id)], 0]
+        self.groups[gid] = group
+        self.stop_group[stop_id] = gid
+        heappush(self._watermarks, (x, gid))
+        self._push_trigger(gid, group)
+
+    def remove(self, stop_id):
+        # Lazy deletion: the member is dropped when it reaches the top of its group
+        return self.stop_group.pop(stop_id, None) is not None
+
+    def watermark(self, stop_id):
+        gid = self.stop_group.get(stop_id)
+        if gid is None:
+            return None
+        return self.sign * self.groups[gid][0]
+
+    def on_price(self, price):
+        """Feed one tick, returns the ids of the stops it triggered"""
+        x = self.sign * price
+        groups = self.groups
+        stop_group = self.stop_group
+
+        # 1. New extreme: merge every group with a lower watermark into one
+        watermarks = self._watermarks
+        if watermarks and watermarks[0][0] < x:
+            raised = []
+            while watermarks and watermarks[0][0] < x:
+                watermark_x, gid = heappop(watermarks)
+                group = groups.get(gid)
+                if group is not None and group[0] == watermark_x:
+                    raised.append((gid, group))
+
+            if raised:
+                base_gid, base = max(raised, key=lambda item: len(item[1][1]))
+                for gid, group in raised:
+                    if gid == base_gid:
+                        continue
+                    for member in group[1]:  # Small-to-large merge
+                        if stop_group.get(member[1]) == gid:
+                            stop_group[member[1]] = base_gid
+                            heappush(base[1], member)
+                    del groups[gid]
+
+                members = base[1]
+                while members and members[0][1] not in stop_group:
+                    heappop(members)
+                if members:
+                    base[0] = x
+                    base[2] += 1
+                    heappush(watermarks, (x, base_gid))
+                    self._push_trigger(base_gid, base)
+                else:
+                    del groups[base_gid]
+
+        # 2. Fire every group whose tightest trigger has been crossed
+        fired = []
+        triggers = self._triggers
+        while triggers and -triggers[0][0] >= x:
+            _, gid, version = heappop(triggers)
+            group = groups.get(gid)
+            if group is None or group[2] != version:
+                continue
+
+            watermark_x, members = group[0], group[1]
+            while members:
+                rate, stop_id = members[0]
+                if stop_id not in stop_group:
+                    heappop(members)
+                elif x <= self._trigger_x(watermark_x, rate):
+                    heappop(members)
+                    del stop_group[stop_id]
+                    fired.append(stop_id)
+                else:
+                    break
+
+            if members:
+                group[2] += 1
+                self._push_trigger(gid, group)
+            else:
+                del groups[gid]
+
+        return fired
+
+
+class TrailingStopEngine:
+    """
+    Client-side trailing stop trigger engine
+
+    Keeps a heap-indexed book per symbol and exit side. Price ticks cost O(log n)
+    in the number of stops instead of a scan over all of them.
+    """
+    def __init__(self):
+        self._books = {}  # symbol -> {'SELL': _TrailingBook, 'BUY': _TrailingBook}
+        self._stop_book = {}  # stop_id -> _TrailingBook
+
+    def add_stop(self, stop_id, symbol, side, callback_rate, reference_price):
+        """
+        Track a trailing stop
+
+        Args:
+            stop_id: Unique stop identifier
+            symbol: Trading pair
+            side: Exit side, 'SELL' trails the high (long), 'BUY' trails the low (short)
+            callback_rate: Retracement from the watermark that triggers, as a fraction (0.01 = 1%)
+            reference_price: Starting watermark, usually the current price
+        """
+        books = self._books.get(symbol)
+        if books is None:
+            books = self._books[symbol] = {'SELL': _TrailingBook(1), 'BUY': _TrailingBook(-1)}
+        book = books[side]
+        book.add(stop_id, callback_rate, reference_price)
+        self._stop_book[stop_id] = book
+
+    def remove_stop(self, stop_id):
+        """Stop tracking a trailing stop"""
+        book = self._stop_book.pop(stop_id, None)
+        return book is not None and book.remove(stop_id)
+
+    def watermark(self, stop_id):
+        """Current high (SELL) or low (BUY) watermark of a stop"""
+        book = self._stop_book.get(stop_id)
+        return book.watermark(stop_id) if book else None
+
+    def on_price(self, symbol, price):
+        """Feed a price tick, returns the ids of the triggered stops"""
+        books = self._books.get(symbol)
+        if books is None:
+            return []
+        fired = books['SELL'].on_price(price)
+        fired += books['BUY'].on_price(price)
+        for stop_id in fired:
+            del self._stop_book[stop_id]
+        return fired
+
+    def __len__(self):
+        return len(self._stop_book)
+
+
+class TrailingStopOrders(MarketOrders, LimitOrders):
+    def __init__(self):
+        super().__init__()
+        logging.info("TrailingStopOrders initialized for Futures trading")
+        self.engine = TrailingStopEngine()
+        self.active_trailing_stops = {}  # Track trailing stops by id
+        self.use_stream = True  # Set False when ticks are fed to on_price externally
+        self._subscribed = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._exit_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='trailing-exit')
+        self._stop = register_stop_event(threading.Event())  # Set by stop_all_workers, no more exits fire
+
+    @timed_order('trailing_stop')
+    def place_trailing_stop(self, symbol, quantity, callback_rate, side='SELL', order_type='MARKET', limit_offset=0.1):
+        """
+        Place a client-side trailing stop
+
+        The watermark starts at the current price and follows the price stream.
+        When price retraces callback_rate percent from it, an exit order is sent
+        through the regular market/limit order path.
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            quantity: Amount to exit
+            callback_rate: Retracement in percent that triggers the exit (1 = 1%)
+            side: 'SELL' for closing long position, 'BUY' for closing short position
+            order_type: 'MARKET' or 'LIMIT' exit
+            limit_offset: For LIMIT exits, percent beyond the trigger price for the limit price
+        """
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(callback_rate, "callback_rate"):
+                return None
+            if not validate_symbol(self.client, symbol):
+                return None
+
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+            if callback_rate >= 100:
+                logging.error("Callback rate must be below 100%")
+                return None
+
+            current_price = self.get_current_price(symbol)
+            if not current_price:
+                logging.error(f"Could not get current price for {symbol.upper()}")
+                return None
+
+            stop_id = f"TS_{int(time.time())}_{next(self._ids)}"
+            stop_config = {
+                'stop_id': stop_id,
+                'symbol': symbol.upper(),
+                'side': side.upper(),
+                'quantity': quantity,
+                'callback_rate': callback_rate,
+                'order_type': order_type.upper(),
+                'limit_offset': limit_offset,
+                'reference_price': current_price,
+                'status': 'ACTIVE',
+                'created_time': time.time(),
+                'trigger_price': None,
+                'exit_order': None
+            }
+
+            with self._lock:
+                self.active_trailing_stops[stop_id] = stop_config
+                self.engine.add_stop(stop_id, symbol.upper(), side.upper(), callback_rate / 100, current_price)
+
+            if self.use_stream and symbol.upper() not in self._subscribed:
+                self._subscribed.add(symbol.upper())
+                get_market_stream().on_trade(symbol.upper(), self.on_price)
+
+            logging.info(f"Trailing stop {stop_id} placed: {side.upper()} {quantity} {symbol.upper()}, callback {callback_rate}% from {current_price}")
+            return stop_config
+
+        except Exception as e:
+            logging.error(f"Error placing trailing stop: {e}")
+            return None
+
+    def on_price(self, symbol, price, quantity=None, trade_time=None):
+        """Feed a price tick and fire the exits of triggered stops"""
+        if self._stop.is_set():
+            return []
+        with self._lock:
+            fired = self.engine.on_price(symbol, price)
+            for stop_id in fired:
+                stop_config = self.active_trailing_stops[stop_id]
+                stop_config['status'] = 'TRIGGERED'
+                stop_config['trigger_price'] = price
+
+        for stop_id in fired:
+            logging.info(f"Trailing stop {stop_id} triggered at {price}")
+            self._exit_executor.submit(self._fire_exit, self.active_trailing_stops[stop_id], price)
+        return fired
+
+    def _fire_exit(self, stop_config, price):
+        """Send the exit order of a triggered stop"""
+        try:
+            symbol = stop_config['symbol']
+            quantity = stop_config['quantity']
+            if stop_config['order_type'] == 'MARKET':
+                if stop_config['side'] == 'SELL':
+                    order = self.place_sell_order(symbol, quantity)
+                else:
+                    order = self.place_buy_order(symbol, quantity)
+            else:  # LIMIT
+                offset = stop_config['limit_offset'] / 100
+                if stop_config['side'] == 'SELL':
+                    order = self.place_limit_sell_order(symbol, quantity, self.quantize_price(symbol, price * (1 - offset)))
+                else:
+                    order = self.place_limit_buy_order(symbol, quantity, self.quantize_price(symbol, price * (1 + offset)))
+
+            stop_config['exit_order'] = order
+            stop_config['status'] = 'EXECUTED' if order else 'EXIT_FAILED'
+            return order
+        except Exception as e:
+            logging.error(f"Error placing trailing stop exit for {stop_config['stop_id']}: {e}")
+            stop_config['status'] = 'EXIT_FAILED'
+            return None
+
+    def cancel_trailing_stop(self, stop_id):
+        """Cancel an active trailing stop"""
+        with self._lock:
+            stop_config = self.active_trailing_stops.get(stop_id)
+            if not stop_config or stop_config['status'] != 'ACTIVE':
+                logging.warning(f"Trailing stop {stop_id} not found or not active")
+                return False
+            self.engine.remove_stop(stop_id)
+            stop_config['status'] = 'CANCELLED'
+        logging.info(f"Trailing stop {stop_id} cancelled")
+        return True
+
+    def get_trailing_stop_status(self, stop_id):
+        """Get status of a trailing stop including its current watermark"""
+        with self._lock:
+            if stop_id not in self.active_trailing_stops:
+                return None
+            status = self.active_trailing_stops[stop_id].copy()
+            status['watermark'] = self.engine.watermark(stop_id)
+            return status
+
+    def get_active_trailing_stops(self):
+        """Get all trailing stops that have not triggered yet"""
+        return {k: v for k, v in self.active_trailing_stops.items() if v['status'] == 'ACTIVE'}
@@ -1,16 +1,155 @@
-from src.bot import BasicBot
-from src.validator import validate_positive_number, validate_symbol
+from src.bot import BasicBot, register_stop_event
+from src.heartbeat import register_pulse
+from src.validator import validate_positive_number, validate_symbol, get_symbol_info
+from src.journal import journal
+from src.analytics import analytics
+from src.events import order_events, FILL
+from src.streams import get_user_stream
+from src.advanced.chase import ChaseOrders
+from collections import deque
+from array import array
 import logging
 import time
 import threading
 from datetime import datetime
+from src.metrics import timed_order
+
+# Finished TWAPs stay in memory this long before they are moved to the journal
+TWAP_RETENTION_SECONDS = 3600
+# Time a chunk may take on top of the interval before the TWAP thread counts as stalled
+CHUNK_GRACE_SECONDS = 60
+# LIMIT chunks are priced this fraction through the last price, so they cross at once
+LIMIT_CHUNK_OFFSET = 0.001
+# Fill quantities closer than this are treated as equal
+FILL_EPSILON = 1e-12
+# Longest a finished TWAP waits for the fill consumer to apply the fills published so far
+FILL_DRAIN_SECONDS = 1.0
+
+def twap_schedule(total_quantity, duration_minutes, num_chunks=None):
+    """
+    Chunk count, chunk size and seconds between chunks of a TWAP
+
+    Args:
+        total_quantity: Total amount to trade
+        duration_minutes: Time period to spread the order over
+        num_chunks: Number of smaller orders (default: one per minute)
+    """
+    if num_chunks is None:
+        num_chunks = max(1, int(duration_minutes))
+    return num_chunks, total_quantity / num_chunks, (duration_minutes * 60) / num_chunks
+
+def limit_chunk_price(current_price, side, offset=LIMIT_CHUNK_OFFSET):
+    """Limit price of a LIMIT chunk: slightly through the last price"""
+    return current_price * (1 + offset) if side == 'BUY' else current_price * (1 - offset)
+
+class FillLedger:
+    """
+    Chunk fills of one TWAP in typed columns, one row per chunk
+
+    Rows are keyed by the chunk's client order id and fed from FILL events, so
+    LIMIT chunks that fill after their acknowledgement are counted. Filled
+    quantity, VWAP and slippage against the arrival price are kept as running
+    totals, so reading them does not walk the fills.
+    """
+    __slots__ = ('order_ids', 'quantities', 'prices', 'submitted', 'filled', 'rows_by_client_id',
+                 'filled_chunks', 'filled_quantity', 'notional', 'arrival_price', 'side_sign')
+
+    def __init__(self, side, arrival_price=None):
+        self.order_ids = array('q')
+        self.quantities = array('d')  # Cumulative filled quantity of the chunk
+        self.prices = array('d')  # Average fill price of the chunk
+        self.submitted = array('d')  # Epoch seconds the chunk was sent
+        self.filled = array('d')  # Epoch seconds of the chunk's last fill
+        self.rows_by_client_id = {}
+        self.filled_chunks = 0
+        self.filled_quantity = 0.0
+        self.notional = 0.0
+        self.arrival_price = arrival_price
+        self.side_sign = 1 if side == 'BUY' else -1
+
+    def _row(self, client_order_id, ts):
+        row = self.rows_by_client_id.get(client_order_id)
+        if row is None:
+            row = self.rows_by_client_id[client_order_id] = len(self.order_ids)
+            self.order_ids.append(0)
+            self.quantities.append(0.0)
+            self.prices.append(0.0)
+            self.submitted.append(ts)
+            self.filled.append(0.0)
+        return row
+
+    def submit(self, client_order_id, submitted):
+        """Record when a chunk was sent (its fill may already have been applied)"""
+        self.submitted[self._row(client_order_id, submitted)] = submitted
+
+    def fill(self, client_order_id, order_id, price, quantity, cum_quantity, ts):
+        """
+        Apply one fill report of a chunk, returns the newly filled quantity
+
+        REST responses report the cumulative fill at the average price, the
+        user-data stream the last fill; a fill reported by both counts once.
+
+        Args:
+            price: Fill price, or average price when quantity is the cumulative fill
+            quantity: Last fill quantity, or the cumulative fill
+            cum_quantity: Cumulative filled quantity of the chunk
+        """
+        row = self._row(client_order_id, ts)
+        seen_quantity = self.quantities[row]
+        increment = cum_quantity - seen_quantity
+        if increment <= FILL_EPSILON:
+            return 0.0
+        seen_notional = seen_quantity * self.prices[row]
+        if abs(quantity - cum_quantity) <= FILL_EPSILON:
+            total_notional = price * cum_quantity
+        else:
+            total_notional = seen_notional + price * increment
+
+        if not seen_quantity:
+            self.filled_chunks += 1
+        self.order_ids[row] = int(order_id or 0)
+        self.quantities[row] = cum_quantity
+        self.prices[row] = total_notional / cum_quantity
+        self.filled[row] = ts
+        self.filled_quantity += increment
+        self.notional += total_notional - seen_notional
+        return increment
+
+    def __len__(self):
+        return self.filled_chunks
+
+    @property
+    def vwap(self):
+        return self.notional / self.filled_quantity if self.filled_quantity else None
+
+    @property
+    def slippage_bps(self):
+        """VWAP versus arrival price in basis points, positive when worse than arrival"""
+        vwap = self.vwap
+        if vwap is None or not self.arrival_price:
+            return None
+        return self.side_sign * (vwap - self.arrival_price) / self.arrival_price * 10000
+
+    def rows(self):
+        """Filled chunks as (order_id, quantity, price, submitted, filled) tuples"""
+        return [row for row in zip(self.order_ids, self.quantities, self.prices, self.submitted, self.filled) if row[1]]
 
 class TWAPOrders(BasicBot):
     def __init__(self):
         super().__init__()
         logging.info("TWAPOrders initialized for Futures trading")
         self.active_twap_orders = {}  # Track active TWAP executions
+        self.retention_seconds = TWAP_RETENTION_SECONDS
+        self._finished = deque()  # (end time, twap_id) in completion order
+        self._twap_ids = 0
+        self._chaser = None  # ChaseOrders for CHASE chunks, created on first use
+        self.use_user_stream = True  # Set False when fills are published into the bus by something else
+        self._ledger_lock = threading.Lock()
+        self._fills_stop = threading.Event()
+        self._fill_subscription = None
+        self._fill_consumer = None
 
+    @timed_order('twap')
     def place_twap_order(self, symbol, total_quantity, side, duration_minutes, num_chunks=None, order_type='MARKET'):
         """
         Place TWAP (Time-Weighted Average Price) order
@@ -22,7 +161,7 @@ class TWAPOrders(BasicBot):
             side: 'BUY' or 'SELL'
             duration_minutes: Time period to spread the order over
             num_chunks: Number of smaller orders (default: duration_minutes)
-            order_type: 'MARKET' or 'LIMIT'
+            order_type: 'MARKET', 'LIMIT' or 'CHASE' (limit chunks that follow the top of the book)
         """
         try:
             # Validate inputs
@@ -37,13 +176,8 @@ class TWAPOrders(BasicBot):
                 logging.error("Side must be 'BUY' or 'SELL'")
                 return None
                 
-            # Default chunks to duration in minutes (1 chunk per minute)
-            if num_chunks is None:
-                num_chunks = max(1, int(duration_minutes))
-            
-            # Calculate chunk parameters
-            chunk_size = total_quantity / num_chunks
-            interval_seconds = (duration_minutes * 60) / num_chunks
+            # Chunks default to one per minute of the duration
+            num_chunks, chunk_size, interval_seconds = twap_schedule(total_quantity, duration_minutes, num_chunks)
             
             # Minimum chunk size check (exchange specific)
             min_chunk_size = self.get_min_quantity(symbol)
@@ -51,7 +185,9 @@ class TWAPOrders(BasicBot):
                 logging.error(f"Chunk size {chunk_size} is below minimum {min_chunk_size}")
                 return None
             
-            twap_id = f"TWAP_{int(time.time())}"
+            self._evict_finished()
+            self._twap_ids += 1
+            twap_id = f"TWAP_{int(time.time())}_{self._twap_ids}"
             
             twap_config = {
                 'twap_id': twap_id,
@@ -65,13 +201,18 @@ class TWAPOrders(BasicBot):
                 'interval_seconds': interval_seconds,
                 'chunks_executed': 0,
                 'total_executed': 0,
+                'submitted_quantity': 0,
                 'start_time': datetime.now(),
                 'status': 'ACTIVE',
-                'executed_orders': [],
-                'errors': []
+                'ledger': FillLedger(side.upper(), self.get_current_price(symbol)),
+                'errors': [],
+                'stop_event': register_stop_event(threading.Event())
             }
             
+            self._start_fill_consumer(twap_config['order_type'])
             self.active_twap_orders[twap_id] = twap_config
+            if twap_config['ledger'].arrival_price:
+                analytics.set_arrival(twap_id, twap_config['ledger'].arrival_price)
             
             logging.info(f"TWAP order initiated: {twap_id}")
             logging.info(f"Total: {total_quantity}, Chunks: {num_chunks}, Size: {chunk_size}, Interval: {interval_seconds}s")
@@ -92,6 +233,7 @@ class TWAPOrders(BasicBot):
 
     def _execute_twap_chunks(self, twap_id):
         """Execute TWAP chunks in background thread"""
+        pulse = None
         try:
             twap_config = self.active_twap_orders[twap_id]
             symbol = twap_config['symbol']
@@ -100,40 +242,44 @@ class TWAPOrders(BasicBot):
             num_chunks = twap_config['num_chunks']
             interval_seconds = twap_config['interval_seconds']
             order_type = twap_config['order_type']
+            stop_event = twap_config['stop_event']
+            pulse = register_pulse(f"twap {twap_id}", interval_seconds + CHUNK_GRACE_SECONDS)
             
             for chunk_num in range(num_chunks):
+                pulse.beat()
                 try:
-                    # Check if TWAP was cancelled
-                    if twap_config.get('status') == 'CANCELLED':
+                    # Check if TWAP was cancelled or all workers were stopped
+                    if stop_event.is_set():
                         logging.info(f"TWAP {twap_id} cancelled, stopping execution")
                         break
                     
                     # Adjust last chunk size for any remainder
                     current_chunk_size = chunk_size
                     if chunk_num == num_chunks - 1:
-                        remaining = twap_config['total_quantity'] - twap_config['total_executed']
+                        remaining = twap_config['total_quantity'] - twap_config['submitted_quantity']
                         current_chunk_size = remaining
                     
                     # Execute chunk order
+                    submitted = time.time()
                     if order_type == 'MARKET':
-                        order = self._place_market_chunk(symbol, current_chunk_size, side)
+                        order = self._place_market_chunk(symbol, current_chunk_size, side, source=twap_id)
+                    elif order_type == 'CHASE':
+                        order = self._place_chase_chunk(symbol, current_chunk_size, side, source=twap_id)
                     else:  # LIMIT
                         current_price = self.get_current_price(symbol)
                         if not current_price:
                             raise Exception("Could not get current price for limit order")
                         
-                        # Small price adjustment for limit orders
-                        if side == 'BUY':
-                            limit_price = current_price * 1.001  # Slightly above market
-                        else:
-                            limit_price = current_price * 0.999  # Slightly below market
+                        # Slightly through the market so the chunk fills
+                        limit_price = self.quantize_price(symbol, limit_chunk_price(current_price, side))
                             
-                        order = self._place_limit_chunk(symbol, current_chunk_size, side, limit_price)
+                        order = self._place_limit_chunk(symbol, current_chunk_size, side, limit_price, source=twap_id)
                     
                     if order:
+                        with self._ledger_lock:
+                            twap_config['ledger'].submit(order.get('clientOrderId'), submitted)
                         twap_config['chunks_executed'] += 1
-                        twap_config['total_executed'] += float(order.get('executedQty', current_chunk_size))
-                        twap_config['executed_orders'].append(order)
+                        twap_config['submitted_quantity'] += current_chunk_size
                         
                         logging.info(f"TWAP {twap_id} - Chunk {chunk_num + 1}/{num_chunks} executed: {order.get('orderId')}")
                     else:
@@ -141,9 +287,9 @@ class TWAPOrders(BasicBot):
                         twap_config['errors'].append(error_msg)
                         logging.error(f"TWAP {twap_id} - {error_msg}")
                     
-                    # Wait for next chunk (except for last chunk)
+                    # Wait for next chunk (except for last chunk), wakes up at once when stopped
                     if chunk_num < num_chunks - 1:
-                        time.sleep(interval_seconds)
+                        stop_event.wait(interval_seconds)
                         
                 except Exception as e:
                     error_msg = f"Error executing chunk {chunk_num + 1}: {str(e)}"
@@ -151,36 +297,54 @@ class TWAPOrders(BasicBot):
                     logging.error(f"TWAP {twap_id} - {error_msg}")
                     continue
             
+            # Totals include the last chunk's fill before the TWAP is reported finished
+            if not self._drain_fills():
+                logging.warning(f"TWAP {twap_id} - fill consumer is behind, totals may miss the latest fills")
+
             # Mark as completed
-            twap_config['status'] = 'COMPLETED'
+            if twap_config['status'] == 'ACTIVE':
+                twap_config['status'] = 'STOPPED' if stop_event.is_set() else 'COMPLETED'
             twap_config['end_time'] = datetime.now()
             
-            logging.info(f"TWAP {twap_id} completed: {twap_config['chunks_executed']}/{num_chunks} chunks executed")
+            ledger = twap_config['ledger']
+            logging.info(
+                f"TWAP {twap_id} completed: {twap_config['chunks_executed']}/{num_chunks} chunks executed, "
+                f"filled {ledger.filled_quantity} at VWAP {ledger.vwap}, slippage {ledger.slippage_bps} bps vs arrival {ledger.arrival_price}"
+            )
             
         except Exception as e:
             logging.error(f"Critical error in TWAP execution {twap_id}: {e}")
             if twap_id in self.active_twap_orders:
                 self.active_twap_orders[twap_id]['status'] = 'ERROR'
                 self.active_twap_orders[twap_id]['errors'].append(str(e))
+        finally:
+            if pulse:
+                pulse.close()
+            self._finished.append((time.time(), twap_id))
 
-    def _place_market_chunk(self, symbol, quantity, side):
+    @timed_order('twap_chunk_market')
+    def _place_market_chunk(self, symbol, quantity, side, source=None):
         """Place a market order chunk"""
         try:
-            order = self.client.futures_create_order(
+            order = self._create_order(
+                source=source,
                 symbol=symbol,
                 side=side,
                 type='MARKET',
-                quantity=quantity
+                quantity=quantity,
+                newOrderRespType='RESULT'  # Response carries the fill quantity and average price
             )
             return order
         except Exception as e:
             logging.error(f"Error placing market chunk: {e}")
             return None
 
-    def _place_limit_chunk(self, symbol, quantity, side, price):
+    @timed_order('twap_chunk_limit')
+    def _place_limit_chunk(self, symbol, quantity, side, price, source=None):
         """Place a limit order chunk"""
         try:
-            order = self.client.futures_create_order(
+            order = self._create_order(
+                source=source,
                 symbol=symbol,
                 side=side,
                 type='LIMIT',
@@ -193,11 +357,101 @@ class TWAPOrders(BasicBot):
             logging.error(f"Error placing limit chunk: {e}")
             return None
 
-    def get_twap_status(self, twap_id):
-        """Get status of a TWAP order"""
-        if twap_id not in self.active_twap_orders:
+    def _place_chase_chunk(self, symbol, quantity, side, source=None):
+        """Place a chunk as a limit order that follows the top of the book"""
+        if self._chaser is None:
+            self._chaser = ChaseOrders()
+        state = self._chaser.place_chase_order(symbol, side, quantity, source=source)
+        if state is None:
             return None
-        return self.active_twap_orders[twap_id].copy()
+        return {'orderId': state.order_id, 'clientOrderId': state.client_order_id, 'executedQty': 0, 'price': state.price}
+
+    def _start_fill_consumer(self, order_type):
+        """Consume FILL events into the TWAP ledgers on a background thread"""
+        with self._ledger_lock:
+            if self._fill_consumer is None:
+                self._fill_subscription = order_events.subscribe(f"twap-{id(self)}", [FILL])
+                self._fill_consumer = threading.Thread(
+                    target=self._fill_subscription.run,
+                    args=(self._on_fill, self._fills_stop),
+                    daemon=True,
+                    name='twap-fills'
+                )
+                self._fill_consumer.start()
+        # MARKET chunks fill in their REST response, resting chunks are reported by the user-data stream
+        if order_type != 'MARKET' and self.use_user_stream:
+            get_user_stream()
+
+    def _drain_fills(self, timeout=FILL_DRAIN_SECONDS):
+        """Wait until every fill published so far has been applied to the ledgers, False on timeout"""
+        subscription = self._fill_subscription
+        if subscription is None:
+            return True
+        target = subscription.bus._next_seq
+        deadline = time.monotonic() + timeout
+        while subscription.cursor < target:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _on_fill(self, event):
+        """Apply a FILL event to the ledger of the TWAP that sent the chunk"""
+        twap_config = self.active_twap_orders.get(event.source)
+        if twap_config is None:
+            return
+        with self._ledger_lock:
+            ledger = twap_config['ledger']
+            if ledger.fill(event.client_order_id, event.order_id, event.price, event.quantity, event.cum_quantity, event.ts):
+                twap_config['total_executed'] = ledger.filled_quantity
+
+    def get_twap_status(self, twap_id):
+        """Get a snapshot of a TWAP order's status (from the journal once evicted)"""
+        twap_config = self.active_twap_orders.get(twap_id)
+        if twap_config is None:
+            return self._load_evicted(twap_id)
+        return self._snapshot(twap_config)
+
+    @staticmethod
+    def _snapshot(twap_config):
+        """Scalar fields and ledger aggregates, without copying the fills"""
+        status = {k: v for k, v in twap_config.items() if k not in ('ledger', 'errors', 'stop_event')}
+        ledger = twap_config['ledger']
+        status['fills'] = ledger.filled_chunks
+        status['filled_quantity'] = ledger.filled_quantity
+        status['vwap'] = ledger.vwap
+        status['arrival_price'] = ledger.arrival_price
+        status['slippage_bps'] = ledger.slippage_bps
+        status['error_count'] = len(twap_config['errors'])
+        status['last_error'] = twap_config['errors'][-1] if twap_config['errors'] else None
+        return status
+
+    def _evict_finished(self):
+        """Move TWAPs finished longer than retention_seconds ago to the journal"""
+        cutoff = time.time() - self.retention_seconds
+        while self._finished and self._finished[0][0] <= cutoff:
+            _, twap_id = self._finished.popleft()
+            twap_config = self.active_twap_orders.pop(twap_id, None)
+            if twap_config is None:
+                continue
+            try:
+                journal.record(
+                    'summary', 'twap', twap_config['symbol'], tag=twap_id,
+                    status=self._snapshot(twap_config), errors=twap_config['errors'],
+                    fills=twap_config['ledger'].rows()
+                )
+                logging.info(f"TWAP {twap_id} evicted to the journal")
+            except Exception as e:
+                logging.error(f"Error writing TWAP {twap_id} to the journal: {e}")
+
+    def _load_evicted(self, twap_id):
+        try:
+            for record in journal.query(tag=twap_id, limit=1):
+                if record['kind'] == 'summary':
+                    return record['status']
+        except Exception as e:
+            logging.error(f"Error reading TWAP {twap_id} from the journal: {e}")
+        return None
 
     def cancel_twap_order(self, twap_id):
         """Cancel an active TWAP order"""
@@ -207,6 +461,7 @@ class TWAPOrders(BasicBot):
                 return False
             
             self.active_twap_orders[twap_id]['status'] = 'CANCELLED'
+            self.active_twap_orders[twap_id]['stop_event'].set()
             logging.info(f"TWAP {twap_id} marked for cancellation")
             return True
             
@@ -216,18 +471,14 @@ class TWAPOrders(BasicBot):
 
     def get_active_twap_orders(self):
         """Get all active TWAP orders"""
+        self._evict_finished()
         return {k: v for k, v in self.active_twap_orders.items() if v['status'] == 'ACTIVE'}
 
     def get_min_quantity(self, symbol):
         """Get minimum quantity for a symbol"""
         try:
-            exchange_info = self.client.futures_exchange_info()
-            for s in exchange_info['symbols']:
-                if s['symbol'] == symbol.upper():
-                    for filter_info in s['filters']:
-                        if filter_info['filterType'] == 'LOT_SIZE':
-                            return float(filter_info['minQty'])
-            return None
+            symbol_info = get_symbol_info(self.client, symbol)
+            return symbol_info.min_qty if symbol_info else None
         except Exception as e:
             logging.error(f"Error getting minimum quantity: {e}")
             return None
@@ -0,0 +1,365 @@
+from .events import order_events, PLACED, FILL
+from collections import OrderedDict
+import numpy as np
+import threading
+import time
+
+# Orders whose cumulative fill is remembered to drop fills reported twice (REST response and user stream)
+MAX_TRACKED_ORDERS = 100000
+EPSILON = 1e-12
+
+
+class PositionPnL:
+    """Signed position of one symbol with average-cost realized and unrealized PnL"""
+    __slots__ = ('symbol', 'position', 'avg_price', 'realized', 'mark')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.position = 0.0
+        self.avg_price = 0.0
+        self.realized = 0.0
+        self.mark = None
+
+    def fill(self, signed_quantity, price):
+        position = self.position
+        if position == 0 or (position > 0) == (signed_quantity > 0):
+            # Opening or adding: new average cost
+            total = position + signed_quantity
+            self.avg_price = (self.avg_price * abs(position) + price * abs(signed_quantity)) / abs(total)
+            self.position = total
+            return
+        closing = min(abs(signed_quantity), abs(position))
+        self.realized += closing * (price - self.avg_price) * (1 if position > 0 else -1)
+        total = position + signed_quantity
+        if abs(total) <= EPSILON:
+            self.position, self.avg_price = 0.0, 0.0
+        elif (total > 0) != (position > 0):
+            # Flipped through zero: the rest opens at the fill price
+            self.position, self.avg_price = total, price
+        else:
+            self.position = total
+
+    @property
+    def unrealized(self):
+        if self.mark is None or not self.position:
+            return 0.0
+        return self.position * (self.mark - self.avg_price)
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol, 'position': self.position, 'avg_price': self.avg_price,
+            'realized': self.realized, 'unrealized': self.unrealized, 'mark': self.mark
+        }
+
+
+class ParentExecution:
+    """Running fill totals of one parent order (a strategy id such as a TWAP id)"""
+    __slots__ = ('source', 'symbol', 'side_sign', 'arrival_price', 'filled', 'notional', 'fills', 'first_ts', 'last_ts')
+
+    def __init__(self, source, symbol, side_sign=0, arrival_price=None):
+        self.source = source
+        self.symbol = symbol
+        self.side_sign = side_sign
+        self.arrival_price = arrival_price
+        self.filled = 0.0
+        self.notional = 0.0
+        self.fills = 0
+        self.first_ts = None
+        self.last_ts = None
+
+    def fill(self, side_sign, quantity, price, ts):
+        if not self.side_sign:
+            self.side_sign = side_sign
+        if self.arrival_price is None:
+            self.arrival_price = price  # No arrival mark known, benchmark against the first fill
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self.filled += quantity
+        self.notional += quantity * price
+        self.fills += 1
+
+    @property
+    def vwap(self):
+        return self.notional / self.filled if self.filled else None
+
+    @property
+    def shortfall_bps(self):
+        """VWAP versus arrival in basis points, positive when worse than arrival"""
+        if not self.filled or not self.arrival_price:
+            return None
+        return self.side_sign * (self.vwap - self.arrival_price) / self.arrival_price * 10000
+
+    @property
+    def shortfall_cost(self):
+        """Implementation shortfall in quote currency"""
+        if not self.filled or not self.arrival_price:
+            return None
+        return self.side_sign * (self.notional - self.filled * self.arrival_price)
+
+    def to_dict(self):
+        return {
+            'source': self.source, 'symbol': self.symbol, 'side': {1: 'BUY', -1: 'SELL'}.get(self.side_sign),
+            'fills': self.fills, 'filled': self.filled, 'vwap': self.vwap, 'arrival_price': self.arrival_price,
+            'shortfall_bps': self.shortfall_bps, 'shortfall_cost': self.shortfall_cost,
+            'duration': (self.last_ts - self.first_ts) if self.first_ts is not None else None
+        }
+
+
+class ExecutionAnalytics:
+    """
+    Live PnL and execution quality from the order event bus
+
+    Every FILL event updates the symbol's position (average cost, realized
+    PnL) and its parent order's VWAP and shortfall in O(1). Fills reported
+    twice (in the REST response and on the user-data stream) are counted once
+    by tracking each order's cumulative filled quantity. Orders without a
+    source are their own parent.
+    """
+    def __init__(self, bus=order_events):
+        self.bus = bus
+        self.positions = {}  # symbol -> PositionPnL
+        self.parents = {}  # source -> ParentExecution
+        self._arrivals = {}  # source -> arrival price set before the first event
+        self._orders = OrderedDict()  # order key -> (cumulative quantity, cumulative notional)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._subscription = None
+        self._dispatcher = None
+
+    def start(self):
+        """Consume the bus on a background thread"""
+        with self._lock:
+            if self._dispatcher is None:
+                self._subscription = self.bus.subscribe(f"analytics-{id(self)}", [PLACED, FILL])
+                self._dispatcher = threading.Thread(
+                    target=self._subscription.run,
+                    args=(self.on_event, self._stop),
+                    daemon=True,
+                    name='analytics'
+                )
+                self._dispatcher.start()
+        return self
+
+    def drain(self, timeout=1.0):
+        """Wait until every event published so far has been processed, False on timeout"""
+        if self._subscription is None:
+            return True
+        target = self.bus._next_seq
+        deadline = time.monotonic() + timeout
+        while self._subscription.cursor < target:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def set_arrival(self, source, price):
+        """Arrival (decision) price of a parent order, e.g. the mid when a TWAP starts"""
+        with self._lock:
+            parent = self.parents.get(source)
+            if parent is not None:
+                parent.arrival_price = price
+            else:
+                self._arrivals[source] = price
+
+    def update_mark(self, symbol, price):
+        """Latest mark price of a symbol for unrealized PnL and arrival prices"""
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                position = self.positions[symbol] = PositionPnL(symbol)
+            position.mark = price
+
+    def on_event(self, event):
+        if event.event_type == PLACED:
+            source = event.source
+            if source is None:
+                return
+            with self._lock:
+                if source not in self.parents:
+                    arrival = self._arrivals.pop(source, None)
+                    if arrival is None:
+                        position = self.positions.get(event.symbol)
+                        arrival = position.mark if position is not None else None
+                    self.parents[source] = ParentExecution(source, event.symbol, 0, arrival)
+            return
+        self.on_fill(
+            event.symbol, event.order_id, event.client_order_id, event.source, event.side,
+            event.price, event.quantity, event.cum_quantity, event.ts
+        )
+
+    def on_fill(self, symbol, order_id, client_order_id, source, side, price, quantity, cum_quantity, ts):
+        """
+        Apply one fill report
+
+        Args:
+            price: Fill price, or average price when quantity is the cumulative fill
+            quantity: Last fill quantity, or the cumulative fill (REST responses)
+            cum_quantity: Cumulative filled quantity of the order
+        """
+        side_sign = 1 if side == 'BUY' else -1
+        key = client_order_id or order_id
+        with self._lock:
+            seen_quantity, seen_notional = self._orders.get(key, (0.0, 0.0))
+            increment = cum_quantity - seen_quantity
+            if increment <= EPSILON:
+                return  # Already counted
+            if abs(quantity - cum_quantity) <= EPSILON:
+                # Cumulative report at the average price
+                total_notional = price * cum_quantity
+            else:
+                total_notional = seen_notional + price * increment
+            fill_price = (total_notional - seen_notional) / increment
+            self._orders[key] = (cum_quantity, total_notional)
+            self._orders.move_to_end(key)
+            if len(self._orders) > MAX_TRACKED_ORDERS:
+                self._orders.popitem(last=False)
+
+            position = self.positions.get(symbol)
+            if position is None:
+                position = self.positions[symbol] = PositionPnL(symbol)
+            position.fill(side_sign * increment, fill_price)
+
+            parent_key = source or f"order-{order_id}"
+            parent = self.parents.get(parent_key)
+            if parent is None:
+                parent = self.parents[parent_key] = ParentExecution(
+                    parent_key, symbol, side_sign, self._arrivals.pop(parent_key, None) or position.mark
+                )
+            parent.fill(side_sign, increment, fill_price, ts)
+
+    def parent_report(self, source):
+        """VWAP, arrival and shortfall of one parent order, None if it has no events"""
+        with self._lock:
+            parent = self.parents.get(source)
+            return parent.to_dict() if parent is not None else None
+
+    def pnl_report(self):
+        """Position, realized and unrealized PnL per symbol plus totals"""
+        with self._lock:
+            symbols = [p.to_dict() for p in self.positions.values() if p.position or p.realized]
+        return {
+            'symbols': symbols,
+            'realized': sum(s['realized'] for s in symbols),
+            'unrealized': sum(s['unrealized'] for s in symbols)
+        }
+
+    def reports(self):
+        """Reports of every parent order with fills"""
+        with self._lock:
+            return [p.to_dict() for p in self.parents.values() if p.fills]
+
+
+analytics = ExecutionAnalytics()  # Process-wide engine, start() to consume the order bus
+
+
+# --- Batch TCA over the order journal ---
+
+def journal_fills(records):
+    """
+    Fill columns from order journal records
+
+    Uses the order responses; an order seen several times (create, get,
+    cancel) is counted once with its largest cumulative fill.
+
+    Returns:
+        Dict of numpy arrays: ts, order_id, side (+1/-1), quantity, price, plus
+        symbol and tag lists
+    """
+    latest = {}
+    for record in records:
+        if record.get('kind') != 'response':
+            continue
+        responses = record.get('response')
+        for response in responses if isinstance(responses, list) else [responses]:
+            if not isinstance(response, dict) or 'orderId' not in response:
+                continue
+            executed = float(response.get('executedQty') or 0)
+            if executed <= 0:
+                continue
+            order_id = response['orderId']
+            previous = latest.get(order_id)
+            if previous is None or executed > previous[3]:
+                price = float(response.get('avgPrice') or 0) or float(response.get('price') or 0)
+                latest[order_id] = (
+                    record['ts'], order_id, 1 if response.get('side') == 'BUY' else -1, executed, price,
+                    response.get('symbol') or record.get('symbol'), record.get('tag')
+                )
+    rows = sorted(latest.values())
+    return {
+        'ts': np.array([r[0] for r in rows], dtype=float),
+        'order_id': np.array([r[1] for r in rows], dtype=np.int64),
+        'side': np.array([r[2] for r in rows], dtype=float),
+        'quantity': np.array([r[3] for r in rows], dtype=float),
+        'price': np.array([r[4] for r in rows], dtype=float),
+        'symbol': [r[5] for r in rows],
+        'tag': [r[6] for r in rows]
+    }
+
+
+def tca_report(fills):
+    """
+    Transaction cost analysis per parent order, vectorized over all fills
+
+    A parent is a (tag, symbol) pair, untagged orders are grouped per symbol.
+    The arrival price is the first fill of the parent since the journal holds
+    no market data, so shortfall measures drift over the execution. PnL per
+    symbol is cash flow plus the open position marked at the last fill.
+
+    Args:
+        fills: Columns from journal_fills()
+
+    Returns:
+        Dict with 'parents' and 'symbols' row lists
+    """
+    count = len(fills['ts'])
+    if not count:
+        return {'parents': [], 'symbols': []}
+    ts, side, quantity, price = fills['ts'], fills['side'], fills['quantity'], fills['price']
+    signed = side * quantity
+    notional = quantity * price
+
+    # Parents: group ids in first-seen order, fills are sorted by time
+    parent_keys = [f"{tag or '-'}|{symbol}" for tag, symbol in zip(fills['tag'], fills['symbol'])]
+    names, group = np.unique(parent_keys, return_inverse=True)
+    groups = len(names)
+    filled = np.bincount(group, quantity, groups)
+    traded = np.bincount(group, notional, groups)
+    net = np.bincount(group, signed, groups)
+    orders = np.bincount(group, minlength=groups)
+    first = np.full(groups, count)
+    np.minimum.at(first, group, np.arange(count))
+    last = np.zeros(groups, dtype=int)
+    np.maximum.at(last, group, np.arange(count))
+
+    vwap = traded / filled
+    arrival = price[first]
+    direction = np.where(net >= 0, 1.0, -1.0)
+    shortfall_bps = direction * (vwap - arrival) / arrival * 10000
+    shortfall_cost = direction * (traded - filled * arrival)
+    parents = []
+    for i, name in enumerate(names.tolist()):
+        tag, _, symbol = name.partition('|')
+        parents.append({
+            'tag': None if tag == '-' else tag, 'symbol': symbol, 'side': 'BUY' if direction[i] > 0 else 'SELL',
+            'orders': int(orders[i]), 'filled': float(filled[i]), 'vwap': float(vwap[i]), 'arrival_price': float(arrival[i]),
+            'shortfall_bps': float(shortfall_bps[i]), 'shortfall_cost': float(shortfall_cost[i]),
+            'start': float(ts[first[i]]), 'duration': float(ts[last[i]] - ts[first[i]])
+        })
+    parents.sort(key=lambda p: p['start'])
+
+    # Symbols: cash flow plus the open position at the last fill price
+    symbol_names, symbol_group = np.unique(fills['symbol'], return_inverse=True)
+    symbol_count = len(symbol_names)
+    position = np.bincount(symbol_group, signed, symbol_count)
+    cash = -np.bincount(symbol_group, side * notional, symbol_count)
+    last_fill = np.zeros(symbol_count, dtype=int)
+    np.maximum.at(last_fill, symbol_group, np.arange(count))
+    mark = price[last_fill]
+    volume = np.bincount(symbol_group, notional, symbol_count)
+    symbols = [
+        {'symbol': s, 'position': float(position[i]), 'volume': float(volume[i]), 'mark': float(mark[i]),
+         'pnl': float(cash[i] + position[i] * mark[i])}
+        for i, s in enumerate(symbol_names.tolist())
+    ]
+    return {'parents': parents, 'symbols': symbols}
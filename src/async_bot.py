@@ -0,0 +1,166 @@
+from binance import AsyncClient
+from .bot import API_KEY, API_SECRET, _client_order_seq, _client_wrappers, make_client_order_id
+from .events import order_events, publish_order_response, PLACED, REJECT
+from .profiling import trace_span
+from .validator import get_symbol_info_async, clear_exchange_info_cache
+import aiohttp
+import asyncio
+import inspect
+import logging
+
+# One keep-alive pool is shared by every async bot, sized for hundreds of requests in flight
+MAX_CONNECTIONS = 256
+KEEPALIVE_SECONDS = 60
+DNS_CACHE_SECONDS = 300
+
+_async_client_factory = None
+_async_client_task = None
+
+def set_async_client_factory(factory):
+    """
+    Build the shared async client with factory() instead of the Binance AsyncClient
+
+    The factory may be a coroutine function. Pass None to restore the Binance
+    client. Takes effect for the next get_async_client() after
+    close_async_client().
+    """
+    global _async_client_factory
+    _async_client_factory = factory
+    clear_exchange_info_cache()
+
+async def create_async_binance_client(max_connections=MAX_CONNECTIONS):
+    """
+    Binance futures testnet AsyncClient with a keep-alive connection pool
+
+    Args:
+        max_connections: Connections the pool keeps open to the exchange
+    """
+    if not API_KEY or not API_SECRET:
+        logging.error("API_KEY or API_SECRET not found. Make sure to set them in your .env file.")
+        raise ValueError("API credentials are not set in the environment variables.")
+
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_connections,  # Every request goes to the same futures host
+        keepalive_timeout=KEEPALIVE_SECONDS,
+        ttl_dns_cache=DNS_CACHE_SECONDS
+    )
+    client = await AsyncClient.create(API_KEY, API_SECRET, testnet=True, session_params={'connector': connector})
+
+    client.API_URL = 'https://testnet.binancefuture.com'
+
+    logging.info(f"Initialized Binance async client, pool of {max_connections} connections")
+    return client
+
+async def _build_async_client():
+    with trace_span('client.init', 'init'):
+        if _async_client_factory is not None:
+            client = _async_client_factory()
+            if inspect.isawaitable(client):
+                client = await client
+            logging.info(f"Initialized {type(client).__name__} async client")
+        else:
+            client = await create_async_binance_client()
+    for wrapper in _client_wrappers:
+        client = wrapper(client)
+    return client
+
+async def get_async_client():
+    """
+    The process-wide async client, created on first use
+
+    Concurrent first calls share one creation, so the process opens a single
+    connection pool. The client is bound to the running event loop; call
+    close_async_client() before the loop ends.
+    """
+    global _async_client_task
+    task = _async_client_task
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = _async_client_task = asyncio.ensure_future(_build_async_client())
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _async_client_task is task:
+            _async_client_task = None  # Let the next call retry
+        raise
+
+async def close_async_client():
+    """Close the shared async client's connection pool"""
+    global _async_client_task
+    task, _async_client_task = _async_client_task, None
+    if task is None:
+        return
+    try:
+        client = await task
+        await client.close_connection()
+        logging.info("Closed async client")
+    except Exception as e:
+        logging.error(f"Error closing async client: {e}")
+
+class AsyncBasicBot:
+    """
+    Asyncio counterpart of BasicBot
+
+    Every async bot shares the client from get_async_client(), so one event
+    loop drives all their requests over one connection pool. Create bots with
+    `await Cls.create()`.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    async def create(cls):
+        """Bot on the shared async client"""
+        return cls(await get_async_client())
+
+    async def get_account_info(self):
+        """Get futures account information"""
+        try:
+            account_info = await self.client.futures_account()
+            logging.info("Successfully retrieved futures account information")
+            return account_info
+        except Exception as e:
+            logging.error(f"Error retrieving account info: {e}")
+            return None
+
+    async def quantize_price(self, symbol, price):
+        """Round a price to the symbol's tick size (unchanged if the rules are unavailable)"""
+        try:
+            symbol_info = await get_symbol_info_async(self.client, symbol)
+        except Exception as e:
+            logging.error(f"Error getting tick size for {symbol}: {e}")
+            return price
+        return symbol_info.quantize_price(price) if symbol_info else price
+
+    async def get_current_price(self, symbol):
+        """Get current market price for a symbol"""
+        try:
+            ticker = await self.client.futures_symbol_ticker(symbol=symbol.upper())
+            logging.info(f"Current price for {symbol.upper()}: {ticker['price']}")
+            return float(ticker['price'])
+        except Exception as e:
+            logging.error(f"Error getting current price for {symbol}: {e}")
+            return None
+
+    async def _create_order(self, source=None, **params):
+        """
+        Send a futures order and publish its lifecycle on the order event bus
+
+        Same events and client order ids as BasicBot._create_order.
+        """
+        if source and 'newClientOrderId' not in params:
+            params['newClientOrderId'] = make_client_order_id(source, next(_client_order_seq))
+        symbol = params.get('symbol')
+        side = params.get('side')
+        price = float(params.get('price') or 0)
+        quantity = float(params.get('quantity') or 0)
+        client_order_id = params.get('newClientOrderId')
+
+        order_events.publish(PLACED, symbol, 0, side, price, quantity, 0.0, client_order_id, source)
+        try:
+            order = await self.client.futures_create_order(**params)
+        except Exception:
+            order_events.publish(REJECT, symbol, 0, side, price, quantity, 0.0, client_order_id, source)
+            raise
+        publish_order_response(order, source)
+        return order
@@ -0,0 +1,664 @@
+from .async_bot import AsyncBasicBot
+from .bot import register_stop_event
+from .validator import validate_positive_number, validate_symbol_async, get_symbol_info_async
+from .metrics import timed_order
+from .analytics import analytics
+from .advanced.oco import ALL_SYMBOLS_THRESHOLD, MAX_BATCH_CANCEL
+from .advanced.stop_limit import stop_limit_price, STOP_LIMIT_BUFFER
+from .advanced.twa import FillLedger, TWAPOrders, TWAP_RETENTION_SECONDS, FILL_DRAIN_SECONDS, twap_schedule, limit_chunk_price
+from collections import deque
+from datetime import datetime
+import asyncio
+import logging
+import threading
+import time
+
+# How often a sleeping async TWAP checks its stop event (set from any thread by stop_all_workers)
+STOP_POLL_SECONDS = 0.1
+
+class AsyncMarketOrders(AsyncBasicBot):
+    def __init__(self, client):
+        super().__init__(client)
+        logging.info("AsyncMarketOrders initialized")
+
+    @timed_order('market_buy')
+    async def place_buy_order(self, symbol, quantity):
+        return await self._place_market(symbol, quantity, 'BUY')
+
+    @timed_order('market_sell')
+    async def place_sell_order(self, symbol, quantity):
+        return await self._place_market(symbol, quantity, 'SELL')
+
+    async def _place_market(self, symbol, quantity, side):
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not await validate_symbol_async(self.client, symbol):
+                return None
+
+            order = await self._create_order(
+                symbol=symbol.upper(),
+                side=side,
+                type='MARKET',
+                quantity=quantity
+            )
+
+            logging.info(f"Futures market {side.lower()} order placed for {symbol.upper()} with quantity {quantity}")
+            logging.info("Order details: %s", order)
+            return order
+        except Exception as e:
+            logging.error(f"Error placing {side.lower()} order: {e}")
+            return None
+
+class AsyncLimitOrders(AsyncBasicBot):
+    def __init__(self, client):
+        super().__init__(client)
+        logging.info("AsyncLimitOrders initialized")
+
+    @timed_order('limit_buy')
+    async def place_limit_buy_order(self, symbol, quantity, price):
+        return await self._place_limit(symbol, quantity, price, 'BUY')
+
+    @timed_order('limit_sell')
+    async def place_limit_sell_order(self, symbol, quantity, price):
+        return await self._place_limit(symbol, quantity, price, 'SELL')
+
+    async def _place_limit(self, symbol, quantity, price, side):
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(price, "price"):
+                return None
+            if not await validate_symbol_async(self.client, symbol):
+                return None
+
+            order = await self._create_order(
+                symbol=symbol.upper(),
+                side=side,
+                type='LIMIT',
+                timeInForce='GTC',  # Good Till Cancelled
+                quantity=quantity,
+                price=str(price)  # Price must be string for futures API
+            )
+
+            logging.info(f"Futures limit {side.lower()} order placed for {symbol.upper()} with quantity {quantity} at price {price}")
+            logging.info("Order details: %s", order)
+            return order
+        except Exception as e:
+            logging.error(f"Error placing limit {side.lower()} order: {e}")
+            return None
+
+class AsyncStopLimitOrders(AsyncBasicBot):
+    def __init__(self, client):
+        super().__init__(client)
+        logging.info("AsyncStopLimitOrders initialized for Futures trading")
+
+    @timed_order('stop_loss')
+    async def place_stop_loss_order(self, symbol, quantity, stop_price, limit_price, side='SELL'):
+        """
+        Place a stop-loss order (stops losses by selling when price drops)
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            quantity: Amount to trade
+            stop_price: Price that triggers the order
+            limit_price: Maximum/minimum price for the limit order after trigger
+            side: 'SELL' for long positions, 'BUY' for short positions
+        """
+        return await self._place_stop(symbol, quantity, stop_price, limit_price, side, 'STOP', 'Stop-loss')
+
+    @timed_order('take_profit')
+    async def place_take_profit_order(self, symbol, quantity, stop_price, limit_price, side='SELL'):
+        """
+        Place a take-profit order (locks in profits by selling when price rises)
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            quantity: Amount to trade
+            stop_price: Price that triggers the order
+            limit_price: Maximum/minimum price for the limit order after trigger
+            side: 'SELL' for long positions, 'BUY' for short positions
+        """
+        return await self._place_stop(symbol, quantity, stop_price, limit_price, side, 'TAKE_PROFIT', 'Take-profit')
+
+    async def _place_stop(self, symbol, quantity, stop_price, limit_price, side, order_type, label):
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(stop_price, "stop_price"):
+                return None
+            if not validate_positive_number(limit_price, "limit_price"):
+                return None
+            if not await validate_symbol_async(self.client, symbol):
+                return None
+
+            order = await self._create_order(
+                symbol=symbol.upper(),
+                side=side.upper(),
+                type=order_type,
+                timeInForce='GTC',
+                quantity=quantity,
+                price=str(limit_price),  # Limit price after trigger
+                stopPrice=str(stop_price)  # Trigger price
+            )
+
+            logging.info(f"{label} order placed for {symbol.upper()}: {side} {quantity} at stop {stop_price}, limit {limit_price}")
+            logging.info("Order details: %s", order)
+            return order
+
+        except Exception as e:
+            logging.error(f"Error placing {label.lower()} order: {e}")
+            return None
+
+class AsyncOCOOrders(AsyncBasicBot):
+    """
+    Asyncio counterpart of OCOOrders
+
+    Both legs are sent at once; if one is rejected the other is cancelled so
+    no unpaired leg is left on the book.
+    """
+    def __init__(self, client):
+        super().__init__(client)
+        logging.info("AsyncOCOOrders initialized for Futures trading")
+        self.active_oco_orders = {}  # Track OCO order pairs
+
+    @timed_order('oco')
+    async def place_oco_order(self, symbol, quantity, take_profit_price, stop_loss_price, side='SELL', stop_limit_buffer=STOP_LIMIT_BUFFER):
+        """
+        Place OCO (One-Cancels-Other) order: Take-profit + Stop-loss
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            quantity: Amount to trade
+            take_profit_price: Price for take-profit order
+            stop_loss_price: Price for stop-loss order
+            side: 'SELL' for closing long position, 'BUY' for closing short position
+            stop_limit_buffer: Stop-loss limit price distance beyond the trigger, as a fraction
+        """
+        try:
+            if not validate_positive_number(quantity, "quantity"):
+                return None
+            if not validate_positive_number(take_profit_price, "take_profit_price"):
+                return None
+            if not validate_positive_number(stop_loss_price, "stop_loss_price"):
+                return None
+            valid, current_price = await asyncio.gather(
+                validate_symbol_async(self.client, symbol), self.get_current_price(symbol)
+            )
+            if not valid:
+                return None
+
+            side = side.upper()
+            if current_price:
+                if side == 'SELL':
+                    if take_profit_price <= current_price:
+                        logging.error("Take-profit price should be above current price for SELL side")
+                        return None
+                    if stop_loss_price >= current_price:
+                        logging.error("Stop-loss price should be below current price for SELL side")
+                        return None
+                else:  # BUY side
+                    if take_profit_price >= current_price:
+                        logging.error("Take-profit price should be below current price for BUY side")
+                        return None
+                    if stop_loss_price <= current_price:
+                        logging.error("Stop-loss price should be above current price for BUY side")
+                        return None
+
+            take_profit_order, stop_loss_order = await asyncio.gather(
+                self._create_order(
+                    source='OCO',
+                    symbol=symbol.upper(),
+                    side=side,
+                    type='TAKE_PROFIT',
+                    timeInForce='GTC',
+                    quantity=quantity,
+                    price=str(take_profit_price),
+                    stopPrice=str(take_profit_price)
+                ),
+                self._create_order(
+                    source='OCO',
+                    symbol=symbol.upper(),
+                    side=side,
+                    type='STOP',
+                    timeInForce='GTC',
+                    quantity=quantity,
+                    price=str(stop_limit_price(stop_loss_price, side, stop_limit_buffer)),
+                    stopPrice=str(stop_loss_price)
+                ),
+                return_exceptions=True
+            )
+            failed = [leg for leg in (take_profit_order, stop_loss_order) if isinstance(leg, Exception)]
+            if failed:
+                for leg in (take_profit_order, stop_loss_order):
+                    if not isinstance(leg, Exception):
+                        await self._cancel_leg(symbol.upper(), leg['orderId'])
+                raise failed[0]
+
+            logging.info("Take-profit order placed: %s", take_profit_order)
+            logging.info("Stop-loss order placed: %s", stop_loss_order)
+
+            oco_id = f"OCO_{int(time.time())}_{take_profit_order['orderId']}"
+            self.active_oco_orders[oco_id] = {
+                'symbol': symbol.upper(),
+                'take_profit_order_id': take_profit_order['orderId'],
+                'stop_loss_order_id': stop_loss_order['orderId'],
+                'quantity': quantity,
+                'side': side,
+                'created_time': time.time()
+            }
+
+            logging.info(f"OCO orders created successfully: {oco_id}")
+            return {
+                'oco_id': oco_id,
+                'symbol': symbol.upper(),
+                'take_profit_order': take_profit_order,
+                'stop_loss_order': stop_loss_order,
+                'quantity': quantity,
+                'side': side
+            }
+
+        except Exception as e:
+            logging.error(f"Error placing OCO order: {e}")
+            return None
+
+    async def _cancel_leg(self, symbol, order_id):
+        try:
+            result = await self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            logging.info("Cancelled unpaired OCO leg: %s", result)
+        except Exception as e:
+            logging.error(f"Could not cancel unpaired OCO leg {order_id} on {symbol}: {e}")
+
+    @timed_order('oco_reconcile')
+    async def reconcile_oco_orders(self):
+        """
+        Check every tracked OCO pair against one open-orders snapshot and cancel
+        the sibling of any leg that filled
+
+        Same requests as OCOOrders.reconcile_oco_orders; the per-symbol
+        snapshots and the batch cancels are each sent concurrently.
+        """
+        try:
+            if not self.active_oco_orders:
+                return {'triggered': [], 'closed': [], 'broken': [], 'active': 0, 'requests': 0}
+
+            symbols = {oco['symbol'] for oco in self.active_oco_orders.values()}
+            if len(symbols) > ALL_SYMBOLS_THRESHOLD:
+                snapshots = [await self.client.futures_get_open_orders()]
+            else:
+                snapshots = await asyncio.gather(*(self.client.futures_get_open_orders(symbol=symbol) for symbol in symbols))
+            requests_made = len(snapshots)
+            open_ids = {}
+            for orders in snapshots:
+                for order in orders:
+                    open_ids.setdefault(order['symbol'], set()).add(order['orderId'])
+
+            triggered = []
+            closed = []
+            broken = []  # A leg cancelled or expired unfilled, the sibling was kept
+            cancels = {}  # symbol -> [order ids to cancel]
+            for oco_id, oco_data in list(self.active_oco_orders.items()):
+                symbol_open = open_ids.get(oco_data['symbol'], set())
+                tp_open = oco_data['take_profit_order_id'] in symbol_open
+                sl_open = oco_data['stop_loss_order_id'] in symbol_open
+
+                if tp_open and sl_open:
+                    continue
+
+                gone = 'stop_loss' if tp_open else 'take_profit' if sl_open else None
+                if gone:
+                    status = await self._final_status(oco_data['symbol'], oco_data[f"{gone}_order_id"])
+                    requests_made += 1
+                    if status is None:
+                        continue
+                    if status != 'FILLED':
+                        logging.warning(f"OCO {oco_id} {gone} leg ended {status} without filling, "
+                                        f"{'take_profit' if tp_open else 'stop_loss'} leg left on the book")
+                        broken.append({'oco_id': oco_id, 'ended': gone, 'status': status})
+                        del self.active_oco_orders[oco_id]
+                        continue
+
+                if tp_open:
+                    cancels.setdefault(oco_data['symbol'], []).append(oco_data['take_profit_order_id'])
+                    triggered.append({'oco_id': oco_id, 'filled': 'stop_loss', 'cancelled': 'take_profit'})
+                elif sl_open:
+                    cancels.setdefault(oco_data['symbol'], []).append(oco_data['stop_loss_order_id'])
+                    triggered.append({'oco_id': oco_id, 'filled': 'take_profit', 'cancelled': 'stop_loss'})
+                else:
+                    closed.append(oco_id)
+
+                del self.active_oco_orders[oco_id]
+
+            batches = [
+                (symbol, order_ids[i:i + MAX_BATCH_CANCEL])
+                for symbol, order_ids in cancels.items()
+                for i in range(0, len(order_ids), MAX_BATCH_CANCEL)
+            ]
+            await asyncio.gather(*(self._cancel_batch(*batch) for batch in batches))
+            requests_made += len(batches)
+
+            logging.info(
+                f"OCO reconcile: {len(triggered)} triggered, {len(closed)} closed, {len(broken)} broken, "
+                f"{len(self.active_oco_orders)} active, {requests_made} requests"
+            )
+            return {
+                'triggered': triggered,
+                'closed': closed,
+                'broken': broken,
+                'active': len(self.active_oco_orders),
+                'requests': requests_made
+            }
+
+        except Exception as e:
+            logging.error(f"Error reconciling OCO orders: {e}")
+            return None
+
+    async def _final_status(self, symbol, order_id):
+        """Status of an order that left the book, None if it could not be fetched"""
+        try:
+            return (await self.client.futures_get_order(symbol=symbol, orderId=order_id))['status']
+        except Exception as e:
+            logging.error(f"Error fetching OCO leg {order_id} on {symbol}: {e}")
+            return None
+
+    async def _cancel_batch(self, symbol, order_ids):
+        """Cancel up to 10 orders of one symbol in a single request"""
+        try:
+            results = await self.client.futures_cancel_orders(symbol=symbol, orderidlist=order_ids)
+            for result in results:
+                if 'code' in result:
+                    logging.warning(f"Could not cancel OCO sibling on {symbol} (might be already filled): {result.get('msg')}")
+                else:
+                    logging.info(f"Cancelled OCO sibling order {result.get('orderId')} on {symbol}")
+            return results
+        except Exception as e:
+            logging.error(f"Error batch cancelling orders {order_ids} on {symbol}: {e}")
+            return None
+
+    async def cancel_oco_orders(self, oco_id):
+        """Cancel both orders in an OCO pair"""
+        try:
+            if oco_id not in self.active_oco_orders:
+                logging.warning(f"OCO ID {oco_id} not found")
+                return None
+
+            oco_data = self.active_oco_orders.pop(oco_id)
+            symbol = oco_data['symbol']
+            legs = [('take_profit', oco_data['take_profit_order_id']), ('stop_loss', oco_data['stop_loss_order_id'])]
+            cancels = await asyncio.gather(
+                *(self.client.futures_cancel_order(symbol=symbol, orderId=order_id) for _, order_id in legs),
+                return_exceptions=True
+            )
+
+            results = []
+            for (leg, _), cancel in zip(legs, cancels):
+                if isinstance(cancel, Exception):
+                    logging.warning(f"Could not cancel {leg.replace('_', '-')} order: {cancel}")
+                else:
+                    results.append((leg, cancel))
+                    logging.info(f"Cancelled {leg.replace('_', '-')} order: %s", cancel)
+            return results
+
+        except Exception as e:
+            logging.error(f"Error cancelling OCO orders: {e}")
+            return None
+
+    def get_active_oco_orders(self):
+        """Get all active OCO order pairs"""
+        return self.active_oco_orders.copy()
+
+class AsyncTWAPOrders(AsyncBasicBot):
+    """
+    Asyncio counterpart of TWAPOrders
+
+    Each TWAP runs as a task on the event loop instead of a thread, so one
+    loop can drive many TWAPs. Fills go into the same FillLedger from the
+    order event bus and finished TWAPs move to the journal like the threaded
+    ones.
+    """
+    # Status snapshots, eviction and cancellation are shared with TWAPOrders
+    get_twap_status = TWAPOrders.get_twap_status
+    _snapshot = staticmethod(TWAPOrders._snapshot)
+    _evict_finished = TWAPOrders._evict_finished
+    _load_evicted = TWAPOrders._load_evicted
+    cancel_twap_order = TWAPOrders.cancel_twap_order
+    get_active_twap_orders = TWAPOrders.get_active_twap_orders
+    _start_fill_consumer = TWAPOrders._start_fill_consumer
+    _on_fill = TWAPOrders._on_fill
+
+    def __init__(self, client):
+        super().__init__(client)
+        logging.info("AsyncTWAPOrders initialized for Futures trading")
+        self.active_twap_orders = {}  # Track active TWAP executions
+        self.retention_seconds = TWAP_RETENTION_SECONDS
+        self._finished = deque()  # (end time, twap_id) in completion order
+        self._twap_ids = 0
+        self._tasks = {}  # twap_id -> execution task
+        self.use_user_stream = True  # Set False when fills are published into the bus by something else
+        self._ledger_lock = threading.Lock()
+        self._fills_stop = threading.Event()
+        self._fill_subscription = None
+        self._fill_consumer = None
+
+    @timed_order('twap')
+    async def place_twap_order(self, symbol, total_quantity, side, duration_minutes, num_chunks=None, order_type='MARKET'):
+        """
+        Place TWAP (Time-Weighted Average Price) order
+        Splits large order into smaller chunks executed over time
+
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            total_quantity: Total amount to trade
+            side: 'BUY' or 'SELL'
+            duration_minutes: Time period to spread the order over
+            num_chunks: Number of smaller orders (default: duration_minutes)
+            order_type: 'MARKET' or 'LIMIT'
+        """
+        try:
+            if not validate_positive_number(total_quantity, "total_quantity"):
+                return None
+            if not validate_positive_number(duration_minutes, "duration_minutes"):
+                return None
+            if not await validate_symbol_async(self.client, symbol):
+                return None
+
+            if side.upper() not in ['BUY', 'SELL']:
+                logging.error("Side must be 'BUY' or 'SELL'")
+                return None
+
+            num_chunks, chunk_size, interval_seconds = twap_schedule(total_quantity, duration_minutes, num_chunks)
+
+            min_chunk_size, arrival_price = await asyncio.gather(self.get_min_quantity(symbol), self.get_current_price(symbol))
+            if min_chunk_size and chunk_size < min_chunk_size:
+                logging.error(f"Chunk size {chunk_size} is below minimum {min_chunk_size}")
+                return None
+
+            self._evict_finished()
+            self._twap_ids += 1
+            twap_id = f"TWAP_{int(time.time())}_{self._twap_ids}"
+
+            twap_config = {
+                'twap_id': twap_id,
+                'symbol': symbol.upper(),
+                'total_quantity': total_quantity,
+                'side': side.upper(),
+                'order_type': order_type.upper(),
+                'duration_minutes': duration_minutes,
+                'num_chunks': num_chunks,
+                'chunk_size': chunk_size,
+                'interval_seconds': interval_seconds,
+                'chunks_executed': 0,
+                'total_executed': 0,
+                'submitted_quantity': 0,
+                'start_time': datetime.now(),
+                'status': 'ACTIVE',
+                'ledger': FillLedger(side.upper(), arrival_price),
+                'errors': [],
+                'stop_event': register_stop_event(threading.Event())
+            }
+
+            self._start_fill_consumer(twap_config['order_type'])
+            self.active_twap_orders[twap_id] = twap_config
+            if arrival_price:
+                analytics.set_arrival(twap_id, arrival_price)
+
+            logging.info(f"TWAP order initiated: {twap_id}")
+            logging.info(f"Total: {total_quantity}, Chunks: {num_chunks}, Size: {chunk_size}, Interval: {interval_seconds}s")
+
+            self._tasks[twap_id] = asyncio.ensure_future(self._execute_twap_chunks(twap_id))
+            return twap_config
+
+        except Exception as e:
+            logging.error(f"Error initiating TWAP order: {e}")
+            return None
+
+    async def wait_twap(self, twap_id):
+        """Wait until a TWAP has sent its last chunk or stopped, returns its status"""
+        task = self._tasks.get(twap_id)
+        if task is not None:
+            await task
+        return self.get_twap_status(twap_id)
+
+    async def _execute_twap_chunks(self, twap_id):
+        """Execute TWAP chunks as a task on the event loop"""
+        try:
+            twap_config = self.active_twap_orders[twap_id]
+            symbol = twap_config['symbol']
+            side = twap_config['side']
+            chunk_size = twap_config['chunk_size']
+            num_chunks = twap_config['num_chunks']
+            interval_seconds = twap_config['interval_seconds']
+            order_type = twap_config['order_type']
+            stop_event = twap_config['stop_event']
+            start = time.monotonic()
+
+            for chunk_num in range(num_chunks):
+                try:
+                    if stop_event.is_set():
+                        logging.info(f"TWAP {twap_id} cancelled, stopping execution")
+                        break
+
+                    current_chunk_size = chunk_size
+                    if chunk_num == num_chunks - 1:
+                        current_chunk_size = twap_config['total_quantity'] - twap_config['submitted_quantity']
+
+                    submitted = time.time()
+                    if order_type == 'MARKET':
+                        order = await self._place_market_chunk(symbol, current_chunk_size, side, source=twap_id)
+                    else:  # LIMIT
+                        current_price = await self.get_current_price(symbol)
+                        if not current_price:
+                            raise Exception("Could not get current price for limit order")
+
+                        limit_price = await self.quantize_price(symbol, limit_chunk_price(current_price, side))
+
+                        order = await self._place_limit_chunk(symbol, current_chunk_size, side, limit_price, source=twap_id)
+
+                    if order:
+                        with self._ledger_lock:
+                            twap_config['ledger'].submit(order.get('clientOrderId'), submitted)
+                        twap_config['chunks_executed'] += 1
+                        twap_config['submitted_quantity'] += current_chunk_size
+
+                        logging.info(f"TWAP {twap_id} - Chunk {chunk_num + 1}/{num_chunks} executed: {order.get('orderId')}")
+                    else:
+                        error_msg = f"Chunk {chunk_num + 1} failed to execute"
+                        twap_config['errors'].append(error_msg)
+                        logging.error(f"TWAP {twap_id} - {error_msg}")
+
+                    # Chunks are due on a fixed schedule from the start, so request latency does not add up
+                    if chunk_num < num_chunks - 1:
+                        await self._sleep_until(stop_event, start + (chunk_num + 1) * interval_seconds)
+
+                except Exception as e:
+                    error_msg = f"Error executing chunk {chunk_num + 1}: {str(e)}"
+                    twap_config['errors'].append(error_msg)
+                    logging.error(f"TWAP {twap_id} - {error_msg}")
+                    continue
+
+            # Totals include the last chunk's fill before the TWAP is reported finished
+            if not await self._drain_fills():
+                logging.warning(f"TWAP {twap_id} - fill consumer is behind, totals may miss the latest fills")
+
+            if twap_config['status'] == 'ACTIVE':
+                twap_config['status'] = 'STOPPED' if stop_event.is_set() else 'COMPLETED'
+            twap_config['end_time'] = datetime.now()
+
+            ledger = twap_config['ledger']
+            logging.info(
+                f"TWAP {twap_id} completed: {twap_config['chunks_executed']}/{num_chunks} chunks executed, "
+                f"filled {ledger.filled_quantity} at VWAP {ledger.vwap}, slippage {ledger.slippage_bps} bps vs arrival {ledger.arrival_price}"
+            )
+
+        except Exception as e:
+            logging.error(f"Critical error in TWAP execution {twap_id}: {e}")
+            if twap_id in self.active_twap_orders:
+                self.active_twap_orders[twap_id]['status'] = 'ERROR'
+                self.active_twap_orders[twap_id]['errors'].append(str(e))
+        finally:
+            self._tasks.pop(twap_id, None)
+            self._finished.append((time.time(), twap_id))
+
+    async def _drain_fills(self, timeout=FILL_DRAIN_SECONDS):
+        """Wait until every fill published so far has been applied to the ledgers, False on timeout"""
+        subscription = self._fill_subscription
+        if subscription is None:
+            return True
+        target = subscription.bus._next_seq
+        deadline = time.monotonic() + timeout
+        while subscription.cursor < target:
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.005)
+        return True
+
+    @staticmethod
+    async def _sleep_until(stop_event, deadline):
+        """Sleep until the monotonic deadline, returning early once stop_event is set"""
+        while not stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, STOP_POLL_SECONDS))
+
+    @timed_order('twap_chunk_market')
+    async def _place_market_chunk(self, symbol, quantity, side, source=None):
+        """Place a market order chunk"""
+        try:
+            return await self._create_order(
+                source=source,
+                symbol=symbol,
+                side=side,
+                type='MARKET',
+                quantity=quantity,
+                newOrderRespType='RESULT'  # Response carries the fill quantity and average price
+            )
+        except Exception as e:
+            logging.error(f"Error placing market chunk: {e}")
+            return None
+
+    @timed_order('twap_chunk_limit')
+    async def _place_limit_chunk(self, symbol, quantity, side, price, source=None):
+        """Place a limit order chunk"""
+        try:
+            return await self._create_order(
+                source=source,
+                symbol=symbol,
+                side=side,
+                type='LIMIT',
+                timeInForce='GTC',
+                quantity=quantity,
+                price=str(price)
+            )
+        except Exception as e:
+            logging.error(f"Error placing limit chunk: {e}")
+            return None
+
+    async def get_min_quantity(self, symbol):
+        """Get minimum quantity for a symbol"""
+        try:
+            symbol_info = await get_symbol_info_async(self.client, symbol)
+            return symbol_info.min_qty if symbol_info else None
+        except Exception as e:
+            logging.error(f"Error getting minimum quantity: {e}")
+            return None
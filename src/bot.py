@@ -1,24 +1,239 @@
 from binance import Client
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv 
+from .events import order_events, publish_order_response, PLACED, REJECT
+from .profiling import trace_span
+from .validator import get_symbol_info, clear_exchange_info_cache
+from .models import fetch_account
+import atexit
+import itertools
+import json
 import os
+import secrets
 import logging
+import threading
+import time
+import weakref
 
 load_dotenv()
 
 API_KEY = os.getenv("API_Key")
 API_SECRET = os.getenv("Secret_Key")
 
+_client_order_seq = itertools.count(1)
+# Random per process: sequence numbers restart in every process, and the
+# exchange rejects a client order id that matches one of our open orders
+CLIENT_ID_TAG = secrets.token_hex(3)
+_client_factory = None
+_client_wrappers = []
+_stop_events = weakref.WeakSet()
+_stop_events_lock = threading.Lock()
+_panic_watcher = None
+
+# Processes running workers register here and watch the panic flag, so a
+# panic raised from another process stops them too. Anchored to the project
+# directory so processes started from any working directory share it.
+WORKER_REGISTRY_DIR = os.getenv("WORKER_REGISTRY_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'workers'
+)
+PANIC_FLAG_FILE = os.path.join(WORKER_REGISTRY_DIR, 'PANIC')
+PANIC_POLL_SECONDS = 0.1
+# How long a panic waits for registered processes to confirm their workers stopped
+PANIC_ACK_SECONDS = 1.0
+# A registration not refreshed for this long belongs to a process that died
+REGISTRY_STALE_SECONDS = 5.0
+
+def make_client_order_id(source, suffix):
+    """Client order id '<source>.<process tag><suffix>', within the 36 characters Binance accepts"""
+    return f"{source[:22]}.{CLIENT_ID_TAG}{suffix}"
+
+def set_client_factory(factory):
+    """
+    Build bot clients with factory() instead of the Binance REST client
+
+    Used to run the order classes against a local stand-in exchange. Pass None
+    to restore the Binance client.
+    """
+    global _client_factory
+    _client_factory = factory
+    clear_exchange_info_cache()
+
+def register_client_wrapper(wrapper):
+    """
+    Wrap every bot client created from now on with wrapper(client)
+
+    Wrappers are applied in registration order, e.g. to time or record the
+    client calls.
+    """
+    _client_wrappers.append(wrapper)
+
+def create_binance_client():
+    """Binance futures testnet client with the credentials from .env"""
+    if not API_KEY or not API_SECRET:
+        logging.error("API_KEY or API_SECRET not found. Make sure to set them in your .env file.")
+        raise ValueError("API credentials are not set in the environment variables.")
+        
+    client = Client(API_KEY, API_SECRET,testnet=True)
+
+    client.API_URL = 'https://testnet.binancefuture.com'
+    
+    logging.info("Initialized Binance client")
+    return client
+
+def register_stop_event(event):
+    """
+    Register a worker's stop event so stop_all_workers() can halt it
+
+    Workers should sleep with event.wait(timeout) instead of time.sleep so
+    they stop immediately. Events are held weakly.
+    """
+    global _panic_watcher
+    with _stop_events_lock:
+        _stop_events.add(event)
+        if _panic_watcher is None:
+            _panic_watcher = threading.Thread(target=_watch_panic, daemon=True, name='panic-watcher')
+            _panic_watcher.start()
+    return event
+
+def stop_all_workers():
+    """Set every registered stop event, returns how many were still running"""
+    with _stop_events_lock:
+        events = list(_stop_events)
+    stopped = 0
+    for event in events:
+        if not event.is_set():
+            event.set()
+            stopped += 1
+    return stopped
+
+def _registry_path(pid, suffix=''):
+    return os.path.join(WORKER_REGISTRY_DIR, f"{pid}{suffix}")
+
+def _write_atomic(path, text):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def _read_file(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _unregister_process(pid=None):
+    pid = pid or os.getpid()
+    for path in (_registry_path(pid), _registry_path(pid, '.ack')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _watch_panic():
+    """Register this process and stop its workers when another process raises the panic flag"""
+    registration = _registry_path(os.getpid())
+    try:
+        os.makedirs(WORKER_REGISTRY_DIR, exist_ok=True)
+        _write_atomic(registration, str(time.time()))
+        atexit.register(_unregister_process)
+    except OSError as e:
+        logging.error(f"Error registering for cross-process panic, only an in-process panic stops these workers: {e}")
+        return
+    seen = _read_file(PANIC_FLAG_FILE)  # A panic raised before this process started does not apply
+    while True:
+        time.sleep(PANIC_POLL_SECONDS)
+        try:
+            os.utime(registration)
+        except OSError:
+            try:
+                _write_atomic(registration, str(time.time()))
+            except OSError:
+                pass
+        flag = _read_file(PANIC_FLAG_FILE)
+        if flag and flag != seen:
+            seen = flag
+            stopped = stop_all_workers()
+            logging.warning(f"PANIC raised by another process: stopped {stopped} workers")
+            try:
+                _write_atomic(_registry_path(os.getpid(), '.ack'), json.dumps({'panic': flag, 'stopped': stopped}))
+            except OSError as e:
+                logging.error(f"Error acknowledging panic: {e}")
+
+def raise_panic_flag():
+    """
+    Raise the panic flag for every other process running workers
+
+    Returns without waiting, collect the confirmations with wait_for_panic_acks.
+
+    Returns:
+        (flag, pids of the registered processes)
+    """
+    flag = f"{os.getpid()} {time.time()}"
+    os.makedirs(WORKER_REGISTRY_DIR, exist_ok=True)
+    _write_atomic(PANIC_FLAG_FILE, flag)
+
+    now = time.time()
+    pending = set()
+    for name in os.listdir(WORKER_REGISTRY_DIR):
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        path = _registry_path(name)
+        try:
+            if now - os.path.getmtime(path) > REGISTRY_STALE_SECONDS:
+                _unregister_process(name)  # Left behind by a process that died
+                continue
+        except OSError:
+            continue
+        pending.add(int(name))
+    return flag, pending
+
+def wait_for_panic_acks(flag, pids, timeout=PANIC_ACK_SECONDS):
+    """
+    Wait up to timeout for the processes to confirm the panic flag
+
+    Returns:
+        (processes reached, workers they stopped, pids that did not confirm)
+    """
+    pending = set(pids)
+    reached = stopped = 0
+    deadline = time.monotonic() + timeout
+    while pending:
+        for pid in list(pending):
+            ack = _read_file(_registry_path(pid, '.ack'))
+            try:
+                ack = json.loads(ack) if ack else None
+            except ValueError:
+                ack = None
+            if ack and ack.get('panic') == flag:
+                pending.discard(pid)
+                reached += 1
+                stopped += ack['stopped']
+        if not pending or time.monotonic() >= deadline:
+            break
+        time.sleep(PANIC_POLL_SECONDS / 4)
+    return reached, stopped, sorted(pending)
+
 class BasicBot:
     def __init__(self):
-        if not API_KEY or not API_SECRET:
-            logging.error("API_KEY or API_SECRET not found. Make sure to set them in your .env file.")
-            raise ValueError("API credentials are not set in the environment variables.")
-            
-        self.client = Client(API_KEY, API_SECRET,testnet=True)
+        with trace_span('client.init', 'init'):
+            self.client = self._build_client()
+        for wrapper in _client_wrappers:
+            self.client = wrapper(self.client)
 
-        self.client.API_URL = 'https://testnet.binancefuture.com'
-        
-        logging.info("Initialized Binance client")
+    def _build_client(self):
+        if _client_factory is not None:
+            client = _client_factory()
+            logging.info(f"Initialized {type(client).__name__} client")
+            return client
+        return create_binance_client()
+
+    def widen_connection_pool(self, max_connections):
+        """Let the Binance client's HTTP session keep max_connections open, for concurrent requests"""
+        session = getattr(self.client, 'session', None)
+        if session is None or not hasattr(session, 'mount'):
+            return
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=max_connections))
 
     def get_account_info(self):
         """Get futures account information"""
@@ -30,6 +245,23 @@ class BasicBot:
             logging.error(f"Error retrieving account info: {e}")
             return None
         
+    def get_account(self):
+        """Get futures account balances and open positions as an Account"""
+        try:
+            return fetch_account(self.client)
+        except Exception as e:
+            logging.error(f"Error retrieving account: {e}")
+            return None
+
+    def quantize_price(self, symbol, price):
+        """Round a price to the symbol's tick size (unchanged if the rules are unavailable)"""
+        try:
+            symbol_info = get_symbol_info(self.client, symbol)
+        except Exception as e:
+            logging.error(f"Error getting tick size for {symbol}: {e}")
+            return price
+        return symbol_info.quantize_price(price) if symbol_info else price
+
     def get_current_price(self, symbol):
         """Get current market price for a symbol"""
         try:
@@ -39,3 +271,29 @@ class BasicBot:
         except Exception as e:
             logging.error(f"Error getting current price for {symbol}: {e}")
             return None
+
+    def _create_order(self, source=None, **params):
+        """
+        Send a futures order and publish its lifecycle on the order event bus
+
+        Publishes PLACED before the request and ACK/FILL or REJECT after it.
+        Orders with a source get a client order id '<source>.<tag><n>' so fills
+        from the user-data stream can be attributed to the strategy that sent
+        them; the process tag keeps ids of concurrent processes apart.
+        """
+        if source and 'newClientOrderId' not in params:
+            params['newClientOrderId'] = make_client_order_id(source, next(_client_order_seq))
+        symbol = params.get('symbol')
+        side = params.get('side')
+        price = float(params.get('price') or 0)
+        quantity = float(params.get('quantity') or 0)
+        client_order_id = params.get('newClientOrderId')
+
+        order_events.publish(PLACED, symbol, 0, side, price, quantity, 0.0, client_order_id, source)
+        try:
+            order = self.client.futures_create_order(**params)
+        except Exception:
+            order_events.publish(REJECT, symbol, 0, side, price, quantity, 0.0, client_order_id, source)
+            raise
+        publish_order_response(order, source)
+        return order
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process at a time
+    fcntl = None
+
+
+class ColumnTable:
+    """
+    Append-only table stored as one raw file per column
+
+    Each column is a flat little-endian array on disk, so appending a batch is
+    one write per column and reading a column is a single np.fromfile, with
+    no parsing. Columns are written one after the other; a batch cut short by
+    a crash is ignored by readers and cut off by the next append, which
+    truncates every column to the shortest one.
+    """
+    def __init__(self, directory, schema):
+        """
+        Args:
+            directory: Directory holding the column files
+            schema: {column name: numpy dtype}
+        """
+        self.directory = directory
+        self.schema = {name: np.dtype(dtype).newbyteorder('<') for name, dtype in schema.items()}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._rows = self._complete_rows()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.col")
+
+    def _repair(self):
+        """Row count, after truncating columns left longer by an interrupted append"""
+        sizes = {}
+        for name, dtype in self.schema.items():
+            path = self._path(name)
+            sizes[name] = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        rows = min(sizes.values())
+        for name, size in sizes.items():
+            if size > rows:
+                os.truncate(self._path(name), rows * self.schema[name].itemsize)
+        return rows
+
+    def __len__(self):
+        return self._rows
+
+    def append(self, columns):
+        """
+        Append rows
+
+        Args:
+            columns: {column name: sequence}, every column of the schema with the same length
+        """
+        arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in self.schema.items()}
+        lengths = {len(a) for a in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        rows = lengths.pop()
+        if not rows:
+            return 0
+        with self._lock, open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have appended since we opened the table
+            self._rows = self._repair()
+            for name, array in arrays.items():
+                with open(self._path(name), 'ab') as f:
+                    array.tofile(f)
+            self._rows += rows
+        return rows
+
+    def read(self, names=None):
+        """
+        Columns as numpy arrays
+
+        Args:
+            names: Columns to read (default: all)
+        """
+        names = names or list(self.schema)
+        rows = self._complete_rows()
+        columns = {}
+        for name in names:
+            dtype = self.schema[name]
+            path = self._path(name)
+            columns[name] = np.fromfile(path, dtype=dtype, count=rows) if rows else np.empty(0, dtype=dtype)
+        return columns
+
+    def memmap(self, names=None):
+        """
+        Columns as read-only memory maps
+
+        Processes mapping the same table share the page cache, so nothing is
+        copied into each of them; pages are read in as they are touched.
+        """
+        names = names or list(self.schema)
+        rows = self._complete_rows()
+        columns = {}
+        for name in names:
+            dtype = self.schema[name]
+            columns[name] = np.memmap(self._path(name), dtype=dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+        return columns
+
+    def _complete_rows(self):
+        """Complete rows on disk, without truncating (a writer may be mid-append)"""
+        rows = None
+        for name, dtype in self.schema.items():
+            path = self._path(name)
+            size = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+            rows = size if rows is None else min(rows, size)
+        self._rows = rows or 0
+        return self._rows
+
+
+class SymbolDictionary:
+    """
+    Symbol <-> integer code mapping persisted as a JSON list
+
+    Lets tables store symbols as int32 columns and group by them with
+    np.bincount. Codes are positions in the list and never change.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.symbols = []
+        if os.path.exists(path):
+            with open(path) as f:
+                self.symbols = json.load(f)
+        self._codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def code(self, symbol):
+        """Code of symbol, assigning and saving a new one if unseen"""
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            temp = f"{self.path}.tmp"
+            with open(temp, 'w') as f:
+                json.dump(self.symbols, f)
+            os.replace(temp, self.path)
+        return code
+
+    def get(self, symbol):
+        return self._codes.get(symbol)
@@ -0,0 +1,329 @@
+from array import array
+import logging
+import threading
+import time
+
+# Order event types
+PLACED = 1
+ACK = 2
+FILL = 3
+CANCEL = 4
+REJECT = 5
+
+EVENT_NAMES = {PLACED: 'PLACED', ACK: 'ACK', FILL: 'FILL', CANCEL: 'CANCEL', REJECT: 'REJECT'}
+SIDE_CODES = {'BUY': 1, 'SELL': -1}
+SIDE_NAMES = {1: 'BUY', -1: 'SELL', 0: None}
+
+# Exchange order status -> event type for REST responses
+STATUS_EVENTS = {
+    'NEW': ACK,
+    'PARTIALLY_FILLED': ACK,
+    'FILLED': FILL,
+    'CANCELED': CANCEL,
+    'EXPIRED': CANCEL,
+    'EXPIRED_IN_MATCH': CANCEL,
+    'REJECTED': REJECT
+}
+
+# User-data stream execution type -> event type
+EXECUTION_EVENTS = {
+    'NEW': ACK,
+    'AMENDMENT': ACK,
+    'TRADE': FILL,
+    'CANCELED': CANCEL,
+    'EXPIRED': CANCEL,
+    'CALCULATED': FILL,
+    'REJECTED': REJECT
+}
+
+
+class OrderEvent:
+    """
+    Read-only view of one ring-buffer slot
+
+    Each subscription owns one view and repositions it on every event, so
+    consuming events allocates no record objects. Do not keep a reference to a
+    view after the handler returns; copy the fields you need.
+    """
+    __slots__ = ('_bus', 'slot', 'seq')
+
+    def __init__(self, bus):
+        self._bus = bus
+        self.slot = 0
+        self.seq = -1
+
+    @property
+    def event_type(self):
+        return self._bus._types[self.slot]
+
+    @property
+    def ts(self):
+        return self._bus._ts[self.slot]
+
+    @property
+    def symbol(self):
+        return self._bus._symbols[self.slot]
+
+    @property
+    def order_id(self):
+        return self._bus._order_ids[self.slot]
+
+    @property
+    def client_order_id(self):
+        return self._bus._client_ids[self.slot]
+
+    @property
+    def side(self):
+        return SIDE_NAMES[self._bus._sides[self.slot]]
+
+    @property
+    def price(self):
+        return self._bus._prices[self.slot]
+
+    @property
+    def quantity(self):
+        return self._bus._quantities[self.slot]
+
+    @property
+    def cum_quantity(self):
+        return self._bus._cum_quantities[self.slot]
+
+    @property
+    def source(self):
+        return self._bus._sources[self.slot]
+
+    def to_dict(self):
+        """Copy the event out of the ring"""
+        return {
+            'seq': self.seq,
+            'event': EVENT_NAMES.get(self.event_type),
+            'ts': self.ts,
+            'symbol': self.symbol,
+            'order_id': self.order_id,
+            'client_order_id': self.client_order_id,
+            'side': self.side,
+            'price': self.price,
+            'quantity': self.quantity,
+            'cum_quantity': self.cum_quantity,
+            'source': self.source
+        }
+
+
+class EventSubscription:
+    """A consumer of the bus with its own cursor and backpressure counters"""
+    def __init__(self, bus, name, event_types=None):
+        self.bus = bus
+        self.name = name
+        self.event_types = frozenset(event_types) if event_types else None
+        self.cursor = bus._next_seq  # Next sequence number to read
+        self.view = OrderEvent(bus)
+        self.delivered = 0
+        self.dropped = 0
+        self.max_lag = 0
+
+    def lag(self):
+        """Events published but not yet consumed"""
+        return self.bus._next_seq - self.cursor
+
+    def poll(self, handler, max_events=1024):
+        """
+        Deliver pending events to handler(event)
+
+        Returns:
+            int: Number of events delivered
+        """
+        bus = self.bus
+        head = bus._next_seq
+        cursor = self.cursor
+        lag = head - cursor
+        if lag > self.max_lag:
+            self.max_lag = lag
+        if lag > bus.capacity:
+            # Consumer fell a full ring behind: skip what was overwritten
+            self.dropped += lag - bus.capacity
+            cursor = head - bus.capacity
+
+        end = min(head, cursor + max_events)
+        mask = bus._mask
+        seqs = bus._seqs
+        types = bus._types
+        event_types = self.event_types
+        view = self.view
+        delivered = 0
+        while cursor < end:
+            slot = cursor & mask
+            if seqs[slot] != cursor:
+                self.dropped += 1
+            elif event_types is None or types[slot] in event_types:
+                view.slot = slot
+                view.seq = cursor
+                handler(view)
+                delivered += 1
+            cursor += 1
+        self.cursor = cursor
+        self.delivered += delivered
+        return delivered
+
+    def wait(self, timeout=None):
+        """Block until there are unread events, returns False on timeout"""
+        return self.bus._wait_for(self, timeout)
+
+    def run(self, handler, stop_event, max_events=1024, timeout=0.5):
+        """Consume events until stop_event is set (blocking loop for a consumer thread)"""
+        while not stop_event.is_set():
+            if self.wait(timeout):
+                try:
+                    self.poll(handler, max_events)
+                except Exception as e:
+                    logging.error(f"Event consumer {self.name} failed handling event: {e}")
+
+    def stats(self):
+        return {
+            'cursor': self.cursor,
+            'lag': self.lag(),
+            'max_lag': self.max_lag,
+            'delivered': self.delivered,
+            'dropped': self.dropped
+        }
+
+
+class OrderEventBus:
+    """
+    In-process pub/sub for order lifecycle events
+
+    Events are written into a fixed-size ring of typed columns preallocated at
+    start-up; publishing overwrites a slot instead of allocating a record. Each
+    subscriber reads at its own cursor, and a subscriber that falls more than
+    `capacity` events behind loses the overwritten ones (counted in its stats).
+    """
+    def __init__(self, capacity=65536):
+        if capacity & (capacity - 1):
+            raise ValueError("Event bus capacity must be a power of two")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._seqs = array('q', [-1]) * capacity
+        self._types = array('b', [0]) * capacity
+        self._ts = array('d', [0.0]) * capacity
+        self._order_ids = array('q', [0]) * capacity
+        self._sides = array('b', [0]) * capacity
+        self._prices = array('d', [0.0]) * capacity
+        self._quantities = array('d', [0.0]) * capacity
+        self._cum_quantities = array('d', [0.0]) * capacity
+        self._symbols = [None] * capacity
+        self._client_ids = [None] * capacity
+        self._sources = [None] * capacity
+        self._next_seq = 0
+        self._publish_lock = threading.Lock()
+        self._ready = threading.Condition(threading.Lock())
+        self._waiting = 0
+        self.subscriptions = {}
+
+    def publish(self, event_type, symbol, order_id=0, side=None, price=0.0, quantity=0.0, cum_quantity=0.0, client_order_id=None, source=None):
+        """
+        Publish an order event
+
+        Args:
+            event_type: PLACED, ACK, FILL, CANCEL or REJECT
+            symbol: Trading pair
+            order_id: Exchange order id (0 when not known yet)
+            side: 'BUY' or 'SELL'
+            price: Order price, or last fill price for FILL events
+            quantity: Order quantity, or last fill quantity for FILL events
+            cum_quantity: Cumulative filled quantity of the order
+            client_order_id: Client order id
+            source: Tag of the strategy that owns the order (e.g., a TWAP id)
+
+        Returns:
+            int: Sequence number of the event
+        """
+        with self._publish_lock:
+            seq = self._next_seq
+            slot = seq & self._mask
+            self._types[slot] = event_type
+            self._ts[slot] = time.time()
+            self._order_ids[slot] = order_id or 0
+            self._sides[slot] = SIDE_CODES.get(side, 0)
+            self._prices[slot] = price
+            self._quantities[slot] = quantity
+            self._cum_quantities[slot] = cum_quantity
+            self._symbols[slot] = symbol
+            self._client_ids[slot] = client_order_id
+            self._sources[slot] = source
+            self._seqs[slot] = seq
+            self._next_seq = seq + 1
+        if self._waiting:
+            with self._ready:
+                self._ready.notify_all()
+        return seq
+
+    def subscribe(self, name, event_types=None):
+        """
+        Create a consumer starting at the next published event
+
+        Args:
+            name: Consumer name used in stats
+            event_types: Optional iterable of event types to deliver (default: all)
+        """
+        subscription = EventSubscription(self, name, event_types)
+        self.subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name):
+        self.subscriptions.pop(name, None)
+
+    def _wait_for(self, subscription, timeout):
+        if subscription.cursor < self._next_seq:
+            return True
+        with self._ready:
+            self._waiting += 1
+            try:
+                return self._ready.wait_for(lambda: subscription.cursor < self._next_seq, timeout)
+            finally:
+                self._waiting -= 1
+
+    def stats(self):
+        """Backpressure metrics: published count and per-consumer lag/drops"""
+        consumers = {name: sub.stats() for name, sub in list(self.subscriptions.items())}
+        return {
+            'capacity': self.capacity,
+            'published': self._next_seq,
+            'max_lag': max((c['lag'] for c in consumers.values()), default=0),
+            'consumers': consumers
+        }
+
+
+# Process-wide bus used by the order classes and the user-data stream
+order_events = OrderEventBus()
+
+def publish_order_response(order, source=None, bus=order_events):
+    """Publish a REST order response as ACK, FILL, CANCEL or REJECT based on its status"""
+    event_type = STATUS_EVENTS.get(order.get('status'), ACK)
+    executed = float(order.get('executedQty') or 0)
+    if event_type == FILL:
+        price = float(order.get('avgPrice') or 0) or float(order.get('price') or 0)
+        quantity = executed
+    else:
+        price = float(order.get('price') or 0)
+        quantity = float(order.get('origQty') or 0)
+    return bus.publish(
+        event_type, order.get('symbol'), order.get('orderId', 0), order.get('side'),
+        price, quantity, executed, order.get('clientOrderId'), source
+    )
+
+def publish_user_data_event(msg, bus=order_events):
+    """Publish an ORDER_TRADE_UPDATE message from the futures user-data stream"""
+    if msg.get('e') != 'ORDER_TRADE_UPDATE':
+        return None
+    o = msg['o']
+    event_type = EXECUTION_EVENTS.get(o.get('x'))
+    if event_type is None:
+        return None
+    if event_type == FILL:
+        price, quantity = float(o['L']), float(o['l'])
+    else:
+        price, quantity = float(o['p']), float(o['q'])
+    # Orders sent with a source get client ids of the form '<source>.<n>'
+    source = o['c'].rpartition('.')[0] or None
+    return bus.publish(
+        event_type, o['s'], o['i'], o['S'], price, quantity, float(o['z']), o['c'], source
+    )
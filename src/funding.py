@@ -0,0 +1,296 @@
+from .bot import BasicBot
+from .columnar import ColumnTable, SymbolDictionary
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import time
+
+import numpy as np
+
+FUNDING_DIR = 'funding_cache'
+HISTORY_DAYS = 90  # History fetched for a symbol the first time it is synced
+FUNDING_PAGE = 1000
+PREMIUM_PAGE = 1500
+PREMIUM_INTERVAL = '1h'
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+YEAR_MS = 365 * DAY_MS
+DEFAULT_FUNDING_INTERVAL_MS = 8 * HOUR_MS
+
+FUNDING_SCHEMA = {'time': 'i8', 'symbol': 'i4', 'rate': 'f8', 'mark': 'f8'}
+PREMIUM_SCHEMA = {'time': 'i8', 'symbol': 'i4', 'premium': 'f8'}
+MARK_SCHEMA = {'time': 'i8', 'symbol': 'i4', 'mark': 'f8', 'index': 'f8', 'funding_rate': 'f8', 'next_funding_time': 'i8'}
+
+
+def _last_rows(codes, count, rows=None):
+    """Index of the last row per symbol code, -1 where none"""
+    last = np.full(count, -1, dtype=np.int64)
+    np.maximum.at(last, codes, np.arange(len(codes)) if rows is None else rows)
+    return last
+
+
+def _latest(times, codes, count):
+    """
+    Latest time per symbol code and the gap to the one before it
+
+    Rows of a symbol are appended in time order, so its newest row is its
+    last one and the one before is the last row once that is masked out.
+
+    Returns:
+        (last, interval) int64 arrays of length count, -1 where unknown
+    """
+    last = np.full(count, -1, dtype=np.int64)
+    interval = np.full(count, -1, dtype=np.int64)
+    if not len(times):
+        return last, interval
+    last_row = _last_rows(codes, count)
+    has_last = last_row >= 0
+    older = np.ones(len(codes), dtype=bool)
+    older[last_row[has_last]] = False
+    previous_row = _last_rows(codes[older], count, np.flatnonzero(older))
+    has_previous = previous_row >= 0
+    last[has_last] = times[last_row[has_last]]
+    interval[has_previous] = last[has_previous] - times[previous_row[has_previous]]
+    return last, interval
+
+
+class FundingCache:
+    """
+    Funding-rate, premium-index and mark-price history of all perpetuals
+
+    Three append-only ColumnTables with symbols stored as int codes:
+    funding events (time, rate, mark), hourly premium index closes and
+    premiumIndex snapshots (mark, index, predicted funding rate) taken at
+    each sync. FundingSync fills it incrementally; rank() reads the columns
+    and computes carry and basis of every symbol at once with numpy, without
+    calling the exchange.
+    """
+    def __init__(self, directory=FUNDING_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.symbols = SymbolDictionary(os.path.join(directory, 'symbols.json'))
+        self.funding = ColumnTable(os.path.join(directory, 'funding'), FUNDING_SCHEMA)
+        self.premium = ColumnTable(os.path.join(directory, 'premium'), PREMIUM_SCHEMA)
+        self.marks = ColumnTable(os.path.join(directory, 'marks'), MARK_SCHEMA)
+
+    def latest(self, table):
+        """(last time, gap to the previous row) per symbol code of a table"""
+        columns = table.read(['time', 'symbol'])
+        return _latest(columns['time'], columns['symbol'], len(self.symbols))
+
+    def rank(self, window_days=7, sort='carry', symbols=None, now=None):
+        """
+        Rank symbols by annualized funding carry or basis
+
+        Carry is the mean funding rate over the window times the symbol's
+        funding events per year (from the gap between its last two events),
+        positive when shorts are paid. Basis is mark over index from the
+        latest snapshot; the premium is the mean hourly premium index over
+        the window.
+
+        Args:
+            window_days: Days of history the carry and premium are averaged over
+            sort: 'carry', 'basis' or 'funding' (predicted rate), largest magnitude first
+            symbols: Only these symbols (default: all cached)
+            now: Epoch milliseconds the window ends at (default: now)
+
+        Returns:
+            List of row dicts, best first
+        """
+        count = len(self.symbols)
+        if not count:
+            return []
+        now = now or int(time.time() * 1000)
+        since = now - int(window_days * DAY_MS)
+
+        funding = self.funding.read()
+        _, interval = _latest(funding['time'], funding['symbol'], count)
+        interval = np.where(interval > 0, interval, DEFAULT_FUNDING_INTERVAL_MS).astype(float)
+        in_window = funding['time'] >= since
+        window_codes, window_rates = funding['symbol'][in_window], funding['rate'][in_window]
+        events = np.bincount(window_codes, minlength=count)
+        rate_sum = np.bincount(window_codes, window_rates, count)
+        positive = np.bincount(window_codes, window_rates > 0, count)
+        all_events = np.bincount(funding['symbol'], minlength=count)
+        all_sum = np.bincount(funding['symbol'], funding['rate'], count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            carry = rate_sum / events * YEAR_MS / interval
+            carry_all = all_sum / all_events * YEAR_MS / interval
+            positive_share = positive / events
+
+        premium = self.premium.read()
+        in_window = premium['time'] >= since
+        premium_count = np.bincount(premium['symbol'][in_window], minlength=count)
+        premium_sum = np.bincount(premium['symbol'][in_window], premium['premium'][in_window], count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            premium_mean = premium_sum / premium_count
+
+        # Latest premiumIndex snapshot per symbol: rows are appended in time order
+        marks = self.marks.read()
+        latest_row = _last_rows(marks['symbol'], count)
+        has_mark = latest_row >= 0
+        rows = latest_row[has_mark]
+        mark = np.full(count, np.nan)
+        index = np.full(count, np.nan)
+        predicted = np.full(count, np.nan)
+        mark[has_mark] = marks['mark'][rows]
+        index[has_mark] = marks['index'][rows]
+        predicted[has_mark] = marks['funding_rate'][rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            basis_bps = (mark / index - 1) * 10000
+            predicted_apr = predicted * YEAR_MS / interval
+
+        keys = {'carry': carry, 'basis': basis_bps, 'funding': predicted_apr}
+        if sort not in keys:
+            raise ValueError(f"Unknown sort key {sort}, expected one of {sorted(keys)}")
+        selected = np.ones(count, dtype=bool)
+        if symbols:
+            selected[:] = False
+            for symbol in symbols:
+                code = self.symbols.get(symbol.upper())
+                if code is not None:
+                    selected[code] = True
+        key = np.abs(keys[sort])
+        selected &= ~np.isnan(key)
+        order = np.flatnonzero(selected)
+        order = order[np.argsort(-key[order], kind='stable')]
+
+        def value(array, i, scale=1.0):
+            return None if np.isnan(array[i]) else float(array[i] * scale)
+
+        return [{
+            'symbol': self.symbols.symbols[i],
+            'side': 'SHORT' if (carry[i] if not np.isnan(carry[i]) else predicted_apr[i]) > 0 else 'LONG',
+            'carry_apr_pct': value(carry, i, 100),
+            'carry_apr_all_pct': value(carry_all, i, 100),
+            'predicted_apr_pct': value(predicted_apr, i, 100),
+            'positive_share': value(positive_share, i),
+            'funding_events': int(events[i]),
+            'interval_hours': float(interval[i] / HOUR_MS),
+            'basis_bps': value(basis_bps, i),
+            'premium_bps': value(premium_mean, i, 10000),
+            'mark_price': value(mark, i)
+        } for i in order.tolist()]
+
+    def stats(self):
+        return {'symbols': len(self.symbols), 'funding_rows': len(self.funding),
+                'premium_rows': len(self.premium), 'mark_rows': len(self.marks)}
+
+
+class FundingSync(BasicBot):
+    """
+    Fills a FundingCache from the futures market data endpoints
+
+    One premiumIndex call snapshots mark, index and predicted funding of every
+    symbol. Funding history and hourly premium index klines are then fetched
+    per symbol, only from the newest cached row on, and only when a new
+    funding event or kline can have closed since: a sync shortly after the
+    previous one costs a single request.
+    """
+    def __init__(self, cache=None):
+        super().__init__()
+        self.cache = cache or FundingCache()
+        logging.info("FundingSync initialized for Futures market data")
+
+    def sync(self, symbols=None, history_days=HISTORY_DAYS, max_workers=4):
+        """
+        Append new funding events, premium klines and a mark snapshot
+
+        Args:
+            symbols: Symbols to sync (default: every perpetual)
+            history_days: Days of history fetched for symbols not cached yet
+            max_workers: Symbols fetched at once (the funding history endpoint has a tight IP limit)
+
+        Returns:
+            Report dict with the rows added, requests made, errors and elapsed seconds
+        """
+        start = time.perf_counter()
+        now = int(time.time() * 1000)
+        cache = self.cache
+        report = {'symbols': 0, 'funding_rows': 0, 'premium_rows': 0, 'requests': 1, 'up_to_date': 0, 'errors': []}
+        try:
+            snapshot = self.client.futures_mark_price()
+        except Exception as e:
+            logging.error(f"Error fetching premium index snapshot: {e}")
+            report['errors'].append(f"snapshot: {e}")
+            report['elapsed_seconds'] = time.perf_counter() - start
+            return report
+
+        wanted = {s.upper() for s in symbols} if symbols else None
+        # Delivery contracts (BTCUSDT_250926) have no funding
+        snapshot = [m for m in snapshot if '_' not in m['symbol'] and (wanted is None or m['symbol'] in wanted)]
+        marks = {name: [] for name in MARK_SCHEMA}
+        for m in snapshot:
+            marks['time'].append(int(m.get('time') or now))
+            marks['symbol'].append(cache.symbols.code(m['symbol']))
+            marks['mark'].append(float(m.get('markPrice') or 'nan'))
+            marks['index'].append(float(m.get('indexPrice') or 'nan'))
+            marks['funding_rate'].append(float(m.get('lastFundingRate') or 'nan'))
+            marks['next_funding_time'].append(int(m.get('nextFundingTime') or 0))
+        cache.marks.append(marks)
+        report['symbols'] = len(snapshot)
+
+        funding_last, funding_interval = cache.latest(cache.funding)
+        premium_last, _ = cache.latest(cache.premium)
+        first_start = now - int(history_days * DAY_MS)
+        tasks = []
+        for m in snapshot:
+            code = cache.symbols.code(m['symbol'])
+            last = funding_last[code]
+            interval = funding_interval[code] if funding_interval[code] > 0 else HOUR_MS
+            funding_from = first_start if last < 0 else (last + 1 if now >= last + interval else None)
+            premium_from = first_start if premium_last[code] < 0 else (premium_last[code] + HOUR_MS if now >= premium_last[code] + 2 * HOUR_MS else None)
+            if funding_from is None and premium_from is None:
+                report['up_to_date'] += 1
+                continue
+            tasks.append((m['symbol'], code, funding_from, premium_from))
+
+        funding = {name: [] for name in FUNDING_SCHEMA}
+        premium = {name: [] for name in PREMIUM_SCHEMA}
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)), thread_name_prefix='funding') as executor:
+                results = list(executor.map(lambda task: self._fetch(*task, now=now), tasks))
+            for (symbol, code, _, _), (funding_rows, premium_rows, requests, error) in zip(tasks, results):
+                report['requests'] += requests
+                if error:
+                    report['errors'].append(f"{symbol}: {error}")
+                for t, rate, mark in funding_rows:
+                    funding['time'].append(t)
+                    funding['symbol'].append(code)
+                    funding['rate'].append(rate)
+                    funding['mark'].append(mark)
+                for t, value in premium_rows:
+                    premium['time'].append(t)
+                    premium['symbol'].append(code)
+                    premium['premium'].append(value)
+        report['funding_rows'] = cache.funding.append(funding)
+        report['premium_rows'] = cache.premium.append(premium)
+        report['elapsed_seconds'] = time.perf_counter() - start
+        logging.info(
+            f"Funding sync: {report['symbols']} symbols, +{report['funding_rows']} funding events, "
+            f"+{report['premium_rows']} premium klines in {report['requests']} requests, {len(report['errors'])} errors"
+        )
+        return report
+
+    def _fetch(self, symbol, code, funding_from, premium_from, now):
+        """New (time, rate, mark) funding rows and closed (open time, premium) klines of one symbol"""
+        funding_rows, premium_rows, requests = [], [], 0
+        try:
+            while funding_from is not None:
+                page = self.client.futures_funding_rate(symbol=symbol, startTime=funding_from, limit=FUNDING_PAGE)
+                requests += 1
+                for f in page:
+                    funding_rows.append((int(f['fundingTime']), float(f['fundingRate']), float(f.get('markPrice') or 'nan')))
+                funding_from = int(page[-1]['fundingTime']) + 1 if len(page) == FUNDING_PAGE else None
+            while premium_from is not None:
+                page = self.client.futures_premium_index_klines(symbol=symbol, interval=PREMIUM_INTERVAL, startTime=premium_from, limit=PREMIUM_PAGE)
+                requests += 1
+                for k in page:
+                    if int(k[6]) < now:  # Only closed klines, the open one would be stored half-formed
+                        premium_rows.append((int(k[0]), float(k[4])))
+                premium_from = int(page[-1][0]) + HOUR_MS if len(page) == PREMIUM_PAGE else None
+            return funding_rows, premium_rows, requests, None
+        except Exception as e:
+            logging.error(f"Error syncing funding data of {symbol}: {e}")
+            # Rows fetched before the error are kept, the next sync continues after them
+            return funding_rows, premium_rows, requests, str(e)
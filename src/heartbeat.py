@@ -0,0 +1,238 @@
+from .bot import BasicBot, register_stop_event
+from .events import order_events, PLACED
+from .metrics import metrics
+import itertools
+import logging
+import threading
+import time
+import weakref
+
+COUNTDOWN_SECONDS = 60
+REFRESH_DIVISOR = 3  # Refresh three times per countdown, so two refreshes can fail before it fires
+TICK_SECONDS = 0.1
+MAX_JITTER_SECONDS = 0.5
+EVENT_LOOP_MAX_SILENCE = 5.0
+
+_pulses = weakref.WeakSet()
+_pulses_lock = threading.Lock()
+_switch_ids = itertools.count(1)
+
+class Pulse:
+    """
+    Liveness signal of one worker thread or event loop
+
+    The worker calls beat() on every pass of its loop and close() when it
+    exits. A pulse that is open and has not beaten for max_silence seconds
+    counts as stalled.
+    """
+    __slots__ = ('name', 'max_silence', 'last', 'closed', '__weakref__')
+
+    def __init__(self, name, max_silence):
+        self.name = name
+        self.max_silence = max_silence
+        self.last = time.monotonic()
+        self.closed = False
+
+    def beat(self):
+        self.last = time.monotonic()
+
+    def close(self):
+        self.closed = True
+
+    def silence(self, now=None):
+        """Seconds since the last beat"""
+        return (now or time.monotonic()) - self.last
+
+def register_pulse(name, max_silence):
+    """
+    Register a worker's pulse so a running DeadMansSwitch watches it
+
+    Pulses are held weakly, like the stop events of register_stop_event.
+
+    Args:
+        name: Worker name used in logs
+        max_silence: Seconds without a beat after which the worker is stalled
+    """
+    pulse = Pulse(name, max_silence)
+    with _pulses_lock:
+        _pulses.add(pulse)
+    return pulse
+
+def watch_event_loop(loop, name='event-loop', max_silence=EVENT_LOOP_MAX_SILENCE):
+    """
+    Pulse beaten by a callback on an asyncio event loop
+
+    The callback reschedules itself every max_silence / 4 seconds, so it stops
+    beating when a coroutine blocks the loop. Close the returned pulse before
+    stopping the loop.
+    """
+    pulse = register_pulse(name, max_silence)
+    interval = max_silence / 4
+    def beat():
+        if pulse.closed:
+            return
+        pulse.beat()
+        loop.call_later(interval, beat)
+    loop.call_soon_threadsafe(beat)
+    return pulse
+
+def _open_pulses():
+    with _pulses_lock:
+        return [pulse for pulse in _pulses if not pulse.closed]
+
+class DeadMansSwitch(BasicBot):
+    """
+    Keeps the exchange's auto-cancel countdown running while the process is healthy
+
+    A background thread refreshes the futures countdownCancelAll timer of
+    every symbol we trade, so if the process dies or hangs the exchange
+    cancels all its open orders on those symbols within countdown_seconds of
+    the last refresh. Symbols are the ones given plus, with track_orders, any
+    symbol an order is placed on.
+
+    The thread also watches the registered worker pulses: when a worker or
+    event loop stalls, it stops refreshing and lets the countdown fire,
+    since nothing is managing those orders any more. It wakes every
+    TICK_SECONDS on a fixed schedule and records how late each wake-up was;
+    wake-ups later than max_jitter are logged as process stalls (GIL
+    contention, blocking IO, swapping).
+    """
+    def __init__(self, symbols=None, countdown_seconds=COUNTDOWN_SECONDS, refresh_seconds=None, max_jitter=MAX_JITTER_SECONDS, track_orders=True):
+        """
+        Args:
+            symbols: Symbols to arm from the start
+            countdown_seconds: Seconds without a refresh before the exchange cancels a symbol's orders
+            refresh_seconds: Seconds between refreshes (default: countdown_seconds / 3)
+            max_jitter: Wake-up lateness in seconds logged as a stall
+            track_orders: Also arm every symbol an order is placed on
+        """
+        super().__init__()
+        refresh_seconds = refresh_seconds or countdown_seconds / REFRESH_DIVISOR
+        if countdown_seconds <= 0 or not 0 < refresh_seconds < countdown_seconds:
+            raise ValueError("Refresh interval must be positive and shorter than the countdown")
+        self.countdown_seconds = countdown_seconds
+        self.refresh_seconds = refresh_seconds
+        self.max_jitter = max_jitter
+        self.symbols = {s.upper() for s in symbols or ()}
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.stalls = 0
+        self.max_lateness = 0.0
+        self.tripped = None  # Reason the refreshes were stopped
+        self._armed = {}  # symbol -> monotonic time of the last successful refresh
+        self._pending = set(self.symbols)  # Symbols to refresh on the next tick
+        self._lock = threading.Lock()
+        self._stop = register_stop_event(threading.Event())
+        self._thread = None
+        self._jitter = metrics.histogram('heartbeat', 'jitter')
+        self._subscription = order_events.subscribe(f"dead-man-{next(_switch_ids)}", [PLACED]) if track_orders else None
+        logging.info(f"DeadMansSwitch initialized: {countdown_seconds}s countdown, refreshed every {refresh_seconds:.1f}s")
+
+    def start(self):
+        """Start the heartbeat thread, returns self"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='dead-man')
+            self._thread.start()
+        return self
+
+    def stop(self, disarm=True):
+        """
+        Stop the heartbeat thread
+
+        Args:
+            disarm: Cancel the countdowns, so open orders stay on the book.
+                Ignored once tripped, the countdowns are left to fire.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._subscription is not None:
+            order_events.unsubscribe(self._subscription.name)
+        if disarm and not self.tripped:
+            for symbol in list(self._armed):
+                self._send(symbol, 0)
+            self._armed.clear()
+        logging.info(f"DeadMansSwitch stopped: {self.refreshes} refreshes, {self.refresh_errors} errors, {self.stalls} stalls")
+
+    def add_symbol(self, symbol):
+        """Arm the countdown of symbol on the next tick"""
+        symbol = symbol.upper()
+        with self._lock:
+            self.symbols.add(symbol)
+            self._pending.add(symbol)
+
+    def _on_placed(self, event):
+        if event.symbol and event.symbol not in self.symbols:
+            self.add_symbol(event.symbol)
+
+    def _run(self):
+        next_tick = next_refresh = time.monotonic()
+        while True:
+            next_tick += TICK_SECONDS
+            if self._stop.wait(max(0.0, next_tick - time.monotonic())):
+                return
+            now = time.monotonic()
+            lateness = now - next_tick
+            self._jitter.record(max(0.0, lateness))
+            self.max_lateness = max(self.max_lateness, lateness)
+            if lateness > self.max_jitter:
+                self.stalls += 1
+                logging.warning(f"Dead-man's switch woke {lateness * 1000:.0f} ms late, the process stalled")
+                self._check_expired(now)
+                next_tick = now  # Resume the schedule instead of catching up on missed ticks
+
+            stalled = [p for p in _open_pulses() if p.silence(now) > p.max_silence]
+            if stalled:
+                self.tripped = ', '.join(f"{p.name} silent for {p.silence(now):.1f}s" for p in stalled)
+                logging.error(f"Dead-man's switch tripped ({self.tripped}): countdowns left to fire, "
+                              f"open orders on {sorted(self._armed)} are cancelled within {self.countdown_seconds}s")
+                return
+
+            if self._subscription is not None:
+                self._subscription.poll(self._on_placed)
+            with self._lock:
+                if now >= next_refresh:
+                    self._pending.update(self.symbols)
+                    next_refresh = now + self.refresh_seconds
+                pending, self._pending = self._pending, set()
+            for symbol in sorted(pending):
+                if not self._send(symbol, self.countdown_seconds):
+                    with self._lock:
+                        self._pending.add(symbol)  # Retry on the next tick
+            if pending:
+                # Time spent on requests is not scheduling jitter
+                next_tick = time.monotonic()
+
+    def _check_expired(self, now):
+        """Log the symbols whose countdown may have fired during a stall"""
+        expired = [s for s, refreshed in self._armed.items() if now - refreshed >= self.countdown_seconds]
+        if expired:
+            logging.error(f"Dead-man's switch countdown may have fired on {expired}, their open orders may be cancelled")
+
+    def _send(self, symbol, countdown_seconds):
+        try:
+            self.client.futures_countdown_cancel_all(symbol=symbol, countdownTime=int(countdown_seconds * 1000))
+        except Exception as e:
+            self.refresh_errors += 1
+            logging.error(f"Error setting {symbol} auto-cancel countdown to {countdown_seconds}s: {e}")
+            return False
+        if countdown_seconds:
+            self._armed[symbol] = time.monotonic()
+            self.refreshes += 1
+        return True
+
+    def get_status(self):
+        """Armed symbols with the seconds left on their countdown, and the jitter seen"""
+        now = time.monotonic()
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'tripped': self.tripped,
+            'countdown_seconds': self.countdown_seconds,
+            'refresh_seconds': self.refresh_seconds,
+            'armed': {s: round(self.countdown_seconds - (now - t), 3) for s, t in sorted(self._armed.items())},
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'stalls': self.stalls,
+            'max_lateness_ms': round(self.max_lateness * 1000, 3),
+            'pulses': {p.name: round(p.silence(now), 3) for p in _open_pulses()}
+        }
@@ -0,0 +1,308 @@
+from contextlib import contextmanager
+import functools
+import inspect
+import itertools
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process at a time
+    fcntl = None
+
+JOURNAL_FILE = 'orders.jsonl'
+INDEX_FILE = 'orders.idx'
+
+# Index entry: ts, journal offset, order id, symbol, tag (strategy id)
+INDEX_ENTRY = struct.Struct('<dQq16s24s')
+ENTRY_SIZE = INDEX_ENTRY.size
+ORDER_ID_OFFSET = 16
+SYMBOL_OFFSET = 24
+TAG_OFFSET = 40
+
+# Client methods whose requests and responses are journaled
+JOURNALED_METHODS = (
+    'futures_create_order', 'futures_place_batch_order', 'futures_modify_order',
+    'futures_cancel_order', 'futures_cancel_orders', 'futures_cancel_all_open_orders',
+    'futures_get_order'
+)
+
+_context = threading.local()
+
+@contextmanager
+def journal_tag(tag):
+    """Tag journal records of orders sent by this thread inside the block"""
+    previous = getattr(_context, 'tag', None)
+    _context.tag = tag
+    try:
+        yield
+    finally:
+        _context.tag = previous
+
+
+def _fixed(text, size):
+    return (text or '').encode()[:size].ljust(size, b'\0')
+
+
+class OrderJournal:
+    """
+    Append-only order journal with a fixed-width sidecar index
+
+    Every record is one JSON line in the journal. For each record a 64-byte
+    index entry (time, offset, order id, symbol, tag) is appended to the index,
+    so queries scan the small index and seek straight to the matching lines.
+    Entries are in time order, so time ranges are found by binary search.
+    """
+    def __init__(self, path=JOURNAL_FILE, index_path=INDEX_FILE):
+        self.path = path
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._fd = None
+        self._index_fd = None
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._index_fd = os.open(self.index_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def record(self, kind, method, symbol=None, order_id=None, client_order_id=None, tag=None, **data):
+        """
+        Append one record
+
+        Args:
+            kind: 'request', 'response' or 'error'
+            method: Client method name
+            symbol: Trading pair
+            order_id: Exchange order id, if known
+            client_order_id: Client order id, if known
+            tag: Strategy id (default: the journal_tag context or the client id prefix)
+            **data: Request params, response or error text
+        """
+        if tag is None:
+            tag = (client_order_id or '').rpartition('.')[0] or getattr(_context, 'tag', None)
+        entry = {'ts': None, 'kind': kind, 'method': method, 'symbol': symbol, 'order_id': order_id,
+                 'client_order_id': client_order_id, 'tag': tag}
+        entry.update(data)
+
+        with self._lock:
+            self._open()
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # Stamp under the lock so index entries stay sorted for the since/until bisect
+                ts = entry['ts'] = time.time()
+                line = (json.dumps(entry, default=str) + '\n').encode()
+                offset = os.lseek(self._fd, 0, os.SEEK_END)
+                os.write(self._fd, line)
+                os.write(self._index_fd, INDEX_ENTRY.pack(
+                    ts, offset, int(order_id or 0), _fixed(symbol, 16), _fixed(tag, 24)
+                ))
+            finally:
+                if fcntl:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                os.close(self._index_fd)
+                self._fd = self._index_fd = None
+
+    # --- Queries ---
+
+    def query(self, symbol=None, order_id=None, tag=None, since=None, until=None, limit=None):
+        """
+        Yield journal records matching all given filters, oldest first
+
+        Args:
+            symbol: Trading pair
+            order_id: Exchange order id
+            tag: Strategy id, e.g. a TWAP id
+            since: Earliest timestamp (epoch seconds)
+            until: Latest timestamp (epoch seconds)
+            limit: Only the most recent limit matches
+        """
+        if not os.path.exists(self.index_path) or not os.path.getsize(self.index_path):
+            return
+        with open(self.index_path, 'rb') as index_file, open(self.path, 'rb') as journal:
+            index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                count = len(index) // ENTRY_SIZE
+                start = self._bisect(index, count, since) if since else 0
+                end = self._bisect(index, count, until, right=True) if until else count
+                if limit:
+                    # Walk back from the newest entry and stop after limit matches
+                    newest = itertools.islice(self._matches(index, start, end, symbol, order_id, tag, reverse=True), limit)
+                    offsets = reversed(list(newest))
+                else:
+                    offsets = self._matches(index, start, end, symbol, order_id, tag)
+                for offset in offsets:
+                    journal.seek(offset)
+                    yield json.loads(journal.readline())
+            finally:
+                index.close()
+
+    @staticmethod
+    def _bisect(index, count, ts, right=False):
+        """First entry with time >= ts (> ts when right)"""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            entry_ts = struct.unpack_from('<d', index, middle * ENTRY_SIZE)[0]
+            if entry_ts < ts or (right and entry_ts == ts):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _matches(index, start, end, symbol, order_id, tag, reverse=False):
+        """Journal offsets of index entries in [start, end) matching the filters, newest first when reverse"""
+        symbol_key = _fixed(symbol.upper(), 16) if symbol else None
+        tag_key = _fixed(tag, 24) if tag else None
+        order_key = struct.pack('<q', int(order_id)) if order_id is not None else None
+
+        # Let mmap.find jump between candidates on the most selective field
+        if order_key is not None:
+            needle, field_offset = order_key, ORDER_ID_OFFSET
+        elif tag_key is not None:
+            needle, field_offset = tag_key, TAG_OFFSET
+        elif symbol_key is not None:
+            needle, field_offset = symbol_key, SYMBOL_OFFSET
+        else:
+            needle = None
+
+        if needle is None:
+            entries = range(end - 1, start - 1, -1) if reverse else range(start, end)
+            positions = (i * ENTRY_SIZE for i in entries)
+        else:
+            positions = OrderJournal._find_aligned(index, needle, field_offset, start * ENTRY_SIZE, end * ENTRY_SIZE, reverse)
+
+        for position in positions:
+            ts, offset, entry_order_id, entry_symbol, entry_tag = INDEX_ENTRY.unpack_from(index, position)
+            if symbol_key is not None and entry_symbol != symbol_key:
+                continue
+            if tag_key is not None and entry_tag != tag_key:
+                continue
+            if order_key is not None and entry_order_id != int(order_id):
+                continue
+            yield offset
+
+    @staticmethod
+    def _find_aligned(index, needle, field_offset, start, stop, reverse=False):
+        """Entry positions in [start, stop) whose field at field_offset starts with needle"""
+        if reverse:
+            position = index.rfind(needle, start, stop)
+            while position != -1:
+                entry_position = position - field_offset
+                if entry_position % ENTRY_SIZE == 0 and entry_position >= start:
+                    yield entry_position
+                    position = index.rfind(needle, start, entry_position + field_offset)
+                else:
+                    position = index.rfind(needle, start, position + len(needle) - 1)
+            return
+        position = index.find(needle, start + field_offset, stop)
+        while position != -1:
+            entry_position = position - field_offset
+            if entry_position % ENTRY_SIZE == 0:
+                yield entry_position
+                position = index.find(needle, entry_position + ENTRY_SIZE + field_offset, stop)
+            else:
+                position = index.find(needle, position + 1, stop)
+
+    def rebuild_index(self):
+        """Recreate the index from the journal, e.g. after a crash between the two writes"""
+        with self._lock:
+            self.close()
+            tmp_path = f"{self.index_path}.tmp"
+            entries = 0
+            with open(self.path, 'rb') as journal, open(tmp_path, 'wb') as index:
+                offset = 0
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                        index.write(INDEX_ENTRY.pack(
+                            entry['ts'], offset, int(entry.get('order_id') or 0),
+                            _fixed(entry.get('symbol'), 16), _fixed(entry.get('tag'), 24)
+                        ))
+                        entries += 1
+                    except (ValueError, KeyError) as e:
+                        logging.warning(f"Skipping unreadable journal record at offset {offset}: {e}")
+                    offset += len(line)
+            os.replace(tmp_path, self.index_path)
+        logging.info(f"Rebuilt journal index with {entries} entries")
+        return entries
+
+
+journal = OrderJournal()  # Process-wide journal
+
+
+class JournalClient:
+    """Proxy around an exchange client that journals order requests and responses"""
+    def __init__(self, client, order_journal=journal):
+        self._client = client
+        self._journal = order_journal
+        self._methods = {}
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self._client, name)
+            if name not in JOURNALED_METHODS:
+                return attribute
+            method = self._methods[name] = self._wrap(name, attribute)
+        return method
+
+    def _wrap(self, name, method):
+        order_journal = self._journal
+        def before(params):
+            symbol = params.get('symbol')
+            order_id = params.get('orderId')
+            client_order_id = params.get('newClientOrderId') or params.get('origClientOrderId')
+            try:
+                order_journal.record('request', name, symbol, order_id, client_order_id, params=params)
+            except Exception as e:
+                logging.error(f"Error writing journal request record: {e}")
+            return symbol, order_id, client_order_id
+        def failed(ids, error):
+            try:
+                order_journal.record('error', name, *ids, error=str(error))
+            except Exception as journal_error:
+                logging.error(f"Error writing journal error record: {journal_error}")
+        def after(ids, response):
+            symbol, order_id, client_order_id = ids
+            try:
+                if isinstance(response, dict):
+                    order_id = response.get('orderId', order_id)
+                    client_order_id = response.get('clientOrderId', client_order_id)
+                    symbol = response.get('symbol', symbol)
+                order_journal.record('response', name, symbol, order_id, client_order_id, response=response)
+            except Exception as e:
+                logging.error(f"Error writing journal response record: {e}")
+            return response
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **params):
+                ids = before(params)
+                try:
+                    response = await method(*args, **params)
+                except Exception as e:
+                    failed(ids, e)
+                    raise
+                return after(ids, response)
+            return async_wrapper
+        @functools.wraps(method)
+        def wrapper(*args, **params):
+            ids = before(params)
+            try:
+                response = method(*args, **params)
+            except Exception as e:
+                failed(ids, e)
+                raise
+            return after(ids, response)
+        return wrapper
@@ -1,5 +1,6 @@
 from .bot import BasicBot
 from .validator import validate_positive_number, validate_symbol
+from .metrics import timed_order
 import logging
 
 class LimitOrders(BasicBot):
@@ -7,6 +8,7 @@ class LimitOrders(BasicBot):
         super().__init__()
         logging.info("LimitOrders initialized")
 
+    @timed_order('limit_buy')
     def place_limit_buy_order(self, symbol, quantity, price):
         try:
             if not validate_positive_number(quantity, "quantity"):
@@ -17,7 +19,7 @@ class LimitOrders(BasicBot):
                 return None
 
             # Place futures limit buy order
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side='BUY',
                 type='LIMIT',
@@ -27,13 +29,14 @@ class LimitOrders(BasicBot):
             )
             
             logging.info(f"Futures limit buy order placed for {symbol.upper()} with quantity {quantity} at price {price}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
     
         except Exception as e:
             logging.error(f"Error placing limit buy order: {e}")
             return None
 
+    @timed_order('limit_sell')
     def place_limit_sell_order(self, symbol, quantity, price):
         try:
             if not validate_positive_number(quantity, "quantity"):
@@ -44,7 +47,7 @@ class LimitOrders(BasicBot):
                 return None
 
             # Place futures limit sell order
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side='SELL',
                 type='LIMIT',
@@ -54,7 +57,7 @@ class LimitOrders(BasicBot):
             )
             
             logging.info(f"Futures limit sell order placed for {symbol.upper()} with quantity {quantity} at price {price}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
         
         except Exception as e:
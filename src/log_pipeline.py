@@ -0,0 +1,126 @@
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+
+LOG_FILE = 'bot.log'
+
+# Attributes every LogRecord has, anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, extra= fields included"""
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'where': f"{record.module}:{record.lineno}",
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the writer thread
+
+    The standard QueueHandler renders the message on the logging thread so the
+    record can be pickled. Records here never leave the process, so the
+    calling thread only builds the record and puts it on the queue.
+    """
+    def prepare(self, record):
+        return record
+
+
+class SizeTimeRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotates when the file reaches max_bytes or is older than interval_seconds
+
+    Rotated files are gzip-compressed to <name>.<n>.gz.
+    """
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, interval_seconds=24 * 3600, backup_count=10):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval_seconds = interval_seconds
+        self.rollover_at = self._opened_at() + interval_seconds
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+
+    def _opened_at(self):
+        try:
+            if os.path.getsize(self.baseFilename):
+                return os.path.getmtime(self.baseFilename)
+        except OSError:
+            pass
+        return time.time()
+
+    def shouldRollover(self, record):
+        if self.interval_seconds and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval_seconds
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+def start_logging(filename=LOG_FILE, level=logging.INFO, console=True, max_bytes=10 * 1024 * 1024, interval_seconds=24 * 3600, backup_count=10):
+    """
+    Route all logging through a queue to a background writer thread
+
+    Call sites only create the record and enqueue it. Formatting, the JSONL
+    file (rotated by size/time, gzip-compressed) and the console output all
+    happen on the listener thread, which is flushed at exit.
+
+    Args:
+        filename: JSONL log file
+        level: Root logger level, disabled levels are dropped before any formatting
+        console: Also print 'LEVEL: message' lines to the console
+        max_bytes: Rotate when the file reaches this size
+        interval_seconds: Rotate when the file is this old
+        backup_count: Number of compressed files kept
+
+    Returns:
+        The running QueueListener
+    """
+    file_handler = SizeTimeRotatingFileHandler(filename, max_bytes, interval_seconds, backup_count)
+    file_handler.setFormatter(JsonLineFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    # Process fields are not in the JSON records, skip collecting them per call
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
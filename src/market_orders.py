@@ -1,5 +1,6 @@
 from .bot import BasicBot
 from .validator import validate_positive_number, validate_symbol
+from .metrics import timed_order
 import logging
 
 class MarketOrders(BasicBot):
@@ -7,6 +8,7 @@ class MarketOrders(BasicBot):
         super().__init__()
         logging.info("MarketOrders initialized")
 
+    @timed_order('market_buy')
     def place_buy_order(self, symbol, quantity):
         try:
             if not validate_positive_number(quantity, "quantity"):
@@ -15,7 +17,7 @@ class MarketOrders(BasicBot):
                 return None
 
             # Place futures market buy order
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side='BUY',
                 type='MARKET',
@@ -27,12 +29,13 @@ class MarketOrders(BasicBot):
             # )
             
             logging.info(f"Futures market buy order placed for {symbol.upper()} with quantity {quantity}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
         except Exception as e:
             logging.error(f"Error placing buy order: {e}")
             return None
 
+    @timed_order('market_sell')
     def place_sell_order(self, symbol, quantity):
         try:
             if not validate_positive_number(quantity, "quantity"):
@@ -41,7 +44,7 @@ class MarketOrders(BasicBot):
                 return None
 
             # Place futures market sell order
-            order = self.client.futures_create_order(
+            order = self._create_order(
                 symbol=symbol.upper(),
                 side='SELL',
                 type='MARKET',
@@ -49,7 +52,7 @@ class MarketOrders(BasicBot):
             )
             
             logging.info(f"Futures market sell order placed for {symbol.upper()} with quantity {quantity}")
-            logging.info(f"Order details: {order}")
+            logging.info("Order details: %s", order)
             return order
         
         except Exception as e:
@@ -0,0 +1,300 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from array import array
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+METRICS_FILE = 'metrics.json'
+
+# Log-linear buckets over microseconds: values below 2 * SUB_BUCKETS are exact,
+# above that every power of two is split into SUB_BUCKETS buckets (~6% wide)
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+NUM_BUCKETS = 400  # Up to ~100 s, slower calls land in the last bucket
+COUNT, ERRORS, TOTAL = 0, 1, 2  # Header slots of a shard, buckets start at 3
+HEADER = 3
+
+# Prometheus bucket bounds in seconds, folded from the fine buckets on export
+PROMETHEUS_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def bucket_index(micros):
+    """Bucket of a latency in whole microseconds"""
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BITS - 1
+    return min((shift + 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS, NUM_BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """(lower, upper) microseconds covered by a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    sub = index % SUB_BUCKETS + SUB_BUCKETS
+    return sub << shift, (sub + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    Call count, error count and latency histogram of one endpoint or order type
+
+    Every recording thread gets its own preallocated shard, so the hot path is
+    a thread-local lookup and three array increments with no lock. Shards are
+    only summed when the histogram is read.
+    """
+    def __init__(self, name, label):
+        self.name = name
+        self.label = label
+        self._shards = []
+        self._local = threading.local()
+        self._lock = threading.Lock()  # Only taken when a thread records for the first time
+
+    def _shard(self):
+        with self._lock:
+            shard = array('d', bytes(8 * (HEADER + NUM_BUCKETS)))
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def record(self, seconds, error=False):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[COUNT] += 1
+        shard[TOTAL] += seconds
+        if error:
+            shard[ERRORS] += 1
+        shard[HEADER + bucket_index(int(seconds * 1e6))] += 1
+
+    def merge(self, counts):
+        """Add counts from snapshot() (e.g. loaded from an earlier run)"""
+        shard = self._shard() if not hasattr(self._local, 'shard') else self._local.shard
+        for i, value in enumerate(counts):
+            shard[i] += value
+
+    def snapshot(self):
+        """Summed header and bucket counts of all shards"""
+        total = array('d', bytes(8 * (HEADER + NUM_BUCKETS)))
+        for shard in list(self._shards):
+            for i, value in enumerate(shard):
+                if value:
+                    total[i] += value
+        return total
+
+    def summary(self):
+        """Count, errors, mean and p50/p90/p99/max latency in milliseconds"""
+        counts = self.snapshot()
+        count = int(counts[COUNT])
+        summary = {'name': self.name, 'label': self.label, 'count': count, 'errors': int(counts[ERRORS])}
+        if not count:
+            return summary
+        summary['mean_ms'] = counts[TOTAL] / count * 1000
+        targets = [('p50_ms', 0.5), ('p90_ms', 0.9), ('p99_ms', 0.99), ('max_ms', 1.0)]
+        seen = 0
+        for index in range(NUM_BUCKETS):
+            seen += counts[HEADER + index]
+            while targets and seen >= targets[0][1] * count:
+                lower, upper = bucket_bounds(index)
+                summary[targets.pop(0)[0]] = (upper if index < NUM_BUCKETS - 1 else lower) / 1000
+            if not targets:
+                break
+        return summary
+
+
+class MetricsRegistry:
+    """Histograms keyed by (metric name, label)"""
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, label):
+        key = (name, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(name, label))
+        return histogram
+
+    def histograms(self):
+        return sorted(self._histograms.values(), key=lambda h: (h.name, h.label))
+
+    def summary(self):
+        return [h.summary() for h in self.histograms()]
+
+    def save(self, path=METRICS_FILE):
+        """Add this process's counts to the metrics file"""
+        try:
+            totals = self._read(path)
+            for histogram in self.histograms():
+                key = f"{histogram.name}|{histogram.label}"
+                counts = histogram.snapshot()
+                if not counts[COUNT]:
+                    continue
+                if key in totals:
+                    counts = [a + b for a, b in zip(counts, totals[key])]
+                totals[key] = list(counts)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'updated': time.time(), 'histograms': totals}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error saving metrics to {path}: {e}")
+
+    def load(self, path=METRICS_FILE):
+        """Merge counts from the metrics file into this registry"""
+        for key, counts in self._read(path).items():
+            name, label = key.split('|', 1)
+            self.histogram(name, label).merge(counts)
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)['histograms']
+        except Exception as e:
+            logging.error(f"Error reading metrics from {path}: {e}")
+            return {}
+
+    def prometheus_text(self):
+        """Histograms in the Prometheus text exposition format"""
+        families = {}
+        for histogram in self.histograms():
+            families.setdefault(histogram.name, []).append((histogram, histogram.snapshot()))
+
+        lines = []
+        for name, members in families.items():
+            metric = f"primetrade_{name}_latency_seconds"
+            label_name = 'endpoint' if name == 'exchange' else 'order_type'
+            lines.append(f"# HELP {metric} Latency of {name} calls")
+            lines.append(f"# TYPE {metric} histogram")
+            for histogram, counts in members:
+                label = f'{label_name}="{histogram.label}"'
+                cumulative = 0
+                index = 0
+                for bound in PROMETHEUS_BOUNDS:
+                    while index < NUM_BUCKETS and bucket_bounds(index)[1] <= bound * 1e6:
+                        cumulative += counts[HEADER + index]
+                        index += 1
+                    lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {int(cumulative)}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {int(counts[COUNT])}')
+                lines.append(f'{metric}_sum{{{label}}} {counts[TOTAL]}')
+                lines.append(f'{metric}_count{{{label}}} {int(counts[COUNT])}')
+
+            lines.append(f"# HELP primetrade_{name}_errors_total Failed {name} calls")
+            lines.append(f"# TYPE primetrade_{name}_errors_total counter")
+            for histogram, counts in members:
+                lines.append(f'primetrade_{name}_errors_total{{{label_name}="{histogram.label}"}} {int(counts[ERRORS])}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()  # Process-wide registry
+
+
+class MetricsClient:
+    """Proxy around an exchange client that records every futures_* call"""
+    def __init__(self, client, registry=metrics):
+        self._client = client
+        self._registry = registry
+        self._methods = {}
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self._client, name)
+            if not name.startswith('futures_') or not callable(attribute):
+                return attribute
+            method = self._methods[name] = self._wrap(name, attribute)
+        return method
+
+    def _wrap(self, name, method):
+        histogram = self._registry.histogram('exchange', name)
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await method(*args, **kwargs)
+                except Exception:
+                    histogram.record(time.perf_counter() - start, error=True)
+                    raise
+                histogram.record(time.perf_counter() - start)
+                return result
+            return async_wrapper
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                histogram.record(time.perf_counter() - start, error=True)
+                raise
+            histogram.record(time.perf_counter() - start)
+            return result
+        return wrapper
+
+
+def timed_order(order_type, registry=metrics):
+    """
+    Decorator recording latency of an order method
+
+    A call counts as an error when it raises or returns None/False, which is
+    how the order classes report failures.
+    """
+    histogram = registry.histogram('order', order_type)
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    histogram.record(time.perf_counter() - start, error=result is None or result is False)
+            return async_wrapper
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                histogram.record(time.perf_counter() - start, error=result is None or result is False)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = metrics
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of bot.log
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=metrics):
+    """Serve the registry at http://host:port/metrics from a daemon thread"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics-http').start()
+    logging.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,304 @@
+from .metrics import metrics
+from .profiling import trace_span
+from decimal import Decimal
+import json
+import math
+import time
+
+try:
+    import msgspec
+except ImportError:  # Optional: pip install msgspec for the typed fast path
+    msgspec = None
+
+def _decimals(step):
+    """Decimal places of a step/tick size string such as '0.001'"""
+    return max(0, -Decimal(step).normalize().as_tuple().exponent)
+
+
+class Order:
+    """Order response with numbers converted once"""
+    __slots__ = (
+        'order_id', 'client_order_id', 'symbol', 'side', 'type', 'status', 'price', 'avg_price',
+        'orig_qty', 'executed_qty', 'stop_price', 'reduce_only', 'update_time'
+    )
+
+    def __init__(self, order_id, client_order_id, symbol, side, type, status, price, avg_price,
+                 orig_qty, executed_qty, stop_price, reduce_only, update_time):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = type
+        self.status = status
+        self.price = price
+        self.avg_price = avg_price
+        self.orig_qty = orig_qty
+        self.executed_qty = executed_qty
+        self.stop_price = stop_price
+        self.reduce_only = reduce_only
+        self.update_time = update_time
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            d.get('orderId'), d.get('clientOrderId'), d.get('symbol'), d.get('side'), d.get('type'), d.get('status'),
+            float(d.get('price') or 0), float(d.get('avgPrice') or 0), float(d.get('origQty') or 0),
+            float(d.get('executedQty') or 0), float(d.get('stopPrice') or 0), bool(d.get('reduceOnly', False)),
+            d.get('updateTime')
+        )
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Order({self.order_id} {self.symbol} {self.side} {self.type} {self.status} {self.executed_qty}/{self.orig_qty})"
+
+
+class Ticker:
+    """Last price of a symbol"""
+    __slots__ = ('symbol', 'price', 'time')
+
+    def __init__(self, symbol, price, time):
+        self.symbol = symbol
+        self.price = price
+        self.time = time
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['symbol'], float(d['price']), d.get('time'))
+
+
+class SymbolInfo:
+    """Trading rules of one symbol from exchange info"""
+    __slots__ = (
+        'symbol', 'status', 'tick_size', 'step_size', 'min_qty', 'min_notional',
+        'price_decimals', 'quantity_decimals'
+    )
+
+    def __init__(self, symbol, status, tick_size='0.01', step_size='0.001', min_qty='0.001', min_notional='0'):
+        self.symbol = symbol
+        self.status = status
+        self.tick_size = float(tick_size)
+        self.step_size = float(step_size)
+        self.min_qty = float(min_qty)
+        self.min_notional = float(min_notional)
+        self.price_decimals = _decimals(tick_size)
+        self.quantity_decimals = _decimals(step_size)
+
+    @classmethod
+    def from_filters(cls, symbol, status, filters):
+        """
+        Build from (filterType, tickSize, stepSize, minQty, notional) tuples
+
+        The MARKET_LOT_SIZE filter is ignored, LOT_SIZE is the one the order
+        classes size against.
+        """
+        rules = {}
+        for filter_type, tick_size, step_size, min_qty, notional in filters:
+            if filter_type == 'PRICE_FILTER':
+                rules['tick_size'] = tick_size
+            elif filter_type == 'LOT_SIZE':
+                rules['step_size'] = step_size
+                rules['min_qty'] = min_qty
+            elif filter_type == 'MIN_NOTIONAL':
+                rules['min_notional'] = notional
+        return cls(symbol, status, **rules)
+
+    @property
+    def trading(self):
+        return self.status == 'TRADING'
+
+    def quantize_price(self, price):
+        """Round a price to the nearest tick"""
+        return round(round(price / self.tick_size) * self.tick_size, self.price_decimals)
+
+    def quantize_quantity(self, quantity):
+        """Round a quantity down to the step size"""
+        if quantity <= 0:
+            return 0.0
+        return round(math.floor(quantity / self.step_size + 1e-9) * self.step_size, self.quantity_decimals)
+
+
+class ExchangeInfo:
+    """Symbol rules by symbol name"""
+    __slots__ = ('symbols', 'server_time', 'fetched_at')
+
+    def __init__(self, symbols, server_time=None):
+        self.symbols = symbols
+        self.server_time = server_time
+        self.fetched_at = time.time()
+
+    def __contains__(self, symbol):
+        return symbol in self.symbols
+
+    def get(self, symbol):
+        return self.symbols.get(symbol)
+
+    @classmethod
+    def from_dict(cls, d):
+        symbols = {}
+        for s in d['symbols']:
+            filters = [
+                (f['filterType'], f.get('tickSize'), f.get('stepSize'), f.get('minQty'), f.get('notional'))
+                for f in s['filters']
+            ]
+            symbols[s['symbol']] = SymbolInfo.from_filters(s['symbol'], s['status'], filters)
+        return cls(symbols, d.get('serverTime'))
+
+
+class Position:
+    """Open position from the account payload"""
+    __slots__ = ('symbol', 'position_amt', 'entry_price', 'unrealized_profit')
+
+    def __init__(self, symbol, position_amt, entry_price, unrealized_profit):
+        self.symbol = symbol
+        self.position_amt = position_amt
+        self.entry_price = entry_price
+        self.unrealized_profit = unrealized_profit
+
+
+class Account:
+    """
+    Futures account balances and open positions
+
+    The account payload lists every symbol; only positions with a non-zero
+    amount are kept.
+    """
+    __slots__ = ('total_wallet_balance', 'total_margin_balance', 'available_balance', 'total_unrealized_profit', 'positions')
+
+    def __init__(self, total_wallet_balance, total_margin_balance, available_balance, total_unrealized_profit, positions):
+        self.total_wallet_balance = total_wallet_balance
+        self.total_margin_balance = total_margin_balance
+        self.available_balance = available_balance
+        self.total_unrealized_profit = total_unrealized_profit
+        self.positions = positions
+
+    @classmethod
+    def from_dict(cls, d):
+        positions = {}
+        for p in d.get('positions', ()):
+            amount = float(p.get('positionAmt') or 0)
+            if amount:
+                positions[p['symbol']] = Position(p['symbol'], amount, float(p.get('entryPrice') or 0), float(p.get('unrealizedProfit') or 0))
+        return cls(
+            float(d.get('totalWalletBalance') or 0), float(d.get('totalMarginBalance') or 0),
+            float(d.get('availableBalance') or 0), float(d.get('totalUnrealizedProfit') or 0), positions
+        )
+
+
+if msgspec:
+    # Typed views of the payloads: msgspec skips every field not declared here
+    class _RawFilter(msgspec.Struct):
+        filterType: str
+        tickSize: str | None = None
+        stepSize: str | None = None
+        minQty: str | None = None
+        notional: str | None = None
+
+    class _RawSymbol(msgspec.Struct):
+        symbol: str
+        status: str
+        filters: list[_RawFilter] = []
+
+    class _RawExchangeInfo(msgspec.Struct):
+        serverTime: int | None = None
+        symbols: list[_RawSymbol] = []
+
+    class _RawPosition(msgspec.Struct):
+        symbol: str
+        positionAmt: float = 0.0
+        entryPrice: float = 0.0
+        unrealizedProfit: float = 0.0
+
+    class _RawAccount(msgspec.Struct):
+        totalWalletBalance: float = 0.0
+        totalMarginBalance: float = 0.0
+        availableBalance: float = 0.0
+        totalUnrealizedProfit: float = 0.0
+        positions: list[_RawPosition] = []
+
+    # Binance sends numbers as strings, strict=False converts them while decoding
+    _exchange_info_decoder = msgspec.json.Decoder(_RawExchangeInfo)
+    _account_decoder = msgspec.json.Decoder(_RawAccount, strict=False)
+
+
+def decode_exchange_info(payload):
+    """ExchangeInfo from raw JSON bytes or an already decoded dict"""
+    if isinstance(payload, dict):
+        return ExchangeInfo.from_dict(payload)
+    if not msgspec:
+        return ExchangeInfo.from_dict(json.loads(payload))
+    raw = _exchange_info_decoder.decode(payload)
+    symbols = {
+        s.symbol: SymbolInfo.from_filters(
+            s.symbol, s.status,
+            [(f.filterType, f.tickSize, f.stepSize, f.minQty, f.notional) for f in s.filters]
+        )
+        for s in raw.symbols
+    }
+    return ExchangeInfo(symbols, raw.serverTime)
+
+
+def decode_account(payload):
+    """Account from raw JSON bytes or an already decoded dict"""
+    if isinstance(payload, dict):
+        return Account.from_dict(payload)
+    if not msgspec:
+        return Account.from_dict(json.loads(payload))
+    raw = _account_decoder.decode(payload)
+    positions = {
+        p.symbol: Position(p.symbol, p.positionAmt, p.entryPrice, p.unrealizedProfit)
+        for p in raw.positions if p.positionAmt
+    }
+    return Account(raw.totalWalletBalance, raw.totalMarginBalance, raw.availableBalance, raw.totalUnrealizedProfit, positions)
+
+
+def _supports_raw(client):
+    return msgspec is not None and hasattr(client, '_create_futures_api_uri') and hasattr(client, 'session')
+
+
+def fetch_raw(client, path, signed=False, version=1, endpoint=None, **params):
+    """
+    GET a futures endpoint and return the undecoded response body
+
+    Skips python-binance's json decoding of the whole payload so the caller
+    can decode only the fields it needs. Recorded in the exchange metrics
+    under endpoint.
+    """
+    from binance.exceptions import BinanceAPIException
+
+    histogram = metrics.histogram('exchange', endpoint or path)
+    start = time.perf_counter()
+    error = False
+    try:
+        with trace_span(f"client.{endpoint or path}", 'client'):
+            uri = client._create_futures_api_uri(path, version)
+            kwargs = client._get_request_kwargs('get', signed, True, data=dict(params))
+            response = client.session.get(uri, **kwargs)
+            if not (200 <= response.status_code < 300):
+                raise BinanceAPIException(response, response.status_code, response.text)
+            return response.content
+    except Exception:
+        error = True
+        raise
+    finally:
+        histogram.record(time.perf_counter() - start, error)
+
+
+def fetch_exchange_info(client):
+    """Exchange info as an ExchangeInfo, decoded straight from the response bytes when possible"""
+    if _supports_raw(client):
+        return decode_exchange_info(fetch_raw(client, 'exchangeInfo', endpoint='futures_exchange_info'))
+    return ExchangeInfo.from_dict(client.futures_exchange_info())
+
+
+async def fetch_exchange_info_async(client):
+    """Exchange info as an ExchangeInfo from an asyncio client"""
+    return ExchangeInfo.from_dict(await client.futures_exchange_info())
+
+
+def fetch_account(client):
+    """Account balances and open positions as an Account"""
+    if _supports_raw(client):
+        return decode_account(fetch_raw(client, 'account', signed=True, version=2, endpoint='futures_account'))
+    return Account.from_dict(client.futures_account())
@@ -0,0 +1,150 @@
+from .bot import BasicBot, stop_all_workers, raise_panic_flag, wait_for_panic_acks
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+
+class KillSwitch(BasicBot):
+    """
+    Flattens the account as fast as possible
+
+    Stops every strategy worker of this process and, through the panic flag,
+    of every other registered process, cancels all open orders of every
+    symbol concurrently and optionally closes every position with reduce-only
+    market orders at the same time.
+    """
+    def __init__(self):
+        super().__init__()
+        logging.info("KillSwitch initialized for Futures trading")
+
+    def panic(self, close_positions=False, max_workers=32):
+        """
+        Stop all workers, cancel all open orders and optionally close all positions
+
+        Args:
+            close_positions: Also close open positions with reduce-only market orders
+            max_workers: Maximum number of requests in flight at once
+
+        Returns:
+            Report dict with the workers stopped, the processes reached, the
+            cancelled symbols, closed positions, errors, what is still open and
+            the seconds until the account was flat
+        """
+        start = time.perf_counter()
+        report = {
+            'workers_stopped': stop_all_workers(),
+            'processes_reached': 0,
+            'processes_unreached': [],
+            'cancelled': [],
+            'closed': [],
+            'errors': [],
+            'open_orders_left': None,
+            'positions_left': None,
+            'flat': False
+        }
+        # Workers in other processes stop on the flag; their confirmations are
+        # collected alongside the flatten so a hung process cannot delay it
+        acks = None
+        try:
+            flag, pids = raise_panic_flag()
+            ack_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='panic-acks')
+            acks = ack_executor.submit(wait_for_panic_acks, flag, pids)
+            ack_executor.shutdown(wait=False)
+        except Exception as e:
+            logging.error(f"PANIC: error signalling other processes: {e}")
+            report['errors'].append(f"signal: {e}")
+        logging.warning(f"PANIC: stopped {report['workers_stopped']} workers, panic flag raised, flattening the account")
+
+        try:
+            self.widen_connection_pool(max_workers)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                open_orders = executor.submit(self.client.futures_get_open_orders)
+                positions = executor.submit(self._open_positions) if close_positions else None
+                symbols = sorted({order['symbol'] for order in open_orders.result()})
+                positions = positions.result() if positions else []
+        except Exception as e:
+            logging.error(f"PANIC: error fetching open orders and positions: {e}")
+            report['errors'].append(f"snapshot: {e}")
+            report['elapsed_seconds'] = time.perf_counter() - start
+            self._collect_acks(report, acks)
+            return report
+
+        tasks = [('cancelled', self._cancel_all, symbol) for symbol in symbols]
+        tasks += [('closed', self._close_position, position) for position in positions]
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)), thread_name_prefix='panic') as executor:
+                results = list(executor.map(lambda task: task[1](task[2]), tasks))
+            for (outcome, _, _), (ok, detail) in zip(tasks, results):
+                report[outcome if ok else 'errors'].append(detail)
+        report['dispatch_seconds'] = time.perf_counter() - start
+
+        # Confirm with the exchange rather than trusting the responses
+        try:
+            report['open_orders_left'] = len(self.client.futures_get_open_orders())
+            report['positions_left'] = len(self._open_positions()) if close_positions else None
+            report['flat'] = not report['open_orders_left'] and not report['positions_left']
+        except Exception as e:
+            logging.error(f"PANIC: error checking the account after flattening: {e}")
+            report['errors'].append(f"verify: {e}")
+        report['elapsed_seconds'] = time.perf_counter() - start
+        self._collect_acks(report, acks)
+
+        logging.warning(
+            f"PANIC: cancelled orders on {len(report['cancelled'])} symbols, closed {len(report['closed'])} positions, "
+            f"{len(report['errors'])} errors, flat={report['flat']} after {report['elapsed_seconds']:.3f}s"
+        )
+        return report
+
+    @staticmethod
+    def _collect_acks(report, acks):
+        """Add the workers stopped in other processes, and those that did not confirm, to the report"""
+        if acks is None:
+            return
+        try:
+            reached, stopped, unreached = acks.result()
+        except Exception as e:
+            logging.error(f"PANIC: error collecting confirmations from other processes: {e}")
+            report['errors'].append(f"confirm: {e}")
+            return
+        report['workers_stopped'] += stopped
+        report['processes_reached'] = reached
+        report['processes_unreached'] = unreached
+        logging.warning(f"PANIC: {reached} other processes confirmed stopping {stopped} workers")
+        if unreached:
+            logging.error(f"PANIC: processes {unreached} did not confirm their workers stopped")
+
+    def _open_positions(self):
+        """Non-zero positions as (symbol, signed amount string, position side)"""
+        return [
+            (p['symbol'], p['positionAmt'], p.get('positionSide', 'BOTH'))
+            for p in self.client.futures_position_information()
+            if float(p.get('positionAmt') or 0)
+        ]
+
+    def _cancel_all(self, symbol):
+        try:
+            self.client.futures_cancel_all_open_orders(symbol=symbol)
+            logging.info(f"PANIC: cancelled all open orders on {symbol}")
+            return True, symbol
+        except Exception as e:
+            logging.error(f"PANIC: error cancelling open orders on {symbol}: {e}")
+            return False, f"cancel {symbol}: {e}"
+
+    def _close_position(self, position):
+        symbol, amount, position_side = position
+        params = {
+            'symbol': symbol,
+            'side': 'SELL' if float(amount) > 0 else 'BUY',
+            'type': 'MARKET',
+            'quantity': amount.lstrip('-')  # Exchange string keeps the step precision
+        }
+        if position_side == 'BOTH':
+            params['reduceOnly'] = 'true'
+        else:
+            params['positionSide'] = position_side  # Hedge mode rejects reduceOnly
+        try:
+            order = self._create_order(source='PANIC', **params)
+            logging.info(f"PANIC: closing {amount} {symbol} with order {order.get('orderId')}")
+            return True, {'symbol': symbol, 'amount': amount, 'order_id': order.get('orderId')}
+        except Exception as e:
+            logging.error(f"PANIC: error closing {amount} {symbol}: {e}")
+            return False, f"close {symbol}: {e}"
@@ -0,0 +1,243 @@
+from contextlib import contextmanager, nullcontext
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = 'profiles'
+
+_tracer = None  # Active Tracer, None when --trace-timings is off
+
+class Tracer:
+    """
+    Collects wall-clock spans (client calls, validation steps, startup phases)
+
+    Spans are kept as plain tuples and only aggregated when the run is written
+    out, so recording one costs two perf_counter calls and a list append.
+    """
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.spans = []  # (name, category, start_ms, duration_ms, thread, error)
+        self._lock = threading.Lock()
+
+    def record(self, name, category, start, end, error=None):
+        span = (name, category, (start - self.origin) * 1000, (end - start) * 1000, threading.current_thread().name, error)
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name, category):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(name, category, start, time.perf_counter(), error)
+
+    def summary(self):
+        """Count/total/mean/max milliseconds per span name, slowest total first"""
+        totals = {}
+        for name, category, _, duration, _, error in self.spans:
+            entry = totals.setdefault(name, {'name': name, 'category': category, 'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['errors'] += error is not None
+            entry['total_ms'] += duration
+            entry['max_ms'] = max(entry['max_ms'], duration)
+        for entry in totals.values():
+            entry['mean_ms'] = entry['total_ms'] / entry['count']
+        return sorted(totals.values(), key=lambda e: e['total_ms'], reverse=True)
+
+    def to_dict(self):
+        return {
+            'summary': self.summary(),
+            'spans': [
+                {'name': n, 'category': c, 'start_ms': round(s, 3), 'duration_ms': round(d, 3), 'thread': t, 'error': e}
+                for n, c, s, d, t, e in self.spans
+            ]
+        }
+
+
+def get_tracer():
+    """The active Tracer, or None when timings are not being traced"""
+    return _tracer
+
+
+def trace_span(name, category):
+    """Context manager timing a block when tracing is on, a no-op otherwise"""
+    tracer = _tracer
+    return tracer.span(name, category) if tracer else nullcontext()
+
+
+def traced(name, category='validation'):
+    """Decorator timing every call of a function while tracing is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedClient:
+    """
+    Proxy around an exchange client that times every method call
+
+    Spans are named 'client.<method>'. For the Binance client the JSON
+    decoding of responses is timed separately as 'client.decode'.
+    """
+    def __init__(self, client, tracer):
+        self._client = client
+        self._tracer = tracer
+        self._methods = {}
+        handle_response = getattr(client, '_handle_response', None)
+        if handle_response is not None:
+            # Every REST response goes through this static method, shadow it on the instance
+            client._handle_response = self._wrap('client.decode', 'decode', handle_response)
+
+    def _wrap(self, name, category, method):
+        tracer = self._tracer
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name, category):
+                    return await method(*args, **kwargs)
+            return async_wrapper
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, category):
+                return method(*args, **kwargs)
+        return wrapper
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self._client, name)
+            if not callable(attribute) or name.startswith('_'):
+                return attribute
+            method = self._methods[name] = self._wrap(f"client.{name}", 'client', attribute)
+        return method
+
+
+class ProfileSession:
+    """
+    Profiling for one CLI run: cProfile, span tracing and tracemalloc
+
+    Results are written to profiles/<command>_<timestamp>.json when the run
+    stops. With cProfile on, the raw stats are also dumped next to it as .prof
+    for snakeviz or pstats.
+    """
+    def __init__(self, command, profile=False, trace_timings=False, trace_malloc=False, origin=None, output_dir=PROFILE_DIR, top=30):
+        """
+        Args:
+            command: Subcommand being run, used in the output file name
+            profile: Run the command under cProfile
+            trace_timings: Record wall-clock spans of client calls and validation
+            trace_malloc: Record the top allocations with tracemalloc
+            origin: perf_counter value of process start, so startup is included
+            output_dir: Directory the results are written to
+            top: Number of functions/allocations kept in the report
+        """
+        self.command = command
+        self.profile = profile
+        self.trace_timings = trace_timings
+        self.trace_malloc = trace_malloc
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.output_dir = output_dir
+        self.top = top
+        self.tracer = None
+        self._profiler = None
+        self._started = None
+
+    @property
+    def enabled(self):
+        return self.profile or self.trace_timings or self.trace_malloc
+
+    def start(self):
+        global _tracer
+        self._started = time.perf_counter()
+        if self.trace_timings:
+            self.tracer = _tracer = Tracer(self.origin)
+            self.tracer.record('startup', 'startup', self.origin, self._started)
+        if self.trace_malloc:
+            tracemalloc.start(10)
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """Stop collecting and write the report, returns its path"""
+        global _tracer
+        finished = time.perf_counter()
+        if self._profiler:
+            self._profiler.disable()
+        _tracer = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.command}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        report = {
+            'command': self.command,
+            'argv': sys.argv[1:],
+            'started_at': time.time() - (finished - self.origin),
+            'startup_ms': (self._started - self.origin) * 1000,
+            'run_ms': (finished - self._started) * 1000,
+            'total_ms': (finished - self.origin) * 1000
+        }
+        if self.tracer:
+            report['timings'] = self.tracer.to_dict()
+        if self.trace_malloc:
+            report['tracemalloc'] = self._allocations()
+        if self._profiler:
+            self._profiler.dump_stats(base + '.prof')
+            report['profile'] = {'stats_file': base + '.prof', 'top': self._profile_top()}
+
+        with open(base + '.json', 'w') as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Profile written to {base}.json")
+        return base + '.json'
+
+    def _profile_top(self):
+        """Functions sorted by cumulative time"""
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'own_ms': own * 1000,
+                'cumulative_ms': cumulative * 1000
+            })
+        rows.sort(key=lambda r: r['cumulative_ms'], reverse=True)
+        return rows[:self.top]
+
+    def _allocations(self):
+        """Top allocation sites still alive at the end of the run"""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ])
+        return {
+            'current_kb': current / 1024,
+            'peak_kb': peak / 1024,
+            'top': [
+                {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", 'size_kb': stat.size / 1024, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top]
+            ]
+        }
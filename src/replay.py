@@ -0,0 +1,201 @@
+from collections import deque
+from binance.exceptions import BinanceAPIException
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+
+CASSETTE_VERSION = 1
+
+# Request params that differ between runs and are ignored when matching a call
+VOLATILE_PARAMS = ('newClientOrderId', 'origClientOrderId', 'timestamp', 'recvWindow')
+
+class CassetteError(Exception):
+    """Replay could not serve a call from the cassette"""
+
+
+def _normalize(value):
+    """Value as it reads back from the cassette, so live and recorded params compare equal"""
+    return json.loads(json.dumps(value, default=str))
+
+
+class CassetteWriter:
+    """
+    Appends client calls to a cassette file
+
+    A cassette is JSON lines: a header with the command line, then one line
+    per call with the method, params, the response or error, the offset from
+    the start of the recording and the call latency. Lines are flushed as they
+    are written, so a crashed session still leaves a usable cassette.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w')
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._start = time.perf_counter()
+        self._write({'cassette': CASSETTE_VERSION, 'argv': sys.argv, 'recorded_at': time.time()})
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, default=str) + '\n')
+        self._file.flush()
+
+    def record(self, method, args, params, started, elapsed, response=None, error=None):
+        """
+        Append one call
+
+        Args:
+            method: Client method name
+            args: Positional arguments
+            params: Keyword arguments
+            started: perf_counter() when the call was sent
+            elapsed: Call latency in seconds
+            response: Decoded response
+            error: Exception raised by the call
+        """
+        entry = {'method': method, 'args': list(args), 'params': params,
+                 'offset': started - self._start, 'elapsed': elapsed}
+        if error is not None:
+            entry['error'] = {
+                'type': type(error).__name__,
+                'code': getattr(error, 'code', None),
+                'status_code': getattr(error, 'status_code', None),
+                'message': getattr(error, 'message', None) or str(error)
+            }
+        else:
+            entry['response'] = response
+        with self._lock:
+            self._seq += 1
+            entry['seq'] = self._seq
+            self._write(entry)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                logging.info(f"Recorded {self._seq} client calls to {self.path}")
+
+
+class RecordingClient:
+    """
+    Proxy around an exchange client that writes every call to a cassette
+
+    Private attributes and the HTTP session are not exposed, so raw requests
+    (the msgspec fast path in src.models) fall back to the public methods and
+    end up in the cassette too.
+    """
+    def __init__(self, client, writer):
+        self._client = client
+        self._writer = writer
+        self._methods = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'session':
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self._client, name)
+            if not callable(attribute):
+                return attribute
+            method = self._methods[name] = self._wrap(name, attribute)
+        return method
+
+    def _wrap(self, name, method):
+        writer = self._writer
+        @functools.wraps(method)
+        def wrapper(*args, **params):
+            start = time.perf_counter()
+            try:
+                response = method(*args, **params)
+            except Exception as e:
+                writer.record(name, args, params, start, time.perf_counter() - start, error=e)
+                raise
+            writer.record(name, args, params, start, time.perf_counter() - start, response=response)
+            return response
+        return wrapper
+
+
+class ReplayClient:
+    """
+    Serves client calls from a cassette instead of the exchange
+
+    Calls are matched per method in recorded order: the first unused entry
+    whose params are equal (ignoring VOLATILE_PARAMS) wins, otherwise the next
+    entry of that method is used and the divergence is logged. Client order
+    ids in responses are rewritten to the ids sent in this run, so strategies
+    can still attribute their orders.
+
+    One instance is shared by every bot of the run, use it with
+    `set_client_factory(replay.as_client)` from src.bot.
+    """
+    def __init__(self, path, speed=1.0):
+        """
+        Args:
+            path: Cassette written by CassetteWriter
+            speed: Replay speed relative to the recorded latencies, 0 for as fast as possible
+        """
+        self.path = path
+        self.speed = speed
+        self.served = 0
+        self.diverged = 0
+        self._lock = threading.Lock()
+        self._calls = {}  # method -> deque of unused entries
+        with open(path) as f:
+            header = json.loads(f.readline())
+            if header.get('cassette') != CASSETTE_VERSION:
+                raise CassetteError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+            self.argv = header.get('argv')
+            for line in f:
+                entry = json.loads(line)
+                self._calls.setdefault(entry['method'], deque()).append(entry)
+        logging.info(f"Loaded {sum(len(calls) for calls in self._calls.values())} client calls from {path}")
+
+    def as_client(self):
+        """Client factory for set_client_factory"""
+        return self
+
+    def remaining(self):
+        """Number of recorded calls not served yet"""
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'session':
+            raise AttributeError(name)
+        return functools.partial(self._call, name)
+
+    def _call(self, method, *args, **params):
+        entry = self._take(method, args, params)
+        if self.speed:
+            time.sleep(entry['elapsed'] / self.speed)
+        error = entry.get('error')
+        if error is not None:
+            if error['type'] == 'BinanceAPIException':
+                raise BinanceAPIException(None, error['status_code'], json.dumps({'code': error['code'], 'msg': error['message']}))
+            raise CassetteError(f"{error['type']}: {error['message']}")
+
+        response = entry['response']
+        client_order_id = params.get('newClientOrderId') or params.get('origClientOrderId')
+        if client_order_id and isinstance(response, dict) and 'clientOrderId' in response:
+            response['clientOrderId'] = client_order_id
+        return response
+
+    def _take(self, method, args, params):
+        key = _normalize([list(args), {k: v for k, v in params.items() if k not in VOLATILE_PARAMS}])
+        with self._lock:
+            calls = self._calls.get(method)
+            if not calls:
+                raise CassetteError(f"No recorded {method} call left in {self.path}")
+            for i, entry in enumerate(calls):
+                recorded = [entry['args'], {k: v for k, v in entry['params'].items() if k not in VOLATILE_PARAMS}]
+                if recorded == key:
+                    del calls[i]
+                    break
+            else:
+                entry = calls.popleft()
+                self.diverged += 1
+                logging.warning(f"Replay diverged: {method} {params} served with recorded call #{entry['seq']}")
+            self.served += 1
+        return entry
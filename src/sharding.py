@@ -0,0 +1,639 @@
+from .bot import set_client_factory, register_client_wrapper, register_stop_event, stop_all_workers
+from .log_pipeline import start_logging
+from .journal import JournalClient
+from .sim_exchange import SimExchange
+from .streams import get_market_stream
+from .advanced.trailing_stop import TrailingStopOrders
+from .advanced.conditional import ConditionalOrders
+from .advanced.twa import TWAPOrders
+from .advanced.oco import OCOOrders
+from multiprocessing import shared_memory
+import multiprocessing
+import json
+import logging
+import os
+import random
+import struct
+import time
+
+# Ticks kept in each shard ring, a reader further behind than this loses the oldest ones
+RING_SLOTS = 65536
+# Worker and feed processes report at least this often, a silent one is restarted
+HEARTBEAT_TIMEOUT = 10.0
+# A freshly (re)started process gets this long to import and attach before its first heartbeat
+STARTUP_TIMEOUT = 30.0
+MAX_RESTARTS = 5
+POLL_BATCH = 4096
+IDLE_SLEEP = 0.0005
+OCO_RECONCILE_SECONDS = 5.0
+TWAP_CHECK_SECONDS = 1.0
+
+# Strategy spec type -> spec field holding the symbol whose ticks drive it
+STRATEGY_TYPES = {
+    'trailing-stop': 'symbol',
+    'conditional': 'watch_symbol',
+    'twap': 'symbol',
+    'oco': 'symbol'
+}
+
+# Ring layout: a 64-byte header (write sequence, capacity), then fixed slots of
+# a sequence word (-1 while being written) followed by the tick. The sequence
+# words go through an int64 memoryview, whose item assignment is one store;
+# struct.pack_into clears the target first and a reader could see 0 in between.
+_HEADER_SIZE = 64
+_TICK = struct.Struct('16sddddddd')  # symbol, time ms, price, quantity, bid, bid qty, ask, ask qty
+_SLOT_SIZE = 8 + _TICK.size
+_SLOT_WORDS = _SLOT_SIZE // 8
+_HEADER_WORDS = _HEADER_SIZE // 8
+
+
+class TickRing:
+    """
+    Single-writer, many-reader ring of market ticks in shared memory
+
+    Each slot is a fixed 80-byte record. The writer marks a slot as in
+    progress, writes the tick, stamps the slot with the tick's sequence number
+    and then advances the header. Readers decode fields straight out of the
+    shared buffer and keep the tick only if the slot stamp is the sequence
+    they expected both before and after the read, so a slot overwritten under
+    a slow reader is detected and counted as dropped instead of being torn.
+    Nothing is pickled or copied through a pipe.
+    """
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        self.buf = shm.buf
+        self.words = shm.buf.cast('q')
+        self.capacity = self.words[1]
+        self.name = shm.name
+
+    @classmethod
+    def create(cls, capacity=RING_SLOTS):
+        """Allocate a new ring, the creating process unlinks it"""
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + capacity * _SLOT_SIZE)
+        words = shm.buf.cast('q')
+        words[1] = capacity
+        words.release()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Map an existing ring by name"""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def head(self):
+        """Sequence number the next tick will get"""
+        return self.words[0]
+
+    def publish(self, symbol, trade_time=0.0, price=0.0, quantity=0.0, bid=0.0, bid_qty=0.0, ask=0.0, ask_qty=0.0):
+        """
+        Append one tick, only one process may publish into a ring
+
+        Args:
+            symbol: Symbol as bytes, at most 16
+            trade_time: Event time in milliseconds
+            price: Trade price, 0 for a book-only tick
+            quantity: Trade quantity
+            bid, bid_qty, ask, ask_qty: Top of book, 0 for a trade-only tick
+        """
+        words = self.words
+        seq = words[0]
+        slot = _HEADER_WORDS + (seq % self.capacity) * _SLOT_WORDS
+        words[slot] = -1
+        _TICK.pack_into(self.buf, slot * 8 + 8, symbol, trade_time, price, quantity, bid, bid_qty, ask, ask_qty)
+        words[slot] = seq
+        words[0] = seq + 1
+
+    def reader(self):
+        """Reader positioned at the current head, it sees ticks published from now on"""
+        return TickReader(self)
+
+    def close(self):
+        self.words.release()
+        self.words = self.buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class TickReader:
+    """Cursor of one process over a TickRing"""
+    def __init__(self, ring):
+        self.ring = ring
+        self.cursor = ring.head()
+        self.dropped = 0
+        self._symbols = {}  # raw 16-byte name -> str
+
+    def lag(self):
+        """Ticks published but not read yet"""
+        return self.ring.head() - self.cursor
+
+    def poll(self, on_trade=None, on_book=None, limit=POLL_BATCH):
+        """
+        Deliver up to limit new ticks to the callbacks
+
+        Args:
+            on_trade: Called as on_trade(symbol, price, quantity, trade_time) for ticks with a price
+            on_book: Called as on_book(symbol, bid, bid_qty, ask, ask_qty) for ticks with a bid or ask
+
+        Returns:
+            Number of ticks read
+        """
+        buf = self.ring.buf
+        words = self.ring.words
+        capacity = self.ring.capacity
+        head = words[0]
+        if head - self.cursor > capacity:
+            # Lapped by the writer, skip to the oldest tick still in the ring
+            self.dropped += head - capacity - self.cursor
+            self.cursor = head - capacity
+        end = min(head, self.cursor + limit)
+        symbols = self._symbols
+        count = 0
+        for seq in range(self.cursor, end):
+            slot = _HEADER_WORDS + (seq % capacity) * _SLOT_WORDS
+            if words[slot] != seq:
+                self.dropped += 1
+                continue
+            raw, trade_time, price, quantity, bid, bid_qty, ask, ask_qty = _TICK.unpack_from(buf, slot * 8 + 8)
+            if words[slot] != seq:
+                self.dropped += 1  # Overwritten while it was read
+                continue
+            symbol = symbols.get(raw)
+            if symbol is None:
+                symbol = symbols[raw] = raw.rstrip(b'\0').decode()
+            if price and on_trade:
+                on_trade(symbol, price, quantity, int(trade_time))
+            if (bid or ask) and on_book:
+                on_book(symbol, bid, bid_qty, ask, ask_qty)
+            count += 1
+        self.cursor = end
+        return count
+
+
+class FeedPublisher:
+    """
+    Routes market-data callbacks into the ring of the shard that owns the symbol
+
+    publish_trade and publish_book have the MarketStream callback signatures,
+    so they subscribe to the stream directly.
+    """
+    def __init__(self, rings, shard_map):
+        """
+        Args:
+            rings: TickRing per shard
+            shard_map: Shard index by symbol
+        """
+        self._routes = {symbol: (rings[shard], symbol.encode()) for symbol, shard in shard_map.items()}
+        self.published = 0
+
+    def publish_trade(self, symbol, price, quantity, trade_time):
+        route = self._routes.get(symbol)
+        if route:
+            route[0].publish(route[1], trade_time, price, quantity)
+            self.published += 1
+
+    def publish_book(self, symbol, bid, bid_qty, ask, ask_qty):
+        route = self._routes.get(symbol)
+        if route:
+            route[0].publish(route[1], time.time() * 1000, 0.0, 0.0, bid, bid_qty, ask, ask_qty)
+            self.published += 1
+
+
+def assign_shards(strategies, workers):
+    """
+    Spread symbols over shards, heaviest first onto the least loaded shard
+
+    Every strategy of a symbol lands in the same shard, so one process owns
+    all state of a symbol.
+
+    Returns:
+        Shard index by symbol
+    """
+    load = {}
+    for spec in strategies:
+        symbol = spec[STRATEGY_TYPES[spec['type']]].upper()
+        load[symbol] = load.get(symbol, 0) + 1
+    shard_load = [0] * workers
+    shard_map = {}
+    for symbol in sorted(load, key=lambda s: (-load[s], s)):
+        shard = shard_load.index(min(shard_load))
+        shard_map[symbol] = shard
+        shard_load[shard] += load[symbol]
+    return shard_map
+
+
+def load_strategies(path):
+    """
+    Read a JSON list of strategy specs
+
+    A spec is {"type": ..., **arguments}, the arguments are those of the
+    strategy's placement method, e.g.
+    {"type": "trailing-stop", "symbol": "BTCUSDT", "quantity": 0.01, "callback_rate": 1.0}
+
+    Returns:
+        List of specs, None if the file is invalid
+    """
+    try:
+        with open(path) as f:
+            strategies = json.load(f)
+        for i, spec in enumerate(strategies):
+            if spec.get('type') not in STRATEGY_TYPES:
+                logging.error(f"Strategy {i} in {path}: type must be one of {', '.join(STRATEGY_TYPES)}")
+                return None
+            if not spec.get(STRATEGY_TYPES[spec['type']]):
+                logging.error(f"Strategy {i} in {path}: missing '{STRATEGY_TYPES[spec['type']]}'")
+                return None
+        return strategies
+    except Exception as e:
+        logging.error(f"Error loading strategies from {path}: {e}")
+        return None
+
+
+class ShardWorker:
+    """
+    Strategies of one shard, driven by ticks from the shard's ring
+
+    Runs inside a worker process. Trailing stops and conditional orders are
+    evaluated on every trade tick, OCO pairs are reconciled periodically and
+    TWAPs run on their own threads as usual, polled until they end. Strategies
+    that finish are reported to the supervisor, so a restarted worker does not
+    bring them back.
+    """
+    def __init__(self, shard, specs, restarted, events, sim=None):
+        """
+        Args:
+            shard: Shard index
+            specs: (index, spec, state) of the strategies still owned by the shard
+            restarted: True when the shard is replacing a dead worker
+            events: Queue to the supervisor
+            sim: SimExchange the worker trades against, None for the real exchange
+        """
+        self.shard = shard
+        self.events = events
+        self.sim = sim
+        self.book = {}  # symbol -> (bid, bid_qty, ask, ask_qty)
+        self.trailing = self.conditional = self.oco = self.twap = None
+        self._owner = {}  # strategy id -> spec index
+        self._twaps = {}  # twap_id -> spec index of TWAPs still running
+        self._next_reconcile = 0.0
+        self._next_twap_check = 0.0
+
+        for index, spec, state in specs:
+            kind = spec['type']
+            params = {k: v for k, v in spec.items() if k != 'type'}
+            try:
+                if kind == 'trailing-stop':
+                    # Re-armed after a restart with the watermark starting again at the current price
+                    if self.trailing is None:
+                        self.trailing = TrailingStopOrders()
+                        self.trailing.use_stream = False
+                    stop = self.trailing.place_trailing_stop(**params)
+                    if stop:
+                        self._owner[stop['stop_id']] = index
+                elif kind == 'conditional':
+                    if self.conditional is None:
+                        state_file = f"conditional_orders.shard{shard}.json"
+                        if not restarted and os.path.exists(state_file):
+                            os.remove(state_file)
+                        # A restarted shard gets its pending conditions back from the state file
+                        self.conditional = ConditionalOrders(state_file=state_file)
+                    if not restarted:
+                        cond = self.conditional.add_conditional_order(**params)
+                        if cond:
+                            self._owner[cond['cond_id']] = index
+                elif kind == 'twap':
+                    if restarted:
+                        logging.warning(f"Shard {shard}: TWAP {params} was running in the dead worker and is not resumed")
+                        self._finished(index)
+                        continue
+                    if self.twap is None:
+                        self.twap = TWAPOrders()
+                    twap = self.twap.place_twap_order(**params)
+                    if twap:
+                        self._twaps[twap['twap_id']] = index
+                    else:
+                        self._finished(index)
+                elif kind == 'oco':
+                    if self.oco is None:
+                        self.oco = OCOOrders()
+                    if state:
+                        # Placed by the dead worker, keep reconciling its legs
+                        self.oco.active_oco_orders.update(state)
+                        self._owner.update(dict.fromkeys(state, index))
+                    elif not restarted:
+                        result = self.oco.place_oco_order(**params)
+                        if result:
+                            oco_id = result['oco_id']
+                            self._owner[oco_id] = index
+                            self.events.put(('state', index, {oco_id: self.oco.active_oco_orders[oco_id]}))
+            except Exception as e:
+                logging.error(f"Shard {shard}: error starting {kind} strategy {params}: {e}")
+        logging.info(f"Shard {shard} worker running {len(specs)} strategies")
+
+    def _finished(self, index):
+        self.events.put(('done', index))
+
+    def on_trade(self, symbol, price, quantity, trade_time):
+        if self.sim:
+            self.sim.set_price(symbol, price)
+        if self.trailing:
+            for stop_id in self.trailing.on_price(symbol, price):
+                self._finished(self._owner.pop(stop_id))
+        if self.conditional:
+            for cond_id in self.conditional.on_price(symbol, price):
+                if cond_id in self._owner:
+                    self._finished(self._owner.pop(cond_id))
+
+    def on_book(self, symbol, bid, bid_qty, ask, ask_qty):
+        self.book[symbol] = (bid, bid_qty, ask, ask_qty)
+
+    def maintain(self, now):
+        """Periodic work outside the tick path"""
+        if self.oco and self.oco.active_oco_orders and now >= self._next_reconcile:
+            self._next_reconcile = now + OCO_RECONCILE_SECONDS
+            result = self.oco.reconcile_oco_orders()
+            if result:
+                for oco_id in [t['oco_id'] for t in result['triggered'] + result['broken']] + result['closed']:
+                    if oco_id in self._owner:
+                        self._finished(self._owner.pop(oco_id))
+        if self._twaps and now >= self._next_twap_check:
+            self._next_twap_check = now + TWAP_CHECK_SECONDS
+            active = self.twap.get_active_twap_orders()
+            for twap_id in [t for t in self._twaps if t not in active]:
+                self._finished(self._twaps.pop(twap_id))
+
+
+def _worker_main(shard, ring_name, specs, restarted, simulate, prices, stop_event, heartbeats, processed, lags, dropped, events):
+    """Entry point of a shard worker process"""
+    start_logging(f"bot.shard{shard}.log", console=False)
+    ring = TickRing.attach(ring_name)
+    sim = None
+    if simulate:
+        sim = SimExchange(prices=prices)
+        set_client_factory(sim.as_client)
+    else:
+        register_client_wrapper(JournalClient)
+    try:
+        reader = ring.reader()
+        worker = ShardWorker(shard, specs, restarted, events, sim)
+        while not stop_event.is_set():
+            count = reader.poll(worker.on_trade, worker.on_book)
+            now = time.time()
+            heartbeats[shard] = now
+            processed[shard] += count
+            lags[shard] = reader.lag()
+            dropped[shard] = reader.dropped
+            worker.maintain(now)
+            if not count:
+                time.sleep(IDLE_SLEEP)
+    except Exception as e:
+        logging.error(f"Shard {shard} worker failed: {e}", exc_info=True)
+    finally:
+        stop_all_workers()
+        reader = None
+        ring.close()
+
+
+def _synthetic_ticks(publisher, prices, stop_event, heartbeats, slot, rate, seed):
+    """Random-walk trades for every symbol, rate ticks per second (0 for as fast as possible)"""
+    rng = random.Random(seed)
+    symbols = list(prices)
+    levels = [prices[s] for s in symbols]
+    start = time.perf_counter()
+    sent = 0
+    while not stop_event.is_set():
+        for _ in range(256):
+            i = rng.randrange(len(symbols))
+            levels[i] *= 1 + rng.gauss(0, 0.0004)
+            publisher.publish_trade(symbols[i], levels[i], rng.random(), time.time() * 1000)
+        sent += 256
+        heartbeats[slot] = time.time()
+        if rate:
+            delay = sent / rate - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def _feed_main(ring_names, shard_map, source, prices, rate, seed, stop_event, heartbeats, slot):
+    """Entry point of the feed process"""
+    start_logging("bot.feed.log", console=False)
+    rings = [TickRing.attach(name) for name in ring_names]
+    publisher = FeedPublisher(rings, shard_map)
+    try:
+        if source == 'synthetic':
+            _synthetic_ticks(publisher, {s: prices.get(s, 100.0) for s in shard_map}, stop_event, heartbeats, slot, rate, seed)
+        else:
+            stream = get_market_stream()
+            for symbol in shard_map:
+                stream.on_trade(symbol, publisher.publish_trade)
+                stream.on_book(symbol, publisher.publish_book)
+            while not stop_event.wait(1.0):
+                heartbeats[slot] = time.time()
+            stream.stop()
+    except Exception as e:
+        logging.error(f"Feed process failed: {e}", exc_info=True)
+    finally:
+        publisher = None
+        for ring in rings:
+            ring.close()
+    logging.info("Feed process stopped")
+
+
+class ShardSupervisor:
+    """
+    Runs strategies in worker processes sharded by symbol
+
+    One feed process publishes the market data of all symbols into a
+    shared-memory TickRing per shard and every worker owns the strategies of
+    its symbols, so trigger evaluation runs in parallel instead of sharing one
+    GIL. Workers and the feed heartbeat through shared memory; the supervisor
+    restarts any that died or went silent, up to max_restarts per process.
+    """
+    def __init__(self, strategies, workers=None, feed='market', prices=None, simulate=False,
+                 feed_rate=0, heartbeat_timeout=HEARTBEAT_TIMEOUT, max_restarts=MAX_RESTARTS,
+                 ring_slots=RING_SLOTS, seed=0):
+        """
+        Args:
+            strategies: Strategy specs, see load_strategies
+            workers: Worker processes (default: one per CPU, at most one per symbol)
+            feed: 'market' for the Binance stream, 'synthetic' for random-walk ticks
+            prices: Starting prices by symbol for the synthetic feed and the simulated exchange
+            simulate: Trade against a SimExchange in every worker instead of Binance
+            feed_rate: Synthetic ticks per second, 0 for as fast as possible
+            heartbeat_timeout: Seconds of silence before a process is restarted
+            max_restarts: Restarts per process before it is given up
+            ring_slots: Ticks kept in each shard ring
+            seed: Random seed of the synthetic feed
+        """
+        self.strategies = strategies
+        symbols = {spec[STRATEGY_TYPES[spec['type']]].upper() for spec in strategies}
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(symbols)))
+        self.shard_map = assign_shards(strategies, self.workers)
+        self.feed = feed
+        self.prices = prices or {}
+        self.simulate = simulate
+        self.feed_rate = feed_rate
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_restarts = max_restarts
+        self.ring_slots = ring_slots
+        self.seed = seed
+        self.done = set()  # indexes of finished strategies
+        self.state = {}  # index -> strategy state to hand to a restarted worker
+        self._ctx = multiprocessing.get_context('spawn')
+        self._stop = register_stop_event(self._ctx.Event())
+        self._events = self._ctx.Queue()
+        slots = self.workers + 1  # the feed heartbeats in the last slot
+        self.heartbeats = self._ctx.Array('d', slots, lock=False)
+        self.processed = self._ctx.Array('q', self.workers, lock=False)
+        self.lags = self._ctx.Array('q', self.workers, lock=False)
+        self.dropped = self._ctx.Array('q', self.workers, lock=False)
+        self.rings = []
+        self._processes = [None] * slots
+        self._started = [0.0] * slots
+        self.restarts = [0] * slots
+        self.failed = [False] * slots
+
+    def start(self):
+        """Create the rings and start the workers and the feed"""
+        self.rings = [TickRing.create(self.ring_slots) for _ in range(self.workers)]
+        for shard in range(self.workers):
+            self._start_worker(shard, restarted=False)
+        # Workers attach to their rings before the first tick is worth reading
+        self._start_feed()
+        logging.info(f"Supervisor started {self.workers} shards for {len(self.shard_map)} symbols, feed: {self.feed}")
+        return self
+
+    def _shard_specs(self, shard):
+        return [
+            (index, spec, self.state.get(index))
+            for index, spec in enumerate(self.strategies)
+            if index not in self.done and self.shard_map[spec[STRATEGY_TYPES[spec['type']]].upper()] == shard
+        ]
+
+    def _start_worker(self, shard, restarted):
+        process = self._ctx.Process(
+            target=_worker_main, name=f"shard-{shard}", daemon=True,
+            args=(shard, self.rings[shard].name, self._shard_specs(shard), restarted, self.simulate, self.prices,
+                  self._stop, self.heartbeats, self.processed, self.lags, self.dropped, self._events)
+        )
+        self._started[shard] = time.time()
+        process.start()
+        self._processes[shard] = process
+
+    def _start_feed(self):
+        slot = self.workers
+        process = self._ctx.Process(
+            target=_feed_main, name='feed', daemon=True,
+            args=([ring.name for ring in self.rings], self.shard_map, self.feed, self.prices, self.feed_rate,
+                  self.seed, self._stop, self.heartbeats, slot)
+        )
+        self._started[slot] = time.time()
+        process.start()
+        self._processes[slot] = process
+
+    def _drain_events(self):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except Exception:
+                return
+            if event[0] == 'done':
+                self.done.add(event[1])
+                self.state.pop(event[1], None)
+            elif event[0] == 'state':
+                self.state.setdefault(event[1], {}).update(event[2])
+
+    def check(self):
+        """
+        Restart dead or silent processes
+
+        Returns:
+            Health row per shard plus one for the feed
+        """
+        self._drain_events()
+        now = time.time()
+        rows = []
+        for slot, process in enumerate(self._processes):
+            name = 'feed' if slot == self.workers else f"shard-{slot}"
+            beat = self.heartbeats[slot]
+            age = now - beat if beat >= self._started[slot] else None
+            if self.failed[slot]:
+                status = 'FAILED'
+            elif not process.is_alive():
+                status = 'STOPPED' if self._stop.is_set() else 'DEAD'
+            elif age is None:
+                status = 'STALE' if now - self._started[slot] > STARTUP_TIMEOUT else 'STARTING'
+            else:
+                status = 'STALE' if age > self.heartbeat_timeout else 'OK'
+
+            if status in ('DEAD', 'STALE') and not self._stop.is_set():
+                if self.restarts[slot] >= self.max_restarts:
+                    logging.error(f"Supervisor: {name} {status.lower()} after {self.restarts[slot]} restarts, giving up")
+                    self.failed[slot] = True
+                    status = 'FAILED'
+                else:
+                    logging.warning(f"Supervisor: {name} is {status.lower()} (exit code {process.exitcode}), restarting")
+                    if process.is_alive():
+                        process.terminate()
+                    process.join(timeout=5)
+                    self.restarts[slot] += 1
+                    if slot == self.workers:
+                        self._start_feed()
+                    else:
+                        self._drain_events()
+                        self._start_worker(slot, restarted=True)
+                    status = 'RESTARTED'
+
+            row = {'name': name, 'pid': self._processes[slot].pid, 'status': status,
+                   'restarts': self.restarts[slot], 'heartbeat_age': age}
+            if slot < self.workers:
+                row.update(symbols=sorted(s for s, shard in self.shard_map.items() if shard == slot),
+                           ticks=self.processed[slot], lag=self.lags[slot], dropped=self.dropped[slot])
+            rows.append(row)
+        return rows
+
+    def run(self, duration=None, report_interval=5.0, on_report=None):
+        """
+        Start, then supervise until duration elapses or the supervisor is stopped
+
+        Args:
+            duration: Seconds to run, None until stopped
+            report_interval: Seconds between health checks
+            on_report: Called with the health rows after every check
+        """
+        self.start()
+        deadline = time.time() + duration if duration else None
+        try:
+            while not self._stop.is_set():
+                wait = report_interval if deadline is None else min(report_interval, deadline - time.time())
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                rows = self.check()
+                if on_report:
+                    on_report(rows)
+                if deadline and time.time() >= deadline:
+                    break
+        finally:
+            self.stop()
+
+    def stop(self, timeout=10.0):
+        """Stop all processes and release the rings"""
+        self._stop.set()
+        deadline = time.time() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            # Keep draining, a worker with unsent events cannot exit
+            while process.is_alive() and time.time() < deadline:
+                self._drain_events()
+                process.join(0.1)
+            if process.is_alive():
+                logging.warning(f"Supervisor: {process.name} did not stop, terminating")
+                process.terminate()
+                process.join()
+        self._drain_events()
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        logging.info(f"Supervisor stopped, {sum(self.processed)} ticks processed, {len(self.done)}/{len(self.strategies)} strategies finished")
@@ -0,0 +1,380 @@
+from .events import order_events, publish_user_data_event
+import asyncio
+import contextvars
+import functools
+import itertools
+import logging
+import queue
+import random
+import threading
+import time
+
+# Set while AsyncSimExchange runs a method whose latency it already awaited
+_latency_awaited = contextvars.ContextVar('sim_latency_awaited', default=False)
+
+class SimExchangeError(Exception):
+    """Error returned by the stand-in exchange, mirrors a Binance API error"""
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+class SimExchange:
+    """
+    Local stand-in for the Binance futures REST API and user-data stream
+
+    Implements the client methods the order classes use, with optional
+    log-normal request latency. Order updates are delivered as
+    ORDER_TRADE_UPDATE messages on a separate thread, like the real user-data
+    websocket, and published into the order event bus by default.
+
+    Use it in place of the Binance client with
+    `set_client_factory(sim.as_client)` from src.bot.
+    """
+    def __init__(self, prices=None, latency_ms=None, stream_latency_ms=None, seed=0, publish_to_bus=True, step_size=0.001, tick_size=0.1):
+        """
+        Args:
+            prices: Initial prices by symbol (default: BTCUSDT and ETHUSDT)
+            latency_ms: (median, sigma) of the log-normal REST latency, None for no delay
+            stream_latency_ms: (median, sigma) of the user-data event delay, None for no delay
+            seed: Random seed so runs are reproducible
+            publish_to_bus: Publish order updates into the order event bus
+            step_size: LOT_SIZE step reported in exchange info
+            tick_size: PRICE_FILTER tick reported in exchange info
+        """
+        self.prices = dict(prices or {'BTCUSDT': 30000.0, 'ETHUSDT': 2000.0})
+        self.latency_ms = latency_ms
+        self.stream_latency_ms = stream_latency_ms
+        self.step_size = step_size
+        self.tick_size = tick_size
+        self.orders = {}  # orderId -> order dict
+        self.positions = {}  # symbol -> signed position amount
+        self.user_callbacks = []
+        self.request_count = 0
+        self.countdown_cancels = 0  # Symbols whose auto-cancel countdown fired
+        self._countdowns = {}  # symbol -> running auto-cancel timer
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._events = queue.Queue()
+        if publish_to_bus:
+            self.user_callbacks.append(lambda msg: publish_user_data_event(msg, order_events))
+        self._dispatcher = threading.Thread(target=self._dispatch_events, daemon=True, name='sim-user-stream')
+        self._dispatcher.start()
+
+    def as_client(self):
+        """Client factory for set_client_factory, every bot shares this exchange"""
+        return self
+
+    def _delay(self, latency):
+        if latency:
+            median, sigma = latency
+            return median / 1000 * self._rng.lognormvariate(0, sigma)
+        return 0
+
+    def _request(self):
+        with self._lock:
+            self.request_count += 1
+            if _latency_awaited.get():
+                return
+            delay = self._delay(self.latency_ms)
+        if delay:
+            time.sleep(delay)
+
+    def _dispatch_events(self):
+        while True:
+            due, msg = self._events.get()
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            for callback in list(self.user_callbacks):
+                try:
+                    callback(msg)
+                except Exception as e:
+                    logging.error(f"Stand-in exchange user callback failed: {e}")
+
+    def _emit(self, order, execution_type, last_qty=0.0, last_price=0.0):
+        """Queue an ORDER_TRADE_UPDATE message for the user-data stream"""
+        msg = {
+            'e': 'ORDER_TRADE_UPDATE',
+            'E': int(time.time() * 1000),
+            'o': {
+                's': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+                'q': order['origQty'], 'p': order['price'], 'ap': order['avgPrice'], 'sp': order['stopPrice'],
+                'x': execution_type, 'X': order['status'], 'i': order['orderId'],
+                'l': str(last_qty), 'z': order['executedQty'], 'L': str(last_price),
+                'T': int(time.time() * 1000), 'R': order['reduceOnly']
+            }
+        }
+        with self._lock:
+            delay = self._delay(self.stream_latency_ms)
+        self._events.put((time.perf_counter() + delay, msg))
+
+    def _find(self, orderId=None, origClientOrderId=None):
+        if orderId is not None:
+            order = self.orders.get(int(orderId))
+        else:
+            order = next((o for o in self.orders.values() if o['clientOrderId'] == origClientOrderId), None)
+        if order is None:
+            raise SimExchangeError(-2013, "Order does not exist.")
+        return order
+
+    def _execute(self, order, quantity, price):
+        """Fill quantity of an order at price and update the position"""
+        executed = float(order['executedQty'])
+        quantity = min(quantity, float(order['origQty']) - executed)
+        if quantity <= 0:
+            return
+        notional = float(order['avgPrice']) * executed + price * quantity
+        executed += quantity
+        order['executedQty'] = f"{executed:.8f}".rstrip('0').rstrip('.')
+        order['avgPrice'] = f"{notional / executed:.8f}"
+        order['status'] = 'FILLED' if executed >= float(order['origQty']) - 1e-12 else 'PARTIALLY_FILLED'
+        order['updateTime'] = int(time.time() * 1000)
+        sign = 1 if order['side'] == 'BUY' else -1
+        self.positions[order['symbol']] = self.positions.get(order['symbol'], 0.0) + sign * quantity
+        self._emit(order, 'TRADE', quantity, price)
+
+    # --- Simulation controls ---
+
+    def fill(self, order_id, quantity=None, price=None):
+        """Fill (part of) a resting order, returns the order"""
+        with self._lock:
+            order = self._find(order_id)
+            if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                return order
+            remaining = float(order['origQty']) - float(order['executedQty'])
+            fill_price = price or float(order['price']) or self.prices[order['symbol']]
+            self._execute(order, remaining if quantity is None else quantity, fill_price)
+            return dict(order)
+
+    def set_price(self, symbol, price):
+        """Move the price of a symbol, filling crossed limit orders and triggering stops"""
+        with self._lock:
+            self.prices[symbol] = price
+            for order in list(self.orders.values()):
+                if order['symbol'] != symbol or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                    continue
+                buy = order['side'] == 'BUY'
+                if order['type'] == 'LIMIT':
+                    limit = float(order['price'])
+                    if (buy and price <= limit) or (not buy and price >= limit):
+                        self._execute(order, float(order['origQty']), limit)
+                elif order['type'] in ('STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET'):
+                    stop = float(order['stopPrice'])
+                    rising_trigger = (order['type'].startswith('STOP') and buy) or (order['type'].startswith('TAKE_PROFIT') and not buy)
+                    if (rising_trigger and price >= stop) or (not rising_trigger and price <= stop):
+                        self._execute(order, float(order['origQty']), stop)
+
+    def open_orders(self):
+        with self._lock:
+            return [o for o in self.orders.values() if o['status'] in ('NEW', 'PARTIALLY_FILLED')]
+
+    # --- Client API ---
+
+    def futures_exchange_info(self, **params):
+        self._request()
+        filters = [
+            {'filterType': 'PRICE_FILTER', 'tickSize': str(self.tick_size), 'minPrice': str(self.tick_size), 'maxPrice': '1000000'},
+            {'filterType': 'LOT_SIZE', 'stepSize': str(self.step_size), 'minQty': str(self.step_size), 'maxQty': '1000'},
+            {'filterType': 'MARKET_LOT_SIZE', 'stepSize': str(self.step_size), 'minQty': str(self.step_size), 'maxQty': '1000'},
+            {'filterType': 'MIN_NOTIONAL', 'notional': '5'}
+        ]
+        return {'symbols': [
+            {'symbol': symbol, 'status': 'TRADING', 'pricePrecision': 2, 'quantityPrecision': 3, 'filters': filters}
+            for symbol in self.prices
+        ]}
+
+    def futures_symbol_ticker(self, symbol=None, **params):
+        self._request()
+        if symbol:
+            return {'symbol': symbol, 'price': str(self.prices[symbol]), 'time': int(time.time() * 1000)}
+        return [{'symbol': s, 'price': str(p), 'time': int(time.time() * 1000)} for s, p in self.prices.items()]
+
+    def futures_orderbook_ticker(self, symbol=None, **params):
+        self._request()
+        def book(s, p):
+            # One tick either side of the last price
+            bid, ask = round(p - self.tick_size, 8), round(p + self.tick_size, 8)
+            return {'symbol': s, 'bidPrice': str(bid), 'bidQty': '1', 'askPrice': str(ask), 'askQty': '1', 'time': int(time.time() * 1000)}
+        if symbol:
+            return book(symbol, self.prices[symbol])
+        return [book(s, p) for s, p in self.prices.items()]
+
+    def futures_create_order(self, **params):
+        self._request()
+        with self._lock:
+            symbol = params['symbol']
+            if symbol not in self.prices:
+                raise SimExchangeError(-1121, "Invalid symbol.")
+            order_id = next(self._ids)
+            order = {
+                'orderId': order_id,
+                'symbol': symbol,
+                'status': 'NEW',
+                'clientOrderId': params.get('newClientOrderId') or f"sim-{order_id}",
+                'price': str(params.get('price', '0')),
+                'avgPrice': '0.00',
+                'origQty': str(params['quantity']),
+                'executedQty': '0',
+                'cumQuote': '0',
+                'timeInForce': params.get('timeInForce', 'GTC'),
+                'type': params['type'],
+                'reduceOnly': str(params.get('reduceOnly', False)).lower() == 'true',
+                'side': params['side'],
+                'stopPrice': str(params.get('stopPrice', '0')),
+                'updateTime': int(time.time() * 1000)
+            }
+            self.orders[order_id] = order
+            self._emit(order, 'NEW')
+            if order['type'] == 'MARKET':
+                self._execute(order, float(order['origQty']), self.prices[symbol])
+            return dict(order)
+
+    def futures_get_order(self, symbol=None, orderId=None, origClientOrderId=None, **params):
+        self._request()
+        with self._lock:
+            return dict(self._find(orderId, origClientOrderId))
+
+    def futures_get_open_orders(self, symbol=None, **params):
+        self._request()
+        return [dict(o) for o in self.open_orders() if symbol is None or o['symbol'] == symbol]
+
+    def futures_cancel_order(self, symbol=None, orderId=None, origClientOrderId=None, **params):
+        self._request()
+        with self._lock:
+            order = self._find(orderId, origClientOrderId)
+            if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                raise SimExchangeError(-2011, "Unknown order sent.")
+            order['status'] = 'CANCELED'
+            self._emit(order, 'CANCELED')
+            return dict(order)
+
+    def futures_cancel_orders(self, symbol=None, orderidlist=None, **params):
+        self._request()
+        results = []
+        with self._lock:
+            for order_id in orderidlist or []:
+                order = self.orders.get(int(order_id))
+                if order is None or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                    results.append({'code': -2011, 'msg': 'Unknown order sent.'})
+                    continue
+                order['status'] = 'CANCELED'
+                self._emit(order, 'CANCELED')
+                results.append(dict(order))
+        return results
+
+    def futures_cancel_all_open_orders(self, symbol=None, **params):
+        self._request()
+        with self._lock:
+            for order in self.open_orders():
+                if order['symbol'] == symbol:
+                    order['status'] = 'CANCELED'
+                    self._emit(order, 'CANCELED')
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def futures_modify_order(self, symbol=None, orderId=None, side=None, quantity=None, price=None, **params):
+        self._request()
+        with self._lock:
+            order = self._find(orderId, params.get('origClientOrderId'))
+            if order['status'] not in ('NEW', 'PARTIALLY_FILLED') or order['type'] != 'LIMIT':
+                raise SimExchangeError(-2013, "Order does not exist.")
+            order['price'] = str(price)
+            order['origQty'] = str(quantity)
+            order['updateTime'] = int(time.time() * 1000)
+            self._emit(order, 'AMENDMENT')
+            return dict(order)
+
+    def futures_position_information(self, symbol=None, **params):
+        self._request()
+        return [
+            {'symbol': s, 'positionAmt': str(amount), 'markPrice': str(self.prices[s]), 'entryPrice': str(self.prices[s])}
+            for s, amount in self.positions.items() if symbol is None or s == symbol
+        ]
+
+    def futures_account(self, **params):
+        self._request()
+        return {'totalWalletBalance': '100000', 'totalMarginBalance': '100000', 'availableBalance': '100000', 'assets': [], 'positions': []}
+
+    def futures_countdown_cancel_all(self, symbol=None, countdownTime=0, **params):
+        self._request()
+        with self._lock:
+            timer = self._countdowns.pop(symbol, None)
+            if timer is not None:
+                timer.cancel()
+            if int(countdownTime) > 0:
+                timer = threading.Timer(int(countdownTime) / 1000, self._expire_countdown)
+                timer.args = (symbol, timer)
+                timer.daemon = True
+                self._countdowns[symbol] = timer
+                timer.start()
+        return {'symbol': symbol, 'countdownTime': str(countdownTime)}
+
+    def _expire_countdown(self, symbol, timer):
+        """Cancel all open orders of symbol once its countdown ran out unrefreshed"""
+        with self._lock:
+            if self._countdowns.get(symbol) is not timer:
+                return
+            del self._countdowns[symbol]
+            self.countdown_cancels += 1
+            for order in self.open_orders():
+                if order['symbol'] == symbol:
+                    order['status'] = 'CANCELED'
+                    self._emit(order, 'CANCELED')
+        logging.info(f"Stand-in exchange auto-cancel countdown fired on {symbol}")
+
+
+class AsyncSimExchange:
+    """
+    Asyncio view of a SimExchange, for the async order classes
+
+    Every futures_* method is a coroutine that awaits the simulated request
+    latency without blocking the event loop and then runs the SimExchange
+    method. Orders, prices and the user-data stream are the wrapped
+    exchange's, so sync and async bots can trade against the same book.
+
+    Use it with `set_async_client_factory(AsyncSimExchange(sim).as_client)`
+    from src.async_bot.
+    """
+    def __init__(self, sim):
+        self.sim = sim
+        self.in_flight = 0
+        self.peak_in_flight = 0  # Most requests awaiting their latency at once
+        self._methods = {}
+
+    def as_client(self):
+        """Client factory for set_async_client_factory, every bot shares this exchange"""
+        return self
+
+    async def close_connection(self):
+        pass
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self.sim, name)
+            if not name.startswith('futures_') or not callable(attribute):
+                return attribute
+            method = self._methods[name] = self._wrap(attribute)
+        return method
+
+    def _wrap(self, method):
+        sim = self.sim
+        @functools.wraps(method)
+        async def call(*args, **params):
+            with sim._lock:
+                delay = sim._delay(sim.latency_ms)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                if delay:
+                    await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+            token = _latency_awaited.set(True)
+            try:
+                return method(*args, **params)
+            finally:
+                _latency_awaited.reset(token)
+        return call
@@ -0,0 +1,178 @@
+from binance import Client
+from .sim_exchange import AsyncSimExchange, SimExchangeError
+from aiohttp import web
+from urllib.parse import unquote, urlencode
+import aiohttp
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import threading
+
+# (HTTP method, path under /fapi) -> SimExchange method
+REST_ROUTES = {
+    ('GET', '/v1/exchangeInfo'): 'futures_exchange_info',
+    ('GET', '/v1/ticker/price'): 'futures_symbol_ticker',
+    ('GET', '/v1/ticker/bookTicker'): 'futures_orderbook_ticker',
+    ('POST', '/v1/order'): 'futures_create_order',
+    ('GET', '/v1/order'): 'futures_get_order',
+    ('DELETE', '/v1/order'): 'futures_cancel_order',
+    ('PUT', '/v1/order'): 'futures_modify_order',
+    ('GET', '/v1/openOrders'): 'futures_get_open_orders',
+    ('DELETE', '/v1/batchOrders'): 'futures_cancel_orders',
+    ('DELETE', '/v1/allOpenOrders'): 'futures_cancel_all_open_orders',
+    ('POST', '/v1/countdownCancelAll'): 'futures_countdown_cancel_all',
+    ('GET', '/v3/positionRisk'): 'futures_position_information',
+    ('GET', '/v2/account'): 'futures_account',
+}
+
+# WebSocket API method -> SimExchange method
+WS_ROUTES = {
+    'order.place': 'futures_create_order',
+    'order.cancel': 'futures_cancel_order',
+    'order.status': 'futures_get_order',
+    'order.modify': 'futures_modify_order',
+}
+
+# Authentication fields that are not order parameters
+_AUTH_FIELDS = ('apiKey', 'timestamp', 'recvWindow', 'signature')
+
+class SimExchangeServer:
+    """
+    Local HTTP and WebSocket front end of a SimExchange
+
+    Serves the futures REST endpoints the order classes use under /fapi and
+    the WebSocket API (order.place, order.cancel, order.status, order.modify)
+    under /ws-fapi/v1, so the python-binance REST client and WsOrderGateway
+    can be run and timed against the stand-in over real connections. The
+    simulated latency is awaited, so concurrent requests overlap.
+
+    With api_secret set, request signatures are checked like the exchange does.
+    """
+    def __init__(self, sim, host='127.0.0.1', port=0, api_secret=None):
+        """
+        Args:
+            sim: SimExchange to serve
+            host: Interface to listen on
+            port: Port to listen on, 0 for any free port
+            api_secret: Secret to verify signatures with, None to accept any
+        """
+        self.sim = sim
+        self.host = host
+        self.port = port
+        self.api_secret = api_secret
+        self.requests = 0
+        self._exchange = AsyncSimExchange(sim)
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    @property
+    def rest_url(self):
+        return f"http://{self.host}:{self.port}/fapi"
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.port}/ws-fapi/v1"
+
+    def start(self):
+        """Start serving on a background thread, returns self once listening"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='sim-server')
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        logging.info(f"Sim exchange serving {self.rest_url} and {self.ws_url}")
+        return self
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/ws-fapi/v1', self._handle_ws)
+        app.router.add_route('*', '/fapi/{path:.*}', self._handle_rest)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def rest_client(self, api_key='sim', api_secret='sim'):
+        """python-binance REST client pointed at this server"""
+        client = Client(api_key, api_secret, ping=False)
+        client.FUTURES_URL = self.rest_url
+        return client
+
+    def _verify(self, params, query_string):
+        if self.api_secret is None:
+            return
+        expected = hmac.new(self.api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, str(params.get('signature', ''))):
+            raise SimExchangeError(-1022, "Signature for this request is not valid.")
+
+    @staticmethod
+    def _order_params(params):
+        params = {k: v for k, v in params.items() if k not in _AUTH_FIELDS}
+        for key in ('orderidlist', 'orderIdList'):
+            if key in params:
+                params['orderidlist'] = json.loads(unquote(params.pop(key)))
+        return params
+
+    async def _call(self, name, params):
+        self.requests += 1
+        return await getattr(self._exchange, name)(**self._order_params(params))
+
+    async def _handle_rest(self, request):
+        name = REST_ROUTES.get((request.method, '/' + request.match_info['path']))
+        if name is None:
+            return web.json_response({'code': -1000, 'msg': f"Unsupported endpoint {request.path}"}, status=404)
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        try:
+            if 'signature' in params:
+                # python-binance signs the sorted, unencoded parameters
+                self._verify(params, '&'.join(f"{k}={v}" for k, v in sorted(params.items()) if k != 'signature'))
+            return web.json_response(await self._call(name, params))
+        except SimExchangeError as e:
+            return web.json_response({'code': e.code, 'msg': e.message}, status=400)
+
+    async def _handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        tasks = set()
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            # Requests on one connection are served concurrently, responses go out as they finish
+            task = asyncio.ensure_future(self._serve_ws_request(ws, msg.data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        for task in list(tasks):
+            task.cancel()
+        return ws
+
+    async def _serve_ws_request(self, ws, data):
+        request_id = None
+        try:
+            request = json.loads(data)
+            request_id = request.get('id')
+            name = WS_ROUTES.get(request.get('method'))
+            if name is None:
+                raise SimExchangeError(-1000, f"Unsupported method {request.get('method')}")
+            params = request.get('params') or {}
+            self._verify(params, urlencode(sorted((k, v) for k, v in params.items() if k != 'signature')))
+            response = {'id': request_id, 'status': 200, 'result': await self._call(name, params), 'rateLimits': []}
+        except SimExchangeError as e:
+            response = {'id': request_id, 'status': 400, 'error': {'code': e.code, 'msg': e.message}}
+        except Exception as e:
+            response = {'id': request_id, 'status': 400, 'error': {'code': -1000, 'msg': str(e)}}
+        if not ws.closed:
+            await ws.send_str(json.dumps(response))
@@ -0,0 +1,187 @@
+from binance import ThreadedWebsocketManager
+from .bot import API_KEY, API_SECRET
+from .events import order_events, publish_user_data_event
+import logging
+import threading
+import time
+
+class MarketStream:
+    """
+    Shared futures market-data websocket
+
+    Strategies register per-symbol callbacks for trades (@aggTrade) and top of
+    book (@bookTicker). All subscriptions go through one multiplex socket, so any
+    number of strategies in the process share a single connection.
+    """
+    def __init__(self, testnet=True):
+        self.testnet = testnet
+        self.trade_handlers = {}  # symbol -> [callback(symbol, price, quantity, trade_time)]
+        self.book_handlers = {}  # symbol -> [callback(symbol, bid, bid_qty, ask, ask_qty)]
+        self._twm = None
+        self._socket_name = None
+        self._lock = threading.Lock()
+
+    def on_trade(self, symbol, callback):
+        """Subscribe callback to aggregated trades of a symbol"""
+        with self._lock:
+            handlers = self.trade_handlers.setdefault(symbol.upper(), [])
+            handlers.append(callback)
+            resubscribe = len(handlers) == 1
+        if resubscribe:
+            self._restart_socket()
+
+    def on_book(self, symbol, callback):
+        """Subscribe callback to best bid/ask updates of a symbol"""
+        with self._lock:
+            handlers = self.book_handlers.setdefault(symbol.upper(), [])
+            handlers.append(callback)
+            resubscribe = len(handlers) == 1
+        if resubscribe:
+            self._restart_socket()
+
+    def remove_handler(self, symbol, callback):
+        """Unsubscribe callback from a symbol's trades and book updates"""
+        with self._lock:
+            for handlers in (self.trade_handlers, self.book_handlers):
+                callbacks = handlers.get(symbol.upper(), [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+    def _streams(self):
+        streams = [f"{symbol.lower()}@aggTrade" for symbol, cbs in self.trade_handlers.items() if cbs]
+        streams += [f"{symbol.lower()}@bookTicker" for symbol, cbs in self.book_handlers.items() if cbs]
+        return streams
+
+    def _restart_socket(self):
+        """(Re)open the multiplex socket with the current stream list"""
+        with self._lock:
+            if self._twm is None:
+                self._twm = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET, testnet=self.testnet)
+                self._twm.start()
+            if self._socket_name:
+                self._twm.stop_socket(self._socket_name)
+            streams = self._streams()
+            self._socket_name = self._twm.start_futures_multiplex_socket(callback=self._dispatch, streams=streams)
+            logging.info(f"Market stream subscribed to {len(streams)} streams")
+
+    def _dispatch(self, msg):
+        """Route a multiplex message to the registered callbacks"""
+        try:
+            data = msg.get('data', msg)
+            event = data.get('e')
+            if event == 'aggTrade':
+                symbol = data['s']
+                price = float(data['p'])
+                quantity = float(data['q'])
+                for callback in self.trade_handlers.get(symbol, ()):
+                    callback(symbol, price, quantity, data['T'])
+            elif event == 'bookTicker':
+                symbol = data['s']
+                bid, bid_qty = float(data['b']), float(data['B'])
+                ask, ask_qty = float(data['a']), float(data['A'])
+                for callback in self.book_handlers.get(symbol, ()):
+                    callback(symbol, bid, bid_qty, ask, ask_qty)
+            elif event == 'error':
+                logging.error(f"Market stream error: {data.get('m')}")
+        except Exception as e:
+            logging.error(f"Error dispatching market stream message: {e}")
+
+    def stop(self):
+        """Close the websocket connection"""
+        with self._lock:
+            if self._twm is not None:
+                self._twm.stop()
+                self._twm = None
+                self._socket_name = None
+
+
+class UserDataStream:
+    """
+    Futures user-data websocket publishing order updates into the order event bus
+
+    ORDER_TRADE_UPDATE messages become ACK, FILL, CANCEL and REJECT events, so
+    strategies get fills pushed to them instead of polling order status.
+    """
+    def __init__(self, bus=order_events, testnet=True):
+        self.bus = bus
+        self.testnet = testnet
+        self._twm = None
+
+    def start(self):
+        if self._twm is None:
+            self._twm = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET, testnet=self.testnet)
+            self._twm.start()
+            self._twm.start_futures_user_socket(callback=self._dispatch)
+            logging.info("User data stream started")
+        return self
+
+    def _dispatch(self, msg):
+        try:
+            if msg.get('e') == 'error':
+                logging.error(f"User data stream error: {msg.get('m')}")
+                return
+            publish_user_data_event(msg, self.bus)
+        except Exception as e:
+            logging.error(f"Error publishing user data event: {e}")
+
+    def stop(self):
+        if self._twm is not None:
+            self._twm.stop()
+            self._twm = None
+
+
+_shared_stream = None
+_shared_stream_lock = threading.Lock()
+
+def get_market_stream():
+    """Get the process-wide shared market stream"""
+    global _shared_stream
+    with _shared_stream_lock:
+        if _shared_stream is None:
+            _shared_stream = MarketStream()
+        return _shared_stream
+
+_user_stream = None
+
+def get_user_stream():
+    """Get the process-wide user-data stream, started on first use"""
+    global _user_stream
+    with _shared_stream_lock:
+        if _user_stream is None:
+            _user_stream = UserDataStream().start()
+        return _user_stream
+
+def replay_tick_file(path, callback, speed=None):
+    """
+    Replay a recorded tick file through a trade callback
+
+    The file is CSV with lines `timestamp_ms,symbol,price[,quantity]`; a header
+    line is skipped.
+
+    Args:
+        path: Tick file to replay
+        callback: Called as callback(symbol, price, quantity, timestamp_ms)
+        speed: None to replay as fast as possible, 1.0 for recorded speed, 2.0 for twice as fast
+
+    Returns:
+        int: Number of ticks replayed
+    """
+    count = 0
+    first_ts = None
+    start = time.perf_counter()
+    with open(path) as f:
+        for line in f:
+            fields = line.strip().split(',')
+            if len(fields) < 3 or not fields[0].isdigit():
+                continue
+            ts = int(fields[0])
+            if speed:
+                if first_ts is None:
+                    first_ts = ts
+                delay = (ts - first_ts) / 1000 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            quantity = float(fields[3]) if len(fields) > 3 else 0.0
+            callback(fields[1], float(fields[2]), quantity, ts)
+            count += 1
+    return count
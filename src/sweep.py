@@ -0,0 +1,375 @@
+from .bot import BasicBot
+from .columnar import ColumnTable
+from .advanced.stop_limit import stop_limit_price, STOP_LIMIT_BUFFER
+from .advanced.twa import twap_schedule, limit_chunk_price
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+KLINE_DIR = 'kline_cache'
+KLINE_PAGE = 1500
+KLINE_SCHEMA = {'time': 'i8', 'open': 'f8', 'high': 'f8', 'low': 'f8', 'close': 'f8', 'volume': 'f8'}
+INTERVAL_SECONDS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200, '4h': 14400}
+BATCH_SIZE = 32  # Configurations per pool task
+IMPACT_BPS = 100  # Square-root market impact of trading a whole bar's volume
+
+# Grid parameters of each strategy and their defaults
+PARAMETERS = {
+    'oco': {'take_profit': 1.0, 'stop_loss': 1.0, 'stop_limit_buffer': STOP_LIMIT_BUFFER * 100, 'side': 'sell'},
+    'twap': {'duration': 10, 'chunks': 10, 'order_type': 'market', 'side': 'buy'},
+}
+
+# Result metrics and whether larger or smaller is better
+OBJECTIVES = {
+    'oco': {'mean_bps': 'max', 'sharpe': 'max', 'hit_rate': 'max', 'stop_rate': 'min', 'stuck_rate': 'min',
+            'worst_bps': 'max', 'hold_bars': 'min'},
+    'twap': {'shortfall_bps': 'min', 'shortfall_std': 'min', 'cost_risk': 'min', 'p95_bps': 'min',
+             'impact_bps': 'min', 'fill_rate': 'max'},
+}
+DEFAULT_OBJECTIVES = {'oco': ['sharpe'], 'twap': ['cost_risk']}
+
+
+def kline_path(symbol, interval, directory=KLINE_DIR):
+    return os.path.join(directory, f"{symbol.upper()}_{interval}")
+
+
+class KlineSync(BasicBot):
+    """Fills a kline ColumnTable of one symbol, from the newest cached bar on"""
+    def __init__(self):
+        super().__init__()
+        logging.info("KlineSync initialized for Futures market data")
+
+    def sync(self, symbol, interval='1m', days=30, directory=KLINE_DIR):
+        """
+        Append the closed klines since the newest cached one
+
+        Args:
+            symbol: Trading pair
+            interval: Kline interval, e.g. '1m'
+            days: Days of history fetched when nothing is cached yet
+            directory: Kline cache directory
+
+        Returns:
+            (table path, bars added)
+        """
+        path = kline_path(symbol, interval, directory)
+        table = ColumnTable(path, KLINE_SCHEMA)
+        step_ms = INTERVAL_SECONDS[interval] * 1000
+        now = int(time.time() * 1000)
+        times = table.memmap(['time'])['time']
+        start = int(times[-1]) + step_ms if len(times) else now - int(days * 86400 * 1000)
+        columns = {name: [] for name in KLINE_SCHEMA}
+        while start < now:
+            try:
+                page = self.client.futures_klines(symbol=symbol.upper(), interval=interval, startTime=start, limit=KLINE_PAGE)
+            except Exception as e:
+                # Keep the bars fetched so far, the next sync resumes after them
+                logging.error(f"Error fetching {symbol.upper()} {interval} klines from {start}: {e}")
+                break
+            for k in page:
+                if int(k[6]) >= now:
+                    break  # Still open
+                for name, value in zip(KLINE_SCHEMA, (int(k[0]), k[1], k[2], k[3], k[4], k[5])):
+                    columns[name].append(value)
+            if len(page) < KLINE_PAGE:
+                break
+            start = int(page[-1][0]) + step_ms
+        added = table.append(columns)
+        logging.info(f"Kline sync {symbol.upper()} {interval}: +{added} bars, {len(table)} cached")
+        return path, added
+
+
+def synthetic_klines(path, bars, interval='1m', price=30000.0, volatility=0.001, jump_probability=0.002, seed=0):
+    """
+    Write random-walk klines with occasional gaps into a kline table
+
+    For dry runs without market data. Jumps open the bar away from the
+    previous close, which is what stop-limit buffers are tuned against.
+
+    Returns:
+        Table path
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, volatility, bars)
+    gaps = np.where(rng.random(bars) < jump_probability, rng.normal(0, volatility * 15, bars), 0.0)
+    close = price * np.exp(np.cumsum(returns + gaps))
+    open_ = np.empty(bars)
+    open_[0] = price
+    open_[1:] = close[:-1] * np.exp(gaps[1:])
+    wick = np.abs(rng.normal(0, volatility / 2, (2, bars)))
+    step_ms = INTERVAL_SECONDS[interval] * 1000
+    ColumnTable(path, KLINE_SCHEMA).append({
+        'time': int(time.time() * 1000) - bars * step_ms + np.arange(bars) * step_ms,
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + wick[0]),
+        'low': np.minimum(open_, close) * (1 - wick[1]),
+        'close': close,
+        'volume': rng.lognormal(3, 0.5, bars)
+    })
+    return path
+
+
+def parse_grid(strategy, specs):
+    """
+    Parameter grid from 'name=v1,v2,...' or 'name=start:stop:step' (inclusive) specs
+
+    Parameters not given keep their PARAMETERS default.
+
+    Returns:
+        {name: list of values}
+    """
+    defaults = PARAMETERS[strategy]
+    grid = {name: [value] for name, value in defaults.items()}
+    for spec in specs or ():
+        name, _, values = spec.partition('=')
+        name = name.strip().replace('-', '_')
+        if name not in defaults:
+            raise ValueError(f"Unknown {strategy} parameter {name}, expected one of {sorted(defaults)}")
+        if ':' in values:
+            start, stop, step = (float(v) for v in values.split(':'))
+            grid[name] = [round(float(v), 10) for v in np.arange(start, stop + step / 2, step)]
+        elif isinstance(defaults[name], str):
+            grid[name] = [v.strip().lower() for v in values.split(',')]
+        else:
+            grid[name] = [float(v) for v in values.split(',')]
+    return grid
+
+
+def expand_grid(grid):
+    """Every combination of the grid values as config dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+# --- Worker side: bars are memory maps opened once per process ---
+
+_worker = {}
+
+def _init_worker(path):
+    _worker['bars'] = ColumnTable(path, KLINE_SCHEMA).memmap()
+    _worker['windows'] = {}
+
+def _entries(bar_count, horizon, entry_step):
+    return np.arange(0, bar_count - horizon - 1, entry_step)
+
+def _windows(horizon, entry_step):
+    """Bars after every entry, relative to the entry close, cached per process"""
+    key = (horizon, entry_step)
+    windows = _worker['windows'].get(key)
+    if windows is None:
+        bars = _worker['bars']
+        entries = _entries(len(bars['close']), horizon, entry_step)
+        base = np.asarray(bars['close'][entries])[:, None]
+        windows = {name: sliding_window_view(bars[name], horizon)[entries + 1] / base for name in ('open', 'high', 'low', 'close')}
+        _worker['windows'][key] = windows
+    return windows
+
+def evaluate_oco(config, horizon, entry_step):
+    """
+    OCO exit of a position opened at every entry bar's close
+
+    Take-profit fills at its price when reached. The stop-loss fills at the
+    trigger, or at a worse open; if the open gapped past its limit price
+    (stop_limit_price, as placed by OCOOrders) the limit rests until the
+    price comes back to it, or the position is marked at the horizon. A bar
+    that reaches both levels counts as a stop.
+    """
+    w = _windows(horizon, entry_step)
+    side = config['side'].upper()  # Side of the exit orders, SELL closes a long
+    sign = 1 if side == 'SELL' else -1
+    take_profit = 1 + sign * config['take_profit'] / 100
+    stop = 1 - sign * config['stop_loss'] / 100
+    limit = stop_limit_price(stop, side, config['stop_limit_buffer'] / 100)
+    if side == 'SELL':
+        tp_hits, sl_hits = w['high'] >= take_profit, w['low'] <= stop
+    else:
+        tp_hits, sl_hits = w['low'] <= take_profit, w['high'] >= stop
+    tp_at = np.where(tp_hits.any(axis=1), tp_hits.argmax(axis=1), horizon)
+    sl_at = np.where(sl_hits.any(axis=1), sl_hits.argmax(axis=1), horizon)
+    stopped = (sl_at < horizon) & (sl_at <= tp_at)
+    took_profit = (tp_at < horizon) & ~stopped
+
+    rows = np.arange(len(tp_at))
+    exit_price = w['close'][:, -1].copy()  # Neither leg filled: marked at the horizon
+    exit_price[took_profit] = take_profit
+    trigger_open = w['open'][rows, np.minimum(sl_at, horizon - 1)]
+    gapped = stopped & (sign * (trigger_open - limit) < 0)
+    fills = stopped & ~gapped
+    exit_price[fills] = (np.minimum if side == 'SELL' else np.maximum)(trigger_open, stop)[fills]
+    hold = np.minimum(tp_at, sl_at)
+    stuck = np.zeros(len(rows), dtype=bool)
+    if gapped.any():
+        g = np.flatnonzero(gapped)
+        back = (w['high'][g] >= limit) if side == 'SELL' else (w['low'][g] <= limit)
+        back &= np.arange(horizon) >= sl_at[g, None]
+        recovered = back.any(axis=1)
+        exit_price[g[recovered]] = limit
+        hold[g] = np.where(recovered, back.argmax(axis=1), horizon)
+        stuck[g[~recovered]] = True
+
+    returns = sign * (exit_price - 1) * 10000
+    std = returns.std()
+    return {
+        'trades': len(returns),
+        'mean_bps': float(returns.mean()),
+        'sharpe': float(returns.mean() / std) if std else 0.0,
+        'hit_rate': float(took_profit.mean()),
+        'stop_rate': float(stopped.mean()),
+        'stuck_rate': float(stuck.mean()),
+        'worst_bps': float(returns.min()),
+        'hold_bars': float(hold.mean())
+    }
+
+def evaluate_twap(config, horizon, entry_step, bar_seconds, quantity, impact_bps):
+    """
+    TWAP started at every entry bar's open, chunked like TWAPOrders
+
+    Chunks go out on twap_schedule's interval at the open of the bar they
+    fall in and pay square-root impact on the share of that bar's volume
+    the TWAP trades in it.
+    LIMIT chunks are priced like TWAPOrders prices them (limit_chunk_price)
+    and do not fill when the impact would take them past it; what they
+    leave is bought or sold at market when the schedule ends. Shortfall is
+    the VWAP against the arrival price, positive when worse.
+    """
+    bars = _worker['bars']
+    side = config['side'].upper()
+    sign = 1 if side == 'BUY' else -1
+    num_chunks, chunk_size, interval_seconds = twap_schedule(quantity, config['duration'], int(config['chunks']))
+    offsets = (np.arange(num_chunks) * interval_seconds // bar_seconds).astype(np.int64)
+    opens, volumes = np.asarray(bars['open']), np.asarray(bars['volume'])
+    entries = _entries(len(opens), horizon, entry_step)
+    at = entries[:, None] + offsets
+    # Chunks falling in the same bar share its volume
+    bar_quantity = chunk_size * np.bincount(offsets)[offsets]
+    impact = impact_bps / 10000 * np.sqrt(bar_quantity / np.maximum(volumes[at], 1e-12))
+    fill_price = opens[at] * (1 + sign * impact)
+    filled = np.ones(fill_price.shape, dtype=bool)
+    if config['order_type'] == 'limit':
+        filled = sign * (fill_price - limit_chunk_price(opens[at], side)) <= 0
+    # What the chunks left unfilled is completed at market when the schedule ends
+    end = entries + int(config['duration'] * 60 // bar_seconds)
+    residual = (~filled).sum(axis=1) * chunk_size
+    cleanup_impact = impact_bps / 10000 * np.sqrt(residual / np.maximum(volumes[end], 1e-12))
+    cleanup_price = opens[end] * (1 + sign * cleanup_impact)
+    vwap = ((fill_price * filled).sum(axis=1) * chunk_size + cleanup_price * residual) / quantity
+    shortfall = sign * (vwap / opens[entries] - 1) * 10000
+    paid_impact = ((impact * filled).sum(axis=1) * chunk_size + cleanup_impact * residual) / quantity
+    return {
+        'trades': len(shortfall),
+        'shortfall_bps': float(shortfall.mean()),
+        'shortfall_std': float(shortfall.std()),
+        'cost_risk': float(shortfall.mean() + shortfall.std()),
+        'p95_bps': float(np.percentile(shortfall, 95)),
+        'impact_bps': float(paid_impact.mean() * 10000),
+        'fill_rate': float(filled.mean())
+    }
+
+def _evaluate_batch(task):
+    strategy, configs, settings = task
+    results = []
+    for config in configs:
+        if strategy == 'oco':
+            metrics = evaluate_oco(config, settings['horizon'], settings['entry_step'])
+        else:
+            metrics = evaluate_twap(config, settings['horizon'], settings['entry_step'], settings['bar_seconds'],
+                                    settings['quantity'], settings['impact_bps'])
+        results.append({**config, **metrics})
+    return results
+
+
+# --- Driver ---
+
+def rank_results(results, strategy, objectives=None):
+    """
+    Order results best first by the given objectives
+
+    With several objectives each result is ranked on each one and ordered
+    by its mean rank, so metrics on different scales weigh the same.
+    """
+    objectives = objectives or DEFAULT_OBJECTIVES[strategy]
+    directions = OBJECTIVES[strategy]
+    for objective in objectives:
+        if objective not in directions:
+            raise ValueError(f"Unknown {strategy} objective {objective}, expected one of {sorted(directions)}")
+    if not results:
+        return []
+    ranks = np.zeros(len(results))
+    for objective in objectives:
+        values = np.array([r[objective] for r in results], dtype=float)
+        values = -values if directions[objective] == 'max' else values
+        values[np.isnan(values)] = np.inf
+        ranks += np.argsort(np.argsort(values, kind='stable'), kind='stable')
+    for result, rank in zip(results, ranks / len(objectives)):
+        result['rank_score'] = float(rank)
+    return [results[i] for i in np.argsort(ranks, kind='stable')]
+
+
+def run_sweep(path, strategy, grid, objectives=None, workers=None, interval='1m', horizon=None, entry_step=60,
+              quantity=1.0, impact_bps=IMPACT_BPS):
+    """
+    Evaluate every configuration of the grid over a kline table on a process pool
+
+    Workers are spawned fresh and map the table's column files instead of
+    receiving a copy of the bars; each gets batches of configurations.
+
+    Args:
+        path: Kline table directory
+        strategy: 'oco' or 'twap'
+        grid: {parameter: values}, see parse_grid
+        objectives: Metric names to rank by (default: DEFAULT_OBJECTIVES)
+        workers: Worker processes (default: one per CPU), 1 runs in this process
+        interval: Kline interval of the table
+        horizon: Bars an OCO is followed for (default: one day), TWAPs use their longest duration
+        entry_step: Bars between simulated entries
+        quantity: TWAP total quantity, for the impact model
+        impact_bps: Impact of trading a whole bar's volume, in bps
+
+    Returns:
+        Report dict with the ranked results
+    """
+    if strategy not in PARAMETERS:
+        raise ValueError(f"Unknown strategy {strategy}, expected one of {sorted(PARAMETERS)}")
+    rank_results([], strategy, objectives)  # Reject unknown objectives before the run
+    start = time.perf_counter()
+    bar_seconds = INTERVAL_SECONDS[interval]
+    configs = expand_grid(grid)
+    if strategy == 'twap':
+        horizon = int(max(grid['duration']) * 60 // bar_seconds) + 1
+    else:
+        horizon = horizon or 86400 // bar_seconds
+    bar_count = len(ColumnTable(path, KLINE_SCHEMA))
+    entries = len(_entries(bar_count, horizon, entry_step))
+    if entries <= 0:
+        raise ValueError(f"{bar_count} bars are too few for a {horizon}-bar horizon")
+    settings = {'horizon': horizon, 'entry_step': entry_step, 'bar_seconds': bar_seconds,
+                'quantity': quantity, 'impact_bps': impact_bps}
+    tasks = [(strategy, configs[i:i + BATCH_SIZE], settings) for i in range(0, len(configs), BATCH_SIZE)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    logging.info(f"Sweep {strategy}: {len(configs)} configurations x {entries} entries over {bar_count} bars on {workers} workers")
+
+    if workers <= 1:
+        _init_worker(path)
+        batches = [_evaluate_batch(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(path,)) as pool:
+            batches = list(pool.map(_evaluate_batch, tasks))
+    results = rank_results([r for batch in batches for r in batch], strategy, objectives)
+    return {
+        'strategy': strategy,
+        'objectives': objectives or DEFAULT_OBJECTIVES[strategy],
+        'configs': len(configs),
+        'bars': bar_count,
+        'entries': entries,
+        'horizon': horizon,
+        'workers': workers,
+        'elapsed_seconds': time.perf_counter() - start,
+        'results': results
+    }
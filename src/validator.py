@@ -1,5 +1,18 @@
+from .profiling import traced
+from .models import fetch_exchange_info, fetch_exchange_info_async
+import asyncio
 import logging
+import threading
+import time
 
+# Exchange info is several hundred KB and changes rarely, so it is fetched at most once per TTL
+EXCHANGE_INFO_TTL = 300
+
+_exchange_info = None
+_exchange_info_lock = threading.Lock()
+_exchange_info_task = None  # In-flight async fetch, shared by concurrent callers
+
+@traced('validate.positive_number')
 def validate_positive_number(value, name="value"):
     """
     Validates that a given value is a positive number.
@@ -17,6 +30,7 @@ def validate_positive_number(value, name="value"):
         return False
     return True
 
+@traced('validate.symbol')
 def validate_symbol(client, symbol):
     """
     Validates that the symbol is a valid and tradable futures symbol by checking with the API.
@@ -30,25 +44,109 @@ def validate_symbol(client, symbol):
     """
     try:
         logging.info(f"Validating symbol: {symbol.upper()}")
-        exchange_info = client.futures_exchange_info()
-        valid_symbols = {s['symbol'] for s in exchange_info['symbols']}
+        return _check_symbol(symbol, get_exchange_info(client).get(symbol.upper()))
+    except Exception as e:
+        logging.error(f"An error occurred while validating the symbol {symbol}: {e}", exc_info=True)
+        print("An error occurred while trying to validate the symbol with Binance. Please check your connection and API keys.")
+        return False
 
-        if symbol.upper() not in valid_symbols:
-            logging.error(f"Invalid symbol: {symbol}. It does not exist on Binance Futures.")
-            print(f"Error: The symbol '{symbol}' is not a valid futures symbol.")
-            return False
-        
-        # Additionally, check if the symbol is actively trading
-        for s_info in exchange_info['symbols']:
-            if s_info['symbol'] == symbol.upper():
-                if s_info['status'] != 'TRADING':
-                    logging.error(f"Symbol {symbol} is not currently trading. Its status is {s_info['status']}.")
-                    print(f"Error: The symbol '{symbol}' is not available for trading right now.")
-                    return False
-        
-        logging.info(f"Symbol {symbol} is valid and tradable.")
-        return True
+async def validate_symbol_async(client, symbol):
+    """
+    validate_symbol for asyncio clients, awaits the exchange info instead of blocking the loop
+    
+    Args:
+        client: The asyncio Binance client instance.
+        symbol (str): The symbol to validate (e.g., 'BTCUSDT').
+    """
+    try:
+        logging.info(f"Validating symbol: {symbol.upper()}")
+        return _check_symbol(symbol, (await get_exchange_info_async(client)).get(symbol.upper()))
     except Exception as e:
         logging.error(f"An error occurred while validating the symbol {symbol}: {e}", exc_info=True)
         print("An error occurred while trying to validate the symbol with Binance. Please check your connection and API keys.")
         return False
+
+def _check_symbol(symbol, s_info):
+    """True if s_info (a SymbolInfo or None) is an existing, trading symbol"""
+    if s_info is None:
+        logging.error(f"Invalid symbol: {symbol}. It does not exist on Binance Futures.")
+        print(f"Error: The symbol '{symbol}' is not a valid futures symbol.")
+        return False
+    
+    # Additionally, check if the symbol is actively trading
+    if not s_info.trading:
+        logging.error(f"Symbol {symbol} is not currently trading. Its status is {s_info.status}.")
+        print(f"Error: The symbol '{symbol}' is not available for trading right now.")
+        return False
+    
+    logging.info(f"Symbol {symbol} is valid and tradable.")
+    return True
+
+
+def get_exchange_info(client, max_age=EXCHANGE_INFO_TTL):
+    """
+    Cached exchange info (an ExchangeInfo), refreshed when older than max_age seconds
+    
+    Args:
+        client: The Binance client instance.
+        max_age (float): Maximum age of the cached copy in seconds.
+    """
+    global _exchange_info
+    info = _exchange_info
+    if info is None or time.time() - info.fetched_at > max_age:
+        with _exchange_info_lock:
+            info = _exchange_info
+            if info is None or time.time() - info.fetched_at > max_age:
+                info = _exchange_info = fetch_exchange_info(client)
+    return info
+
+async def get_exchange_info_async(client, max_age=EXCHANGE_INFO_TTL):
+    """
+    get_exchange_info for asyncio clients, shares the cache with the sync path
+    
+    Concurrent callers on a cold cache wait on one fetch instead of each
+    sending their own request.
+    
+    Args:
+        client: The asyncio Binance client instance.
+        max_age (float): Maximum age of the cached copy in seconds.
+    """
+    global _exchange_info, _exchange_info_task
+    info = _exchange_info
+    if info is not None and time.time() - info.fetched_at <= max_age:
+        return info
+    task = _exchange_info_task
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = _exchange_info_task = asyncio.ensure_future(fetch_exchange_info_async(client))
+    try:
+        info = _exchange_info = await asyncio.shield(task)
+    finally:
+        if _exchange_info_task is task and task.done():
+            _exchange_info_task = None
+    return info
+
+async def get_symbol_info_async(client, symbol):
+    """
+    Trading rules (a SymbolInfo) of a symbol for asyncio clients, None if unknown
+    
+    Args:
+        client: The asyncio Binance client instance.
+        symbol (str): The symbol to look up (e.g., 'BTCUSDT').
+    """
+    return (await get_exchange_info_async(client)).get(symbol.upper())
+
+def get_symbol_info(client, symbol):
+    """
+    Trading rules (a SymbolInfo) of a symbol from the cached exchange info, None if unknown
+    
+    Args:
+        client: The Binance client instance.
+        symbol (str): The symbol to look up (e.g., 'BTCUSDT').
+    """
+    return get_exchange_info(client).get(symbol.upper())
+
+def clear_exchange_info_cache():
+    """Drop the cached exchange info, e.g. after switching exchanges."""
+    global _exchange_info, _exchange_info_task
+    _exchange_info = None
+    _exchange_info_task = None
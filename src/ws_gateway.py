@@ -0,0 +1,281 @@
+from .bot import API_KEY, API_SECRET
+from .metrics import metrics
+from urllib.parse import urlencode
+import aiohttp
+import asyncio
+import functools
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import threading
+import time
+
+WS_API_URL = 'wss://testnet.binancefuture.com/ws-fapi/v1'
+REQUEST_TIMEOUT = 10
+CONNECT_TIMEOUT = 10
+RECONNECT_DELAY = 1
+
+# Client method -> WebSocket API method, everything else stays on REST
+WS_METHODS = {
+    'futures_create_order': 'order.place',
+    'futures_cancel_order': 'order.cancel',
+    'futures_get_order': 'order.status',
+    'futures_modify_order': 'order.modify',
+}
+
+_ws_order_seq = itertools.count(1)
+
+class WsApiError(Exception):
+    """Error response of the WebSocket API, the exchange rejected the request"""
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+class WsApiUnavailable(Exception):
+    """The request was not sent, so it is safe to send it over REST"""
+
+class WsApiTimeout(Exception):
+    """The request was sent but no response came back, its outcome is unknown"""
+
+def sign_params(params, api_key, api_secret):
+    """
+    WebSocket API params with apiKey, timestamp and HMAC-SHA256 signature
+
+    The signature covers the url-encoded parameters sorted by name, as the
+    exchange expects.
+    """
+    signed = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        signed[key] = ('true' if value else 'false') if isinstance(value, bool) else str(value)
+    signed['apiKey'] = api_key
+    signed['timestamp'] = int(time.time() * 1000)
+    signed = dict(sorted(signed.items()))
+    signed['signature'] = hmac.new(api_secret.encode(), urlencode(signed).encode(), hashlib.sha256).hexdigest()
+    return signed
+
+class WsOrderGateway:
+    """
+    Order entry over the Binance futures WebSocket API
+
+    Keeps one persistent connection on a background event loop. Requests from
+    any thread are signed, tagged with an id and matched to their response by
+    that id, so many orders can be in flight on the connection at once. The
+    connection is reopened when it drops; while it is down, callers get
+    WsApiUnavailable and WsOrderClient sends the call over REST instead.
+    """
+    def __init__(self, url=WS_API_URL, api_key=None, api_secret=None, timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            url: WebSocket API endpoint
+            api_key: API key (default: from .env)
+            api_secret: API secret used for signing (default: from .env)
+            timeout: Seconds to wait for a response
+        """
+        self.url = url
+        self.api_key = api_key or API_KEY
+        self.api_secret = api_secret or API_SECRET
+        self.timeout = timeout
+        self.sent = 0
+        self.fallbacks = 0
+        self._ids = itertools.count(1)
+        self._pending = {}  # request id -> future, touched on the loop thread only
+        self._counts_lock = threading.Lock()
+        self._connected = threading.Event()
+        self._stopping = False
+        self._ws = None
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def start(self, wait=CONNECT_TIMEOUT):
+        """Open the connection in the background, waiting up to wait seconds for it"""
+        if not self.api_key or not self.api_secret:
+            logging.error("API_KEY or API_SECRET not found. Make sure to set them in your .env file.")
+            raise ValueError("API credentials are not set in the environment variables.")
+        if self._thread is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='ws-api')
+        self._thread.start()
+        self._runner = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+        if not self._connected.wait(wait):
+            logging.warning(f"WebSocket API not connected after {wait}s, orders go over REST until it is")
+        return self
+
+    def stop(self):
+        """Close the connection and stop the background loop"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        ws = self._ws
+        if ws is not None:
+            asyncio.run_coroutine_threadsafe(ws.close(), self._loop)
+        try:
+            self._runner.result(timeout=5)
+        except Exception as e:
+            logging.error(f"Error closing WebSocket API connection: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        logging.info(f"WebSocket API gateway stopped: {self.sent} requests sent, {self.fallbacks} REST fallbacks")
+
+    async def _run(self):
+        async with aiohttp.ClientSession() as session:
+            while not self._stopping:
+                try:
+                    # The server pings every few minutes, aiohttp answers with pongs
+                    async with session.ws_connect(self.url, autoping=True, max_msg_size=0) as ws:
+                        self._ws = ws
+                        self._connected.set()
+                        logging.info(f"WebSocket API connected to {self.url}")
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self._dispatch(msg.data)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except Exception as e:
+                    logging.error(f"WebSocket API connection error: {e}")
+                finally:
+                    self._ws = None
+                    self._connected.clear()
+                    for future in self._pending.values():
+                        if not future.done():
+                            future.set_exception(WsApiTimeout("Connection closed before the response"))
+                    self._pending.clear()
+                if not self._stopping:
+                    logging.warning(f"WebSocket API disconnected, reconnecting in {RECONNECT_DELAY}s")
+                    await asyncio.sleep(RECONNECT_DELAY)
+
+    def _dispatch(self, data):
+        """Resolve the pending request a response belongs to"""
+        try:
+            message = json.loads(data)
+            future = self._pending.pop(message.get('id'), None)
+            if future is None or future.done():
+                return
+            if message.get('status') == 200:
+                future.set_result(message.get('result'))
+            else:
+                error = message.get('error') or {}
+                future.set_exception(WsApiError(error.get('code'), error.get('msg')))
+        except Exception as e:
+            logging.error(f"Error dispatching WebSocket API message: {e}")
+
+    async def _send(self, method, params):
+        ws = self._ws
+        if ws is None or ws.closed:
+            raise WsApiUnavailable("WebSocket API not connected")
+        request_id = str(next(self._ids))
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        try:
+            await ws.send_str(json.dumps({
+                'id': request_id,
+                'method': method,
+                'params': sign_params(params, self.api_key, self.api_secret)
+            }))
+        except Exception as e:
+            self._pending.pop(request_id, None)
+            raise WsApiUnavailable(f"Could not send {method}: {e}")
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(request_id, None)
+            raise WsApiTimeout(f"No response to {method} within {self.timeout}s")
+
+    def request(self, method, params):
+        """
+        Send a WebSocket API request and wait for its result, from any thread
+
+        Args:
+            method: WebSocket API method (e.g. 'order.place')
+            params: Request parameters, without the authentication fields
+
+        Raises:
+            WsApiUnavailable: Not connected, the request was not sent
+            WsApiTimeout: Sent, but no response arrived
+            WsApiError: The exchange rejected the request
+        """
+        if not self.connected:
+            raise WsApiUnavailable("WebSocket API not connected")
+        histogram = metrics.histogram('ws_api', method)
+        start = time.perf_counter()
+        try:
+            result = asyncio.run_coroutine_threadsafe(self._send(method, params), self._loop).result()
+        except Exception:
+            histogram.record(time.perf_counter() - start, error=True)
+            raise
+        histogram.record(time.perf_counter() - start)
+        with self._counts_lock:
+            self.sent += 1
+        return result
+
+    def count_fallback(self):
+        with self._counts_lock:
+            self.fallbacks += 1
+
+    def wrap(self, client):
+        """Client wrapper for register_client_wrapper"""
+        return WsOrderClient(client, self)
+
+class WsOrderClient:
+    """
+    Proxy around a REST client that places, cancels, modifies and queries
+    orders over the WebSocket API
+
+    Same method names, parameters and responses as the REST client, so the
+    order classes use it unchanged. Other calls go to the REST client, and so
+    do order calls the gateway could not send. An order.place that timed out
+    is looked up by its client order id before it is resent over REST; if the
+    first request does land later, the exchange rejects the duplicate id.
+    """
+    def __init__(self, client, gateway):
+        self._client = client
+        self._gateway = gateway
+        self._methods = {}
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            attribute = getattr(self._client, name)
+            if name not in WS_METHODS:
+                return attribute
+            method = self._methods[name] = self._wrap(name, attribute)
+        return method
+
+    def _wrap(self, name, rest_method):
+        ws_method = WS_METHODS[name]
+        gateway = self._gateway
+        client = self._client
+        @functools.wraps(rest_method)
+        def wrapper(**params):
+            if name == 'futures_create_order' and not params.get('newClientOrderId'):
+                # A client order id makes a timed-out place safe to check and resend
+                params['newClientOrderId'] = f"ws-{int(time.time() * 1000)}-{next(_ws_order_seq)}"
+            try:
+                return gateway.request(ws_method, params)
+            except WsApiUnavailable as e:
+                logging.warning(f"{ws_method} over REST: {e}")
+            except WsApiTimeout as e:
+                logging.warning(f"{ws_method} over REST: {e}")
+                if name == 'futures_create_order':
+                    try:
+                        order = client.futures_get_order(symbol=params.get('symbol'), origClientOrderId=params['newClientOrderId'])
+                        logging.info(f"Timed-out order {params['newClientOrderId']} was placed: {order.get('orderId')}")
+                        gateway.count_fallback()
+                        return order
+                    except Exception as lookup_error:
+                        logging.info(f"Timed-out order {params['newClientOrderId']} not found ({lookup_error}), resending over REST")
+            gateway.count_fallback()
+            return rest_method(**params)
+        return wrapper